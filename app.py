@@ -3,27 +3,50 @@
 スマホ対応
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, send_file, session, redirect, url_for, has_request_context
 from flask_session import Session
 import json
 import os
 from datetime import datetime, timedelta
 import threading
+import hashlib
+import hmac
+import time
 import calendar
+import math
 import csv
-from io import StringIO, BytesIO
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+import gzip
+from io import StringIO
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import assets
+import compression
+import staff_index
+import store_meta
+import change_log
+import store_import
+import store_export
+import store_registry
+import store_summary
+import month_summary
+import holiday_calendar
+import warmup
+from rate_limit import TokenBucketLimiter, RATE_LIMIT_DB, RATE_LIMIT_ENABLED
+from store_cache import LRUCache
+from calendar_index import DateIndex, month_keys, parse_date, is_holiday, is_day_before_holiday, get_day_type
+from shift_model import SlotIndex, ShiftRequests, iter_bits, count_coverage
+from store_events import EventBroker, format_sse, STORE_EVENTS_DB
+from store_json import read_json_file, write_json_file, file_signature, file_lock, dumps_compact, dumps_pretty, loads as loads_json, JSON_BACKEND, STORE_JSON_FORMAT
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'shift-tool-secret-key-2026'
 app.config['SESSION_TYPE'] = 'filesystem'
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
 Session(app)
+# 指紋付き静的ファイル（/assets/）とテンプレート関数 asset_url
+assets.init_app(app)
+# JSON・PDF などのレスポンス圧縮（gzip / brotli）
+compression.init_app(app)
 
 # 管理者パスワード（環境変数またはデフォルト値）
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
@@ -41,9 +64,42 @@ else:
 
 os.makedirs(SHIFT_DATA_DIR, exist_ok=True)
 print(f"[INFO] SHIFT_DATA_DIR: {SHIFT_DATA_DIR}")
-
-# スタッフ追加のスレッドセーフなロック
-staff_lock = threading.Lock()
+print(f"[INFO] JSON backend: {JSON_BACKEND}, 保存形式: {STORE_JSON_FORMAT}")
+
+# ログインの総当たり対策（トークンバケット）。RATE_LIMIT_DB 指定時は全ワーカーで共有
+# IP ごと・店舗ごと: 管理者パスワードの失敗で消費（成功したログインは消費しない）
+login_ip_limiter = TokenBucketLimiter(
+    'login_ip',
+    capacity=int(os.getenv('LOGIN_IP_BURST', '100')),
+    refill_per_second=float(os.getenv('LOGIN_IP_PER_MINUTE', '60')) / 60,
+    db_path=RATE_LIMIT_DB,
+    enabled=RATE_LIMIT_ENABLED
+)
+login_store_limiter = TokenBucketLimiter(
+    'login_store',
+    capacity=int(os.getenv('LOGIN_STORE_FAILURE_BURST', '10')),
+    refill_per_second=float(os.getenv('LOGIN_STORE_FAILURES_PER_MINUTE', '5')) / 60,
+    db_path=RATE_LIMIT_DB,
+    enabled=RATE_LIMIT_ENABLED
+)
+# リバースプロキシ（Render など）の段数。X-Forwarded-For の右から数えてクライアント IP を取る
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+
+def get_client_ip():
+    """レート制限に使うクライアント IP（信頼するプロキシが付けた X-Forwarded-For のみ使う）"""
+    if TRUSTED_PROXY_COUNT > 0:
+        route = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(route) >= TRUSTED_PROXY_COUNT:
+            return route[-TRUSTED_PROXY_COUNT]
+    return request.remote_addr or 'unknown'
+
+def too_many_login_attempts(retry_after):
+    """429 Too Many Requests（Retry-After 付き）"""
+    response = jsonify({'success': False, 'error': 'ログインの試行回数が多すぎます。しばらく待ってから再度お試しください'})
+    response.status_code = 429
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
 
 def get_default_password_for_store(store_code):
     """店舗ごとのデフォルトパスワードを取得（環境変数を優先）"""
@@ -56,140 +112,202 @@ def get_default_password_for_store(store_code):
     # 環境変数がない場合はデフォルト
     return ADMIN_PASSWORD
 
-# 日本の祝日リスト（2024-2027年の主な祝日）
-# 年を超えた場合は適切に拡張してください
-JAPAN_HOLIDAYS = {
-    # 2024年
-    '2024-01-01': '元日',
-    '2024-01-08': '成人の日',
-    '2024-02-11': '建国記念の日',
-    '2024-02-12': '振替休日',
-    '2024-03-20': '春分の日',
-    '2024-04-29': '昭和の日',
-    '2024-05-03': '憲法記念日',
-    '2024-05-04': 'みどりの日',
-    '2024-05-05': 'こどもの日',
-    '2024-05-06': '振替休日',
-    '2024-07-15': '海の日',
-    '2024-08-11': '山の日',
-    '2024-08-12': '振替休日',
-    '2024-09-16': '敬老の日',
-    '2024-09-22': '秋分の日',
-    '2024-09-23': '振替休日',
-    '2024-10-14': 'スポーツの日',
-    '2024-11-03': '文化の日',
-    '2024-11-04': '振替休日',
-    '2024-11-23': '勤労感謝の日',
-    # 2025年
-    '2025-01-01': '元日',
-    '2025-01-13': '成人の日',
-    '2025-02-11': '建国記念の日',
-    '2025-03-20': '春分の日',
-    '2025-04-29': '昭和の日',
-    '2025-05-03': '憲法記念日',
-    '2025-05-04': 'みどりの日',
-    '2025-05-05': 'こどもの日',
-    '2025-05-06': '振替休日',
-    '2025-07-21': '海の日',
-    '2025-08-11': '山の日',
-    '2025-09-15': '敬老の日',
-    '2025-09-23': '秋分の日',
-    '2025-10-13': 'スポーツの日',
-    '2025-11-03': '文化の日',
-    '2025-11-23': '勤労感謝の日',
-    '2025-11-24': '振替休日',
-    # 2026年
-    '2026-01-01': '元日',
-    '2026-01-12': '成人の日',
-    '2026-02-11': '建国記念の日',
-    '2026-03-20': '春分の日',
-    '2026-03-21': '振替休日',
-    '2026-04-29': '昭和の日',
-    '2026-05-03': '憲法記念日',
-    '2026-05-04': 'みどりの日',
-    '2026-05-05': 'こどもの日',
-    '2026-05-06': '振替休日',
-    '2026-07-20': '海の日',
-    '2026-08-10': '山の日',
-    '2026-09-21': '敬老の日',
-    '2026-09-22': '秋分の日',
-    '2026-10-12': 'スポーツの日',
-    '2026-11-03': '文化の日',
-    '2026-11-23': '勤労感謝の日',
-    # 2027年
-    '2027-01-01': '元日',
-    '2027-01-11': '成人の日',
-    '2027-02-11': '建国記念の日',
-    '2027-03-21': '春分の日',
-    '2027-04-29': '昭和の日',
-    '2027-05-03': '憲法記念日',
-    '2027-05-04': 'みどりの日',
-    '2027-05-05': 'こどもの日',
-    '2027-07-19': '海の日',
-    '2027-08-11': '山の日',
-    '2027-09-20': '敬老の日',
-    '2027-09-23': '秋分の日',
-    '2027-10-11': 'スポーツの日',
-    '2027-11-03': '文化の日',
-    '2027-11-23': '勤労感謝の日',
-}
-
-def is_holiday(date_obj):
-    """指定日が祝日かどうかを判定"""
-    if isinstance(date_obj, str):
-        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
-    elif isinstance(date_obj, datetime):
-        date_obj = date_obj.date()
-    
-    date_str = date_obj.strftime('%Y-%m-%d')
-    return date_str in JAPAN_HOLIDAYS
-
-def is_day_before_holiday(date_obj):
-    """指定日が祝日の前日かどうかを判定"""
-    if isinstance(date_obj, str):
-        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
-    elif isinstance(date_obj, datetime):
-        date_obj = date_obj.date()
-    
-    next_day = date_obj + timedelta(days=1)
-    next_day_str = next_day.strftime('%Y-%m-%d')
-    return next_day_str in JAPAN_HOLIDAYS
-
-def get_day_type(date_str):
-    """
-    指定日の種類を返す
-    返り値: 'sunday' (日), 'mon_thu' (月-木), 'friday' (金), 'saturday' (土), 'holiday' (祝日), 'day_before_holiday' (祝日前日)
-    
-    優先順位: 祝前日 > 曜日（金土日） > 祝日（それ以外の日）> 月-木
-    ※ 金曜日が祝日の場合は金曜日として扱い、その前日（木曜日）は祝前日として扱う
-    """
-    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-    weekday = date_obj.weekday()  # 0=月, 6=日
-    
-    # 祝日の前日かどうかをチェック（祝前日は常に優先）
-    if is_day_before_holiday(date_obj):
-        return 'day_before_holiday'
-    
-    # 曜日判定（金曜日・土曜日・日曜日は曜日として扱う）
-    if weekday == 4:  # 金
-        return 'friday'
-    elif weekday == 5:  # 土
-        return 'saturday'
-    elif weekday == 6:  # 日
-        return 'sunday'
-    
-    # 祝日判定（月-木で祝日の場合のみ祝日として扱う）
-    if is_holiday(date_obj):
-        return 'holiday'
-    
-    # それ以外は月-木
-    return 'mon_thu'
-
 def get_store_data_file(store_code):
     """店舗ごとのデータファイルパスを取得"""
     os.makedirs(SHIFT_DATA_DIR, exist_ok=True)
     return os.path.join(SHIFT_DATA_DIR, f'{store_code}_data.json')
 
+def get_store_files(store_code):
+    """店舗の本体と付随ファイル（ロック・メタデータ・変更ログ・月ごとの集計）のパス"""
+    data_file = get_store_data_file(store_code)
+    return [
+        data_file,
+        f'{data_file}.lock',
+        store_meta.meta_file_path(data_file),
+        change_log.changes_file_path(data_file),
+        month_summary.summary_file_path(data_file),
+        f'{month_summary.summary_file_path(data_file)}.lock',
+    ]
+
+def load_store_meta(store_code):
+    """店舗のメタデータ（パスワード検証子・スタッフ名簿など）を本体を読まずに取得（店舗がなければ None）"""
+    meta = store_meta.read_store_meta(get_store_data_file(store_code), ADMIN_PASSWORD)
+    if meta is not None:
+        # メタデータは本体のシグネチャと対応しているため、バージョンも分かる
+        remember_store_version(store_code, tuple(meta['data_signature']), meta['version'])
+    return meta
+
+# 店舗ごとの読み込み〜保存の排他ロック（スレッド間は RLock、プロセス間はロックファイル）
+store_locks = {}
+store_locks_guard = threading.Lock()
+# スレッドごとの保持中の深さ {店舗コード: 深さ}（ロックファイルは最も外側でのみ取得する）
+store_lock_depths = threading.local()
+
+@contextmanager
+def store_lock(store_code=None):
+    """店舗データの読み込みから保存までを排他的に実行する（入れ子にしないこと。同じスレッドで入れ子になった場合は外側のロックをそのまま使う）"""
+    if store_code is None:
+        store_code = session.get('store_code', 'default')
+    with store_locks_guard:
+        lock = store_locks.setdefault(store_code, threading.RLock())
+    with lock:
+        depths = store_lock_depths.__dict__.setdefault('depths', {})
+        depth = depths.get(store_code, 0)
+        depths[store_code] = depth + 1
+        try:
+            if depth:
+                # flock は開いたファイルごとのロックなので、同じスレッドで取り直すと自分自身を待って止まる
+                yield
+            else:
+                with file_lock(get_store_data_file(store_code)):
+                    yield
+        finally:
+            if depth:
+                depths[store_code] = depth
+            else:
+                del depths[store_code]
+
+# 店舗データのバージョン（save_data ごとに +1）をファイルのシグネチャと対応付けて保持
+# シグネチャが一致する間はファイルを読まずにバージョンを返せる
+store_versions = {}
+store_versions_lock = threading.Lock()
+
+def remember_store_version(store_code, signature, version):
+    """ファイルシグネチャとバージョンの対応を記録"""
+    with store_versions_lock:
+        store_versions[store_code] = (signature, version)
+
+def get_store_version(store_code):
+    """店舗データのバージョンを返す（ファイルを読まずに分かる場合のみ。不明なら None）"""
+    cached = store_versions.get(store_code)
+    if cached is None:
+        return None
+    try:
+        signature = file_signature(os.stat(get_store_data_file(store_code)))
+    except OSError:
+        return None
+    return cached[1] if cached[0] == signature else None
+
+def get_store_signature(store_code, version):
+    """バージョンと対応付けたファイルのシグネチャ（別のバージョンを記録済み・不明なら None）"""
+    cached = store_versions.get(store_code)
+    return cached[0] if cached is not None and cached[1] == version else None
+
+# 店舗データの日付キーのソート済みインデックス（ソートは店舗のバージョンごとに1回）
+# キー: (店舗コード, セクション, バージョン, ファイルのシグネチャ)
+DATE_INDEX_CACHE_SIZE = int(os.getenv('DATE_INDEX_CACHE_SIZE', '256'))
+date_index_cache = LRUCache(DATE_INDEX_CACHE_SIZE)
+
+def get_store_date_index(store_code, data, *sections):
+    """読み込んだ店舗データの日付キー（複数セクションの和集合）の DateIndex
+
+    load_data の直後（変更前）のデータに使う。シグネチャが分からない場合（未保存の店舗など）はキャッシュしない。
+    """
+    version = data.get('version', 0)
+    signature = get_store_signature(store_code, version)
+    key = (store_code, sections, version, signature)
+    if signature is not None:
+        cached = date_index_cache.get(key)
+        if cached is not None:
+            return cached
+    keys = set()
+    for section in sections:
+        keys.update(data.get(section) or {})
+    index = DateIndex(keys)
+    if signature is not None:
+        date_index_cache.put(key, index)
+    return index
+
+# 変更イベントの配信（SSE）。STORE_EVENTS_DB 指定時は SQLite 経由で複数ワーカーに配信
+store_events = EventBroker(STORE_EVENTS_DB)
+SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+# 1接続の最長時間（経過後はクライアントが Last-Event-ID 付きで自動再接続する）
+SSE_MAX_SECONDS = int(os.getenv('SSE_MAX_SECONDS', '300'))
+SSE_RETRY_MS = 3000
+# 1ワーカーで同時に保持する接続数の上限（接続ごとにスレッドを1つ占有するため、gunicorn の --threads より小さくする）
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', '8'))
+# 上限を超えた場合に再接続を待ってもらう秒数（static/js/index.js と合わせる）
+SSE_BUSY_RETRY_SECONDS = 30
+sse_streams_lock = threading.Lock()
+sse_streams = 0
+
+def acquire_sse_stream():
+    """SSE 接続の枠を確保（上限に達していれば False）"""
+    global sse_streams
+    with sse_streams_lock:
+        if sse_streams >= SSE_MAX_STREAMS:
+            return False
+        sse_streams += 1
+        return True
+
+def release_sse_stream():
+    global sse_streams
+    with sse_streams_lock:
+        sse_streams -= 1
+
+def publish_store_event(event_type, month_key=None, store_code=None, **fields):
+    """店舗の変更イベントを配信（month_key が None なら全月の購読者へ）"""
+    if store_code is None:
+        store_code = session.get('store_code', 'default')
+    event = {'type': event_type, 'month': month_key}
+    event.update(fields)
+    try:
+        store_events.publish(store_code, event)
+    except Exception as e:
+        # イベント配信の失敗で保存済みの更新をエラーにはしない
+        print(f"[ERROR publish_store_event] {event_type} の配信に失敗: {str(e)}")
+
+def publish_shift_cells(data, cells):
+    """シフト希望のセル更新を月ごとにまとめて配信（[日付, スタッフ, 時間帯, カスタム時間帯]）"""
+    by_month = {}
+    for date, staff in dict.fromkeys(cells):
+        by_month.setdefault(date[:7], []).append([
+            date,
+            staff,
+            data['shifts'].get(date, {}).get(staff, []),
+            data.get('custom_shifts', {}).get(date, {}).get(staff, [])
+        ])
+    for month_key, month_cells in by_month.items():
+        publish_store_event('cells', month_key, cells=month_cells, version=data['version'])
+
+def make_store_etag(store_code, version, kind, *parts):
+    """店舗・バージョン・ファイルのシグネチャ・対象（種類と年月）から強い ETag を作成
+
+    シグネチャも含めるため、同じバージョンのまま他のツールで書き換えられた場合も ETag が変わる。
+    """
+    signature = get_store_signature(store_code, version)
+    signature_key = '-'.join(str(value) for value in signature) if signature is not None else '?'
+    key = ':'.join([store_code, str(version), signature_key, kind] + [str(part) for part in parts])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]
+
+def conditional_json(kind, build_payload, *parts):
+    """ETag による条件付き GET（一致すれば 304、データの読み込み・シリアライズを省略）"""
+    store_code = session.get('store_code', 'default')
+    version = get_store_version(store_code)
+    if version is not None:
+        # 圧縮して返した場合の ETag（-gzip など）も同じ内容として扱う
+        matched = compression.match_etag(make_store_etag(store_code, version, kind, *parts))
+        if matched:
+            return not_modified_response(matched)
+
+    data = load_data()
+    etag = make_store_etag(store_code, data.get('version', 0), kind, *parts)
+    matched = compression.match_etag(etag)
+    if matched:
+        return not_modified_response(matched)
+
+    response = jsonify(build_payload(data))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified_response(etag):
+    """304 Not Modified レスポンス"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 def build_shift_change_map(time_slots):
     """時間帯の並び順に基づいて変更可能先を作成"""
     change_map = {}
@@ -197,21 +315,6 @@ def build_shift_change_map(time_slots):
         change_map[slot] = time_slots[index + 1:]
     return change_map
 
-def get_covered_slots(time_slots):
-    """指定された時間帯（単一または複数）をそのまま返す"""
-    if isinstance(time_slots, str):
-        return [time_slots]
-
-    # 入力順を保持して重複を除外
-    unique_slots = []
-    seen = set()
-    for slot in time_slots:
-        if slot not in seen:
-            seen.add(slot)
-            unique_slots.append(slot)
-
-    return unique_slots
-
 def get_default_time_slots():
     """デフォルトの時間帯を返す"""
     return ['10-15', '17-23', '18-23', '19-23']
@@ -399,7 +502,8 @@ def load_data(store_code=None):
     if store_code is None:
         store_code = session.get('store_code', 'default')
     
-    print(f"[DEBUG load_data] セッション内の store_code: {session.get('store_code')}, 使用する store_code: {store_code}")
+    session_store_code = session.get('store_code') if has_request_context() else None
+    print(f"[DEBUG load_data] セッション内の store_code: {session_store_code}, 使用する store_code: {store_code}")
     
     data_file = get_store_data_file(store_code)
     print(f"[DEBUG load_data] データファイルパス: {data_file}")
@@ -407,10 +511,12 @@ def load_data(store_code=None):
     
     if os.path.exists(data_file):
         try:
-            with open(data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"[DEBUG load_data] ✅ ファイルから読み込み。スタッフ数: {len(data.get('staff', {}))}")
-                print(f"[DEBUG load_data] 登録済みスタッフ: {list(data.get('staff', {}).keys())}")
+            # 読み込み前のシグネチャを記録（読み込み中に置き換えられても古い方と対応付くだけで安全）
+            signature = file_signature(os.stat(data_file))
+            data = read_json_file(data_file)
+            remember_store_version(store_code, signature, data.get('version', 0))
+            print(f"[DEBUG load_data] ✅ ファイルから読み込み。スタッフ数: {len(data.get('staff', {}))}")
+            print(f"[DEBUG load_data] 登録済みスタッフ: {list(data.get('staff', {}).keys())}")
         except Exception as e:
             print(f"[ERROR load_data] ❌ ファイル読み込みエラー: {str(e)}")
             print(f"[ERROR load_data] ファイルパス: {data_file}")
@@ -439,6 +545,9 @@ def load_data(store_code=None):
         # 確定済み生成シフトがない場合は初期化
         if 'confirmed_generated_shifts' not in data:
             data['confirmed_generated_shifts'] = {}
+        # スタッフの逆引きインデックスがない・古い場合は作り直す
+        if staff_index.ensure_staff_index(data):
+            print(f"[DEBUG load_data] スタッフ逆引きインデックスを再構築しました（{len(data['staff_index']['staff'])}人）")
         
         # 古い形式のshift_settingsをチェック（mode属性がない場合）
         shift_settings = data.get('shift_settings', {})
@@ -476,15 +585,14 @@ def load_data(store_code=None):
         'requirements': {},  # {date: {time_slot: count}}
         'shift_settings': get_default_shift_settings(),  # シフト詳細設定
         'time_slots': get_default_time_slots(),  # 時間帯リスト
-        'admin_password': ADMIN_PASSWORD  # 管理者パスワード（店舗ごと）
+        'admin_password': ADMIN_PASSWORD,  # 管理者パスワード（店舗ごと）
+        'staff_index': staff_index.build_staff_index({})  # {staff: {section: [dates]}} スタッフの逆引き
     }
 
 def replace_month_shifts(base_shifts, year, month, month_shifts):
     """指定月のシフトを丸ごと置き換える"""
-    for date_str in list(base_shifts.keys()):
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        if date_obj.year == year and date_obj.month == month:
-            del base_shifts[date_str]
+    for date_str in month_keys(base_shifts, year, month):
+        del base_shifts[date_str]
 
     for date_str, staff_map in month_shifts.items():
         base_shifts[date_str] = {
@@ -532,14 +640,12 @@ def build_final_generated_shifts(data, year=None, month=None, force_regenerate=F
 def extract_month_generated_shifts(shifts_by_date, year, month):
     """指定月の生成シフトのみを抽出する"""
     result = {}
-    for date_str, staff_map in shifts_by_date.items():
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        if date_obj.year == year and date_obj.month == month:
-            # 参照共有を避けるために浅いコピーを作成
-            result[date_str] = {
-                staff_name: list(slots)
-                for staff_name, slots in staff_map.items()
-            }
+    for date_str in month_keys(shifts_by_date, year, month):
+        # 参照共有を避けるために浅いコピーを作成
+        result[date_str] = {
+            staff_name: list(slots)
+            for staff_name, slots in shifts_by_date[date_str].items()
+        }
     return result
 
 def replace_month_manual_generated_shifts(data, year, month, month_shifts):
@@ -548,10 +654,8 @@ def replace_month_manual_generated_shifts(data, year, month, month_shifts):
         data['manual_generated_shifts'] = {}
 
     # 対象月の既存上書きを削除
-    for date_str in list(data['manual_generated_shifts'].keys()):
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        if date_obj.year == year and date_obj.month == month:
-            del data['manual_generated_shifts'][date_str]
+    for date_str in month_keys(data['manual_generated_shifts'], year, month):
+        del data['manual_generated_shifts'][date_str]
 
     # 新しい確定内容を反映
     for date_str, staff_map in month_shifts.items():
@@ -560,17 +664,58 @@ def replace_month_manual_generated_shifts(data, year, month, month_shifts):
             for staff_name, slots in staff_map.items()
         }
 
-def save_data(data, store_code=None):
-    """データを保存"""
+    staff_index.reindex_month(data, 'manual_generated_shifts', f"{year:04d}-{month:02d}")
+
+def write_store_meta_safely(data_file, data, signature):
+    """本体の保存後にメタデータを書き出す（失敗しても次回の読み込み時に作り直される）"""
+    try:
+        store_meta.write_store_meta(data_file, data, signature, ADMIN_PASSWORD)
+    except Exception as e:
+        print(f"[ERROR save_data] メタデータの保存に失敗: {str(e)}")
+
+def record_changes_safely(data_file, data, previous_version, touched=None):
+    """本体の保存後に変更ログを記録する（失敗した場合、以前のカーソルからは全体コピーになる）"""
+    try:
+        return change_log.record_changes(data_file, data, previous_version, touched)
+    except Exception as e:
+        print(f"[ERROR save_data] 変更ログの記録に失敗: {str(e)}")
+        return None
+
+def invalidate_month_summaries_safely(data_file, previous_version, version, log):
+    """本体の保存後に変わった月の集計を消す（変更ログから月が分からなければ全月。失敗してもバージョン違いで作り直される）"""
+    months = None
+    if log is not None and log['entries'] and log['entries'][-1]['version'] == version:
+        months = month_summary.changed_months(log['entries'][-1]['keys'])
+    try:
+        month_summary.invalidate_months(data_file, previous_version, version, months)
+    except Exception as e:
+        print(f"[ERROR save_data] 月ごとの集計の無効化に失敗: {str(e)}")
+
+def update_registry_safely(store_code, data_file, signature, data):
+    """本体の保存後に未登録の店舗をレジストリに追加する（失敗しても一覧の取得時に作り直す）"""
+    try:
+        store_registry.update_store_entry(SHIFT_DATA_DIR, store_code, data_file, signature, data)
+    except Exception as e:
+        print(f"[ERROR save_data] 店舗レジストリの更新に失敗: {str(e)}")
+
+def save_data(data, store_code=None, touched=None):
+    """データを保存（touched: 変更した日付・月のチャンクキー。変更ログでそれ以外のダイジェストを再利用する）"""
     if store_code is None:
         store_code = session.get('store_code', 'default')
     
     data_file = get_store_data_file(store_code)
     try:
         os.makedirs(os.path.dirname(data_file), exist_ok=True)
-        with open(data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"[DEBUG save_data] ✅ {store_code} のデータを保存しました: {data_file}")
+        previous_version = int(data.get('version', 0))
+        data['version'] = previous_version + 1
+        staff_index.stamp_staff_index(data)
+        signature = write_json_file(data_file, data)
+        remember_store_version(store_code, signature, data['version'])
+        write_store_meta_safely(data_file, data, signature)
+        log = record_changes_safely(data_file, data, previous_version, touched)
+        invalidate_month_summaries_safely(data_file, previous_version, data['version'], log)
+        update_registry_safely(store_code, data_file, signature, data)
+        print(f"[DEBUG save_data] ✅ {store_code} のデータを保存しました: {data_file} (version {data['version']}, {signature[2]} bytes)")
     except Exception as e:
         print(f"[ERROR save_data] ❌ {store_code} のデータ保存に失敗しました: {str(e)}")
         print(f"[ERROR save_data] ファイルパス: {data_file}")
@@ -608,28 +753,41 @@ def api_login():
         print(f"[ERROR api_login] スタッフロール: スタッフ名が入力されていません")
         return jsonify({'success': False, 'error': 'スタッフ名を入力してください'}), 400
     
+    # 総当たり対策: ファイルを読む前に IP・店舗ごとの失敗回数を確認（同じ NAT 配下のスタッフが互いに締め出されないよう、消費は失敗時のみ）
+    client_ip = get_client_ip()
+    allowed, retry_after = login_ip_limiter.peek(client_ip)
+    if allowed and role == 'admin':
+        allowed, retry_after = login_store_limiter.peek(store_code)
+    if not allowed:
+        print(f"[ERROR api_login] 試行回数の上限 - IP: {client_ip}, 店舗: {store_code}")
+        return too_many_login_attempts(retry_after)
+    
     # 店舗データを読み込み（セッション設定前なので直接指定）
     data_file = get_store_data_file(store_code)
     print(f"[DEBUG api_login] データファイルパス: {data_file}")
     print(f"[DEBUG api_login] ファイル存在: {os.path.exists(data_file)}")
     
-    if os.path.exists(data_file):
-        try:
-            with open(data_file, 'r', encoding='utf-8') as f:
-                store_data = json.load(f)
-            store_password = store_data.get('admin_password', ADMIN_PASSWORD)
-            print(f"[DEBUG api_login] ✅ 既存店舗データを読み込みました")
-        except Exception as e:
-            print(f"[ERROR api_login] ❌ 店舗データの読み込みに失敗: {str(e)}")
-            return jsonify({'success': False, 'error': '店舗データの読み込みに失敗しました: ' + str(e)}), 500
+    # 既存店舗はメタデータ（ヘッダー）だけを読み、シフト本体は読み込まない
+    try:
+        meta = load_store_meta(store_code)
+    except Exception as e:
+        print(f"[ERROR api_login] ❌ 店舗データの読み込みに失敗: {str(e)}")
+        return jsonify({'success': False, 'error': '店舗データの読み込みに失敗しました: ' + str(e)}), 500
+    
+    if meta is not None:
+        print(f"[DEBUG api_login] ✅ 既存店舗のメタデータを読み込みました (version {meta['version']})")
+        password_ok = role != 'admin' or store_meta.check_password(meta, password)
     else:
         # 新規店舗の場合はデフォルトパスワード（環境変数を優先）
         print(f"[DEBUG api_login] 新規店舗です（ファイルが存在しません）")
         store_password = get_default_password_for_store(store_code)
+        password_ok = role != 'admin' or password == store_password
     
     # 管理者パスワード確認
-    if role == 'admin' and password != store_password:
+    if not password_ok:
         print(f"[ERROR api_login] 管理者: パスワードが違います")
+        login_ip_limiter.consume(client_ip)
+        login_store_limiter.consume(store_code)
         return jsonify({'success': False, 'error': 'パスワードが違います'}), 401
     
     # セッションに情報を保存
@@ -642,7 +800,7 @@ def api_login():
     print(f"[DEBUG api_login] ✅ セッション設定完了 - store_code: {store_code}, role: {role}")
     
     # 新規店舗の場合、ログイン時に店舗ファイルを自動作成
-    if not os.path.exists(data_file):
+    if meta is None and not os.path.exists(data_file):
         try:
             print(f"[DEBUG api_login] 新規店舗 '{store_code}' の初期ファイルを作成します")
             initial_data = {
@@ -657,10 +815,13 @@ def api_login():
             print(f"[DEBUG api_login] ディレクトリ作成: {dir_path}")
             os.makedirs(dir_path, exist_ok=True)
             
-            print(f"[DEBUG api_login] ファイル作成開始: {data_file}")
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(initial_data, f, ensure_ascii=False, indent=2)
-            print(f"[DEBUG api_login] ✅ 新規店舗ファイル作成完了: {data_file}")
+            with store_lock(store_code):
+                # 同時にログインした別のリクエストが作成済みなら上書きしない
+                if not os.path.exists(data_file):
+                    print(f"[DEBUG api_login] ファイル作成開始: {data_file}")
+                    signature = write_json_file(data_file, initial_data)
+                    write_store_meta_safely(data_file, initial_data, signature)
+                    print(f"[DEBUG api_login] ✅ 新規店舗ファイル作成完了: {data_file}")
             
             # ファイルが本当に作成されたか確認
             if os.path.exists(data_file):
@@ -687,11 +848,21 @@ def check_auth():
     """認証状態確認"""
     if 'role' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
-    return jsonify({
+    store_code = session.get('store_code', 'default')
+    payload = {
         'role': session['role'],
-        'store_code': session.get('store_code', 'default'),
+        'store_code': store_code,
         'success': True
-    })
+    }
+    # 店舗の状態はメタデータ（ヘッダー）のみで確認する
+    meta = load_store_meta(store_code)
+    if meta is not None:
+        payload['version'] = meta['version']
+        payload['mode'] = meta.get('mode')
+        if session['role'] == 'user':
+            payload['staff_name'] = session.get('staff_name')
+            payload['staff_registered'] = session.get('staff_name') in meta['staff']
+    return jsonify(payload)
 
 @app.route('/api/current-staff', methods=['GET'])
 def get_current_staff():
@@ -703,7 +874,6 @@ def get_current_staff():
     if session.get('role') != 'user':
         return jsonify({'error': 'ユーザーロードのみアクセス可能'}), 403
     
-    data = load_data()
     staff_name = session.get('staff_name')
     
     # セッションにスタッフ名がない場合は、最初のスタッフを返す（デフォルト）
@@ -717,13 +887,56 @@ def get_current_staff():
             'staff_type': None
         }), 200
     
-    staff_info = data['staff'].get(staff_name, {})
+    # 種別はメタデータのスタッフ名簿から取得（シフト本体は読まない）
+    meta = load_store_meta(session.get('store_code', 'default'))
+    roster = meta['staff'] if meta is not None else {}
     return jsonify({
         'success': True,
         'staff_name': staff_name,
-        'staff_type': staff_info.get('type', 'アルバイト')
+        'staff_type': roster.get(staff_name, 'アルバイト')
     })
 
+@app.route('/api/bootstrap', methods=['GET'])
+def bootstrap():
+    """初回表示に必要なデータを1回の読み込みでまとめて返す（ロールに応じた範囲のみ）"""
+    if 'role' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    today = datetime.now()
+    year = request.args.get('year', default=today.year, type=int)
+    month = request.args.get('month', default=today.month, type=int)
+    if month < 1 or month > 12:
+        return jsonify({'error': '月の指定が不正です'}), 400
+
+    role = session['role']
+    store_code = session.get('store_code', 'default')
+    data = load_data()
+    version = data.get('version', 0)
+
+    payload = {
+        'success': True,
+        'role': role,
+        'store_code': store_code,
+        'version': version,
+        'year': year,
+        'month': month,
+        'staff': data['staff'],
+        'shifts': build_month_shifts_payload(data, year, month),
+        # 以降の条件付き GET で使えるよう、/api/staff・/api/shifts と同じ ETag を返す
+        'etags': {
+            'staff': make_store_etag(store_code, version, 'staff'),
+            'shifts': make_store_etag(store_code, version, 'shifts', year, month)
+        }
+    }
+
+    if role == 'admin':
+        payload['generated_status'] = build_generated_status_payload(data, year, month)
+        payload['shift_settings'] = build_shift_settings_payload(data)
+    else:
+        payload['staff_name'] = session.get('staff_name')
+
+    return jsonify(payload)
+
 def require_admin(f):
     """管理者専用エンドポイント用デコレータ"""
     def decorated(*args, **kwargs):
@@ -737,59 +950,322 @@ def require_admin(f):
     decorated.__name__ = f.__name__
     return decorated
 
+def parse_month_range_args():
+    """クエリの from / to（YYYY-MM、省略可）を検証して返す（不正ならエラーメッセージ）"""
+    month_from = request.args.get('from') or None
+    month_to = request.args.get('to') or None
+    for value in (month_from, month_to):
+        if value is not None:
+            try:
+                datetime.strptime(value, '%Y-%m')
+            except ValueError:
+                return None, None, '月の形式が不正です（YYYY-MM）'
+    if month_from and month_to and month_from > month_to:
+        return None, None, '期間の指定が不正です'
+    return month_from, month_to, None
+
 @app.route('/api/store-data/export', methods=['GET'])
 @require_admin
 def export_store_data():
-    """現在ログイン中の店舗データをエクスポート（管理者のみ）"""
+    """現在ログイン中の店舗データをエクスポート（管理者のみ）
+
+    format=jsonl で1行1チャンクの JSON Lines をストリーミングで返す（store_export.py）。
+    from / to（YYYY-MM）で日付・月ごとのデータを絞り込める。
+    """
+    month_from, month_to, error = parse_month_range_args()
+    if error:
+        return jsonify({'error': error}), 400
+
+    store_code = session.get('store_code', 'default')
     data = load_data()
-    return jsonify({
+    if request.args.get('format') == 'jsonl':
+        header = store_export.build_export_header(store_code, data, month_from, month_to)
+        return Response(
+            store_export.iter_export_lines(data, header, month_from, month_to),
+            mimetype='application/x-ndjson'
+        )
+
+    # エクスポートはバックアップとして人が読むこともあるため、インデント付きで返す
+    # from / to はインポート時に範囲外の月を消さないために使う（JSON Lines のヘッダーと同じ）
+    payload = dumps_pretty({
         'success': True,
-        'store_code': session.get('store_code', 'default'),
-        'data': data
+        'store_code': store_code,
+        'version': data.get('version', 0),
+        'from': month_from,
+        'to': month_to,
+        'data': store_export.filter_months(data, month_from, month_to)
     })
+    return Response(payload, mimetype='application/json')
+
+# JSON Lines 形式のインポートとして扱う Content-Type
+JSONL_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines')
+
+def read_import_payload():
+    """インポートの本文を読み込んで検証し、(店舗データ, 警告, マージ方法, エクスポートの (from, to)) を返す（不正なら ImportValidationError）"""
+    merge = request.args.get('merge', '')
+    if request.mimetype in JSONL_MIMETYPES:
+        # 本文全体を読み込まず、1行（1チャンク）ずつパース・検証する
+        stream = request.stream
+        if request.content_encoding == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+        try:
+            imported_data, warnings, month_range = store_import.import_jsonl(stream)
+        except (OSError, EOFError) as e:
+            raise store_import.ImportValidationError(f'本文を読み込めません: {str(e)}')
+        return imported_data, warnings, merge, month_range
+
+    # 従来の {'data': {...}} 形式（本文のバイト列はパース後に保持しない）
+    try:
+        payload = loads_json(request.get_data(cache=False))
+    except ValueError:
+        raise store_import.ImportValidationError('インポートデータが不正です')
+    if not isinstance(payload, dict):
+        raise store_import.ImportValidationError('インポートデータが不正です')
+    month_range = store_import.check_month_range(payload.get('from'), payload.get('to'))
+    imported_data, warnings = store_import.import_document(payload.get('data'))
+    return imported_data, warnings, merge or payload.get('merge') or '', month_range
 
 @app.route('/api/store-data/import', methods=['POST'])
 @require_admin
 def import_store_data():
-    """現在ログイン中の店舗データをインポート（管理者のみ）"""
+    """現在ログイン中の店舗データをインポート（管理者のみ）
+
+    JSON（{'data': {...}}）か JSON Lines（store_import.py）で受け付け、全体を検証してから
+    ロック内で1回だけ保存する。merge=month を指定すると、含まれる月だけを置き換える。
+    月を絞ったエクスポート（from / to 付き）は常に月単位のマージで取り込む（範囲内の月を置き換える）。
+    """
+    try:
+        imported_data, warnings, merge, (month_from, month_to) = read_import_payload()
+    except store_import.ImportValidationError as e:
+        return jsonify({'error': str(e), 'line': e.line}), 400
+    partial = month_from is not None or month_to is not None
+    if partial and merge == '':
+        # 全体として取り込むと範囲外の月が消えるため、月単位のマージに切り替える
+        merge = 'month'
+    if merge not in ('', 'month'):
+        return jsonify({'error': f'不明なマージ方法です: {merge}'}), 400
+
+    months = None
+    with store_lock():
+        try:
+            # 現在のデータを読み込んで、admin_passwordを保持
+            current_data = load_data()
+            if merge == 'month':
+                imported_data, months = store_import.merge_by_month(current_data, imported_data, month_from, month_to)
+            imported_data['admin_password'] = current_data.get('admin_password', ADMIN_PASSWORD)
+            # バージョンは単調増加させる（古いバージョンに戻ると ETag が衝突するため）
+            imported_data['version'] = current_data.get('version', 0)
+            # 逆引きインデックスはインポート内容から作り直す
+            imported_data.pop('staff_index', None)
+
+            save_data(imported_data)
+            print(f"[DEBUG import_store_data] ✅ インポート完了（{merge or '全体'}）。admin_passwordは保持しました。")
+        except Exception as e:
+            print(f"[ERROR import_store_data] インポート保存に失敗: {str(e)}")
+            return jsonify({'error': 'インポート保存に失敗しました: ' + str(e)}), 500
+
+    publish_store_event('reload', version=imported_data['version'])
+    result = {
+        'success': True,
+        'store_code': session.get('store_code', 'default'),
+        'version': imported_data['version'],
+        'warnings': warnings
+    }
+    if months is not None:
+        result['months'] = months
+    return jsonify(result)
+
+@app.route('/api/store-data/changes', methods=['GET'])
+@require_admin
+def get_store_data_changes():
+    """指定バージョン以降の変更（チャンク単位）を取得（管理者のみ）
+
+    変更ログで追えないほど古い場合は 410 を返す（全体エクスポートで同期し直す）。
+    """
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'error': 'since を指定してください'}), 400
+
+    store_code = session.get('store_code', 'default')
+    data = load_data()
+    version = data.get('version', 0)
+    if since > version:
+        return jsonify({'error': 'since が現在のバージョンより新しいです', 'version': version}), 410
+
+    changes = change_log.collect_changes(get_store_data_file(store_code), data, since)
+    if changes is None:
+        print(f"[DEBUG store_data_changes] since={since} は変更ログで追えません (version {version})")
+        return jsonify({'error': '変更ログが残っていないため、全体の同期が必要です', 'version': version}), 410
+
+    return jsonify({
+        'success': True,
+        'store_code': store_code,
+        'since': since,
+        'version': version,
+        'changes': changes
+    })
+
+@app.route('/api/store-data/patch', methods=['POST'])
+@require_admin
+def patch_store_data():
+    """/api/store-data/changes の変更を現在の店舗データに反映（管理者のみ）
+
+    expected_version を指定した場合、現在のバージョンと違えば 409（前回の同期後に変更されている）。
+    """
     payload = request.json or {}
-    imported_data = payload.get('data')
+    changes = payload.get('changes')
+    expected_version = payload.get('expected_version')
+    if not isinstance(changes, list):
+        return jsonify({'error': 'changes を指定してください'}), 400
+
+    with store_lock():
+        data = load_data()
+        if expected_version is not None and expected_version != data.get('version', 0):
+            return jsonify({'error': '前回の同期後にデータが変更されています', 'version': data.get('version', 0)}), 409
+        try:
+            applied = change_log.apply_changes(data, changes)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not applied:
+            return jsonify({'success': True, 'applied': 0, 'version': data.get('version', 0)})
+
+        # 逆引きインデックスは反映後の内容から作り直す
+        data.pop('staff_index', None)
+        try:
+            save_data(data, touched=[change['key'] for change in changes])
+        except Exception as e:
+            print(f"[ERROR patch_store_data] 差分の保存に失敗: {str(e)}")
+            return jsonify({'error': '差分の保存に失敗しました: ' + str(e)}), 500
+
+    publish_store_event('reload', version=data['version'])
+    return jsonify({'success': True, 'applied': applied, 'version': data['version']})
+
+# 本部向けの店舗横断集計（HEAD_OFFICE_TOKEN が未設定なら無効）
+HEAD_OFFICE_TOKEN = os.getenv('HEAD_OFFICE_TOKEN', '').strip()
+HEAD_OFFICE_WORKERS = int(os.getenv('HEAD_OFFICE_WORKERS', '8'))
+# 1回の集計で指定できる最大月数
+HEAD_OFFICE_MAX_MONTHS = int(os.getenv('HEAD_OFFICE_MAX_MONTHS', '12'))
+# {(店舗コード, バージョン, 月): 集計}（バージョンが変わるまで再計算しない）
+STORE_SUMMARY_CACHE_SIZE = int(os.getenv('STORE_SUMMARY_CACHE_SIZE', '4096'))
+store_summary_cache = LRUCache(STORE_SUMMARY_CACHE_SIZE)
+head_office_executor = ThreadPoolExecutor(max_workers=HEAD_OFFICE_WORKERS, thread_name_prefix='head-office')
+
+def require_head_office(f):
+    """本部向けエンドポイント用デコレータ（Authorization: Bearer <HEAD_OFFICE_TOKEN>）"""
+    def decorated(*args, **kwargs):
+        if not HEAD_OFFICE_TOKEN:
+            return jsonify({'error': '本部向けの集計は無効です'}), 404
+        auth = request.headers.get('Authorization', '')
+        token = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+        if not hmac.compare_digest(token.encode('utf-8'), HEAD_OFFICE_TOKEN.encode('utf-8')):
+            return jsonify({'error': '本部のトークンが正しくありません'}), 401
+        return f(*args, **kwargs)
+    decorated.__name__ = f.__name__
+    return decorated
+
+def iter_month_keys(month_from, month_to):
+    """YYYY-MM の範囲を順に返す"""
+    year, month = int(month_from[:4]), int(month_from[5:7])
+    while f"{year:04d}-{month:02d}" <= month_to:
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def get_store_month_summaries(store_code, version, month_keys):
+    """店舗の月ごとの集計（すべてキャッシュにあれば本体を読まない）"""
+    summaries = {month_key: store_summary_cache.get((store_code, version, month_key)) for month_key in month_keys}
+    missing = [month_key for month_key, summary in summaries.items() if summary is None]
+    if not missing:
+        return version, summaries
+
+    data = load_data(store_code)
+    version = data.get('version', 0)
+    settings = data.get('shift_settings', get_default_shift_settings())
+    staff_types = get_staff_types(data, settings)
 
-    if not isinstance(imported_data, dict):
-        return jsonify({'error': 'インポートデータが不正です'}), 400
+    def required_matrix(date_str, time_slots, types):
+        return get_required_matrix(date_str, time_slots, types, settings)
+
+    for month_key in month_keys:
+        summary = store_summary_cache.get((store_code, version, month_key))
+        if summary is None:
+            summary = store_summary.summarize_requests(data, month_key, staff_types, required_matrix)
+            store_summary_cache.put((store_code, version, month_key), summary)
+        summaries[month_key] = summary
+    return version, summaries
+
+def get_store_month_summaries_with_assignments(store_code, version, month_keys):
+    """希望の集計に、保存済みの配置状況（月ごとの集計ファイル）を 'assignments' として加える"""
+    version, summaries = get_store_month_summaries(store_code, version, month_keys)
+    return version, {
+        month_key: {**summary, 'assignments': get_materialized_month_summary(store_code, month_key, version)[1]}
+        for month_key, summary in summaries.items()
+    }
 
-    required_keys = ['staff', 'shifts', 'requirements']
-    missing_keys = [key for key in required_keys if key not in imported_data]
-    if missing_keys:
-        return jsonify({'error': f'必須キーが不足しています: {", ".join(missing_keys)}'}), 400
+@app.route('/api/head-office/summary', methods=['GET'])
+@require_head_office
+def head_office_summary():
+    """全店舗の月ごとの集計（日ごとの希望人数・必要人数・不足時間帯、希望時間の合計）
 
-    try:
-        # 現在のデータを読み込んで、admin_passwordを保持
-        current_data = load_data()
-        current_password = current_data.get('admin_password', ADMIN_PASSWORD)
-        
-        # インポートデータを保存
-        save_data(imported_data)
-        
-        # admin_passwordを元に戻す
-        imported_data['admin_password'] = current_password
-        save_data(imported_data)
-        
-        print(f"[DEBUG import_store_data] ✅ インポート完了。admin_passwordは保持しました。")
-    except Exception as e:
-        print(f"[ERROR import_store_data] インポート保存に失敗: {str(e)}")
-        return jsonify({'error': 'インポート保存に失敗しました: ' + str(e)}), 500
+    店舗の一覧はレジストリから取得し、集計は店舗ごとにスレッドプールで並行して行う。
+    stores=a,b で店舗を絞り込み、refresh=1 で shift_data/ を走査し直す。
+    assignments=1 で月ごとの配置状況（不足日・時間帯ごとの配置人数など）も返す。
+    """
+    month_from, month_to, error = parse_month_range_args()
+    if error:
+        return jsonify({'error': error}), 400
+    current_month = datetime.now().strftime('%Y-%m')
+    month_from = month_from or month_to or current_month
+    month_to = month_to or month_from
+    month_keys = list(iter_month_keys(month_from, month_to))
+    if len(month_keys) > HEAD_OFFICE_MAX_MONTHS:
+        return jsonify({'error': f'一度に集計できるのは {HEAD_OFFICE_MAX_MONTHS} か月までです'}), 400
+
+    registry = store_registry.list_stores(SHIFT_DATA_DIR, ADMIN_PASSWORD, rescan=request.args.get('refresh') == '1')
+    requested_stores = [code for code in request.args.get('stores', '').split(',') if code]
+    if requested_stores:
+        registry = {code: entry for code, entry in registry.items() if code in requested_stores}
+
+    summarize = get_store_month_summaries
+    if request.args.get('assignments') == '1':
+        summarize = get_store_month_summaries_with_assignments
+    futures = {
+        store_code: head_office_executor.submit(summarize, store_code, entry['version'], month_keys)
+        for store_code, entry in sorted(registry.items())
+    }
+    stores = []
+    store_months = {}
+    errors = []
+    for store_code, future in futures.items():
+        try:
+            version, summaries = future.result()
+        except Exception as e:
+            print(f"[ERROR head_office_summary] {store_code} の集計に失敗: {str(e)}")
+            errors.append({'store_code': store_code, 'error': str(e)})
+            continue
+        entry = registry[store_code]
+        store_months[store_code] = summaries
+        stores.append({
+            'store_code': store_code,
+            'version': version,
+            'staff_count': entry['staff_count'],
+            'size': entry['size'],
+            'last_modified': entry['last_modified'],
+            'months': summaries
+        })
 
     return jsonify({
         'success': True,
-        'store_code': session.get('store_code', 'default')
+        'from': month_from,
+        'to': month_to,
+        'stores': stores,
+        'totals': store_summary.aggregate_summaries(store_months),
+        'errors': errors
     })
 
 @app.route('/api/staff', methods=['GET'])
 def get_staff():
     """スタッフ一覧を取得"""
-    data = load_data()
-    return jsonify(data['staff'])
+    return conditional_json('staff', lambda data: data['staff'])
 
 @app.route('/api/staff', methods=['POST'])
 @require_admin
@@ -807,8 +1283,8 @@ def add_staff():
     if not staff_type:
         return jsonify({'error': '種別を入力してください'}), 400
     
-    # スレッドセーフなロック処理
-    with staff_lock:
+    # 店舗データの読み込みから保存までを排他的に実行
+    with store_lock():
         print(f"[DEBUG] ロック取得 - スタッフ '{staff_name}' の追加処理開始")
         
         data = load_data()
@@ -833,41 +1309,183 @@ def add_staff():
             print(f"[ERROR] ❌ スタッフ '{staff_name}' の保存に失敗しました: {str(e)}")
             return jsonify({'error': 'スタッフの保存に失敗しました: ' + str(e)}), 500
     
+    publish_store_event('reload', version=data['version'])
     return jsonify({'success': True, 'staff': data['staff']})
 
 @app.route('/api/staff/<staff_name>', methods=['DELETE'])
 @require_admin
 def delete_staff(staff_name):
     """スタッフを削除（管理者のみ）"""
-    data = load_data()
-    
-    if staff_name not in data['staff']:
-        return jsonify({'error': 'スタッフが見つかりません'}), 404
+    with store_lock():
+        data = load_data()
+        
+        if staff_name not in data['staff']:
+            return jsonify({'error': 'スタッフが見つかりません'}), 404
+        
+        del data['staff'][staff_name]
+        
+        # 希望・自由入力・上書き・一時保存・確定の全シフトから、登録のある日付だけ削除
+        removed = staff_index.remove_staff(data, staff_name)
+        print(f"[DEBUG delete_staff] '{staff_name}' のシフト {removed} 件を削除")
+        
+        try:
+            save_data(data)
+        except Exception as e:
+            print(f"[ERROR] スタッフ '{staff_name}' の削除保存に失敗: {str(e)}")
+            return jsonify({'error': 'スタッフの削除保存に失敗しました: ' + str(e)}), 500
     
-    del data['staff'][staff_name]
+    publish_store_event('reload', version=data['version'])
+    return jsonify({'success': True, 'staff': data['staff']})
+
+@app.route('/api/staff/<staff_name>/rename', methods=['POST'])
+@require_admin
+def rename_staff(staff_name):
+    """スタッフ名を変更し、全シフトに反映（管理者のみ）"""
+    new_name = ((request.json or {}).get('new_name') or '').strip()
+    if not new_name:
+        return jsonify({'error': '新しいスタッフ名を入力してください'}), 400
     
-    # シフトデータからも削除
-    for date in list(data['shifts'].keys()):
-        if staff_name in data['shifts'][date]:
-            del data['shifts'][date][staff_name]
-        if not data['shifts'][date]:
-            del data['shifts'][date]
+    with store_lock():
+        data = load_data()
+        
+        if staff_name not in data['staff']:
+            return jsonify({'error': 'スタッフが見つかりません'}), 404
+        if new_name == staff_name:
+            return jsonify({'success': True, 'staff': data['staff'], 'renamed': 0})
+        if new_name in data['staff']:
+            return jsonify({'error': 'このスタッフは既に登録されています'}), 400
+        
+        # 一覧の並び順を保ったまま名前を差し替える
+        data['staff'] = {
+            (new_name if name == staff_name else name): info
+            for name, info in data['staff'].items()
+        }
+        renamed = staff_index.rename_staff(data, staff_name, new_name)
+        print(f"[DEBUG rename_staff] '{staff_name}' -> '{new_name}'（シフト {renamed} 件）")
+        
+        try:
+            save_data(data)
+        except Exception as e:
+            print(f"[ERROR] スタッフ名変更の保存に失敗: {str(e)}")
+            return jsonify({'error': 'スタッフ名変更の保存に失敗しました: ' + str(e)}), 500
+    
+    publish_store_event('reload', version=data['version'])
+    return jsonify({'success': True, 'staff': data['staff'], 'renamed': renamed})
+
+def parse_date_range_args():
+    """クエリの from / to（YYYY-MM-DD、省略可）を検証して返す（不正ならエラーメッセージ）"""
+    date_from = request.args.get('from') or None
+    date_to = request.args.get('to') or None
+    for value in (date_from, date_to):
+        if value is not None:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return None, None, '日付の形式が不正です（YYYY-MM-DD）'
+    if date_from and date_to and date_from > date_to:
+        return None, None, '期間の指定が不正です'
+    return date_from, date_to, None
+
+@app.route('/api/staff/<staff_name>/shifts', methods=['GET'])
+@require_admin
+def get_staff_shifts(staff_name):
+    """1人分のシフト（希望・自由入力・上書き・一時保存・確定）を日付順に取得（管理者のみ）"""
+    date_from, date_to, error = parse_date_range_args()
+    if error:
+        return jsonify({'error': error}), 400
     
-    try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] スタッフ '{staff_name}' の削除保存に失敗: {str(e)}")
-        return jsonify({'error': 'スタッフの削除保存に失敗しました: ' + str(e)}), 500
+    data = load_data()
+    if staff_name not in data['staff'] and not staff_index.staff_dates(data, staff_name):
+        return jsonify({'error': 'スタッフが見つかりません'}), 404
     
-    return jsonify({'success': True, 'staff': data['staff']})
+    return jsonify({
+        'staff': staff_name,
+        'from': date_from,
+        'to': date_to,
+        'shifts': staff_index.staff_shifts(data, staff_name, date_from, date_to)
+    })
+
+# 「自分のシフト」の応答キャッシュ {(店舗, バージョン, スタッフ, from, to): JSON バイト列}
+MY_SHIFTS_CACHE_SIZE = int(os.getenv('MY_SHIFTS_CACHE_SIZE', '2048'))
+my_shifts_cache = LRUCache(MY_SHIFTS_CACHE_SIZE)
+
+def build_my_shifts_payload(data, staff_name, date_from, date_to):
+    """1人分の希望・自由入力・確定シフトを日付ごとにまとめる"""
+    days = {}
+    for date_str, sections in staff_index.staff_shifts(data, staff_name, date_from, date_to).items():
+        day = {}
+        if 'shifts' in sections:
+            day['requested'] = sections['shifts']
+        if 'custom_shifts' in sections:
+            day['custom'] = sections['custom_shifts']
+        # 一時保存・手作業上書きは確定前のため、スタッフには確定分のみ返す
+        if 'confirmed_generated_shifts' in sections:
+            day['confirmed'] = sections['confirmed_generated_shifts']
+        if day:
+            days[date_str] = day
+
+    confirmed_months = sorted(
+        month_key for month_key in data.get('confirmed_generated_shifts', {})
+        if (not date_from or month_key >= date_from[:7]) and (not date_to or month_key <= date_to[:7])
+    )
+    return {
+        'success': True,
+        'staff_name': staff_name,
+        'from': date_from,
+        'to': date_to,
+        'version': data.get('version', 0),
+        'confirmed_months': confirmed_months,
+        'days': days
+    }
+
+@app.route('/api/me/shifts', methods=['GET'])
+def get_my_shifts():
+    """ログイン中のスタッフ本人のシフトを期間指定で取得（スタッフのみ）"""
+    if 'role' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    staff_name = session.get('staff_name')
+    if session.get('role') != 'user' or not staff_name:
+        return jsonify({'error': 'スタッフとしてログインしてください'}), 403
+
+    date_from, date_to, error = parse_date_range_args()
+    if error:
+        return jsonify({'error': error}), 400
+
+    store_code = session.get('store_code', 'default')
+    parts = (staff_name, date_from, date_to)
+
+    # バージョンがファイルを読まずに分かれば、304 かキャッシュ済みの応答を返す
+    version = get_store_version(store_code)
+    body = None
+    if version is not None:
+        matched = compression.match_etag(make_store_etag(store_code, version, 'me', *parts))
+        if matched:
+            return not_modified_response(matched)
+        body = my_shifts_cache.get((store_code, version) + parts)
+
+    if body is None:
+        data = load_data()
+        version = data.get('version', 0)
+        matched = compression.match_etag(make_store_etag(store_code, version, 'me', *parts))
+        if matched:
+            return not_modified_response(matched)
+        body = dumps_compact(build_my_shifts_payload(data, staff_name, date_from, date_to))
+        my_shifts_cache.put((store_code, version) + parts, body)
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(make_store_etag(store_code, version, 'me', *parts))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/api/shifts/<year>/<month>', methods=['GET'])
 def get_shifts(year, month):
     """指定月のシフト希望を取得"""
-    data = load_data()
     year = int(year)
     month = int(month)
-    
+    return conditional_json('shifts', lambda data: build_month_shifts_payload(data, year, month), year, month)
+
+def build_month_shifts_payload(data, year, month):
+    """指定月のシフト希望レスポンスを作成"""
     # 月の日数を取得
     days_in_month = calendar.monthrange(year, month)[1]
     
@@ -879,14 +1497,61 @@ def get_shifts(year, month):
         month_shifts[date_str] = data['shifts'].get(date_str, {})
         month_custom_shifts[date_str] = data.get('custom_shifts', {}).get(date_str, {})
     
-    return jsonify({
+    return {
         'shifts': month_shifts,
         'custom_shifts': month_custom_shifts,
         'staff': data['staff'],
         'time_slots': data.get('time_slots', get_default_time_slots()),
         'change_map': build_shift_change_map(data.get('time_slots', get_default_time_slots())),
         'days_in_month': days_in_month
-    })
+    }
+
+@app.route('/api/events/<int:year>/<int:month>', methods=['GET'])
+def store_event_stream(year, month):
+    """指定月の変更イベントを Server-Sent Events で配信"""
+    if 'role' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    if month < 1 or month > 12:
+        return jsonify({'error': '月の指定が不正です'}), 400
+
+    store_code = session.get('store_code', 'default')
+    month_key = f"{year:04d}-{month:02d}"
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    if not acquire_sse_stream():
+        # 接続でスレッドが埋まると他のリクエスト（/api/ready を含む）が処理できなくなるため断る
+        print(f"[DEBUG store_event_stream] 同時接続数の上限（{SSE_MAX_STREAMS}）に達したため拒否: {store_code}")
+        response = jsonify({'error': '接続が混み合っています。しばらくしてから再接続してください'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(SSE_BUSY_RETRY_SECONDS)
+        return response
+    subscription = store_events.subscribe(store_code, month_key, last_event_id)
+
+    def stream():
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            deadline = time.monotonic() + SSE_MAX_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                record = subscription.get(timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                if record is None:
+                    # 中継サーバーに切断されないよう定期的にコメント行を送る
+                    yield ': ping\n\n'
+                    continue
+                yield format_sse(*record)
+        finally:
+            subscription.close()
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # 配信を始める前に切断された場合も含め、レスポンスを閉じたときに枠を返す
+    response.call_on_close(release_sse_stream)
+    return response
 
 @app.route('/api/shifts', methods=['POST'])
 def update_shift():
@@ -899,11 +1564,29 @@ def update_shift():
     if not date or not staff:
         return jsonify({'error': 'パラメータが不足しています'}), 400
     
-    data = load_data()
-    
-    if staff not in data['staff']:
-        return jsonify({'error': 'スタッフが登録されていません'}), 400
+    with store_lock():
+        data = load_data()
+        
+        if staff not in data['staff']:
+            return jsonify({'error': 'スタッフが登録されていません'}), 400
+        
+        set_shift_request(data, date, staff, time_slots, custom_time_slots)
+        
+        try:
+            save_data(data, touched=cell_chunk_keys(('shifts', 'custom_shifts'), [date]))
+        except Exception as e:
+            print(f"[ERROR] シフト情報の保存に失敗: {str(e)}")
+            return jsonify({'error': 'シフト情報の保存に失敗しました: ' + str(e)}), 500
     
+    publish_shift_cells(data, [(date, staff)])
+    return jsonify({'success': True})
+
+def cell_chunk_keys(sections, dates):
+    """変更したセルの日付ごとのチャンクキー（save_data の touched に渡す）"""
+    return [f'{section}/{date}' for section in sections for date in dates]
+
+def set_shift_request(data, date, staff, time_slots, custom_time_slots):
+    """1セル分のシフト希望（時間帯・カスタム時間帯）を設定（空なら削除）"""
     if date not in data['shifts']:
         data['shifts'][date] = {}
     if 'custom_shifts' not in data:
@@ -927,14 +1610,69 @@ def update_shift():
             del data['custom_shifts'][date][staff]
         if date in data['custom_shifts'] and not data['custom_shifts'][date]:
             del data['custom_shifts'][date]
-    
+
+    staff_index.sync_cell(data, 'shifts', date, staff)
+    staff_index.sync_cell(data, 'custom_shifts', date, staff)
+
+# 一括更新で受け付ける最大件数
+MAX_BATCH_OPERATIONS = 500
+
+def validate_shift_operation(operation, staff_names):
+    """一括更新の1件を検証し、(date, staff, time_slots, custom_time_slots) を返す（不正ならエラーメッセージ）"""
+    if not isinstance(operation, dict):
+        return None, '形式が不正です'
+    date = operation.get('date')
+    staff = operation.get('staff')
+    time_slots = operation.get('time_slots') or []
+    custom_time_slots = operation.get('custom_time_slots') or []
+    if not date or not staff:
+        return None, 'パラメータが不足しています'
     try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] シフト情報の保存に失敗: {str(e)}")
-        return jsonify({'error': 'シフト情報の保存に失敗しました: ' + str(e)}), 500
-    
-    return jsonify({'success': True})
+        parse_date(date)
+    except (TypeError, ValueError):
+        return None, f'日付の形式が正しくありません: {date}'
+    if staff not in staff_names:
+        return None, f'スタッフが登録されていません: {staff}'
+    for slots in (time_slots, custom_time_slots):
+        if not isinstance(slots, list) or not all(isinstance(slot, str) for slot in slots):
+            return None, '時間帯は文字列の配列で指定してください'
+    return (date, staff, time_slots, custom_time_slots), None
+
+@app.route('/api/shifts/batch', methods=['PATCH'])
+def update_shifts_batch():
+    """シフト希望を一括更新（全件を検証してから1回の読み込み・保存で反映）"""
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': '更新内容がありません'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'一度に更新できるのは{MAX_BATCH_OPERATIONS}件までです'}), 400
+
+    with store_lock():
+        data = load_data()
+        staff_names = data['staff']
+
+        validated = []
+        for index, operation in enumerate(operations):
+            values, error = validate_shift_operation(operation, staff_names)
+            if error:
+                # 1件でも不正なら何も反映しない
+                return jsonify({'error': error, 'index': index}), 400
+            validated.append(values)
+
+        # 同じセルへの複数の操作は後のものが優先される
+        for date, staff, time_slots, custom_time_slots in validated:
+            set_shift_request(data, date, staff, time_slots, custom_time_slots)
+
+        touched = cell_chunk_keys(('shifts', 'custom_shifts'), {date for date, _, _, _ in validated})
+        try:
+            save_data(data, touched=touched)
+        except Exception as e:
+            print(f"[ERROR] シフト情報の一括保存に失敗: {str(e)}")
+            return jsonify({'error': 'シフト情報の保存に失敗しました: ' + str(e)}), 500
+
+    publish_shift_cells(data, [(date, staff) for date, staff, _, _ in validated])
+    print(f"[DEBUG update_shifts_batch] {len(validated)}件を反映 (version {data['version']})")
+    return jsonify({'success': True, 'applied': len(validated), 'version': data['version']})
 
 @app.route('/api/update-shift', methods=['POST'])
 @require_admin
@@ -947,26 +1685,21 @@ def update_shift_inline():
     if not date or not staff_name:
         return jsonify({'error': 'パラメータが不足しています', 'success': False}), 400
     
-    data = load_data()
-    
-    if staff_name not in data['staff']:
-        return jsonify({'error': 'スタッフが登録されていません', 'success': False}), 400
-
-    if 'manual_generated_shifts' not in data:
-        data['manual_generated_shifts'] = {}
-
-    if date not in data['manual_generated_shifts']:
-        data['manual_generated_shifts'][date] = {}
+    with store_lock():
+        data = load_data()
+        
+        if staff_name not in data['staff']:
+            return jsonify({'error': 'スタッフが登録されていません', 'success': False}), 400
 
-    # 空配列も有効な上書き値として保存（生成結果を空にしたいケース）
-    data['manual_generated_shifts'][date][staff_name] = shifts
-    
-    try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] シフト更新の保存に失敗: {str(e)}")
-        return jsonify({'error': 'シフト更新の保存に失敗しました: ' + str(e)}), 500
+        set_manual_generated_shift(data, date, staff_name, shifts)
+        
+        try:
+            save_data(data, touched=cell_chunk_keys(('manual_generated_shifts',), [date]))
+        except Exception as e:
+            print(f"[ERROR] シフト更新の保存に失敗: {str(e)}")
+            return jsonify({'error': 'シフト更新の保存に失敗しました: ' + str(e)}), 500
     
+    publish_store_event('generated', date[:7], dates=[date], version=data['version'])
     return jsonify({'success': True})
 
 @app.route('/api/update-custom-shift', methods=['POST'])
@@ -980,30 +1713,17 @@ def update_custom_shift():
     if not date or not staff_name:
         return jsonify({'error': 'パラメータが不足しています', 'success': False}), 400
     
-    data = load_data()
-    
-    # custom_shiftsキーが存在しない場合は初期化
-    if 'custom_shifts' not in data:
-        data['custom_shifts'] = {}
-    
-    if custom_shifts:
-        # 日付キーが存在しない場合は初期化
-        if date not in data['custom_shifts']:
-            data['custom_shifts'][date] = {}
-        data['custom_shifts'][date][staff_name] = custom_shifts
-    else:
-        # 空の場合は削除
-        if date in data['custom_shifts'] and staff_name in data['custom_shifts'][date]:
-            del data['custom_shifts'][date][staff_name]
-            if not data['custom_shifts'][date]:
-                del data['custom_shifts'][date]
-    
-    try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] カスタムシフト更新の保存に失敗: {str(e)}")
-        return jsonify({'error': 'カスタムシフト更新の保存に失敗しました: ' + str(e)}), 500
+    with store_lock():
+        data = load_data()
+        set_custom_shift(data, date, staff_name, custom_shifts)
+        
+        try:
+            save_data(data, touched=cell_chunk_keys(('custom_shifts',), [date]))
+        except Exception as e:
+            print(f"[ERROR] カスタムシフト更新の保存に失敗: {str(e)}")
+            return jsonify({'error': 'カスタムシフト更新の保存に失敗しました: ' + str(e)}), 500
     
+    publish_store_event('generated', date[:7], dates=[date], version=data['version'])
     return jsonify({'success': True})
 
 @app.route('/api/delete-generated-shift', methods=['POST'])
@@ -1016,13 +1736,53 @@ def delete_generated_shift():
     if not date or not staff_name:
         return jsonify({'error': 'パラメータが不足しています', 'success': False}), 400
     
-    data = load_data()
+    with store_lock():
+        data = load_data()
+        delete_generated_cell(data, date, staff_name)
+        
+        try:
+            save_data(data, touched=cell_chunk_keys(('shifts', 'manual_generated_shifts'), [date]))
+            print(f"[INFO] 生成シフト削除完了: staff={staff_name}, date={date}")
+        except Exception as e:
+            print(f"[ERROR] 生成シフト削除の保存に失敗: {str(e)}")
+            return jsonify({'error': '生成シフト削除の保存に失敗しました: ' + str(e)}), 500
     
-    # カスタムシフトを事前に保存（削除対象ではない）
-    preserved_custom_shifts = None
-    if 'custom_shifts' in data and date in data['custom_shifts'] and staff_name in data['custom_shifts'][date]:
-        preserved_custom_shifts = data['custom_shifts'][date][staff_name].copy()
+    publish_store_event('generated', date[:7], dates=[date], version=data['version'])
+    return jsonify({'success': True})
+
+def set_manual_generated_shift(data, date, staff_name, shifts):
+    """生成シフト表の手作業上書きを設定"""
+    if 'manual_generated_shifts' not in data:
+        data['manual_generated_shifts'] = {}
+
+    if date not in data['manual_generated_shifts']:
+        data['manual_generated_shifts'][date] = {}
+
+    # 空配列も有効な上書き値として保存（生成結果を空にしたいケース）
+    data['manual_generated_shifts'][date][staff_name] = shifts
+    staff_index.sync_cell(data, 'manual_generated_shifts', date, staff_name)
+
+def set_custom_shift(data, date, staff_name, custom_shifts):
+    """自由入力シフトを設定（空なら削除）"""
+    # custom_shiftsキーが存在しない場合は初期化
+    if 'custom_shifts' not in data:
+        data['custom_shifts'] = {}
     
+    if custom_shifts:
+        # 日付キーが存在しない場合は初期化
+        if date not in data['custom_shifts']:
+            data['custom_shifts'][date] = {}
+        data['custom_shifts'][date][staff_name] = custom_shifts
+    else:
+        # 空の場合は削除
+        if date in data['custom_shifts'] and staff_name in data['custom_shifts'][date]:
+            del data['custom_shifts'][date][staff_name]
+            if not data['custom_shifts'][date]:
+                del data['custom_shifts'][date]
+    staff_index.sync_cell(data, 'custom_shifts', date, staff_name)
+
+def delete_generated_cell(data, date, staff_name):
+    """生成シフト（選択シフト）と手作業上書きを削除（カスタムシフトは保持）"""
     # 生成シフト（shifts）から削除
     if date in data['shifts'] and staff_name in data['shifts'][date]:
         del data['shifts'][date][staff_name]
@@ -1034,26 +1794,100 @@ def delete_generated_shift():
         del data['manual_generated_shifts'][date][staff_name]
         if not data['manual_generated_shifts'][date]:
             del data['manual_generated_shifts'][date]
-    
-    # カスタムシフトが保存されていたら復元（実装上は常に保持すること）
-    # ただし、上記で削除しないので実装上の余剰処理
-    
+
+    staff_index.sync_cell(data, 'shifts', date, staff_name)
+    staff_index.sync_cell(data, 'manual_generated_shifts', date, staff_name)
+
+# 生成シフト表の一括編集で使える操作
+GENERATED_BATCH_OPERATIONS = ('override', 'custom', 'delete')
+
+def validate_generated_operation(operation, staff_names):
+    """生成シフト表の一括編集の1件を検証し、(op, date, staff_name, shifts) を返す（不正ならエラーメッセージ）"""
+    if not isinstance(operation, dict):
+        return None, '形式が不正です'
+    op = operation.get('op')
+    date = operation.get('date')
+    staff_name = operation.get('staff_name')
+    shifts = operation.get('shifts') or []
+    if op not in GENERATED_BATCH_OPERATIONS:
+        return None, f'不明な操作です: {op}'
+    if not date or not staff_name:
+        return None, 'パラメータが不足しています'
     try:
-        save_data(data)
-        print(f"[INFO] 生成シフト削除完了: staff={staff_name}, date={date}, custom_shifts保持={preserved_custom_shifts is not None}")
-    except Exception as e:
-        print(f"[ERROR] 生成シフト削除の保存に失敗: {str(e)}")
-        return jsonify({'error': '生成シフト削除の保存に失敗しました: ' + str(e)}), 500
-    
-    return jsonify({'success': True})
+        parse_date(date)
+    except (TypeError, ValueError):
+        return None, f'日付の形式が正しくありません: {date}'
+    if op == 'override' and staff_name not in staff_names:
+        return None, f'スタッフが登録されていません: {staff_name}'
+    if not isinstance(shifts, list) or not all(isinstance(slot, str) for slot in shifts):
+        return None, '時間帯は文字列の配列で指定してください'
+    return (op, date, staff_name, shifts), None
+
+@app.route('/api/generated-shift/batch', methods=['POST'])
+@require_admin
+def update_generated_shift_batch():
+    """生成シフト表の上書き・自由入力・削除を一括で反映し、変更した日の充足状況を返す（管理者のみ）"""
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': '更新内容がありません', 'success': False}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'一度に更新できるのは{MAX_BATCH_OPERATIONS}件までです', 'success': False}), 400
+
+    with store_lock():
+        data = load_data()
+
+        validated = []
+        for index, operation in enumerate(operations):
+            values, error = validate_generated_operation(operation, data['staff'])
+            if error:
+                # 1件でも不正なら何も反映しない
+                return jsonify({'error': error, 'index': index, 'success': False}), 400
+            validated.append(values)
+
+        for op, date, staff_name, shifts in validated:
+            if op == 'override':
+                set_manual_generated_shift(data, date, staff_name, shifts)
+            elif op == 'custom':
+                set_custom_shift(data, date, staff_name, shifts)
+            else:
+                delete_generated_cell(data, date, staff_name)
+
+        touched = cell_chunk_keys(
+            ('shifts', 'custom_shifts', 'manual_generated_shifts'), {date for _, date, _, _ in validated}
+        )
+        try:
+            save_data(data, touched=touched)
+        except Exception as e:
+            print(f"[ERROR] 生成シフト一括編集の保存に失敗: {str(e)}")
+            return jsonify({'error': '生成シフト一括編集の保存に失敗しました: ' + str(e), 'success': False}), 500
+
+    # 変更した日のみ、上書き反映後の生成シフトで充足状況を再計算（月ごとに1回生成）
+    touched_dates = sorted({date for _, date, _, _ in validated})
+    coverage = {}
+    for month_key, dates in DateIndex(touched_dates).by_month().items():
+        year, month = (int(part) for part in month_key.split('-'))
+        final_generated = build_final_generated_shifts(data, year=year, month=month)
+        for date in dates:
+            coverage[date] = build_date_coverage(data, date, final_generated.get(date, {}))
+        publish_store_event('generated', month_key, dates=dates, version=data['version'])
+
+    print(f"[DEBUG update_generated_shift_batch] {len(validated)}件を反映, 対象日 {len(touched_dates)}日")
+    return jsonify({
+        'success': True,
+        'applied': len(validated),
+        'version': data['version'],
+        'coverage': coverage
+    })
 
 @app.route('/api/requirements/<year>/<month>', methods=['GET'])
 def get_requirements(year, month):
     """指定月の必要人数を取得"""
-    data = load_data()
     year = int(year)
     month = int(month)
-    
+    return conditional_json('requirements', lambda data: build_month_requirements_payload(data, year, month), year, month)
+
+def build_month_requirements_payload(data, year, month):
+    """指定月の必要人数レスポンスを作成"""
     # 月の日数を取得
     days_in_month = calendar.monthrange(year, month)[1]
     
@@ -1063,11 +1897,11 @@ def get_requirements(year, month):
         date_str = f"{year:04d}-{month:02d}-{day:02d}"
         month_requirements[date_str] = data['requirements'].get(date_str, {})
     
-    return jsonify({
+    return {
         'requirements': month_requirements,
         'time_slots': data.get('time_slots', get_default_time_slots()),
         'days_in_month': days_in_month
-    })
+    }
 
 @app.route('/api/requirements', methods=['POST'])
 @require_admin
@@ -1080,36 +1914,42 @@ def update_requirement():
     if not date or not time_slot:
         return jsonify({'error': 'パラメータが不足しています'}), 400
     
-    data = load_data()
-    
-    if date not in data['requirements']:
-        data['requirements'][date] = {}
-    
-    if count is not None and count != '':
+    with store_lock():
+        data = load_data()
+        
+        if date not in data['requirements']:
+            data['requirements'][date] = {}
+        
+        if count is not None and count != '':
+            try:
+                data['requirements'][date][time_slot] = int(count)
+            except ValueError:
+                return jsonify({'error': '数値を入力してください'}), 400
+        else:
+            # 空の場合は削除
+            if time_slot in data['requirements'][date]:
+                del data['requirements'][date][time_slot]
+            if not data['requirements'][date]:
+                del data['requirements'][date]
+        
         try:
-            data['requirements'][date][time_slot] = int(count)
-        except ValueError:
-            return jsonify({'error': '数値を入力してください'}), 400
-    else:
-        # 空の場合は削除
-        if time_slot in data['requirements'][date]:
-            del data['requirements'][date][time_slot]
-        if not data['requirements'][date]:
-            del data['requirements'][date]
-    
-    try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] 必要人数の保存に失敗: {str(e)}")
-        return jsonify({'error': '必要人数の保存に失敗しました: ' + str(e)}), 500
+            save_data(data, touched=cell_chunk_keys(('requirements',), [date]))
+        except Exception as e:
+            print(f"[ERROR] 必要人数の保存に失敗: {str(e)}")
+            return jsonify({'error': '必要人数の保存に失敗しました: ' + str(e)}), 500
     
+    publish_store_event('requirement', date[:7], date=date, time_slot=time_slot,
+                        count=data['requirements'].get(date, {}).get(time_slot), version=data['version'])
     return jsonify({'success': True})
 
 @app.route('/api/shift-settings', methods=['GET'])
 @require_admin
 def get_shift_settings():
     """シフト詳細設定を取得（管理者のみ）"""
-    data = load_data()
+    return jsonify(build_shift_settings_payload(load_data()))
+
+def build_shift_settings_payload(data):
+    """シフト詳細設定（正規化済みの設定・時間帯・スタッフ種別・モード）"""
     time_slots = data.get('time_slots', get_default_time_slots())
     staff_types = get_staff_types(data, data.get('shift_settings'))
     raw_settings = data.get('shift_settings', get_default_shift_settings())
@@ -1118,14 +1958,14 @@ def get_shift_settings():
     # モード情報を追加
     mode = raw_settings.get('mode', 'weekday_weekend') if isinstance(raw_settings, dict) else 'weekday_weekend'
     
-    return jsonify({
+    return {
         'success': True,
         'settings': settings,
         'time_slots': time_slots,
         'staff_types': staff_types,
         'mode': mode,
         'raw_settings': raw_settings
-    })
+    }
 
 @app.route('/api/shift-settings', methods=['POST'])
 @require_admin
@@ -1137,35 +1977,40 @@ def update_shift_settings():
     if not raw_settings:
         return jsonify({'error': '設定データが不足しています'}), 400
     
-    data = load_data()
-    time_slots = data.get('time_slots', get_default_time_slots())
-    staff_types = get_staff_types(data, raw_settings)
-    
-    # 既存の設定から現在のモード以外のデータを保持
-    existing_settings = data.get('shift_settings', {})
-    if not isinstance(existing_settings, dict):
-        existing_settings = {}
-    
-    # 元の設定構造を保存（mode + weekday_weekend or daily or weekday_weekend_with_holidays）
-    # 現在のモードのデータのみを更新し、他のモードのデータは保持する
-    updated_settings = {
-        'mode': mode,
-        'weekday_weekend': existing_settings.get('weekday_weekend', get_default_shift_settings().get('weekday_weekend', {})),
-        'daily': existing_settings.get('daily', get_default_shift_settings().get('daily', {})),
-        'weekday_weekend_with_holidays': existing_settings.get('weekday_weekend_with_holidays', {})
-    }
-    
-    # 現在のモードのデータのみを上書き
-    if mode == 'weekday_weekend_with_holidays':
-        updated_settings['weekday_weekend_with_holidays'] = raw_settings.get('weekday_weekend_with_holidays', {})
-    elif mode == 'daily':
-        updated_settings['daily'] = raw_settings.get('daily', {})
-    else:  # weekday_weekend
-        updated_settings['weekday_weekend'] = raw_settings.get('weekday_weekend', {})
-    
-    data['shift_settings'] = updated_settings
-    save_data(data)
+    with store_lock():
+        data = load_data()
+        time_slots = data.get('time_slots', get_default_time_slots())
+        staff_types = get_staff_types(data, raw_settings)
+        
+        # 既存の設定から現在のモード以外のデータを保持
+        existing_settings = data.get('shift_settings', {})
+        if not isinstance(existing_settings, dict):
+            existing_settings = {}
+        
+        # 元の設定構造を保存（mode + weekday_weekend or daily or weekday_weekend_with_holidays）
+        # 現在のモードのデータのみを更新し、他のモードのデータは保持する
+        updated_settings = {
+            'mode': mode,
+            'weekday_weekend': existing_settings.get('weekday_weekend', get_default_shift_settings().get('weekday_weekend', {})),
+            'daily': existing_settings.get('daily', get_default_shift_settings().get('daily', {})),
+            'weekday_weekend_with_holidays': existing_settings.get('weekday_weekend_with_holidays', {})
+        }
+        # 休業日は別画面で管理するため保持
+        if existing_settings.get('closed_days'):
+            updated_settings['closed_days'] = existing_settings['closed_days']
+        
+        # 現在のモードのデータのみを上書き
+        if mode == 'weekday_weekend_with_holidays':
+            updated_settings['weekday_weekend_with_holidays'] = raw_settings.get('weekday_weekend_with_holidays', {})
+        elif mode == 'daily':
+            updated_settings['daily'] = raw_settings.get('daily', {})
+        else:  # weekday_weekend
+            updated_settings['weekday_weekend'] = raw_settings.get('weekday_weekend', {})
+        
+        data['shift_settings'] = updated_settings
+        save_data(data)
     
+    publish_store_event('reload', version=data['version'])
     return jsonify({'success': True})
 
 @app.route('/api/time-slots', methods=['GET'])
@@ -1185,42 +2030,88 @@ def update_time_slots():
     if not time_slots or not isinstance(time_slots, list):
         return jsonify({'error': '時間帯データが不正です'}), 400
     
-    data = load_data()
-    
-    # 古い時間帯データとの整合性を保つため、shift_settingsも更新
-    old_slots = data.get('time_slots', [])
-    staff_types = get_staff_types(data, data.get('shift_settings'))
-    new_settings = normalize_shift_settings(
-        data.get('shift_settings', get_default_shift_settings()),
-        time_slots,
-        staff_types
-    )
+    with store_lock():
+        data = load_data()
+        
+        # 古い時間帯データとの整合性を保つため、shift_settingsも更新
+        old_slots = data.get('time_slots', [])
+        staff_types = get_staff_types(data, data.get('shift_settings'))
+        new_settings = normalize_shift_settings(
+            data.get('shift_settings', get_default_shift_settings()),
+            time_slots,
+            staff_types
+        )
 
-    # 追加された時間帯にデフォルト値を入れる
-    new_slots = [slot for slot in time_slots if slot not in old_slots]
-    if new_slots:
+        # 追加された時間帯にデフォルト値を入れる
+        new_slots = [slot for slot in time_slots if slot not in old_slots]
+        if new_slots:
+            for day_type in ['weekday', 'weekend']:
+                for slot in new_slots:
+                    slot_settings = new_settings.get(day_type, {}).get(slot, {})
+                    for staff_type in staff_types:
+                        if staff_type in ['社員', 'アルバイト'] and slot_settings.get(staff_type, 0) == 0:
+                            slot_settings[staff_type] = 1
+        
+        # 削除された時間帯の設定を削除
         for day_type in ['weekday', 'weekend']:
-            for slot in new_slots:
-                slot_settings = new_settings.get(day_type, {}).get(slot, {})
-                for staff_type in staff_types:
-                    if staff_type in ['社員', 'アルバイト'] and slot_settings.get(staff_type, 0) == 0:
-                        slot_settings[staff_type] = 1
+            slots_to_remove = [s for s in new_settings.get(day_type, {}).keys() if s not in time_slots]
+            for slot in slots_to_remove:
+                del new_settings[day_type][slot]
+        
+        # 休業日は時間帯と無関係なので保持
+        closed_days = data.get('shift_settings', {}).get('closed_days') if isinstance(data.get('shift_settings'), dict) else None
+        if closed_days:
+            new_settings['closed_days'] = closed_days
+        
+        data['time_slots'] = time_slots
+        data['shift_settings'] = new_settings
+        try:
+            save_data(data)
+        except Exception as e:
+            print(f"[ERROR] 時間帯の保存に失敗: {str(e)}")
+            return jsonify({'error': '時間帯の保存に失敗しました: ' + str(e)}), 500
+    
+    publish_store_event('reload', version=data['version'])
+    return jsonify({'success': True})
+
+@app.route('/api/closed-days', methods=['GET'])
+@require_admin
+def get_closed_days():
+    """店舗の休業日リストを取得（管理者のみ）"""
+    data = load_data()
+    settings = data.get('shift_settings', {})
+    closed_days = settings.get('closed_days', []) if isinstance(settings, dict) else []
+    return jsonify({'success': True, 'closed_days': sorted(closed_days)})
+
+@app.route('/api/closed-days', methods=['POST'])
+@require_admin
+def update_closed_days():
+    """店舗の休業日リストを更新（管理者のみ）"""
+    closed_days = request.json.get('closed_days') if request.json else None
     
-    # 削除された時間帯の設定を削除
-    for day_type in ['weekday', 'weekend']:
-        slots_to_remove = [s for s in new_settings.get(day_type, {}).keys() if s not in time_slots]
-        for slot in slots_to_remove:
-            del new_settings[day_type][slot]
+    if not isinstance(closed_days, list):
+        return jsonify({'error': '休業日データが不正です'}), 400
     
-    data['time_slots'] = time_slots
-    data['shift_settings'] = new_settings
-    try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] 時間帯の保存に失敗: {str(e)}")
-        return jsonify({'error': '時間帯の保存に失敗しました: ' + str(e)}), 500
+    for date_str in closed_days:
+        try:
+            parse_date(date_str)
+        except (TypeError, ValueError):
+            return jsonify({'error': f'日付の形式が不正です: {date_str}'}), 400
     
-    return jsonify({'success': True})
+    with store_lock():
+        data = load_data()
+        if not isinstance(data.get('shift_settings'), dict):
+            data['shift_settings'] = get_default_shift_settings()
+        data['shift_settings']['closed_days'] = sorted(set(closed_days))
+        
+        try:
+            save_data(data)
+        except Exception as e:
+            print(f"[ERROR] 休業日の保存に失敗: {str(e)}")
+            return jsonify({'error': '休業日の保存に失敗しました: ' + str(e)}), 500
+    
+    publish_store_event('reload', version=data['version'])
+    return jsonify({'success': True, 'closed_days': data['shift_settings']['closed_days']})
 
 @app.route('/api/change-password', methods=['POST'])
 @require_admin
@@ -1240,37 +2131,37 @@ def change_password():
     if len(new_password) < 4:
         return jsonify({'error': 'パスワードは4文字以上にしてください'}), 400
     
-    data = load_data()
-    print(f"[DEBUG change_password] データ読み込み完了")
-    
-    # 現在のパスワード確認
-    current_stored_password = data.get('admin_password', ADMIN_PASSWORD)
-    print(f"[DEBUG change_password] 現在保存されているパスワード: {current_stored_password[:2]}...")
-    
-    if current_password != current_stored_password:
-        print(f"[ERROR change_password] パスワード不一致")
-        return jsonify({'error': '現在のパスワードが違います'}), 401
-    
-    # 新しいパスワードを保存
-    print(f"[DEBUG change_password] パスワード変更前: {data.get('admin_password', '')[:2]}...")
-    data['admin_password'] = new_password
-    print(f"[DEBUG change_password] パスワード変更後: {data.get('admin_password', '')[:2]}...")
-    
-    try:
-        save_data(data)
-        print(f"[DEBUG change_password] ✅ パスワード保存成功")
+    with store_lock():
+        data = load_data()
+        print(f"[DEBUG change_password] データ読み込み完了")
         
-        # 保存後、実際にファイルから読み込んで確認
-        store_code = session.get('store_code', 'default')
-        data_file = get_store_data_file(store_code)
-        with open(data_file, 'r', encoding='utf-8') as f:
-            verify_data = json.load(f)
-        print(f"[DEBUG change_password] 保存後の確認 - ファイルのパスワード: {verify_data.get('admin_password', '')[:2]}...")
-    except Exception as e:
-        print(f"[ERROR change_password] パスワード変更の保存に失敗: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': 'パスワード変更の保存に失敗しました: ' + str(e)}), 500
+        # 現在のパスワード確認
+        current_stored_password = data.get('admin_password', ADMIN_PASSWORD)
+        print(f"[DEBUG change_password] 現在保存されているパスワード: {current_stored_password[:2]}...")
+        
+        if current_password != current_stored_password:
+            print(f"[ERROR change_password] パスワード不一致")
+            return jsonify({'error': '現在のパスワードが違います'}), 401
+        
+        # 新しいパスワードを保存
+        print(f"[DEBUG change_password] パスワード変更前: {data.get('admin_password', '')[:2]}...")
+        data['admin_password'] = new_password
+        print(f"[DEBUG change_password] パスワード変更後: {data.get('admin_password', '')[:2]}...")
+        
+        try:
+            save_data(data)
+            print(f"[DEBUG change_password] ✅ パスワード保存成功")
+            
+            # 保存後、実際にファイルから読み込んで確認
+            store_code = session.get('store_code', 'default')
+            data_file = get_store_data_file(store_code)
+            verify_data = read_json_file(data_file)
+            print(f"[DEBUG change_password] 保存後の確認 - ファイルのパスワード: {verify_data.get('admin_password', '')[:2]}...")
+        except Exception as e:
+            print(f"[ERROR change_password] パスワード変更の保存に失敗: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return jsonify({'error': 'パスワード変更の保存に失敗しました: ' + str(e)}), 500
     
     return jsonify({'success': True, 'message': 'パスワードを変更しました'})
 
@@ -1286,21 +2177,16 @@ def generate_shift():
     force_regenerate = request.args.get('force_regenerate', default='0') == '1'
     
     # 日付を収集してソート（通常シフト + 自由入力シフト）
-    dates = sorted(set(list(data['shifts'].keys()) + list(data.get('custom_shifts', {}).keys())))
+    date_index = get_store_date_index(session.get('store_code', 'default'), data, 'shifts', 'custom_shifts')
     
-    if not dates:
+    if not date_index:
         return jsonify([])
     
     # 年月が指定されている場合、その月のみにフィルタリング
     if year is not None and month is not None:
-        filtered_dates = []
-        for date_str in dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            if date_obj.year == year and date_obj.month == month:
-                filtered_dates.append(date_str)
-        dates = filtered_dates
-    
-    if not dates:
+        date_index = date_index.month_index(year, month)
+    
+    if not date_index:
         return jsonify([])
     
     # シフトを最適化し、手作業上書きを反映
@@ -1312,19 +2198,21 @@ def generate_shift():
     )
     
     # 月別にグループ化
-    monthly_data = {}
-    for date_str in dates:
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        month_key = f"{date_obj.year}-{date_obj.month:02d}"
-        if month_key not in monthly_data:
-            monthly_data[month_key] = []
-        monthly_data[month_key].append(date_str)
+    monthly_data = date_index.by_month()
     
     result = []
+    time_slots = data.get('time_slots', get_default_time_slots())
+    settings = data.get('shift_settings', get_default_shift_settings())
+    staff_types = get_staff_types(data, settings)
+    slot_index = SlotIndex(time_slots)
+    type_ids = {staff_type: i for i, staff_type in enumerate(staff_types)}
+    # format=compact: 時間帯をビットマスクで返す（ブラウザで安全に扱える時間帯数の場合のみ）
+    compact = request.args.get('format') == 'compact' and len(slot_index) <= COMPACT_MAX_SLOTS
+    wire_type_ids = dict(type_ids)  # compact 形式のスタッフ種別番号（未知の種別は追加される）
     
     for month_key, month_dates in sorted(monthly_data.items()):
         # 月の情報
-        first_date = datetime.strptime(month_dates[0], '%Y-%m-%d')
+        first_date = parse_date(month_dates[0])
         month_info = {
             'month': f"{first_date.year}年{first_date.month}月",
             'dates': [],
@@ -1335,45 +2223,17 @@ def generate_shift():
         # 日付情報（日、曜日）
         weekday_names = ['月', '火', '水', '木', '金', '土', '日']
         for date_str in month_dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            weekday_jp = weekday_names[date_obj.weekday()]
-            
-            # この日の充足状況をチェック
-            is_insufficient = False
-            time_slots = data.get('time_slots', get_default_time_slots())
-            settings = data.get('shift_settings', get_default_shift_settings())
-            staff_types = get_staff_types(data, settings)
+            date_obj = parse_date(date_str)
+            weekday_jp = weekday_names[date_obj.weekday]
             
-            for time_slot in time_slots:
-                required_by_type = {}
-                assigned_by_type = {staff_type: 0 for staff_type in staff_types}
-                
-                for staff_type in staff_types:
-                    required_by_type[staff_type] = get_required_staff(
-                        date_str,
-                        time_slot,
-                        staff_type,
-                        settings
-                    )
-                
-                # 実際に入っている人数を計算（時間帯包含を考慮）
-                shifts = optimized_shifts.get(date_str, {})
-                for staff_name, slots in shifts.items():
-                    covered = get_covered_slots(slots)
-                    if time_slot in covered:
-                        staff_info = data['staff'].get(staff_name, {})
-                        staff_type = staff_info.get('type', 'アルバイト')
-                        if staff_type in assigned_by_type:
-                            assigned_by_type[staff_type] += 1
-                
-                # 不足をチェック
-                for staff_type in staff_types:
-                    if assigned_by_type[staff_type] < required_by_type[staff_type]:
-                        is_insufficient = True
-                        break
-                
-                if is_insufficient:
-                    break
+            # この日の充足状況をチェック（実際に入っている人数は時間帯包含を考慮）
+            required = get_required_matrix(date_str, slot_index.slots, staff_types, settings)
+            assigned = count_coverage(optimized_shifts.get(date_str, {}), slot_index, type_ids, data['staff'])
+            is_insufficient = any(
+                assigned_count < required_count
+                for required_row, assigned_row in zip(required, assigned)
+                for required_count, assigned_count in zip(required_row, assigned_row)
+            )
             
             month_info['dates'].append({
                 'date': date_str,
@@ -1393,6 +2253,12 @@ def generate_shift():
         
         staff_list = sorted(staff_set)
         
+        if compact:
+            result.append(build_compact_generated_month(
+                data, optimized_shifts, month_key, month_info, month_dates, staff_list, slot_index, wire_type_ids
+            ))
+            continue
+        
         # 各スタッフのシフトを表形式に（最適化されたシフトを使用）
         for staff_name in staff_list:
             staff_info = data['staff'].get(staff_name, {})
@@ -1405,34 +2271,104 @@ def generate_shift():
             }
             
             for date_str in month_dates:
-                time_slots = []
-                if date_str in optimized_shifts and staff_name in optimized_shifts[date_str]:
-                    time_slots = optimized_shifts[date_str][staff_name]
+                time_slots, input_slots, custom_slots = get_generated_cell(
+                    data, optimized_shifts, date_str, staff_name, slot_index
+                )
                 row['shifts'].append(time_slots)
-                
-                # 入力されたシフト希望（最適化前）を取得
-                input_slots = []
-                if date_str in data['shifts'] and staff_name in data['shifts'][date_str]:
-                    input_slots = data['shifts'][date_str][staff_name]
                 row['input_shifts'].append(input_slots)
-                
-                # 自由入力シフトを抽出（時間帯リストに存在しない）
-                custom_slots = []
-                if date_str in data.get('custom_shifts', {}) and staff_name in data['custom_shifts'][date_str]:
-                    custom_slots = data['custom_shifts'][date_str][staff_name]
-                elif date_str in data['shifts'] and staff_name in data['shifts'][date_str]:
-                    # 旧データ互換: custom_shifts導入前はshifts内の未定義時間帯を自由入力として扱う
-                    all_slots = data['shifts'][date_str][staff_name]
-                    time_slots_list = data.get('time_slots', get_default_time_slots())
-                    custom_slots = [s for s in all_slots if s not in time_slots_list]
                 row['custom_shifts'].append(custom_slots)
             
             month_info['staff_list'].append(row)
         
         result.append(month_info)
     
+    if compact:
+        return jsonify({
+            'format': 'compact',
+            'slots': slot_index.slots,
+            'types': list(wire_type_ids),
+            'months': result
+        })
     return jsonify(result)
 
+def get_generated_cell(data, optimized_shifts, date_str, staff_name, slot_index):
+    """生成表の1セル分の (選択シフト, 入力されたシフト希望, 自由入力シフト) を返す"""
+    time_slots = []
+    if date_str in optimized_shifts and staff_name in optimized_shifts[date_str]:
+        time_slots = optimized_shifts[date_str][staff_name]
+    
+    # 入力されたシフト希望（最適化前）を取得
+    input_slots = []
+    if date_str in data['shifts'] and staff_name in data['shifts'][date_str]:
+        input_slots = data['shifts'][date_str][staff_name]
+    
+    # 自由入力シフトを抽出（時間帯リストに存在しない）
+    custom_slots = []
+    if date_str in data.get('custom_shifts', {}) and staff_name in data['custom_shifts'][date_str]:
+        custom_slots = data['custom_shifts'][date_str][staff_name]
+    elif date_str in data['shifts'] and staff_name in data['shifts'][date_str]:
+        # 旧データ互換: custom_shifts導入前はshifts内の未定義時間帯を自由入力として扱う
+        all_slots = data['shifts'][date_str][staff_name]
+        custom_slots = [s for s in all_slots if s not in slot_index.positions]
+    
+    return time_slots, input_slots, custom_slots
+
+# compact 形式のビットマスクは JavaScript の安全な整数（2^53 未満）に収める
+COMPACT_MAX_SLOTS = 52
+
+def build_compact_generated_month(data, optimized_shifts, month_key, month_info, month_dates, staff_list, slot_index, type_ids):
+    """1か月分の生成表を compact 形式にする
+
+    shifts / input_shifts: スタッフ×日付（行優先）のビットマスクの配列
+    custom: 自由入力シフトがあるセルのみ [スタッフ番号, 日付番号, 時間帯リスト]
+    extras: ビットマスクで表せないセル（順序・時間帯リストにない値）は [0=shifts/1=input_shifts, スタッフ番号, 日付番号, 値]
+    """
+    shift_masks = []
+    input_masks = []
+    custom = []
+    extras = []
+    staff_rows = []
+
+    for row, staff_name in enumerate(staff_list):
+        staff_type = data['staff'].get(staff_name, {}).get('type', 'アルバイト')  # 未登録スタッフはアルバイト扱い
+        if staff_type not in type_ids:
+            type_ids[staff_type] = len(type_ids)
+        staff_rows.append([staff_name, type_ids[staff_type]])
+
+        for column, date_str in enumerate(month_dates):
+            time_slots, input_slots, custom_slots = get_generated_cell(
+                data, optimized_shifts, date_str, staff_name, slot_index
+            )
+            for field, slots, masks in ((0, time_slots, shift_masks), (1, input_slots, input_masks)):
+                mask = encode_exact_mask(slot_index, slots)
+                if mask is None:
+                    extras.append([field, row, column, slots])
+                    mask = 0
+                masks.append(mask)
+            if custom_slots:
+                custom.append([row, column, custom_slots])
+
+    return {
+        'month': month_info['month'],
+        'key': month_key,
+        'days': [info['day'] for info in month_info['dates']],
+        'insufficient': [info['day'] for info in month_info['dates'] if info['insufficient']],
+        'staff': staff_rows,
+        'shifts': shift_masks,
+        'input_shifts': input_masks,
+        'custom': custom,
+        'extras': extras
+    }
+
+def encode_exact_mask(slot_index, slots):
+    """時間帯リストをビットマスクにする（元のリストに正確に戻せない場合は None）"""
+    if not slots:
+        return 0
+    mask, extras = slot_index.encode(slots)
+    if extras is None and slot_index.decode(mask) == slots:
+        return mask
+    return None
+
 @app.route('/api/generated-shift/status', methods=['GET'])
 @require_admin
 def generated_shift_status():
@@ -1447,6 +2383,10 @@ def generated_shift_status():
         return jsonify({'success': False, 'error': '月の指定が不正です'}), 400
 
     data = load_data()
+    return jsonify(build_generated_status_payload(data, year, month))
+
+def build_generated_status_payload(data, year, month):
+    """指定月の生成シフト保存状態（下書き/確定）"""
     month_key = f"{year:04d}-{month:02d}"
 
     draft_entry = data.get('generated_shift_drafts', {}).get(month_key, {})
@@ -1455,14 +2395,77 @@ def generated_shift_status():
     has_draft = isinstance(draft_entry, dict) and bool(draft_entry.get('shifts'))
     has_confirmed = isinstance(confirmed_entry, dict) and bool(confirmed_entry.get('shifts'))
 
-    return jsonify({
+    return {
         'success': True,
         'month': month_key,
         'has_draft': has_draft,
         'draft_saved_at': draft_entry.get('saved_at') if isinstance(draft_entry, dict) else None,
         'has_confirmed': has_confirmed,
         'confirmed_at': confirmed_entry.get('confirmed_at') if isinstance(confirmed_entry, dict) else None
-    })
+    }
+
+def build_month_assignment_summary(data, month_key):
+    """1か月分の最終生成シフトを作り、配置状況を集計する（最適化は日ごとに独立なので対象月だけ行う）"""
+    year, month = int(month_key[:4]), int(month_key[5:7])
+    month_data = store_export.filter_months(data, month_key, month_key)
+    final_shifts = build_final_generated_shifts(month_data, year, month)
+    settings = data.get('shift_settings', get_default_shift_settings())
+    staff_types = get_staff_types(data, settings)
+
+    def required_matrix(date_str, time_slots, types):
+        return get_required_matrix(date_str, time_slots, types, settings)
+
+    return store_summary.summarize_assignments(month_data, month_key, final_shifts, staff_types, required_matrix)
+
+def get_materialized_month_summary(store_code, month_key, version=None):
+    """店舗の月の配置状況 (バージョン, 集計)（保存済みならそのまま、なければ1か月分だけ計算して保存）"""
+    data_file = get_store_data_file(store_code)
+    if version is not None:
+        summary = month_summary.get_month_summary(data_file, version, month_key)
+        if summary is not None:
+            return version, summary
+
+    data = load_data(store_code)
+    version = data.get('version', 0)
+    summary = month_summary.get_month_summary(data_file, version, month_key)
+    if summary is None:
+        summary = build_month_assignment_summary(data, month_key)
+        if os.path.exists(data_file):
+            month_summary.put_month_summary(data_file, version, month_key, summary)
+    return version, summary
+
+@app.route('/api/month-summary', methods=['GET'])
+@require_admin
+def get_month_summary():
+    """指定月の配置状況（不足日・時間帯ごとの必要/配置人数・スタッフごとの出勤数）（管理者のみ）
+
+    保存済みの集計を返し、保存で無効になった月だけ最初の読み込み時に計算し直す。
+    """
+    year = request.args.get('year', type=int)
+    month = request.args.get('month', type=int)
+
+    if year is None or month is None:
+        return jsonify({'success': False, 'error': '年月が必要です'}), 400
+
+    if month < 1 or month > 12:
+        return jsonify({'success': False, 'error': '月の指定が不正です'}), 400
+
+    store_code = session.get('store_code', 'default')
+    month_key = f"{year:04d}-{month:02d}"
+    version = get_store_version(store_code)
+    if version is None:
+        meta = load_store_meta(store_code)
+        version = meta['version'] if meta is not None else None
+    if version is not None:
+        matched = compression.match_etag(make_store_etag(store_code, version, 'month-summary', month_key))
+        if matched:
+            return not_modified_response(matched)
+
+    version, summary = get_materialized_month_summary(store_code, month_key, version)
+    response = jsonify({'success': True, 'version': version, **summary})
+    response.set_etag(make_store_etag(store_code, version, 'month-summary', month_key))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/api/generated-shift/temp-save', methods=['POST'])
 @require_admin
@@ -1480,28 +2483,31 @@ def temp_save_generated_shift():
     if month < 1 or month > 12:
         return jsonify({'success': False, 'error': '月の指定が不正です'}), 400
 
-    data = load_data()
-    final_generated = build_final_generated_shifts(data, year=year, month=month, force_regenerate=False)
-    month_shifts = extract_month_generated_shifts(final_generated, year, month)
+    with store_lock():
+        data = load_data()
+        final_generated = build_final_generated_shifts(data, year=year, month=month, force_regenerate=False)
+        month_shifts = extract_month_generated_shifts(final_generated, year, month)
 
-    if not month_shifts:
-        return jsonify({'success': False, 'error': '一時保存対象の生成シフトがありません'}), 400
+        if not month_shifts:
+            return jsonify({'success': False, 'error': '一時保存対象の生成シフトがありません'}), 400
 
-    if 'generated_shift_drafts' not in data:
-        data['generated_shift_drafts'] = {}
+        if 'generated_shift_drafts' not in data:
+            data['generated_shift_drafts'] = {}
 
-    month_key = f"{year:04d}-{month:02d}"
-    data['generated_shift_drafts'][month_key] = {
-        'saved_at': datetime.now().isoformat(timespec='seconds'),
-        'shifts': month_shifts
-    }
+        month_key = f"{year:04d}-{month:02d}"
+        data['generated_shift_drafts'][month_key] = {
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+            'shifts': month_shifts
+        }
+        staff_index.reindex_month(data, 'generated_shift_drafts', month_key)
 
-    try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] 生成シフト一時保存の保存に失敗: {str(e)}")
-        return jsonify({'success': False, 'error': '生成シフト一時保存に失敗しました: ' + str(e)}), 500
+        try:
+            save_data(data, touched=cell_chunk_keys(('generated_shift_drafts',), [month_key]))
+        except Exception as e:
+            print(f"[ERROR] 生成シフト一時保存の保存に失敗: {str(e)}")
+            return jsonify({'success': False, 'error': '生成シフト一時保存に失敗しました: ' + str(e)}), 500
 
+    publish_store_event('draft_saved', month_key, version=data['version'])
     return jsonify({
         'success': True,
         'month': month_key,
@@ -1524,37 +2530,40 @@ def confirm_generated_shift():
     if month < 1 or month > 12:
         return jsonify({'success': False, 'error': '月の指定が不正です'}), 400
 
-    data = load_data()
-    month_key = f"{year:04d}-{month:02d}"
+    with store_lock():
+        data = load_data()
+        month_key = f"{year:04d}-{month:02d}"
 
-    draft_entry = data.get('generated_shift_drafts', {}).get(month_key, {})
-    month_shifts = draft_entry.get('shifts') if isinstance(draft_entry, dict) else None
+        draft_entry = data.get('generated_shift_drafts', {}).get(month_key, {})
+        month_shifts = draft_entry.get('shifts') if isinstance(draft_entry, dict) else None
 
-    # 一時保存が未作成の場合は、現時点の生成結果を直接確定
-    if not month_shifts:
-        final_generated = build_final_generated_shifts(data, year=year, month=month, force_regenerate=False)
-        month_shifts = extract_month_generated_shifts(final_generated, year, month)
+        # 一時保存が未作成の場合は、現時点の生成結果を直接確定
+        if not month_shifts:
+            final_generated = build_final_generated_shifts(data, year=year, month=month, force_regenerate=False)
+            month_shifts = extract_month_generated_shifts(final_generated, year, month)
 
-    if not month_shifts:
-        return jsonify({'success': False, 'error': '確定対象の生成シフトがありません'}), 400
+        if not month_shifts:
+            return jsonify({'success': False, 'error': '確定対象の生成シフトがありません'}), 400
 
-    if 'confirmed_generated_shifts' not in data:
-        data['confirmed_generated_shifts'] = {}
+        if 'confirmed_generated_shifts' not in data:
+            data['confirmed_generated_shifts'] = {}
 
-    data['confirmed_generated_shifts'][month_key] = {
-        'confirmed_at': datetime.now().isoformat(timespec='seconds'),
-        'shifts': month_shifts
-    }
+        data['confirmed_generated_shifts'][month_key] = {
+            'confirmed_at': datetime.now().isoformat(timespec='seconds'),
+            'shifts': month_shifts
+        }
+        staff_index.reindex_month(data, 'confirmed_generated_shifts', month_key)
 
-    # 確定結果を生成表に反映（以降の表示で再現される）
-    replace_month_manual_generated_shifts(data, year, month, month_shifts)
+        # 確定結果を生成表に反映（以降の表示で再現される）
+        replace_month_manual_generated_shifts(data, year, month, month_shifts)
 
-    try:
-        save_data(data)
-    except Exception as e:
-        print(f"[ERROR] 生成シフト確定の保存に失敗: {str(e)}")
-        return jsonify({'success': False, 'error': '生成シフト確定に失敗しました: ' + str(e)}), 500
+        try:
+            save_data(data)
+        except Exception as e:
+            print(f"[ERROR] 生成シフト確定の保存に失敗: {str(e)}")
+            return jsonify({'success': False, 'error': '生成シフト確定に失敗しました: ' + str(e)}), 500
 
+    publish_store_event('confirmed', month_key, version=data['version'])
     return jsonify({
         'success': True,
         'month': month_key,
@@ -1562,125 +2571,89 @@ def confirm_generated_shift():
     })
 
 def optimize_shifts(data):
-    """時間帯包含を考慮してシフトを最適化（詳細設定に従って社員・アルバイトを配置）"""
+    """時間帯包含を考慮してシフトを最適化（詳細設定に従って社員・アルバイトを配置）
+
+    希望はスタッフID・時間帯ビットマスクに変換して処理する（shift_model 参照）
+    """
     optimized = {}
     settings = data.get('shift_settings', get_default_shift_settings())
     staff_types = get_staff_types(data, settings)
     time_slots = data.get('time_slots', get_default_time_slots())
-    change_map = build_shift_change_map(time_slots)
-    
-    for date_str, shifts in data['shifts'].items():
-        optimized[date_str] = {}
-        
-        # 各時間帯の必要人数と現在の配置を確認
-        time_slot_needs = {}
-        for time_slot in time_slots:
-            required_by_type = {}
-            assigned_by_type = {}
-            for staff_type in staff_types:
-                required_by_type[staff_type] = get_required_staff(
-                    date_str,
-                    time_slot,
-                    staff_type,
-                    settings
-                )
-                assigned_by_type[staff_type] = []
 
-            time_slot_needs[time_slot] = {
-                'required_by_type': required_by_type,
-                'assigned_by_type': assigned_by_type
-            }
-        
-        # スタッフを種別ごとに分類（社員優先）
-        staff_by_type = {}
-        for staff_type in staff_types:
-            staff_by_type[staff_type] = []
-        
-        for staff_name, slots in shifts.items():
-            staff_info = data['staff'].get(staff_name, {})
-            staff_type = staff_info.get('type', 'アルバイト')
-            if slots:  # 希望時間帯がある場合のみ
-                # スロットを選択シフトと自由入力シフトに分離
-                selected_slots = [s for s in slots if s in time_slots]  # 時間帯リストに存在するシフト
-                
-                # 選択シフトのみを配置処理の対象にする
-                if selected_slots:
-                    staff_by_type[staff_type].append((staff_name, selected_slots))
-        
-        # 社員を優先的に配置（複数の時間帯を選択可能）
-        for staff_type in ['社員'] + [t for t in staff_types if t != '社員']:
-            for staff_name, slots in staff_by_type.get(staff_type, []):
-                for slot in slots:
-                    # この時間帯がカバーする時間帯をチェック
-                    covered = get_covered_slots([slot])
-                    
-                    best_slot = slot
-                    can_use = False
-                    
+    slot_index = SlotIndex(time_slots)
+    slot_count = len(slot_index)
+    slot_names = slot_index.slots
+    requests = ShiftRequests.from_json(data['shifts'], slot_index)
+    staff_names = requests.staff.names
+
+    type_ids = {staff_type: i for i, staff_type in enumerate(staff_types)}
+    staff_type_ids = requests.staff_type_ids(data['staff'], type_ids)
+    # 社員を優先的に配置し、残りの種別は表示順で配置
+    type_order = [type_ids[t] for t in ['社員'] + [t for t in staff_types if t != '社員'] if t in type_ids]
+    fixed_type_id = type_ids.get('社員')
+
+    for date_str, day in requests.dates.items():
+        required = get_required_matrix(date_str, slot_names, staff_types, settings)
+        assigned = [[0] * len(staff_types) for _ in range(slot_count)]
+
+        # スタッフを種別ごとに分類（入力順を保持）
+        rows_by_type = [[] for _ in staff_types]
+        for row, (staff_id, mask) in enumerate(day.entries()):
+            type_id = staff_type_ids[staff_id]
+            if mask and type_id >= 0:  # 時間帯リストに存在する希望がある場合のみ
+                rows_by_type[type_id].append((row, staff_id, mask))
+
+        day_result = {}
+        for type_id in type_order:
+            for row, staff_id, mask in rows_by_type[type_id]:
+                placed = 0
+                # 希望の時間帯は保存されている並び順に配置する（結果の並びも同じ順になる）
+                for position in day.positions(row, mask):
+                    best_position = None
+
                     # まず元の時間帯で使用可能かチェック
-                    all_covered_ok = True
-                    for covered_slot in covered:
-                        slot_needs = time_slot_needs.get(covered_slot, {})
-                        assigned = slot_needs.get('assigned_by_type', {}).get(staff_type, [])
-                        required = slot_needs.get('required_by_type', {}).get(staff_type, 0)
-                        if len(assigned) >= required:
-                            all_covered_ok = False
-                            break
-                    
-                    if all_covered_ok:
-                        # 元の時間帯で問題なし
-                        can_use = True
-                        best_slot = slot
-                    else:
-                        # アルバイトの場合のみ時間変更を試みる（社員は固定）
-                        if staff_type != '社員' and slot in change_map:
-                            for alternative_slot in change_map[slot]:
-                                alt_covered = get_covered_slots([alternative_slot])
-                                alt_ok = True
-                                for covered_slot in alt_covered:
-                                    slot_needs = time_slot_needs.get(covered_slot, {})
-                                    assigned = slot_needs.get('assigned_by_type', {}).get(staff_type, [])
-                                    required = slot_needs.get('required_by_type', {}).get(staff_type, 0)
-                                    if len(assigned) >= required:
-                                        alt_ok = False
-                                        break
-                                
-                                if alt_ok:
-                                    # この代替時間帯が使える
-                                    can_use = True
-                                    best_slot = alternative_slot
-                                    break
-                    
+                    if assigned[position][type_id] < required[position][type_id]:
+                        best_position = position
+                    elif type_id != fixed_type_id:
+                        # アルバイトの場合のみ後ろの時間帯への変更を試みる（社員は固定）
+                        for alternative in range(position + 1, slot_count):
+                            if not placed & (1 << alternative) and assigned[alternative][type_id] < required[alternative][type_id]:
+                                best_position = alternative
+                                break
+
                     # シフトを配置（必要人数に達していなければ配置）
-                    if can_use:
-                        if staff_name not in optimized[date_str]:
-                            optimized[date_str][staff_name] = []
-                        optimized[date_str][staff_name].append(best_slot)
-                        
-                        # 配置を記録
-                        best_covered = get_covered_slots([best_slot])
-                        for covered_slot in best_covered:
-                            time_slot_needs[covered_slot]['assigned_by_type'][staff_type].append({
-                                'staff': staff_name,
-                                'slot': best_slot
-                            })
-        
-        # 最適化後にシフトが1つもない日付は削除
-        if not optimized[date_str]:
-            del optimized[date_str]
-    
+                    if best_position is not None and not placed & (1 << best_position):
+                        placed |= 1 << best_position
+                        assigned[best_position][type_id] += 1
+                        day_result.setdefault(staff_names[staff_id], []).append(slot_names[best_position])
+
+        # 最適化後にシフトが1つもない日付は含めない
+        if day_result:
+            optimized[date_str] = day_result
+
     return optimized
 
+def get_required_matrix(date_str, time_slots, staff_types, settings):
+    """指定日の必要人数を [時間帯位置][種別位置] の表で返す"""
+    return [
+        [get_required_staff(date_str, time_slot, staff_type, settings) for staff_type in staff_types]
+        for time_slot in time_slots
+    ]
+
 def get_required_staff(date_str, time_slot, staff_type, settings=None):
     """指定日時の必要人数を計算（種別ごと、設定モード対応、祝日判定対応）"""
-    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-    weekday = date_obj.weekday()  # 0=月, 1=火, ..., 5=土, 6=日
+    parsed = parse_date(date_str)
+    weekday = parsed.weekday  # 0=月, 1=火, ..., 5=土, 6=日
     
     # 設定を取得
     if settings is None:
         data = load_data()
         settings = data.get('shift_settings', get_default_shift_settings())
     
+    # 店舗の休業日は必要人数0
+    if isinstance(settings, dict) and date_str in settings.get('closed_days', ()):
+        return 0
+    
     # 設定モードを確認
     mode = settings.get('mode', 'weekday_weekend') if isinstance(settings, dict) else 'weekday_weekend'
     
@@ -1695,13 +2668,13 @@ def get_required_staff(date_str, time_slot, staff_type, settings=None):
         time_settings = daily_settings.get(day_key_str, {}).get(time_slot, {}) if isinstance(daily_settings, dict) else {}
     elif mode == 'weekday_weekend_with_holidays':
         # 祝日対応モード（日-木、金、土、祝日、祝前日に分けて設定）
-        day_type = get_day_type(date_str)
+        day_type = parsed.day_type
         weekday_weekend_extended = settings.get('weekday_weekend_with_holidays', {}) if isinstance(settings, dict) else {}
         time_settings = weekday_weekend_extended.get(day_type, {}).get(time_slot, {}) if isinstance(weekday_weekend_extended, dict) else {}
     else:
         # 平日・週末モード（デフォルト）
         # 祝前日の場合は週末扱いにする（祝日は祝日別パターンでのみ対応）
-        is_weekend = weekday in [4, 5] or is_day_before_holiday(date_obj)  # 金(4)土(5)または祝前日
+        is_weekend = weekday in [4, 5] or parsed.day_type == 'day_before_holiday'  # 金(4)土(5)または祝前日
         day_type = 'weekend' if is_weekend else 'weekday'
         weekday_weekend = settings.get('weekday_weekend', {}) if isinstance(settings, dict) else settings
         time_settings = weekday_weekend.get(day_type, {}).get(time_slot, {}) if isinstance(weekday_weekend, dict) else {}
@@ -1722,34 +2695,24 @@ def check_requirements():
     optimized_shifts = optimize_shifts(data)
     
     # この日のシフトを取得（最適化後）
-    shifts = optimized_shifts.get(date, {})
-    
-    # 各時間帯の充足状況をチェック
+    return jsonify(build_date_coverage(data, date, optimized_shifts.get(date, {})))
+
+def build_date_coverage(data, date, shifts):
+    """指定日の各時間帯の充足状況（必要人数・配置人数）を計算"""
     results = []
     time_slots = data.get('time_slots', get_default_time_slots())
     settings = data.get('shift_settings', get_default_shift_settings())
     staff_types = get_staff_types(data, settings)
     
-    for time_slot in time_slots:
-        required_by_type = {}
-        assigned_by_type = {staff_type: 0 for staff_type in staff_types}
-
-        for staff_type in staff_types:
-            required_by_type[staff_type] = get_required_staff(
-                date,
-                time_slot,
-                staff_type,
-                settings
-            )
+    slot_index = SlotIndex(time_slots)
+    type_ids = {staff_type: i for i, staff_type in enumerate(staff_types)}
+    required = get_required_matrix(date, slot_index.slots, staff_types, settings)
+    # 実際に入っている人数を計算（時間帯包含を考慮）
+    assigned = count_coverage(shifts, slot_index, type_ids, data['staff'])
 
-        # 実際に入っている人数を計算（時間帯包含を考慮）
-        for staff_name, slots in shifts.items():
-            covered = get_covered_slots(slots)
-            if time_slot in covered:
-                staff_info = data['staff'].get(staff_name, {})
-                staff_type = staff_info.get('type', 'アルバイト')
-                if staff_type in assigned_by_type:
-                    assigned_by_type[staff_type] += 1
+    for position, time_slot in enumerate(slot_index.slots):
+        required_by_type = dict(zip(staff_types, required[position]))
+        assigned_by_type = dict(zip(staff_types, assigned[position]))
 
         ok_by_type = {}
         for staff_type in staff_types:
@@ -1762,7 +2725,7 @@ def check_requirements():
             'ok_by_type': ok_by_type
         })
     
-    return jsonify(results)
+    return results
 
 @app.route('/api/export/csv', methods=['GET'])
 @require_admin
@@ -1784,154 +2747,10 @@ def export_csv():
     optimized_shifts = optimize_shifts(data)
     
     # 日付を収集
-    dates = sorted(set(list(data['shifts'].keys())))
-    
-    if not dates:
-        pdf_buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            pdf_buffer,
-            pagesize=landscape(A4),
-            leftMargin=20,
-            rightMargin=20,
-            topMargin=20,
-            bottomMargin=20
-        )
-        pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
-        styles = getSampleStyleSheet()
-        empty_style = ParagraphStyle(
-            "Empty",
-            parent=styles["Normal"],
-            fontName="HeiseiKakuGo-W5",
-            fontSize=12
-        )
-        doc.build([Paragraph("シフトデータがありません", empty_style)])
-        pdf_buffer.seek(0)
-    else:
-        # 月別にグループ化
-        monthly_data = {}
-        for date_str in dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            month_key = f"{date_obj.year}-{date_obj.month:02d}"
-            if month_key not in monthly_data:
-                monthly_data[month_key] = []
-            monthly_data[month_key].append(date_str)
-        
-        pdf_buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            pdf_buffer,
-            pagesize=landscape(A4),
-            leftMargin=20,
-            rightMargin=20,
-            topMargin=20,
-            bottomMargin=20
-        )
-        pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
-        styles = getSampleStyleSheet()
-        base_style = ParagraphStyle(
-            "Base",
-            parent=styles["Normal"],
-            fontName="HeiseiKakuGo-W5",
-            fontSize=8,
-            leading=10
-        )
-        header_style = ParagraphStyle(
-            "Header",
-            parent=base_style,
-            textColor=colors.white,
-            alignment=1
-        )
-        name_style = ParagraphStyle(
-            "Name",
-            parent=base_style,
-            alignment=0
-        )
-        center_style = ParagraphStyle(
-            "Center",
-            parent=base_style,
-            alignment=1
-        )
-        title_style = ParagraphStyle(
-            "Title",
-            parent=base_style,
-            fontSize=12,
-            leading=14
-        )
-        story = []
-        weekday_names = ['月', '火', '水', '木', '金', '土', '日']
-        
-        # 月ごとにテーブルを生成
-        month_items = list(sorted(monthly_data.items()))
-        for idx, (month_key, month_dates) in enumerate(month_items):
-            first_date = datetime.strptime(month_dates[0], '%Y-%m-%d')
-            month_label = f"{first_date.year}年{first_date.month}月"
-            story.append(Paragraph(month_label, title_style))
-            story.append(Spacer(1, 8))
-            
-            # スタッフリストを取得
-            staff_set = set(data['staff'].keys())
-            for date_str in month_dates:
-                if date_str in optimized_shifts:
-                    staff_set.update(optimized_shifts[date_str].keys())
-            
-            staff_list = sorted(staff_set)
-            
-            # スタッフ順序があれば適用
-            if month_label in staff_order and staff_order[month_label]:
-                # 指定された順序で並べ替え、存在しないスタッフは末尾に追加
-                ordered_list = []
-                for name in staff_order[month_label]:
-                    if name in staff_list:
-                        ordered_list.append(name)
-                # 順序リストにない残りのスタッフを追加
-                for name in staff_list:
-                    if name not in ordered_list:
-                        ordered_list.append(name)
-                staff_list = ordered_list
-            
-            header_row = [Paragraph("名前", header_style)]
-            for date_str in month_dates:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                weekday_jp = weekday_names[date_obj.weekday()]
-                header_row.append(Paragraph(f"{date_obj.day}日<br/>({weekday_jp})", header_style))
-            
-            table_data = [header_row]
-            for staff_name in staff_list:
-                row = [Paragraph(staff_name, name_style)]
-                for date_str in month_dates:
-                    time_slots = []
-                    if date_str in optimized_shifts and staff_name in optimized_shifts[date_str]:
-                        time_slots = optimized_shifts[date_str][staff_name]
-                    cell_text = "<br/>".join(time_slots) if time_slots else "-"
-                    row.append(Paragraph(cell_text, center_style))
-                table_data.append(row)
-            
-            available_width = landscape(A4)[0] - doc.leftMargin - doc.rightMargin
-            first_col_width = 70
-            if len(month_dates) > 0:
-                other_width = max(35, (available_width - first_col_width) / len(month_dates))
-            else:
-                other_width = 50
-            col_widths = [first_col_width] + [other_width] * len(month_dates)
-            
-            table = Table(table_data, colWidths=col_widths, repeatRows=1)
-            table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#4472C4")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                ("TOPPADDING", (0, 0), (-1, -1), 3),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 3)
-            ]))
-            story.append(table)
-            
-            if idx < len(month_items) - 1:
-                story.append(PageBreak())
-        
-        doc.build(story)
-        pdf_buffer.seek(0)
+    date_index = get_store_date_index(session.get('store_code', 'default'), data, 'shifts')
+    
+    import pdf_export  # reportlab は最初のエクスポート時（またはウォームアップ時）に読み込む
+    pdf_buffer = pdf_export.build_shift_pdf(optimized_shifts, date_index.by_month(), data['staff'].keys(), staff_order)
     
     return send_file(
         pdf_buffer,
@@ -1940,5 +2759,62 @@ def export_csv():
         download_name=f'shift_{datetime.now().strftime("%Y%m%d")}.pdf'
     )
 
+# ワーカー起動時のウォームアップ（gunicorn.conf.py の post_worker_init から start_warmup を呼ぶ）
+warmup_state = warmup.Warmup()
+
+def warm_pdf():
+    """reportlab の読み込みとフォントの初期化（最初の PDF エクスポートが遅くならないように）"""
+    import pdf_export
+    pdf_export.warm_up()
+
+def warm_templates():
+    """テンプレートのコンパイルと静的ファイルの指紋"""
+    for name in ('index.html', 'login.html'):
+        app.jinja_env.get_template(name)
+    for name in assets.FINGERPRINTED_ASSETS:
+        assets.fingerprint(name)
+
+def warm_day_tables():
+    """前年〜翌年の祝日・日種別テーブル"""
+    year = datetime.now().year
+    for target in (year - 1, year, year + 1):
+        holiday_calendar.day_table(target)
+
+def warm_recent_stores():
+    """最近保存された店舗のメタデータと今月の配置状況を読み込んでおく"""
+    if warmup.WARMUP_STORES <= 0:
+        return []
+    registry = store_registry.list_stores(SHIFT_DATA_DIR, ADMIN_PASSWORD)
+    recent = sorted(registry, key=lambda code: registry[code]['last_modified'], reverse=True)[:warmup.WARMUP_STORES]
+    month_key = datetime.now().strftime('%Y-%m')
+    for store_code in recent:
+        meta = load_store_meta(store_code)
+        if meta is not None:
+            get_materialized_month_summary(store_code, month_key, meta['version'])
+    return recent
+
+def start_warmup():
+    """ウォームアップをバックグラウンドで開始（WARMUP_ENABLED=0 なら何もしない）"""
+    if not warmup.WARMUP_ENABLED:
+        return None
+    return warmup_state.start([
+        ('pdf', warm_pdf),
+        ('templates', warm_templates),
+        ('day_tables', warm_day_tables),
+        ('stores', warm_recent_stores),
+    ])
+
+@app.route('/api/ready', methods=['GET'])
+def api_ready():
+    """ウォームアップの状況（このワーカーの準備ができていなければ 503）"""
+    status = warmup_state.status()
+    response = jsonify(status)
+    if not status['ready']:
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 if __name__ == '__main__':
+    start_warmup()
     app.run(host='0.0.0.0', port=5000, debug=True)
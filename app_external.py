@@ -13,8 +13,11 @@ from io import StringIO, BytesIO
 from pyngrok import ngrok
 import sys
 
+import assets
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'shift-tool-secret-key-2026'
+assets.init_app(app)
 
 # データファイルのパス
 DATA_FILE = 'shift_data.json'
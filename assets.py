@@ -0,0 +1,102 @@
+"""
+静的ファイル（JS/CSS）の指紋付き URL と配信
+ファイル内容のハッシュを URL に含めて長期間キャッシュさせ、
+build_assets.py で作成した圧縮済みファイル（.br / .gz）があればそのまま返す
+"""
+
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import abort, request, send_file, url_for
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+# build_assets.py の出力先（指紋付きファイルと圧縮済みファイル）
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+
+# 指紋付きで配信するファイル（static/ からの相対パス）
+FINGERPRINTED_ASSETS = ('css/index.css', 'js/index.js')
+
+# 内容が変われば URL も変わるため、1年間キャッシュさせる
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# 優先順に並べた (Content-Encoding, 拡張子)
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_fingerprints = {}
+_lock = threading.Lock()
+
+
+def content_hash(path):
+    """ファイル内容のハッシュ（URL に使う12文字）"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def fingerprint(name):
+    """static/ 配下のファイルの指紋（更新時刻が変わったときだけ再計算）"""
+    path = os.path.join(STATIC_DIR, name)
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _fingerprints.get(name)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    digest = content_hash(path)
+    with _lock:
+        _fingerprints[name] = (mtime_ns, digest)
+    return digest
+
+
+def hashed_filename(name, digest=None):
+    """'js/index.js' -> 'js/index.<hash>.js'"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest or fingerprint(name)}{ext}'
+
+
+def split_hashed_filename(filename):
+    """'js/index.<hash>.js' -> ('js/index.js', '<hash>')"""
+    stem, ext = os.path.splitext(filename)
+    base, _, digest = stem.rpartition('.')
+    return base + ext, digest
+
+
+def asset_url(name):
+    """テンプレートで使う指紋付き URL"""
+    return url_for('serve_asset', filename=hashed_filename(name))
+
+
+def send_asset(filename):
+    """指紋付きファイルを配信（圧縮済みファイルがあれば Accept-Encoding に応じて返す）"""
+    name, digest = split_hashed_filename(filename)
+    if name not in FINGERPRINTED_ASSETS:
+        abort(404)
+
+    source_path = os.path.join(STATIC_DIR, name)
+    mimetype = mimetypes.guess_type(name)[0]
+    current = fingerprint(name)
+
+    if digest != current:
+        # デプロイ前のページから参照された場合は、現在の内容をキャッシュさせずに返す
+        response = send_file(source_path, mimetype=mimetype, max_age=0)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        compressed_path = os.path.join(DIST_DIR, filename + suffix)
+        if request.accept_encodings.quality(encoding) > 0 and os.path.isfile(compressed_path):
+            response = send_file(compressed_path, mimetype=mimetype, etag=f'{current}-{encoding}')
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_file(source_path, mimetype=mimetype, etag=current)
+
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    """/assets/ の配信ルートとテンプレート関数 asset_url を登録"""
+    app.add_url_rule('/assets/<path:filename>', 'serve_asset', send_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+起動時間（モジュールの import 時間）のベンチマーク
+`python -X importtime -c "import app"` を別プロセスで実行し、所要時間と
+時間のかかっているパッケージを表示する（ワーカーの起動・テストの開始が遅くならないよう確認する）
+
+使い方:
+    python bench_import.py --repeat 5 --top 15
+    # 上限を超えた場合・起動時に読み込まないはずのパッケージ（reportlab）を読み込んだ場合は終了コード 1
+    python bench_import.py --max-ms 1500
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 起動時に読み込まないパッケージ（PDF エクスポート時に pdf_export.py から読み込む）
+DEFAULT_FORBIDDEN = ('reportlab',)
+
+
+def run_importtime(module='app'):
+    """1回分の -X importtime の結果を [(パッケージ名, 自身の時間us, 累積us, 深さ)] で返す"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def module_total_us(rows, module):
+    """対象モジュールの累積時間"""
+    for name, _, cumulative_us, _ in rows:
+        if name == module:
+            return cumulative_us
+    return sum(self_us for _, self_us, _, _ in rows)
+
+
+def package_self_times(rows):
+    """トップレベルのパッケージごとの自身の時間の合計 {パッケージ: us}"""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def loaded_forbidden(rows, forbidden):
+    """読み込まれた禁止パッケージ（ソート済み）"""
+    return sorted({name.split('.')[0] for name, _, _, _ in rows} & set(forbidden))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='import 時間のベンチマーク')
+    parser.add_argument('--module', default='app', help='計測するモジュール')
+    parser.add_argument('--repeat', type=int, default=5, help='計測回数（最短値を採用）')
+    parser.add_argument('--top', type=int, default=15, help='表示するパッケージ数')
+    parser.add_argument('--max-ms', type=float, default=None, help='import 時間の上限（超えたら終了コード 1）')
+    parser.add_argument('--forbid', default=','.join(DEFAULT_FORBIDDEN),
+                        help='起動時に読み込んではいけないパッケージ（カンマ区切り、空で確認しない）')
+    args = parser.parse_args()
+
+    best_rows = None
+    best_us = None
+    for _ in range(args.repeat):
+        rows = run_importtime(args.module)
+        total_us = module_total_us(rows, args.module)
+        if best_us is None or total_us < best_us:
+            best_rows, best_us = rows, total_us
+
+    print(f"import {args.module}: {best_us / 1000:.1f} ms（{args.repeat} 回の最短、{len(best_rows)} モジュール）")
+    print()
+    print(f"{'package':<30} {'self(ms)':>10} {'share':>8}")
+    print('-' * 50)
+    totals = sorted(package_self_times(best_rows).items(), key=lambda item: item[1], reverse=True)
+    for package, self_us in totals[:args.top]:
+        print(f"{package:<30} {self_us / 1000:>10.1f} {self_us / best_us:>8.0%}")
+
+    failed = False
+    forbidden = loaded_forbidden(best_rows, [name for name in args.forbid.split(',') if name])
+    if forbidden:
+        print(f"\n❌ 起動時に読み込まないはずのパッケージが読み込まれています: {', '.join(forbidden)}")
+        failed = True
+    if args.max_ms is not None and best_us / 1000 > args.max_ms:
+        print(f"\n❌ import 時間が上限を超えています: {best_us / 1000:.1f} ms > {args.max_ms:.1f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+店舗データ JSON のパース・ダンプ速度ベンチマーク
+1年分の店舗データを生成し、従来形式（indent=2）と compact 形式、
+orjson（インストール時）のスループットを比較する
+
+使い方:
+    python bench_json.py --staff 40 --repeat 20
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import store_json
+
+TIME_SLOTS = ['10-15', '17-23', '18-23', '19-23']
+
+
+def build_year_store(year=2026, staff_count=40, seed=1):
+    """1年分（希望・自由入力・手作業上書き・下書き・確定）を含む店舗データを生成"""
+    rng = random.Random(seed)
+    staff = {}
+    for i in range(staff_count):
+        staff[f'スタッフ{i:03d}'] = {'type': '社員' if i % 5 == 0 else 'アルバイト'}
+
+    shifts = {}
+    custom_shifts = {}
+    manual_generated_shifts = {}
+    requirements = {}
+    day = date(year, 1, 1)
+    while day.year == year:
+        date_str = day.strftime('%Y-%m-%d')
+        day_shifts = {}
+        for name in staff:
+            if rng.random() < 0.45:
+                day_shifts[name] = [slot for slot in TIME_SLOTS if rng.random() < 0.5] or [TIME_SLOTS[0]]
+        shifts[date_str] = day_shifts
+        if rng.random() < 0.3:
+            custom_shifts[date_str] = {rng.choice(list(staff)): ['11:30-14:00']}
+        if rng.random() < 0.2:
+            manual_generated_shifts[date_str] = {rng.choice(list(staff)): [rng.choice(TIME_SLOTS)]}
+        if rng.random() < 0.1:
+            requirements[date_str] = {rng.choice(TIME_SLOTS): rng.randint(1, 4)}
+        day += timedelta(days=1)
+
+    drafts = {}
+    confirmed = {}
+    for month in range(1, 13):
+        prefix = f'{year:04d}-{month:02d}-'
+        month_shifts = {
+            date_str: {name: slots[:1] for name, slots in staff_map.items()}
+            for date_str, staff_map in shifts.items() if date_str.startswith(prefix)
+        }
+        drafts[f'{year:04d}-{month:02d}'] = {'saved_at': f'{year:04d}-{month:02d}-20T10:00:00', 'shifts': month_shifts}
+        confirmed[f'{year:04d}-{month:02d}'] = {'confirmed_at': f'{year:04d}-{month:02d}-25T10:00:00', 'shifts': month_shifts}
+
+    return {
+        'staff': staff,
+        'shifts': shifts,
+        'custom_shifts': custom_shifts,
+        'manual_generated_shifts': manual_generated_shifts,
+        'generated_shift_drafts': drafts,
+        'confirmed_generated_shifts': confirmed,
+        'requirements': requirements,
+        'time_slots': list(TIME_SLOTS),
+        'admin_password': 'admin123'
+    }
+
+
+def measure(func, repeat):
+    """repeat 回実行し、1回あたりの最短時間（秒）を返す"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='店舗データ JSON のベンチマーク')
+    parser.add_argument('--staff', type=int, default=40, help='スタッフ数')
+    parser.add_argument('--year', type=int, default=2026, help='生成する年')
+    parser.add_argument('--repeat', type=int, default=10, help='計測回数（最短値を採用）')
+    args = parser.parse_args()
+
+    data = build_year_store(args.year, args.staff)
+    pretty_text = json.dumps(data, ensure_ascii=False, indent=2)
+    pretty_bytes = pretty_text.encode('utf-8')
+    compact_bytes = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    print(f"スタッフ {args.staff} 人 / {len(data['shifts'])} 日分")
+    print(f"サイズ: 従来形式 {len(pretty_bytes):,} bytes / compact {len(compact_bytes):,} bytes "
+          f"({len(compact_bytes) / len(pretty_bytes):.0%})")
+    print()
+
+    cases = [
+        ('dump  json indent=2 (従来)', lambda: json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'), len(pretty_bytes)),
+        ('dump  json compact', lambda: json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), len(compact_bytes)),
+        ('parse json indent=2 (従来)', lambda: json.loads(pretty_text), len(pretty_bytes)),
+        ('parse json compact', lambda: json.loads(compact_bytes), len(compact_bytes)),
+    ]
+    if store_json.orjson is not None:
+        orjson = store_json.orjson
+        cases += [
+            ('dump  orjson compact', lambda: orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), len(compact_bytes)),
+            ('parse orjson compact', lambda: orjson.loads(compact_bytes), len(compact_bytes)),
+        ]
+    else:
+        print('orjson は未インストールのため標準 json のみ計測します')
+        print()
+
+    print(f"{'case':<30} {'time(ms)':>10} {'MB/s':>10}")
+    print('-' * 52)
+    for label, func, size in cases:
+        elapsed = measure(func, args.repeat)
+        print(f"{label:<30} {elapsed * 1000:>10.2f} {size / elapsed / 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
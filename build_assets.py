@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+静的ファイルの指紋付きコピーと圧縮済みファイル（.gz / .br）を static/dist/ に作成する
+
+    python build_assets.py
+
+デプロイ時（render.yaml の buildCommand）に実行する。
+brotli がインストールされていれば .br も作成する（任意。pip install brotli）。
+"""
+
+import gzip
+import os
+import sys
+
+from assets import DIST_DIR, FINGERPRINTED_ASSETS, STATIC_DIR, fingerprint, hashed_filename
+
+try:
+    import brotli
+except ImportError:  # brotli は任意依存
+    brotli = None
+
+
+def remove_stale(dist_dir, name, keep):
+    """同じファイルの古い指紋のファイルを削除"""
+    stem, ext = os.path.splitext(name)
+    directory = os.path.join(dist_dir, os.path.dirname(name))
+    prefix = os.path.basename(stem) + '.'
+    for entry in os.listdir(directory):
+        base = entry
+        for suffix in ('.gz', '.br'):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        if base.startswith(prefix) and base.endswith(ext) and base != keep:
+            os.remove(os.path.join(directory, entry))
+
+
+def build_assets(dist_dir=DIST_DIR):
+    """全ファイルを出力し、(名前, 元のサイズ, gzip サイズ, brotli サイズ) のリストを返す"""
+    results = []
+    for name in FINGERPRINTED_ASSETS:
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            raw = f.read()
+
+        filename = hashed_filename(name, fingerprint(name))
+        out_path = os.path.join(dist_dir, filename)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+        with open(out_path, 'wb') as f:
+            f.write(raw)
+        # mtime=0 で毎回同じバイト列にする
+        gz = gzip.compress(raw, compresslevel=9, mtime=0)
+        with open(out_path + '.gz', 'wb') as f:
+            f.write(gz)
+        br_size = None
+        if brotli is not None:
+            br = brotli.compress(raw, quality=11)
+            with open(out_path + '.br', 'wb') as f:
+                f.write(br)
+            br_size = len(br)
+
+        remove_stale(dist_dir, name, os.path.basename(filename))
+        results.append((filename, len(raw), len(gz), br_size))
+    return results
+
+
+def main():
+    results = build_assets()
+    print(f"{'ファイル':<28} {'元':>9} {'gzip':>9} {'brotli':>9}")
+    for filename, raw_size, gz_size, br_size in results:
+        br_text = f'{br_size:,}' if br_size is not None else '-'
+        print(f"{filename:<32} {raw_size:>9,} {gz_size:>9,} {br_text:>9}")
+    if brotli is None:
+        print("※ brotli が未インストールのため .br は作成していません（pip install brotli）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+日付インデックスと日付パースのキャッシュ
+'YYYY-MM-DD' 形式の日付文字列は辞書順と日付順が一致するため、
+ソート済みリストを二分探索するだけで月単位の範囲を取り出せる
+（インデックスは店舗・バージョンごとにキャッシュして使う。1回しか使わない辞書は month_keys で走査する）
+"""
+
+import bisect
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+import holiday_calendar
+
+# パース済み日付（weekday: 0=月, 6=日）
+ParsedDate = namedtuple('ParsedDate', ['date', 'year', 'month', 'day', 'weekday', 'month_key', 'day_type'])
+
+
+def _to_date(date_obj):
+    """文字列・datetime・date を date に揃える"""
+    if isinstance(date_obj, str):
+        return parse_date(date_obj).date
+    if isinstance(date_obj, datetime):
+        return date_obj.date()
+    return date_obj
+
+
+def is_holiday(date_obj):
+    """指定日が祝日かどうかを判定"""
+    return holiday_calendar.is_holiday(_to_date(date_obj))
+
+
+def is_day_before_holiday(date_obj):
+    """指定日が祝日の前日かどうかを判定"""
+    return holiday_calendar.is_day_before_holiday(_to_date(date_obj))
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """日付文字列をパースし、曜日・日の種類を含めてキャッシュする"""
+    date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+    return ParsedDate(
+        date=date_obj,
+        year=date_obj.year,
+        month=date_obj.month,
+        day=date_obj.day,
+        weekday=date_obj.weekday(),
+        month_key=f"{date_obj.year}-{date_obj.month:02d}",
+        day_type=holiday_calendar.day_type_name(date_obj)
+    )
+
+
+def get_day_type(date_str, closed_days=None):
+    """
+    指定日の種類を返す
+    返り値: 'sunday' (日), 'mon_thu' (月-木), 'friday' (金), 'saturday' (土), 'holiday' (祝日), 'day_before_holiday' (祝日前日)
+    店舗の休業日（closed_days）に含まれる場合は 'closed'
+
+    優先順位: 祝前日 > 曜日（金土日） > 祝日（それ以外の日）> 月-木
+    ※ 金曜日が祝日の場合は金曜日として扱い、その前日（木曜日）は祝前日として扱う
+    """
+    if closed_days and date_str in closed_days:
+        return 'closed'
+    return parse_date(date_str).day_type
+
+
+def month_prefix(year, month):
+    """指定月の日付文字列に共通する接頭辞（例: '2026-04-'）"""
+    return f"{year:04d}-{month:02d}-"
+
+
+def month_keys(keys, year, month):
+    """指定月の日付キー（ソート済み）。全体をソートせずに1回走査する（1回しか使わない辞書向け）"""
+    prefix = month_prefix(year, month)
+    return sorted(key for key in keys if key.startswith(prefix))
+
+
+class DateIndex:
+    """日付文字列のソート済みインデックス（月単位の範囲を二分探索で取得）"""
+
+    __slots__ = ('dates',)
+
+    def __init__(self, keys=()):
+        self.dates = sorted(keys)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __iter__(self):
+        return iter(self.dates)
+
+    def month_range(self, year, month):
+        """指定月の日付が入っている範囲 (開始位置, 終了位置) を返す"""
+        prefix = month_prefix(year, month)
+        lo = bisect.bisect_left(self.dates, prefix)
+        # 接頭辞の直後の文字（'-' の次は '.'）で上限を求める
+        hi = bisect.bisect_left(self.dates, prefix[:-1] + '.', lo)
+        return lo, hi
+
+    def month_dates(self, year, month):
+        """指定月の日付リスト（ソート済み）"""
+        lo, hi = self.month_range(year, month)
+        return self.dates[lo:hi]
+
+    def month_index(self, year, month):
+        """指定月だけのインデックス（ソートし直さない）"""
+        index = DateIndex()
+        index.dates = self.month_dates(year, month)
+        return index
+
+    def by_month(self):
+        """{'YYYY-MM': [日付, ...]} を月順で返す"""
+        months = {}
+        for date_str in self.dates:
+            months.setdefault(date_str[:7], []).append(date_str)
+        return months
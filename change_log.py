@@ -0,0 +1,229 @@
+"""
+店舗データの変更ログ（差分同期用）
+保存のたびに、データを「チャンク」（日付・月ごとのシフト、スタッフ一覧など）に分けて
+ダイジェストを比較し、変わったチャンクのキーをバージョンごとに記録する。
+
+    <store>_changes.json = {
+        'schema': 1,
+        'version': 最後に記録した店舗データのバージョン,
+        'base_version': これより前のバージョンのカーソルには差分を返せない（全体コピーが必要）,
+        'digests': {チャンクキー: ダイジェスト},
+        'entries': [{'version': N, 'keys': [チャンクキー, ...]}, ...]
+    }
+
+チャンクキーは 'staff'、'shifts/2026-05-01'、'confirmed_generated_shifts/2026-05' の形式。
+差分の値はログには持たず、要求時に現在のデータから取り出す（同じキーの途中の変更は最新値にまとまる）。
+"""
+
+import hashlib
+import os
+
+from store_cache import LRUCache
+from store_json import dumps_canonical, read_json_file, write_json_file
+
+CHANGE_LOG_SCHEMA = 1
+# 保持するバージョン数（これより古いカーソルは全体コピーにフォールバック）
+CHANGE_LOG_MAX_ENTRIES = int(os.getenv('CHANGE_LOG_MAX_ENTRIES', '500'))
+
+# 同期しないキー（バージョンは店舗ごと、索引は派生データ、パスワードは同期先のものを保持）
+EXCLUDED_KEYS = frozenset(('version', 'staff_index', 'admin_password'))
+# 日付・月ごとに分けて比較するセクション
+SPLIT_SECTIONS = frozenset((
+    'shifts', 'custom_shifts', 'manual_generated_shifts', 'requirements',
+    'generated_shift_drafts', 'confirmed_generated_shifts',
+))
+
+# {本体ファイルのパス: 変更ログ}（保存ごとにファイルを読み直さないため）
+_log_cache = LRUCache(int(os.getenv('CHANGE_LOG_CACHE_SIZE', '64')))
+
+
+def changes_file_path(data_file):
+    """'<store>_data.json' -> '<store>_changes.json'"""
+    base = data_file[:-len('_data.json')] if data_file.endswith('_data.json') else os.path.splitext(data_file)[0]
+    return f'{base}_changes.json'
+
+
+def iter_chunks(data):
+    """(チャンクキー, 値) を列挙"""
+    for key, value in data.items():
+        if key in EXCLUDED_KEYS:
+            continue
+        if key in SPLIT_SECTIONS and isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                yield f'{key}/{sub_key}', sub_value
+        else:
+            yield key, value
+
+
+def chunk_digests(data):
+    """{チャンクキー: ダイジェスト}"""
+    return {
+        key: hashlib.blake2b(dumps_canonical(value), digest_size=8).hexdigest()
+        for key, value in iter_chunks(data)
+    }
+
+
+def update_digests(previous, data, touched):
+    """前回のダイジェストから touched（変更したチャンクキー）と分割しないセクションだけを計算し直す"""
+    digests = {key: digest for key, digest in previous.items() if '/' in key}
+    for key, value in data.items():
+        if key in EXCLUDED_KEYS:
+            continue
+        if key not in SPLIT_SECTIONS or not isinstance(value, dict):
+            digests[key] = hashlib.blake2b(dumps_canonical(value), digest_size=8).hexdigest()
+    for key in touched:
+        exists, value = get_chunk(data, key)
+        if exists:
+            digests[key] = hashlib.blake2b(dumps_canonical(value), digest_size=8).hexdigest()
+        else:
+            digests.pop(key, None)
+    return digests
+
+
+def diff_digests(old, new):
+    """追加・変更・削除されたチャンクキー（ソート済み）"""
+    changed = [key for key, digest in new.items() if old.get(key) != digest]
+    changed.extend(key for key in old if key not in new)
+    return sorted(changed)
+
+
+def is_valid_chunk_key(key):
+    """パッチで受け付けるチャンクキーか"""
+    if not isinstance(key, str) or not key:
+        return False
+    section, _, sub_key = key.partition('/')
+    if section in EXCLUDED_KEYS:
+        return False
+    return not sub_key or section in SPLIT_SECTIONS
+
+
+def get_chunk(data, key):
+    """(存在するか, 値)"""
+    section, _, sub_key = key.partition('/')
+    if not sub_key:
+        return (section in data), data.get(section)
+    container = data.get(section)
+    if not isinstance(container, dict) or sub_key not in container:
+        return False, None
+    return True, container[sub_key]
+
+
+def set_chunk(data, key, value):
+    section, _, sub_key = key.partition('/')
+    if not sub_key:
+        data[section] = value
+        return
+    container = data.get(section)
+    if not isinstance(container, dict):
+        container = data[section] = {}
+    container[sub_key] = value
+
+
+def delete_chunk(data, key):
+    section, _, sub_key = key.partition('/')
+    if not sub_key:
+        data.pop(section, None)
+        return
+    container = data.get(section)
+    if isinstance(container, dict):
+        container.pop(sub_key, None)
+
+
+def read_change_log(data_file):
+    """変更ログを読み込む（なければ None）"""
+    try:
+        log = read_json_file(changes_file_path(data_file))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(log, dict) or log.get('schema') != CHANGE_LOG_SCHEMA:
+        return None
+    return log
+
+
+def record_changes(data_file, data, previous_version, touched=None):
+    """本体の保存直後に呼び、previous_version からの変更を記録する
+
+    touched に変更したチャンクキー（'shifts/2026-05-01' など）を渡すと、日付・月ごとのチャンクは
+    それだけを計算し直す（None なら全チャンク）。
+    """
+    version = data.get('version', 0)
+
+    log = _log_cache.get(data_file)
+    if log is None or log.get('version') != previous_version:
+        # 他のワーカーが保存した場合などはファイルから読み直す
+        log = read_change_log(data_file)
+    previous_digests = log.get('digests') if log is not None and log.get('version') == previous_version else None
+    if log is None and previous_version == 0:
+        # 新しい店舗（空の状態からの変更として記録する）
+        log = {'schema': CHANGE_LOG_SCHEMA, 'base_version': 0, 'entries': []}
+        previous_digests = {}
+
+    if previous_digests is None:
+        # 直前の状態が分からない（同じ版から2回保存された・ログの記録に失敗したなど）。
+        # 同じバージョン番号でも内容が違う可能性があるため、このバージョンのカーソルからも全体コピーが必要
+        digests = chunk_digests(data)
+        log = {'schema': CHANGE_LOG_SCHEMA, 'base_version': version + 1, 'entries': []}
+    else:
+        if touched is None:
+            digests = chunk_digests(data)
+        else:
+            digests = update_digests(previous_digests, data, touched)
+        keys = diff_digests(previous_digests, digests)
+        log['entries'].append({'version': version, 'keys': keys})
+        if len(log['entries']) > CHANGE_LOG_MAX_ENTRIES:
+            del log['entries'][:-CHANGE_LOG_MAX_ENTRIES]
+            log['base_version'] = log['entries'][0]['version'] - 1
+
+    log['version'] = version
+    log['digests'] = digests
+    write_json_file(changes_file_path(data_file), log)
+    _log_cache.put(data_file, log)
+    return log
+
+
+def collect_changes(data_file, data, since):
+    """since より後の変更を [{'key', 'value'} または {'key', 'deleted': True}] で返す
+
+    差分が取れない（ログがない・since が古すぎる・ログを作り直す前のカーソル・ログと本体の版が違う）場合は None。
+    """
+    version = data.get('version', 0)
+    log = _log_cache.get(data_file)
+    if log is None or log.get('version') != version:
+        log = read_change_log(data_file)
+    if log is not None and since < log.get('base_version', 0):
+        # ログを作り直す前のカーソル（最新のバージョンと同じ番号でも内容が違う可能性がある）
+        return None
+    if since >= version:
+        return []
+    if log is None or log.get('version') != version:
+        return None
+
+    keys = set()
+    for entry in log['entries']:
+        if entry['version'] > since:
+            keys.update(entry['keys'])
+
+    changes = []
+    for key in sorted(keys):
+        exists, value = get_chunk(data, key)
+        if exists:
+            changes.append({'key': key, 'value': value})
+        else:
+            changes.append({'key': key, 'deleted': True})
+    return changes
+
+
+def apply_changes(data, changes):
+    """collect_changes の結果をデータに反映し、反映件数を返す（不正なキーがあれば ValueError）"""
+    for change in changes:
+        if not isinstance(change, dict) or not is_valid_chunk_key(change.get('key')):
+            raise ValueError(f'不正な変更です: {change!r}')
+        if not change.get('deleted') and 'value' not in change:
+            raise ValueError(f'値がありません: {change["key"]}')
+
+    for change in changes:
+        if change.get('deleted'):
+            delete_chunk(data, change['key'])
+        else:
+            set_chunk(data, change['key'], change['value'])
+    return len(changes)
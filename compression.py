@@ -0,0 +1,139 @@
+"""
+レスポンスの圧縮（gzip、brotli がインストールされていれば br）
+Accept-Encoding に応じて、対象の Content-Type かつ一定サイズ以上のレスポンスを圧縮する
+ストリーミングレスポンスはチャンクごとに逐次圧縮する
+"""
+
+import gzip
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli は任意依存
+    brotli = None
+
+# RESPONSE_COMPRESSION=0 で無効化
+COMPRESSION_ENABLED = os.getenv('RESPONSE_COMPRESSION', '1') != '0'
+# これより小さいレスポンスは圧縮しない（バイト）
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = frozenset((
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/pdf',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+))
+
+
+def available_encodings():
+    """サーバーが対応している Content-Encoding（優先順）"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding():
+    """リクエストの Accept-Encoding から使用する圧縮形式を選ぶ（なければ None）"""
+    for encoding in available_encodings():
+        if request.accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def encoded_etag(etag, encoding):
+    """圧縮した表現の ETag（非圧縮とは別の表現として区別する）"""
+    return f'{etag}-{encoding}'
+
+
+def match_etag(etag):
+    """If-None-Match が etag（またはその圧縮表現）に一致すれば、一致した値を返す"""
+    candidates = [etag] + [encoded_etag(etag, encoding) for encoding in ('gzip', 'br')]
+    for candidate in candidates:
+        if request.if_none_match.contains(candidate):
+            return candidate
+    return None
+
+
+def compress_bytes(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _new_compressor(encoding):
+    if encoding == 'br':
+        return brotli.Compressor(quality=BROTLI_QUALITY)
+    # wbits=31 で gzip ヘッダー付き
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def compress_stream(chunks, encoding):
+    """チャンクを逐次圧縮して返すジェネレーター"""
+    compressor = _new_compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if not chunk:
+            continue
+        if encoding == 'br':
+            compressed = compressor.process(chunk)
+        else:
+            compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish() if encoding == 'br' else compressor.flush()
+
+
+def compress_response(response):
+    """after_request: 条件を満たすレスポンスを圧縮する"""
+    if not COMPRESSION_ENABLED or request.method == 'HEAD':
+        return response
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    streamed = response.is_streamed or response.direct_passthrough
+    if streamed:
+        # 長さが分かっていて小さければ圧縮しない
+        if response.content_length is not None and response.content_length < COMPRESS_MIN_SIZE:
+            return response
+        original = response.response
+        response.response = compress_stream(original, encoding)
+        if hasattr(original, 'close'):
+            response.call_on_close(original.close)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(compress_bytes(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    response.headers.pop('Accept-Ranges', None)
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
+
+
+def init_app(app):
+    """after_request に圧縮処理を登録"""
+    app.after_request(compress_response)
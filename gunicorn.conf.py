@@ -0,0 +1,10 @@
+"""
+gunicorn の設定（起動時にカレントディレクトリの gunicorn.conf.py が自動で読み込まれる）
+ワーカー数・スレッド数などは起動コマンド（Procfile / render.yaml）で指定する。
+"""
+
+
+def post_worker_init(worker):
+    """ワーカーがアプリを読み込んだ直後にウォームアップを開始する（WARMUP_ENABLED=0 で無効）"""
+    from app import start_warmup
+    start_warmup()
@@ -0,0 +1,212 @@
+"""
+日本の祝日カレンダー（規則ベース）
+固定日・ハッピーマンデー・春分/秋分の近似式・振替休日・国民の休日から
+任意の年の祝日を計算し、1日1バイトの日種別テーブルとして年ごとにキャッシュする
+"""
+
+import threading
+from datetime import date, timedelta
+
+# 日種別コード（テーブルの下位4ビット）
+MON_THU = 0
+FRIDAY = 1
+SATURDAY = 2
+SUNDAY = 3
+HOLIDAY = 4
+DAY_BEFORE_HOLIDAY = 5
+CLOSED = 6
+
+DAY_TYPE_NAMES = ('mon_thu', 'friday', 'saturday', 'sunday', 'holiday', 'day_before_holiday', 'closed')
+
+# 祝日フラグ（テーブルの上位ビット。金土日の祝日も判定できるよう日種別とは別に持つ）
+HOLIDAY_FLAG = 0x10
+DAY_TYPE_MASK = 0x0F
+
+_tables = {}
+_holidays = {}
+_lock = threading.Lock()
+
+
+def _nth_monday(year, month, n):
+    """指定月の第n月曜日"""
+    first = date(year, month, 1)
+    offset = (7 - first.weekday()) % 7  # 最初の月曜日までの日数
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def vernal_equinox_day(year):
+    """春分日（1980〜2099年の近似式）"""
+    return int(20.8431 + 0.242194 * (year - 1980) - int((year - 1980) / 4))
+
+
+def autumnal_equinox_day(year):
+    """秋分日（1980〜2099年の近似式）"""
+    return int(23.2488 + 0.242194 * (year - 1980) - int((year - 1980) / 4))
+
+
+def _national_holidays(year):
+    """「国民の祝日」（振替休日・国民の休日を除く）を {date: 名前} で返す"""
+    holidays = {
+        date(year, 1, 1): '元日',
+        date(year, 2, 11): '建国記念の日',
+        date(year, 3, vernal_equinox_day(year)): '春分の日',
+        date(year, 4, 29): '昭和の日' if year >= 2007 else 'みどりの日',
+        date(year, 5, 3): '憲法記念日',
+        date(year, 5, 5): 'こどもの日',
+        date(year, 9, autumnal_equinox_day(year)): '秋分の日',
+        date(year, 11, 3): '文化の日',
+        date(year, 11, 23): '勤労感謝の日',
+    }
+
+    holidays[_nth_monday(year, 1, 2) if year >= 2000 else date(year, 1, 15)] = '成人の日'
+
+    if year >= 2020:
+        holidays[date(year, 2, 23)] = '天皇誕生日'
+    elif 1989 <= year <= 2018:
+        holidays[date(year, 12, 23)] = '天皇誕生日'
+
+    if year >= 2007:
+        holidays[date(year, 5, 4)] = 'みどりの日'
+
+    # 東京オリンピック・パラリンピックに伴う移動（2020年・2021年）
+    if year == 2020:
+        holidays[date(2020, 7, 23)] = '海の日'
+        holidays[date(2020, 7, 24)] = 'スポーツの日'
+        holidays[date(2020, 8, 10)] = '山の日'
+    elif year == 2021:
+        holidays[date(2021, 7, 22)] = '海の日'
+        holidays[date(2021, 7, 23)] = 'スポーツの日'
+        holidays[date(2021, 8, 8)] = '山の日'
+    else:
+        if year >= 2003:
+            holidays[_nth_monday(year, 7, 3)] = '海の日'
+        elif year >= 1996:
+            holidays[date(year, 7, 20)] = '海の日'
+        if year >= 2016:
+            holidays[date(year, 8, 11)] = '山の日'
+        if year >= 2000:
+            holidays[_nth_monday(year, 10, 2)] = 'スポーツの日' if year >= 2020 else '体育の日'
+        else:
+            holidays[date(year, 10, 10)] = '体育の日'
+
+    holidays[_nth_monday(year, 9, 3) if year >= 2003 else date(year, 9, 15)] = '敬老の日'
+
+    # 即位に伴う祝日（2019年）
+    if year == 2019:
+        holidays[date(2019, 5, 1)] = '天皇の即位の日'
+        holidays[date(2019, 10, 22)] = '即位礼正殿の儀の行われる日'
+
+    return holidays
+
+
+def compute_holidays(year):
+    """振替休日・国民の休日を含む祝日を {date: 名前} で計算する"""
+    national = _national_holidays(year)
+    holidays = dict(national)
+
+    # 国民の休日: 前日と翌日が国民の祝日で、その日自体は祝日でない日
+    for day in sorted(national):
+        candidate = day + timedelta(days=1)
+        if candidate not in national and candidate + timedelta(days=1) in national:
+            holidays[candidate] = '国民の休日'
+
+    # 振替休日: 祝日が日曜日の場合、その後の最初の祝日でない日
+    for day in sorted(national):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            while substitute in holidays:
+                substitute += timedelta(days=1)
+            holidays[substitute] = '振替休日'
+
+    return dict(sorted(holidays.items()))
+
+
+def get_holidays(year):
+    """指定年の祝日（キャッシュ済み）"""
+    holidays = _holidays.get(year)
+    if holidays is None:
+        holidays = compute_holidays(year)
+        _holidays[year] = holidays
+    return holidays
+
+
+def holiday_name(date_obj):
+    """祝日名を返す（祝日でなければ None）"""
+    return get_holidays(date_obj.year).get(date_obj)
+
+
+def _build_table(year):
+    """指定年の日種別テーブル（1日1バイト、元日からの通し番号で参照）を作成"""
+    holidays = get_holidays(year)
+    next_new_year = date(year + 1, 1, 1) in get_holidays(year + 1)
+    first = date(year, 1, 1)
+    days_in_year = (date(year + 1, 1, 1) - first).days
+    table = bytearray(days_in_year)
+
+    for offset in range(days_in_year):
+        day = first + timedelta(days=offset)
+        weekday = day.weekday()
+        is_holiday_day = day in holidays
+        if offset + 1 < days_in_year:
+            next_is_holiday = (day + timedelta(days=1)) in holidays
+        else:
+            next_is_holiday = next_new_year
+
+        # 優先順位: 祝前日 > 曜日（金土日） > 祝日（それ以外の日）> 月-木
+        if next_is_holiday:
+            code = DAY_BEFORE_HOLIDAY
+        elif weekday == 4:
+            code = FRIDAY
+        elif weekday == 5:
+            code = SATURDAY
+        elif weekday == 6:
+            code = SUNDAY
+        elif is_holiday_day:
+            code = HOLIDAY
+        else:
+            code = MON_THU
+
+        table[offset] = code | (HOLIDAY_FLAG if is_holiday_day else 0)
+
+    return bytes(table)
+
+
+def day_table(year):
+    """指定年の日種別テーブル（初回利用時に作成してキャッシュ）"""
+    table = _tables.get(year)
+    if table is None:
+        with _lock:
+            table = _tables.get(year)
+            if table is None:
+                table = _build_table(year)
+                _tables[year] = table
+    return table
+
+
+def _lookup(date_obj):
+    return day_table(date_obj.year)[date_obj.timetuple().tm_yday - 1]
+
+
+def is_holiday(date_obj):
+    """指定日が祝日（振替休日・国民の休日を含む）かどうか"""
+    return bool(_lookup(date_obj) & HOLIDAY_FLAG)
+
+
+def is_day_before_holiday(date_obj):
+    """指定日が祝日の前日かどうか"""
+    return (_lookup(date_obj) & DAY_TYPE_MASK) == DAY_BEFORE_HOLIDAY
+
+
+def day_type_code(date_obj, closed_days=None, date_str=None):
+    """日種別コードを返す（店舗の休業日が指定されていれば CLOSED を優先）"""
+    if closed_days:
+        if date_str is None:
+            date_str = date_obj.strftime('%Y-%m-%d')
+        if date_str in closed_days:
+            return CLOSED
+    return _lookup(date_obj) & DAY_TYPE_MASK
+
+
+def day_type_name(date_obj, closed_days=None, date_str=None):
+    """日種別名を返す（'mon_thu', 'friday', ..., 'closed'）"""
+    return DAY_TYPE_NAMES[day_type_code(date_obj, closed_days, date_str)]
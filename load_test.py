@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+負荷テストハーネス
+app.test_client()（または --gunicorn で起動したローカル gunicorn）に対して、
+同時に操作するスタッフと管理者をシミュレートする。
+エンドポイントごとの p50/p95/p99 と、更新消失（lost update）の件数を集計する。
+
+使い方:
+    python load_test.py --staff 20 --toggles 30
+    python load_test.py --gunicorn --workers 2 --staff 30
+"""
+
+import argparse
+import calendar
+import contextlib
+import http.cookiejar
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
+
+
+def percentile(sorted_values, pct):
+    """ソート済みリストから nearest-rank 方式でパーセンタイルを返す"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LatencyRecorder:
+    """エンドポイントごとのレイテンシとエラー数を記録"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+
+    def record(self, endpoint, elapsed_ms, ok):
+        with self._lock:
+            self._latencies.setdefault(endpoint, []).append(elapsed_ms)
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def report(self):
+        rows = []
+        with self._lock:
+            for endpoint in sorted(self._latencies):
+                values = sorted(self._latencies[endpoint])
+                rows.append({
+                    'endpoint': endpoint,
+                    'count': len(values),
+                    'errors': self._errors.get(endpoint, 0),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                    'p99': percentile(values, 99),
+                    'max': values[-1]
+                })
+        return rows
+
+
+class TestClientTransport:
+    """Flask の test_client 経由でリクエストを送る（プロセス内）"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, payload=None):
+        response = self.client.open(path, method=method, json=payload)
+        return response.status_code, response.get_data()
+
+
+class HttpTransport:
+    """実サーバー（gunicorn）に HTTP でリクエストを送る"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        cookie_jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookie_jar))
+
+    def request(self, method, path, payload=None):
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+class SimulatedUser:
+    """1人分の利用者（トランスポート + レイテンシ記録）"""
+
+    def __init__(self, transport, recorder):
+        self.transport = transport
+        self.recorder = recorder
+
+    def call(self, endpoint, method, path, payload=None):
+        started = time.perf_counter()
+        try:
+            status, body = self.transport.request(method, path, payload)
+        except Exception:
+            status, body = 0, b''
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        ok = 200 <= status < 400
+        self.recorder.record(endpoint, elapsed_ms, ok)
+        return status, body
+
+    def call_json(self, endpoint, method, path, payload=None):
+        status, body = self.call(endpoint, method, path, payload)
+        try:
+            return status, json.loads(body.decode('utf-8')) if body else None
+        except ValueError:
+            return status, None
+
+
+def staff_worker(user, staff_name, store_code, year, month, time_slots, toggles, seed, expected, expected_lock, start_event):
+    """スタッフ1人分のトラフィック（ログイン・月表示・希望トグル連打）"""
+    rng = random.Random(seed)
+    days_in_month = calendar.monthrange(year, month)[1]
+    start_event.wait()
+
+    user.call('POST /api/login', 'POST', '/api/login', {
+        'role': 'user',
+        'password': '',
+        'store_code': store_code,
+        'staff_name': staff_name
+    })
+    user.call('GET /api/shifts/<y>/<m>', 'GET', f'/api/shifts/{year}/{month}')
+
+    own_cells = {}
+    for i in range(toggles):
+        day = rng.randint(1, days_in_month)
+        date_str = f"{year:04d}-{month:02d}-{day:02d}"
+        slots = [slot for slot in time_slots if rng.random() < 0.4]
+        status, _ = user.call('POST /api/shifts', 'POST', '/api/shifts', {
+            'date': date_str,
+            'staff': staff_name,
+            'time_slots': slots,
+            'custom_time_slots': []
+        })
+        if status == 200:
+            own_cells[date_str] = slots
+        # ときどき月表示を再取得（タブ切り替え相当）
+        if i % 5 == 4:
+            user.call('GET /api/shifts/<y>/<m>', 'GET', f'/api/shifts/{year}/{month}')
+
+    with expected_lock:
+        for date_str, slots in own_cells.items():
+            expected[(date_str, staff_name)] = slots
+
+
+def admin_worker(user, year, month, stop_event, start_event):
+    """管理者のトラフィック（生成・一時保存・確定・エクスポート）を停止まで繰り返す"""
+    start_event.wait()
+    while not stop_event.is_set():
+        user.call('GET /api/generate', 'GET', f'/api/generate?year={year}&month={month}')
+        user.call('GET /api/generated-shift/status', 'GET', f'/api/generated-shift/status?year={year}&month={month}')
+        user.call('POST /api/generated-shift/temp-save', 'POST', '/api/generated-shift/temp-save', {'year': year, 'month': month})
+        user.call('POST /api/generated-shift/confirm', 'POST', '/api/generated-shift/confirm', {'year': year, 'month': month})
+        user.call('GET /api/store-data/export', 'GET', '/api/store-data/export')
+        user.call('GET /api/export/csv', 'GET', '/api/export/csv')
+
+
+def count_lost_updates(admin, expected, year, month):
+    """各スタッフが最後に書いた値と保存内容を比較し、消えた更新を数える"""
+    status, month_data = admin.call_json('GET /api/shifts/<y>/<m>', 'GET', f'/api/shifts/{year}/{month}')
+    if status != 200 or not isinstance(month_data, dict):
+        return None
+    stored = month_data.get('shifts', {})
+    lost = 0
+    for (date_str, staff_name), slots in expected.items():
+        actual = stored.get(date_str, {}).get(staff_name, [])
+        if list(actual) != list(slots):
+            lost += 1
+    return lost
+
+
+@contextlib.contextmanager
+def quiet_output(verbose):
+    """アプリのデバッグ出力・例外ログを抑制する（集計結果のみ表示）"""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            yield
+
+
+def wait_for_port(host, port, timeout):
+    """サーバーが待ち受けを開始するまで待つ"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with contextlib.suppress(OSError):
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        time.sleep(0.2)
+    return False
+
+
+def start_gunicorn(port, workers, work_dir, env):
+    """ローカルポートで gunicorn を起動する"""
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--pythonpath', BASE_DIR,
+        '-w', str(workers),
+        '-b', f'127.0.0.1:{port}',
+        'app:app'
+    ]
+    process = subprocess.Popen(command, cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_port('127.0.0.1', port, 30):
+        process.terminate()
+        raise RuntimeError('gunicorn の起動を確認できませんでした')
+    return process
+
+
+def print_report(rows, lost_updates, expected_count, elapsed):
+    """集計結果を表形式で出力"""
+    print()
+    print(f"{'endpoint':<42} {'count':>6} {'err':>5} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'maxms':>8}")
+    print('-' * 90)
+    total = 0
+    for row in rows:
+        total += row['count']
+        print(f"{row['endpoint']:<42} {row['count']:>6} {row['errors']:>5} "
+              f"{row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} {row['max']:>8.1f}")
+    print('-' * 90)
+    print(f"合計リクエスト: {total}  経過時間: {elapsed:.2f}s  スループット: {total / elapsed if elapsed else 0:.1f} req/s")
+    if lost_updates is None:
+        print('更新消失: 検証できませんでした（月データの取得に失敗）')
+    else:
+        print(f"更新消失: {lost_updates} / {expected_count} セル")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='シフトツールの負荷テスト')
+    parser.add_argument('--staff', type=int, default=20, help='同時に操作するスタッフ数')
+    parser.add_argument('--toggles', type=int, default=30, help='スタッフ1人あたりの希望トグル回数')
+    parser.add_argument('--year', type=int, default=None, help='対象年（省略時は来月）')
+    parser.add_argument('--month', type=int, default=None, help='対象月（省略時は来月）')
+    parser.add_argument('--seed', type=int, default=1, help='乱数シード')
+    parser.add_argument('--store-code', default=f'loadtest_{os.getpid()}', help='負荷テスト用の店舗コード')
+    parser.add_argument('--gunicorn', action='store_true', help='test_client ではなくローカル gunicorn に対して実行')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn のワーカー数')
+    parser.add_argument('--port', type=int, default=5099, help='gunicorn の待ち受けポート')
+    parser.add_argument('--verbose', action='store_true', help='アプリのデバッグ出力を表示')
+    parser.add_argument('--keep-data', action='store_true', help='テスト用データディレクトリを削除しない')
+    args = parser.parse_args()
+
+    today = date.today()
+    year = args.year or (today.year + (1 if today.month == 12 else 0))
+    month = args.month or (today.month % 12 + 1)
+
+    # 本番データを汚さないよう、一時ディレクトリを永続ストレージとして使う
+    work_dir = tempfile.mkdtemp(prefix='shift_loadtest_')
+    # 全スタッフが同じ IP からログインするため、ログインのレート制限は無効にする
+    env = dict(os.environ, PERSISTENT_STORAGE_PATH=work_dir, RATE_LIMIT='0')
+    os.environ['PERSISTENT_STORAGE_PATH'] = work_dir
+    os.environ['RATE_LIMIT'] = '0'
+    print(f"[INFO] 作業ディレクトリ: {work_dir}")
+
+    server = None
+    recorder = LatencyRecorder()
+
+    try:
+        if args.gunicorn:
+            server = start_gunicorn(args.port, args.workers, work_dir, env)
+            base_url = f'http://127.0.0.1:{args.port}'
+            make_transport = lambda: HttpTransport(base_url)
+            print(f"[INFO] gunicorn ({args.workers} workers) に対して実行: {base_url}")
+        else:
+            # flask_session のファイルも作業ディレクトリに作られるようにする
+            os.chdir(work_dir)
+            sys.path.insert(0, BASE_DIR)
+            print('[INFO] app.test_client() に対して実行')
+
+        with quiet_output(args.verbose):
+            if not args.gunicorn:
+                from app import app
+                make_transport = lambda: TestClientTransport(app)
+            admin = SimulatedUser(make_transport(), recorder)
+            status, _ = admin.call('POST /api/login', 'POST', '/api/login', {
+                'role': 'admin',
+                'password': ADMIN_PASSWORD,
+                'store_code': args.store_code,
+                'staff_name': ''
+            })
+            if status != 200:
+                raise RuntimeError(f'管理者ログインに失敗しました（HTTP {status}）')
+
+            staff_names = [f'負荷テスト{i:03d}' for i in range(args.staff)]
+            for index, staff_name in enumerate(staff_names):
+                admin.call('POST /api/staff', 'POST', '/api/staff', {
+                    'name': staff_name,
+                    'type': '社員' if index % 4 == 0 else 'アルバイト'
+                })
+            _, slot_info = admin.call_json('GET /api/time-slots', 'GET', '/api/time-slots')
+            time_slots = (slot_info or {}).get('time_slots') or ['10-15', '17-23', '18-23', '19-23']
+
+            expected = {}
+            expected_lock = threading.Lock()
+            start_event = threading.Event()
+            stop_event = threading.Event()
+            threads = []
+            for index, staff_name in enumerate(staff_names):
+                user = SimulatedUser(make_transport(), recorder)
+                threads.append(threading.Thread(
+                    target=staff_worker,
+                    args=(user, staff_name, args.store_code, year, month, time_slots,
+                          args.toggles, args.seed * 1000 + index, expected, expected_lock, start_event)
+                ))
+            admin_thread = threading.Thread(target=admin_worker, args=(admin, year, month, stop_event, start_event))
+
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            admin_thread.start()
+            start_event.set()
+            for thread in threads:
+                thread.join()
+            stop_event.set()
+            admin_thread.join()
+            elapsed = time.perf_counter() - started
+
+            lost_updates = count_lost_updates(admin, expected, year, month)
+
+        print_report(recorder.report(), lost_updates, len(expected), elapsed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        os.chdir(BASE_DIR)
+        if args.keep_data:
+            print(f"[INFO] データを保持しました: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+月ごとの配置状況の集計を本体と並べて保存する（<store>_summary.json）
+
+    {
+        'schema': 1,
+        'version': この内容が対応する店舗データのバージョン,
+        'months': {'YYYY-MM': 集計（store_summary.summarize_assignments）}
+    }
+
+保存（save_data）のたびに変更ログのチャンクキーから変わった月だけを消し、
+次に読まれたときに1か月分だけ計算し直す（スタッフ・時間帯・設定など月に属さない変更は全月を消す）。
+バージョンが合わない場合（他のツールで本体を書き換えた場合など）は全月を作り直す。
+"""
+
+import os
+import threading
+
+from change_log import SPLIT_SECTIONS
+from store_json import file_lock, file_signature, read_json_file, write_json_file
+
+SUMMARY_SCHEMA = 1
+
+# {集計ファイルのパス: (ファイルのシグネチャ, 内容)}
+_summary_cache = {}
+_summary_cache_lock = threading.Lock()
+
+
+def summary_file_path(data_file):
+    """'<store>_data.json' -> '<store>_summary.json'"""
+    base = data_file[:-len('_data.json')] if data_file.endswith('_data.json') else os.path.splitext(data_file)[0]
+    return f'{base}_summary.json'
+
+
+def changed_months(keys):
+    """変更ログのチャンクキーから影響する月の集合を返す（全月に影響する場合は None）"""
+    months = set()
+    for key in keys:
+        section, _, sub_key = key.partition('/')
+        if section not in SPLIT_SECTIONS or not sub_key:
+            return None
+        months.add(sub_key[:7])
+    return months
+
+
+def _read(path):
+    try:
+        signature = file_signature(os.stat(path))
+    except OSError:
+        return None
+    with _summary_cache_lock:
+        cached = _summary_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    try:
+        summaries = read_json_file(path)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(summaries, dict) or summaries.get('schema') != SUMMARY_SCHEMA:
+        return None
+    with _summary_cache_lock:
+        _summary_cache[path] = (signature, summaries)
+    return summaries
+
+
+def _write(path, summaries):
+    signature = write_json_file(path, summaries)
+    with _summary_cache_lock:
+        _summary_cache[path] = (signature, summaries)
+
+
+def invalidate_months(data_file, previous_version, version, months):
+    """本体の保存直後に呼び、変わった月（None なら全月）の集計を消す"""
+    path = summary_file_path(data_file)
+    with file_lock(path):
+        summaries = _read(path)
+        if summaries is None or summaries.get('version') != previous_version or months is None:
+            kept = {}
+        else:
+            kept = {key: value for key, value in summaries['months'].items() if key not in months}
+        _write(path, {'schema': SUMMARY_SCHEMA, 'version': version, 'months': kept})
+
+
+def get_month_summary(data_file, version, month_key):
+    """保存済みの集計（version の本体に対応するものがなければ None）"""
+    summaries = _read(summary_file_path(data_file))
+    if summaries is None or summaries.get('version') != version:
+        return None
+    return summaries['months'].get(month_key)
+
+
+def put_month_summary(data_file, version, month_key, summary):
+    """計算した集計を保存する（その間に本体が保存されて古くなった場合は保存しない）"""
+    path = summary_file_path(data_file)
+    with file_lock(path):
+        summaries = _read(path)
+        if summaries is None or summaries.get('version', 0) < version:
+            summaries = {'schema': SUMMARY_SCHEMA, 'version': version, 'months': {}}
+        elif summaries['version'] != version:
+            return False
+        else:
+            summaries = {**summaries, 'months': dict(summaries['months'])}
+        summaries['months'][month_key] = summary
+        _write(path, summaries)
+    return True
@@ -0,0 +1,177 @@
+"""
+シフト表の PDF 作成（reportlab は重いため、PDF を作るとき・ウォームアップ時に初めて読み込む）
+
+app.py からは関数の中で import する（ワーカーの起動やテストで reportlab を読み込まないため）。
+"""
+
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+
+from calendar_index import parse_date
+
+# PDF の日本語フォント
+PDF_FONT_NAME = "HeiseiKakuGo-W5"
+
+
+def register_font():
+    """PDF 用の日本語フォントを登録（登録済みなら何もしない）"""
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(UnicodeCIDFont(PDF_FONT_NAME))
+
+
+def warm_up():
+    """フォントを登録し、小さな PDF を1回作っておく（フォント・スタイルの初期化）"""
+    register_font()
+    style = ParagraphStyle("Warmup", parent=getSampleStyleSheet()["Normal"], fontName=PDF_FONT_NAME)
+    SimpleDocTemplate(BytesIO(), pagesize=landscape(A4)).build([Paragraph("シフト表 1日(月) 10-15", style)])
+
+
+def build_shift_pdf(optimized_shifts, monthly_data, staff_names, staff_order):
+    """月ごとのシフト表（1か月1ページ）の PDF を BytesIO で返す
+
+    monthly_data: {月: [日付, ...]}、staff_order: {'YYYY年M月': [スタッフ名, ...]}（表示順の指定）
+    """
+    if not monthly_data:
+        pdf_buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            pdf_buffer,
+            pagesize=landscape(A4),
+            leftMargin=20,
+            rightMargin=20,
+            topMargin=20,
+            bottomMargin=20
+        )
+        register_font()
+        styles = getSampleStyleSheet()
+        empty_style = ParagraphStyle(
+            "Empty",
+            parent=styles["Normal"],
+            fontName=PDF_FONT_NAME,
+            fontSize=12
+        )
+        doc.build([Paragraph("シフトデータがありません", empty_style)])
+        pdf_buffer.seek(0)
+    else:
+        pdf_buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            pdf_buffer,
+            pagesize=landscape(A4),
+            leftMargin=20,
+            rightMargin=20,
+            topMargin=20,
+            bottomMargin=20
+        )
+        register_font()
+        styles = getSampleStyleSheet()
+        base_style = ParagraphStyle(
+            "Base",
+            parent=styles["Normal"],
+            fontName=PDF_FONT_NAME,
+            fontSize=8,
+            leading=10
+        )
+        header_style = ParagraphStyle(
+            "Header",
+            parent=base_style,
+            textColor=colors.white,
+            alignment=1
+        )
+        name_style = ParagraphStyle(
+            "Name",
+            parent=base_style,
+            alignment=0
+        )
+        center_style = ParagraphStyle(
+            "Center",
+            parent=base_style,
+            alignment=1
+        )
+        title_style = ParagraphStyle(
+            "Title",
+            parent=base_style,
+            fontSize=12,
+            leading=14
+        )
+        story = []
+        weekday_names = ['月', '火', '水', '木', '金', '土', '日']
+        
+        # 月ごとにテーブルを生成
+        month_items = list(sorted(monthly_data.items()))
+        for idx, (month_key, month_dates) in enumerate(month_items):
+            first_date = parse_date(month_dates[0])
+            month_label = f"{first_date.year}年{first_date.month}月"
+            story.append(Paragraph(month_label, title_style))
+            story.append(Spacer(1, 8))
+            
+            # スタッフリストを取得
+            staff_set = set(staff_names)
+            for date_str in month_dates:
+                if date_str in optimized_shifts:
+                    staff_set.update(optimized_shifts[date_str].keys())
+            
+            staff_list = sorted(staff_set)
+            
+            # スタッフ順序があれば適用
+            if month_label in staff_order and staff_order[month_label]:
+                # 指定された順序で並べ替え、存在しないスタッフは末尾に追加
+                ordered_list = []
+                for name in staff_order[month_label]:
+                    if name in staff_list:
+                        ordered_list.append(name)
+                # 順序リストにない残りのスタッフを追加
+                for name in staff_list:
+                    if name not in ordered_list:
+                        ordered_list.append(name)
+                staff_list = ordered_list
+            
+            header_row = [Paragraph("名前", header_style)]
+            for date_str in month_dates:
+                date_obj = parse_date(date_str)
+                weekday_jp = weekday_names[date_obj.weekday]
+                header_row.append(Paragraph(f"{date_obj.day}日<br/>({weekday_jp})", header_style))
+            
+            table_data = [header_row]
+            for staff_name in staff_list:
+                row = [Paragraph(staff_name, name_style)]
+                for date_str in month_dates:
+                    time_slots = []
+                    if date_str in optimized_shifts and staff_name in optimized_shifts[date_str]:
+                        time_slots = optimized_shifts[date_str][staff_name]
+                    cell_text = "<br/>".join(time_slots) if time_slots else "-"
+                    row.append(Paragraph(cell_text, center_style))
+                table_data.append(row)
+            
+            available_width = landscape(A4)[0] - doc.leftMargin - doc.rightMargin
+            first_col_width = 70
+            if len(month_dates) > 0:
+                other_width = max(35, (available_width - first_col_width) / len(month_dates))
+            else:
+                other_width = 50
+            col_widths = [first_col_width] + [other_width] * len(month_dates)
+            
+            table = Table(table_data, colWidths=col_widths, repeatRows=1)
+            table.setStyle(TableStyle([
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#4472C4")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 4),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+                ("TOPPADDING", (0, 0), (-1, -1), 3),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 3)
+            ]))
+            story.append(table)
+            
+            if idx < len(month_items) - 1:
+                story.append(PageBreak())
+        
+        doc.build(story)
+        pdf_buffer.seek(0)
+    return pdf_buffer
@@ -0,0 +1,147 @@
+"""
+トークンバケットによるレート制限（ログインの総当たり対策）
+既定ではプロセス内で保持し、RATE_LIMIT_DB を指定すると SQLite を経由して
+複数ワーカー（gunicorn の別プロセス）で同じバケットを共有する
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# 複数ワーカーで共有するレート制限 DB（未指定ならプロセス内のみ）
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', '').strip()
+# RATE_LIMIT=0 で無効化（負荷テストなど）
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT', '1') != '0'
+
+# プロセス内で保持するキーの上限（超えたら満タンに戻ったバケットから捨てる）
+MAX_MEMORY_KEYS = 10000
+# SQLite で満タンに戻った行を削除する間隔（操作回数）
+DB_CLEANUP_INTERVAL = 1000
+
+
+class TokenBucketLimiter:
+    """キー（IP・店舗コードなど）ごとのトークンバケット
+
+    capacity 個まで連続で許可し、以降は refill_per_second の速さで回復する。
+    """
+
+    def __init__(self, name, capacity, refill_per_second, db_path=None, enabled=True):
+        self.name = name
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.db_path = db_path or None
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._db_operations = 0
+        if self.db_path:
+            self._init_db()
+
+    def _refill(self, tokens, updated, now):
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+    def _retry_after(self, tokens, cost):
+        if self.refill_per_second <= 0:
+            return None
+        return max(0.0, (cost - tokens) / self.refill_per_second)
+
+    def peek(self, key, cost=1):
+        """トークンを消費せずに確認（許可できれば (True, 0)、できなければ (False, 再試行までの秒数)）"""
+        return self._take(key, cost, consume=False)
+
+    def consume(self, key, cost=1):
+        """トークンを消費（足りなければ消費せずに (False, 再試行までの秒数)）"""
+        return self._take(key, cost, consume=True)
+
+    def reset(self, key):
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM rate_limits WHERE key = ?', (self._db_key(key),))
+            return
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _take(self, key, cost, consume):
+        if not self.enabled:
+            return True, 0.0
+        if self.db_path:
+            return self._take_db(key, cost, consume)
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.capacity, now))
+            tokens = self._refill(tokens, updated, now)
+            if tokens < cost:
+                self._buckets[key] = (tokens, now)
+                return False, self._retry_after(tokens, cost)
+            if consume:
+                self._buckets[key] = (tokens - cost, now)
+                if len(self._buckets) > MAX_MEMORY_KEYS:
+                    self._prune_locked(now)
+            return True, 0.0
+
+    def _prune_locked(self, now):
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if self._refill(tokens, updated, now) >= self.capacity:
+                del self._buckets[key]
+
+    # --- SQLite による複数ワーカー間の共有 ---
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'key TEXT PRIMARY KEY, '
+                'tokens REAL NOT NULL, '
+                'updated REAL NOT NULL)'
+            )
+
+    def _db_key(self, key):
+        return f'{self.name}:{key}'
+
+    def _take_db(self, key, cost, consume):
+        # プロセス間で共有するため、単調時計ではなく壁時計を使う
+        now = time.time()
+        db_key = self._db_key(key)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tokens, updated FROM rate_limits WHERE key = ?', (db_key,)).fetchone()
+            tokens = self._refill(row[0], min(row[1], now), now) if row else self.capacity
+            allowed = tokens >= cost
+            if allowed and consume:
+                tokens -= cost
+            if consume or not allowed:
+                conn.execute(
+                    'INSERT OR REPLACE INTO rate_limits (key, tokens, updated) VALUES (?, ?, ?)',
+                    (db_key, tokens, now)
+                )
+            conn.execute('COMMIT')
+            self._db_operations += 1
+            if self._db_operations % DB_CLEANUP_INTERVAL == 0:
+                self._cleanup_db(conn, now)
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            # DB に問題があってもログイン自体は止めない
+            print(f"[ERROR rate_limit] レート制限 DB の更新に失敗: {str(e)}")
+            return True, 0.0
+        finally:
+            conn.close()
+        return (True, 0.0) if allowed else (False, self._retry_after(tokens, cost))
+
+    def _cleanup_db(self, conn, now):
+        # 空から満タンに戻るまでの時間が経過した行は、初期状態と同じなので削除する
+        if self.refill_per_second <= 0:
+            return
+        full_after = self.capacity / self.refill_per_second
+        conn.execute(
+            'DELETE FROM rate_limits WHERE key LIKE ? AND updated < ?',
+            (f'{self.name}:%', now - full_after)
+        )
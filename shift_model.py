@@ -0,0 +1,225 @@
+"""
+シフト希望の内部表現（整数ID・ビットマスク）
+JSON 上は {date: {staff: [time_slots]}} の入れ子辞書だが、最適化や充足チェックでは
+スタッフ名・時間帯名を小さな整数IDに置き換え、1日分の希望を time_slots の並び順に
+対応したビットマスクとして扱う
+スタッフごとの時間帯リストの並び（入力順）は保持し、to_json・最適化はその順で扱う
+（time_slots の並び順と同じ行は何も追加で持たない）
+"""
+
+from array import array
+
+
+def _mask_typecode(slot_count):
+    """時間帯数に応じたビットマスク配列の型コードを返す"""
+    if slot_count <= 16:
+        return 'H'
+    if slot_count <= 32:
+        return 'L'
+    if slot_count <= 64:
+        return 'Q'
+    return None  # 64を超える場合は Python の int リストで保持
+
+
+def iter_bits(mask):
+    """ビットマスクの立っている位置を小さい順に返す"""
+    position = 0
+    while mask:
+        if mask & 1:
+            yield position
+        mask >>= 1
+        position += 1
+
+
+class SlotIndex:
+    """時間帯名 ⇔ ビット位置の対応表"""
+
+    __slots__ = ('slots', 'positions', 'typecode')
+
+    def __init__(self, time_slots):
+        self.slots = []
+        self.positions = {}
+        for slot in time_slots:
+            if slot not in self.positions:
+                self.positions[slot] = len(self.slots)
+                self.slots.append(slot)
+        self.typecode = _mask_typecode(len(self.slots))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def encode(self, slots):
+        """時間帯リストを (ビットマスク, 時間帯リストにない値のリスト) に変換"""
+        if isinstance(slots, str):
+            slots = [slots]
+        mask = 0
+        extras = None
+        positions = self.positions
+        for slot in slots:
+            position = positions.get(slot)
+            if position is None:
+                if extras is None:
+                    extras = []
+                extras.append(slot)
+            else:
+                mask |= 1 << position
+        return mask, extras
+
+    def decode(self, mask):
+        """ビットマスクを時間帯名のリストに戻す（time_slots の並び順）"""
+        slots = self.slots
+        return [slots[position] for position in iter_bits(mask)]
+
+    def input_order(self, slots, mask, extras=None):
+        """入力の並びが decode(mask) + extras と違えば (入力どおりのリスト, 入力順のビット位置) を返す（同じなら None）"""
+        if isinstance(slots, str):
+            slots = [slots]
+        if list(slots) == self.decode(mask) + (extras or []):
+            return None
+        positions = []
+        seen = 0
+        for slot in slots:
+            position = self.positions.get(slot)
+            if position is not None and not seen >> position & 1:
+                seen |= 1 << position
+                positions.append(position)
+        return list(slots), tuple(positions)
+
+    def new_mask_array(self):
+        """ビットマスク用の空配列を作成"""
+        if self.typecode is None:
+            return []
+        return array(self.typecode)
+
+
+class NameInterner:
+    """スタッフ名 ⇔ 整数IDの対応表"""
+
+    __slots__ = ('names', 'ids')
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.intern(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        staff_id = self.ids.get(name)
+        if staff_id is None:
+            staff_id = len(self.names)
+            self.ids[name] = staff_id
+            self.names.append(name)
+        return staff_id
+
+    def name(self, staff_id):
+        return self.names[staff_id]
+
+
+class DateRequests:
+    """1日分の希望（入力順のスタッフID配列とビットマスク配列）"""
+
+    __slots__ = ('staff_ids', 'masks', 'extras', 'orders')
+
+    def __init__(self, slot_index):
+        self.staff_ids = array('H')
+        self.masks = slot_index.new_mask_array()
+        self.extras = None  # {行番号: [時間帯リストにない値]}（旧データ互換用）
+        self.orders = None  # {行番号: SlotIndex.input_order の結果}（time_slots の並び順でない行のみ）
+
+    def __len__(self):
+        return len(self.staff_ids)
+
+    def append(self, staff_id, mask, extras=None, order=None):
+        row = len(self.staff_ids)
+        if extras:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[row] = extras
+        if order is not None:
+            if self.orders is None:
+                self.orders = {}
+            self.orders[row] = order
+        self.staff_ids.append(staff_id)
+        self.masks.append(mask)
+
+    def entries(self):
+        """(スタッフID, ビットマスク) を入力順に返す"""
+        return zip(self.staff_ids, self.masks)
+
+    def positions(self, row, mask):
+        """行の時間帯のビット位置を入力順に返す（重複は1回）"""
+        if self.orders is not None and row in self.orders:
+            return self.orders[row][1]
+        return iter_bits(mask)
+
+
+class ShiftRequests:
+    """店舗全体の希望（日付 → DateRequests）"""
+
+    __slots__ = ('slot_index', 'staff', 'dates')
+
+    def __init__(self, slot_index, staff=None):
+        self.slot_index = slot_index
+        self.staff = staff if staff is not None else NameInterner()
+        self.dates = {}
+
+    @classmethod
+    def from_json(cls, shifts_by_date, time_slots, staff_names=()):
+        """{date: {staff: [time_slots]}} 形式から変換"""
+        slot_index = time_slots if isinstance(time_slots, SlotIndex) else SlotIndex(time_slots)
+        model = cls(slot_index, NameInterner(staff_names))
+        intern = model.staff.intern
+        for date_str, staff_map in shifts_by_date.items():
+            day = DateRequests(slot_index)
+            for staff_name, slots in staff_map.items():
+                mask, extras = slot_index.encode(slots)
+                day.append(intern(staff_name), mask, extras, slot_index.input_order(slots, mask, extras))
+            model.dates[date_str] = day
+        return model
+
+    def to_json(self):
+        """{date: {staff: [time_slots]}} 形式に戻す（各リストは入力どおりの並び）"""
+        decode = self.slot_index.decode
+        names = self.staff.names
+        result = {}
+        for date_str, day in self.dates.items():
+            staff_map = {}
+            for row, (staff_id, mask) in enumerate(day.entries()):
+                if day.orders and row in day.orders:
+                    slots = list(day.orders[row][0])
+                else:
+                    slots = decode(mask)
+                    if day.extras and row in day.extras:
+                        slots = slots + day.extras[row]
+                staff_map[names[staff_id]] = slots
+            result[date_str] = staff_map
+        return result
+
+    def staff_type_ids(self, staff_info, type_ids, default_type='アルバイト'):
+        """スタッフIDごとの種別ID配列を返す（種別が対象外の場合は -1）"""
+        result = array('h')
+        for name in self.staff.names:
+            staff_type = staff_info.get(name, {}).get('type', default_type)
+            result.append(type_ids.get(staff_type, -1))
+        return result
+
+
+def count_coverage(staff_map, slot_index, type_ids, staff_info, default_type='アルバイト'):
+    """1日分のシフトについて、時間帯ごと・種別ごとの配置人数を数える
+
+    返り値: counts[時間帯位置][種別ID]
+    """
+    type_count = len(type_ids)
+    counts = [[0] * type_count for _ in range(len(slot_index))]
+    for staff_name, slots in staff_map.items():
+        staff_type = staff_info.get(staff_name, {}).get('type', default_type)
+        type_id = type_ids.get(staff_type)
+        if type_id is None:
+            continue
+        mask, _ = slot_index.encode(slots)
+        for position in iter_bits(mask):
+            counts[position][type_id] += 1
+    return counts
@@ -0,0 +1,199 @@
+"""
+スタッフ → 出現日付の逆引きインデックス
+店舗データの data['staff_index'] に保存し、各シフトの更新時に差分で保守する。
+スタッフの削除・名前変更・個人別表示は、該当する日付だけを参照する。
+
+    data['staff_index'] = {
+        'schema': 1,
+        'version': 保存時のデータバージョン,
+        'staff': {staff: {section: [日付, ...]}}  # 日付はソート済み
+    }
+"""
+
+import bisect
+
+STAFF_INDEX_SCHEMA = 1
+
+# 日付をキーとするシフト {date: {staff: [...]}}
+DATE_SECTIONS = ('shifts', 'custom_shifts', 'manual_generated_shifts')
+# 月をキーとするシフト {YYYY-MM: {'shifts': {date: {staff: [...]}}}}
+MONTH_SECTIONS = ('generated_shift_drafts', 'confirmed_generated_shifts')
+INDEXED_SECTIONS = DATE_SECTIONS + MONTH_SECTIONS
+
+
+def _day_map(data, section, date_str):
+    """指定日の {staff: [...]}（なければ None）"""
+    container = data.get(section)
+    if not isinstance(container, dict):
+        return None
+    if section in MONTH_SECTIONS:
+        entry = container.get(date_str[:7])
+        if not isinstance(entry, dict) or not isinstance(entry.get('shifts'), dict):
+            return None
+        container = entry['shifts']
+    day = container.get(date_str)
+    return day if isinstance(day, dict) else None
+
+
+def _drop_day_if_empty(data, section, date_str):
+    container = data[section]
+    if section in MONTH_SECTIONS:
+        container = container[date_str[:7]]['shifts']
+    if not container.get(date_str):
+        container.pop(date_str, None)
+
+
+def iter_section_days(data, section):
+    """セクション内の (日付, {staff: [...]}) を列挙"""
+    container = data.get(section)
+    if not isinstance(container, dict):
+        return
+    if section in MONTH_SECTIONS:
+        for entry in container.values():
+            shifts = entry.get('shifts') if isinstance(entry, dict) else None
+            if isinstance(shifts, dict):
+                for date_str, staff_map in shifts.items():
+                    if isinstance(staff_map, dict):
+                        yield date_str, staff_map
+    else:
+        for date_str, staff_map in container.items():
+            if isinstance(staff_map, dict):
+                yield date_str, staff_map
+
+
+def build_staff_index(data):
+    """全シフトを走査してインデックスを作り直す"""
+    staff_entries = {}
+    for section in INDEXED_SECTIONS:
+        for date_str, staff_map in iter_section_days(data, section):
+            for staff_name in staff_map:
+                staff_entries.setdefault(staff_name, {}).setdefault(section, []).append(date_str)
+    for sections in staff_entries.values():
+        for dates in sections.values():
+            dates.sort()
+    return {
+        'schema': STAFF_INDEX_SCHEMA,
+        'version': data.get('version', 0),
+        'staff': staff_entries,
+    }
+
+
+def ensure_staff_index(data):
+    """インデックスがない・古い形式・データと版が合わない場合に作り直す（作り直したら True）"""
+    index = data.get('staff_index')
+    if (isinstance(index, dict) and index.get('schema') == STAFF_INDEX_SCHEMA
+            and isinstance(index.get('staff'), dict)
+            and index.get('version') == data.get('version', 0)):
+        return False
+    data['staff_index'] = build_staff_index(data)
+    return True
+
+
+def stamp_staff_index(data):
+    """保存直前に呼ぶ（インデックスがデータのどの版に対応するかを記録）"""
+    if not isinstance(data.get('staff_index'), dict):
+        data['staff_index'] = build_staff_index(data)
+    data['staff_index']['version'] = data.get('version', 0)
+
+
+def _entries(data):
+    ensure_staff_index(data)
+    return data['staff_index']['staff']
+
+
+def sync_cell(data, section, date_str, staff_name):
+    """1セル更新後にインデックスを合わせる"""
+    entries = _entries(data)
+    day = _day_map(data, section, date_str)
+    present = day is not None and staff_name in day
+    dates = entries.get(staff_name, {}).get(section)
+    position = bisect.bisect_left(dates, date_str) if dates else 0
+    indexed = bool(dates) and position < len(dates) and dates[position] == date_str
+
+    if present and not indexed:
+        dates = entries.setdefault(staff_name, {}).setdefault(section, [])
+        bisect.insort(dates, date_str)
+    elif indexed and not present:
+        del dates[position]
+        if not dates:
+            _discard_section(entries, staff_name, section)
+
+
+def _discard_section(entries, staff_name, section):
+    sections = entries[staff_name]
+    sections.pop(section, None)
+    if not sections:
+        del entries[staff_name]
+
+
+def reindex_month(data, section, month_key):
+    """月単位で置き換えたセクションのインデックスを作り直す"""
+    entries = _entries(data)
+    prefix = month_key + '-'
+    for staff_name in list(entries):
+        dates = entries[staff_name].get(section)
+        if not dates:
+            continue
+        lo = bisect.bisect_left(dates, prefix)
+        hi = bisect.bisect_left(dates, month_key + '.', lo)
+        if lo < hi:
+            del dates[lo:hi]
+            if not dates:
+                _discard_section(entries, staff_name, section)
+
+    for date_str, staff_map in iter_section_days(data, section):
+        if date_str.startswith(prefix):
+            for staff_name in staff_map:
+                bisect.insort(entries.setdefault(staff_name, {}).setdefault(section, []), date_str)
+
+
+def staff_dates(data, staff_name):
+    """{section: [日付, ...]}（登録がなければ空の辞書）"""
+    return _entries(data).get(staff_name, {})
+
+
+def _date_slice(dates, date_from=None, date_to=None):
+    lo = bisect.bisect_left(dates, date_from) if date_from else 0
+    hi = bisect.bisect_right(dates, date_to) if date_to else len(dates)
+    return dates[lo:hi]
+
+
+def staff_shifts(data, staff_name, date_from=None, date_to=None):
+    """1人分のシフトを {日付: {section: [...]}} で返す（date_from〜date_to、両端を含む）"""
+    result = {}
+    for section, dates in staff_dates(data, staff_name).items():
+        for date_str in _date_slice(dates, date_from, date_to):
+            day = _day_map(data, section, date_str)
+            if day is not None and staff_name in day:
+                result.setdefault(date_str, {})[section] = day[staff_name]
+    return dict(sorted(result.items()))
+
+
+def remove_staff(data, staff_name):
+    """全シフトからスタッフを削除し、削除したセル数を返す"""
+    entries = _entries(data)
+    removed = 0
+    for section, dates in entries.pop(staff_name, {}).items():
+        for date_str in dates:
+            day = _day_map(data, section, date_str)
+            if day is not None and staff_name in day:
+                del day[staff_name]
+                removed += 1
+                _drop_day_if_empty(data, section, date_str)
+    return removed
+
+
+def rename_staff(data, old_name, new_name):
+    """全シフトのスタッフ名を変更し、変更したセル数を返す（new_name の既存セルは上書き）"""
+    entries = _entries(data)
+    sections = entries.pop(old_name, {})
+    renamed = 0
+    for section, dates in sections.items():
+        for date_str in dates:
+            day = _day_map(data, section, date_str)
+            if day is not None and old_name in day:
+                day[new_name] = day.pop(old_name)
+                renamed += 1
+        target = entries.setdefault(new_name, {}).setdefault(section, [])
+        entries[new_name][section] = sorted(set(target) | set(dates))
+    return renamed
@@ -0,0 +1,2362 @@
+let currentYear = new Date().getFullYear();
+let currentMonth = new Date().getMonth() + 1;
+let currentStaff = [];
+let timeSlots = [];
+let changeMap = {};  // 時間帯変更マップ
+let modalData = {};
+let userRole = 'user';  // デフォルトはユーザー
+
+// ETag による条件付き取得（変更がなければ 304 が返り、前回の内容を再利用する）
+const etagCache = {};
+async function fetchWithEtag(url) {
+    const primed = takeBootstrapped(url);
+    if (primed) {
+        return primed;
+    }
+    const cached = etagCache[url];
+    const headers = cached ? {'If-None-Match': cached.etag} : {};
+    const response = await fetch(url, {headers, cache: 'no-store'});
+    if (response.status === 304 && cached) {
+        return new Response(cached.body, {status: 200, headers: {'Content-Type': 'application/json'}});
+    }
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        etagCache[url] = {etag, body: await response.clone().text()};
+    }
+    return response;
+}
+
+// /api/bootstrap でまとめて取得した応答（初回表示の直後だけ使う）
+const BOOTSTRAP_TTL_MS = 10000;
+let bootstrapped = {};
+let bootstrappedAt = 0;
+
+function primeBootstrap(data) {
+    const shiftsUrl = `/api/shifts/${data.year}/${data.month}`;
+    bootstrapped = {
+        '/api/staff': data.staff,
+        [shiftsUrl]: data.shifts
+    };
+    etagCache['/api/staff'] = {etag: data.etags.staff, body: JSON.stringify(data.staff)};
+    etagCache[shiftsUrl] = {etag: data.etags.shifts, body: JSON.stringify(data.shifts)};
+    if (data.generated_status) {
+        bootstrapped[`/api/generated-shift/status?year=${data.year}&month=${data.month}`] = data.generated_status;
+    }
+    if (data.shift_settings) {
+        bootstrapped['/api/shift-settings'] = data.shift_settings;
+    }
+    bootstrappedAt = Date.now();
+}
+
+// 先読み済みなら Response として返す（1回限り。古くなったものは使わない）
+function takeBootstrapped(url) {
+    const body = bootstrapped[url];
+    if (body === undefined) {
+        return null;
+    }
+    delete bootstrapped[url];
+    if (Date.now() - bootstrappedAt > BOOTSTRAP_TTL_MS) {
+        return null;
+    }
+    return new Response(JSON.stringify(body), {status: 200, headers: {'Content-Type': 'application/json'}});
+}
+
+// ページ読み込み時の初期化
+document.addEventListener('DOMContentLoaded', () => {
+    initializeUI();
+});
+
+// UI初期化（ロール別）
+function initializeUI() {
+    // サーバーからロール情報を取得（クッキーまたはセッションから）
+    // 簡易的には、ページがロードされていることでセッション有効を確認
+    // 認証状態と初回表示のデータを1回で取得
+    fetch(`/api/bootstrap?year=${currentYear}&month=${currentMonth}`)
+        .then(response => {
+            if (response.status === 401) {
+                // セッションなし
+                window.location.href = '/login';
+                return;
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data && data.role) {
+                userRole = data.role;
+                primeBootstrap(data);
+                // 店舗情報を表示
+                const storeBadge = document.getElementById('storeBadge');
+                if (data.store_code) {
+                    storeBadge.textContent = `🏪 ${data.store_code}`;
+                }
+                applyRoleBasedUI(data.role);
+                connectStoreEvents();
+            }
+        })
+        .catch(error => {
+            console.error('Auth check error:', error);
+            window.location.href = '/login';
+        });
+    
+    // ここから、スタッフ管理の初期化コード（一覧の読み込みは showTab から）
+    console.log('DOM loaded, initializing...');
+    
+    // ボタンの動作確認
+    const staffNameInput = document.getElementById('staffName');
+    const staffTypeSelect = document.getElementById('staffType');
+    const addStaffBtn = document.getElementById('addStaffBtn');
+    
+    if (staffNameInput) {
+        console.log('staffName input found');
+    } else {
+        console.error('staffName input NOT found');
+    }
+    if (staffTypeSelect) {
+        console.log('staffType select found');
+        staffTypeSelect.addEventListener('change', toggleStaffTypeOther);
+        toggleStaffTypeOther();
+    } else {
+        console.error('staffType select NOT found');
+    }
+    if (addStaffBtn) {
+        console.log('addStaffBtn button found');
+        
+        // 既存のリスナーを確認して削除（重複登録防止）
+        const newBtn = addStaffBtn.cloneNode(true);
+        addStaffBtn.parentNode.replaceChild(newBtn, addStaffBtn);
+        const freshBtn = document.getElementById('addStaffBtn');
+        
+        // イベントリスナーを登録（クローンしたため重複はない）
+        freshBtn.addEventListener('click', function(e) {
+            console.log('Button clicked via event listener');
+            e.preventDefault();
+            addStaff();
+        });
+    } else {
+        console.error('addStaffBtn button NOT found');
+    }
+    
+    // Enterキーでも追加できるようにする
+    if (staffNameInput) {
+        staffNameInput.addEventListener('keypress', function(e) {
+            if (e.key === 'Enter') {
+                console.log('Enter key pressed');
+                e.preventDefault();
+                addStaff();
+            }
+        });
+    }
+    
+    // 時間帯入力フィールドのEnterキー対応
+    const newTimeSlotInput = document.getElementById('newTimeSlot');
+    if (newTimeSlotInput) {
+        newTimeSlotInput.addEventListener('keypress', function(e) {
+            if (e.key === 'Enter') {
+                e.preventDefault();
+                addTimeSlot();
+            }
+        });
+    }
+}
+
+// ロール別UI適用
+function applyRoleBasedUI(role) {
+    const roleBadge = document.getElementById('roleBadge');
+    const tabs = document.querySelectorAll('.tab');
+    
+    if (role === 'admin') {
+        roleBadge.textContent = '👔 管理者';
+        // 管理者用タブをすべて表示
+        tabs.forEach(tab => tab.style.display = 'block');
+        // 最初のタブを表示
+        if (tabs.length > 0) {
+            setTimeout(() => showTab('staff', {target: tabs[0]}), 100);
+        }
+    } else {
+        roleBadge.textContent = '👤 スタッフ';
+        // スタッフ用タブのみ表示（「シフト希望」のみ）
+        tabs.forEach((tab, index) => {
+            if (tab.textContent.includes('シフト希望')) {
+                tab.style.display = 'block';
+            } else {
+                tab.style.display = 'none';
+            }
+        });
+        // シフト希望タブを最初に表示
+        setTimeout(() => {
+            const shiftsTab = Array.from(tabs).find(t => t.textContent.includes('シフト希望'));
+            if (shiftsTab) {
+                showTab('shifts', {target: shiftsTab});
+            }
+        }, 100);
+    }
+}
+
+// ログアウト
+async function logout() {
+    if (confirm('ログアウトしますか？')) {
+        try {
+            await fetch('/api/logout', {method: 'POST'});
+            window.location.href = '/login';
+        } catch (error) {
+            alert('ログアウトエラー: ' + error.message);
+        }
+    }
+}
+
+// タブ切り替え
+function showTab(tabName, event) {
+    document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+    document.querySelectorAll('.content').forEach(content => content.classList.remove('active'));
+    
+    if (event && event.target) {
+        event.target.classList.add('active');
+    }
+    document.getElementById(tabName).classList.add('active');
+
+    if (tabName === 'staff') {
+        loadStaff();
+    } else if (tabName === 'shifts') {
+        loadShiftTable();
+    } else if (tabName === 'generate') {
+        restoreGeneratedShiftIfAny();
+    } else if (tabName === 'settings') {
+        loadShiftSettings();
+    }
+}
+
+// スタッフ管理
+async function loadStaff() {
+    try {
+        const response = await fetchWithEtag('/api/staff');
+        const staffData = await response.json();
+        currentStaff = staffData;
+        
+        const list = document.getElementById('staffList');
+        list.innerHTML = '';
+        
+        if (Object.keys(currentStaff).length === 0) {
+            list.innerHTML = '<li class="staff-item">スタッフが登録されていません</li>';
+            return;
+        }
+    
+        Object.entries(currentStaff).sort().forEach(([name, info]) => {
+            const li = document.createElement('li');
+            li.className = 'staff-item';
+            const badge = info.type === '社員' ? '👔' : '👤';
+            const priorityText = info.priority !== undefined && info.priority !== null ? ` [優先度: ${info.priority}]` : '';
+            li.innerHTML = `
+                <span>${badge} ${name} (${info.type})${priorityText}</span>
+                <span>
+                    <button class="btn" style="width: auto; padding: 8px 15px;" onclick="renameStaff('${name}')">名前変更</button>
+                    <button class="btn btn-danger" style="width: auto; padding: 8px 15px;" onclick="deleteStaff('${name}')">削除</button>
+                </span>
+            `;
+            list.appendChild(li);
+        });
+    } catch (error) {
+        console.error('Error in loadStaff:', error);
+        alert('スタッフの読み込みに失敗しました: ' + error.message);
+    }
+}
+
+function toggleStaffTypeOther() {
+    const staffTypeSelect = document.getElementById('staffType');
+    const otherGroup = document.getElementById('staffTypeOtherGroup');
+    if (!staffTypeSelect || !otherGroup) return;
+
+    const isOther = staffTypeSelect.value === 'その他';
+    otherGroup.style.display = isOther ? 'block' : 'none';
+
+    if (!isOther) {
+        const otherInput = document.getElementById('staffTypeOther');
+        if (otherInput) otherInput.value = '';
+    }
+}
+
+let addStaffCallCount = 0;  // デバッグ用：addStaff呼び出し回数
+let isAddingStaff = false;  // リクエスト中フラグ
+
+async function addStaff() {
+    // 既にリクエスト中なら処理をスキップ
+    if (isAddingStaff) {
+        console.warn('⚠️ Already processing a staff addition request. Skipping duplicate request.');
+        return;
+    }
+
+    addStaffCallCount++;
+    console.log(`[Call #${addStaffCallCount}] addStaff function called`);
+    try {
+        console.log('addStaff function called');
+        const name = document.getElementById('staffName').value.trim();
+        const typeSelect = document.getElementById('staffType');
+        let type = typeSelect ? typeSelect.value : 'アルバイト';
+
+        if (type === 'その他') {
+            const otherInput = document.getElementById('staffTypeOther');
+            const customType = otherInput ? otherInput.value.trim() : '';
+            if (!customType) {
+                alert('種別を入力してください');
+                return;
+            }
+            type = customType;
+        }
+        
+        const priorityInput = document.getElementById('staffPriority');
+        const priority = priorityInput && priorityInput.value ? parseInt(priorityInput.value, 10) : null;
+        
+        console.log('Name:', name, 'Type:', type, 'Priority:', priority);
+        
+        if (!name) {
+            alert('スタッフ名を入力してください');
+            return;
+        }
+
+        const body = {name, type};
+        if (priority !== null) {
+            body.priority = priority;
+        }
+
+        // リクエスト中フラグをセット
+        isAddingStaff = true;
+        const addStaffBtn = document.getElementById('addStaffBtn');
+        if (addStaffBtn) {
+            addStaffBtn.disabled = true;
+            addStaffBtn.style.opacity = '0.6';
+        }
+
+        console.log(`[Call #${addStaffCallCount}] Sending POST request:`, body);
+        const response = await fetch('/api/staff', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(body)
+        });
+
+        const result = await response.json();
+        console.log(`[Call #${addStaffCallCount}] Response:`, result);
+        
+        if (response.ok) {
+            console.log(`[Call #${addStaffCallCount}] ✅ SUCCESS`);
+            document.getElementById('staffName').value = '';
+            if (typeSelect) {
+                typeSelect.value = 'アルバイト';
+            }
+            if (priorityInput) {
+                priorityInput.value = '';
+            }
+            toggleStaffTypeOther();
+            
+            // ファイルシステムの同期を待つため、少し遅延させる
+            setTimeout(() => {
+                console.log(`[Call #${addStaffCallCount}] Calling loadStaff after 500ms delay`);
+                loadStaff();
+            }, 500);
+        } else {
+            console.log(`[Call #${addStaffCallCount}] ❌ ERROR: ${result.error}`);
+            alert(result.error);
+        }
+    } catch (error) {
+        console.error(`[Call #${addStaffCallCount}] Exception in addStaff:`, error);
+        alert('エラーが発生しました: ' + error.message);
+    } finally {
+        // リクエスト中フラグを解除
+        isAddingStaff = false;
+        const addStaffBtn = document.getElementById('addStaffBtn');
+        if (addStaffBtn) {
+            addStaffBtn.disabled = false;
+            addStaffBtn.style.opacity = '1';
+        }
+    }
+}
+
+async function deleteStaff(name) {
+    try {
+        if (!confirm(`${name}を削除しますか？`)) return;
+
+        const response = await fetch(`/api/staff/${encodeURIComponent(name)}`, {
+            method: 'DELETE'
+        });
+
+        if (response.ok) {
+            loadStaff();
+        } else {
+            const result = await response.json();
+            alert('削除に失敗しました: ' + (result.error || '不明なエラー'));
+        }
+    } catch (error) {
+        console.error('Error in deleteStaff:', error);
+        alert('スタッフの削除に失敗しました: ' + error.message);
+    }
+}
+
+async function renameStaff(name) {
+    try {
+        const newName = (prompt(`${name}の新しい名前を入力してください`, name) || '').trim();
+        if (!newName || newName === name) return;
+
+        await flushShiftEdits();
+        const response = await fetch(`/api/staff/${encodeURIComponent(name)}/rename`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({new_name: newName})
+        });
+
+        if (response.ok) {
+            loadStaff();
+        } else {
+            const result = await response.json();
+            alert('名前変更に失敗しました: ' + (result.error || '不明なエラー'));
+        }
+    } catch (error) {
+        console.error('Error in renameStaff:', error);
+        alert('スタッフ名の変更に失敗しました: ' + error.message);
+    }
+}
+
+// シフト希望入力
+// シフト希望の編集は一定時間まとめてから一括送信する（同じセルは最後の編集のみ）
+const SHIFT_FLUSH_DELAY_MS = 1500;
+const pendingShiftEdits = new Map();
+let shiftFlushTimer = null;
+let shiftFlushPromise = null;
+
+function queueShiftEdit(edit) {
+    pendingShiftEdits.set(`${edit.date}__${edit.staff}`, edit);
+    clearTimeout(shiftFlushTimer);
+    shiftFlushTimer = setTimeout(flushShiftEdits, SHIFT_FLUSH_DELAY_MS);
+}
+
+// 未送信の編集をサーバーから取得したデータに重ねる
+function applyPendingShiftEdits(data) {
+    data.custom_shifts = data.custom_shifts || {};
+    pendingShiftEdits.forEach(edit => {
+        data.shifts[edit.date] = {...(data.shifts[edit.date] || {}), [edit.staff]: edit.time_slots};
+        data.custom_shifts[edit.date] = {...(data.custom_shifts[edit.date] || {}), [edit.staff]: edit.custom_time_slots};
+    });
+    return data;
+}
+
+async function flushShiftEdits(options = {}) {
+    clearTimeout(shiftFlushTimer);
+    shiftFlushTimer = null;
+    if (shiftFlushPromise && !options.keepalive) {
+        await shiftFlushPromise;
+    }
+    if (pendingShiftEdits.size === 0) {
+        return true;
+    }
+
+    const operations = Array.from(pendingShiftEdits.values());
+    pendingShiftEdits.clear();
+    shiftFlushPromise = sendShiftEdits(operations, !!options.keepalive);
+    try {
+        return await shiftFlushPromise;
+    } finally {
+        shiftFlushPromise = null;
+    }
+}
+
+async function sendShiftEdits(operations, keepalive) {
+    try {
+        const response = await fetch('/api/shifts/batch', {
+            method: 'PATCH',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({operations}),
+            keepalive
+        });
+        if (response.ok) {
+            const result = await response.json().catch(() => ({}));
+            if (result.version) {
+                ownShiftVersions.add(result.version);
+            }
+            return true;
+        }
+        const result = await response.json().catch(() => ({}));
+        alert('シフト希望の保存に失敗しました: ' + (result.error || response.status));
+    } catch (error) {
+        alert('シフト希望の保存に失敗しました: ' + error.message);
+    }
+    // 失敗した場合はサーバーの状態を表示し直す
+    loadShiftTable();
+    return false;
+}
+
+// ページを離れる前に未送信の編集を送る
+window.addEventListener('pagehide', () => flushShiftEdits({keepalive: true}));
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') {
+        flushShiftEdits({keepalive: true});
+    }
+});
+
+// 他の端末での変更を受け取る（Server-Sent Events）
+let storeEventSource = null;
+let storeEventMonth = null;
+const ownShiftVersions = new Set();  // 自分の一括更新で作られたバージョン
+const STORE_EVENTS_BUSY_RETRY_MS = 30000;  // 同時接続数の上限で断られた場合の再接続まで（app.py の SSE_BUSY_RETRY_SECONDS）
+
+function connectStoreEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+    const monthKey = `${currentYear}-${currentMonth}`;
+    if (storeEventSource && storeEventMonth === monthKey) {
+        return;
+    }
+    if (storeEventSource) {
+        storeEventSource.close();
+    }
+    storeEventMonth = monthKey;
+    // 接続が切れてもブラウザが Last-Event-ID 付きで自動再接続する
+    const source = new EventSource(`/api/events/${currentYear}/${currentMonth}`);
+    source.onmessage = (e) => handleStoreEvent(JSON.parse(e.data));
+    source.onerror = () => {
+        // 503（同時接続数の上限）などで断られた場合はブラウザが再接続しないため、時間をおいて接続し直す
+        if (source.readyState === EventSource.CLOSED && storeEventSource === source) {
+            storeEventSource = null;
+            setTimeout(connectStoreEvents, STORE_EVENTS_BUSY_RETRY_MS);
+        }
+    };
+    storeEventSource = source;
+}
+
+function handleStoreEvent(event) {
+    const shiftsActive = document.getElementById('shifts').classList.contains('active');
+    const generateActive = document.getElementById('generate').classList.contains('active');
+    const isOwn = ownShiftVersions.has(event.version);
+
+    if (event.type === 'cells') {
+        if (shiftsActive) {
+            event.cells.forEach(patchShiftCell);
+        }
+        if (generateActive && !isOwn) {
+            document.getElementById('generatedRemoteNote').style.display = 'block';
+        }
+    } else if (event.type === 'reload' || event.type === 'generated') {
+        // スタッフ・設定の変更や生成表の編集（自由入力はシフト希望にも表示される）
+        if (shiftsActive) {
+            loadShiftTable();
+        }
+    }
+}
+
+// 1セル分の表示を更新（未送信の編集があるセルはそのまま）
+function patchShiftCell([date, staff, slots, customSlots]) {
+    const key = `${date}__${staff}`;
+    if (pendingShiftEdits.has(key)) {
+        return;
+    }
+    const cell = document.querySelector(`#shiftTable td[data-cell="${CSS.escape(key)}"]`);
+    if (!cell) {
+        // 表にないスタッフ・日付は表ごと読み直す
+        loadShiftTable();
+        return;
+    }
+    cell.textContent = [...slots, ...customSlots].join(', ');
+}
+
+async function loadShiftTable() {
+    const response = await fetchWithEtag(`/api/shifts/${currentYear}/${currentMonth}`);
+    const data = applyPendingShiftEdits(await response.json());
+    
+    currentStaff = data.staff;
+    timeSlots = data.time_slots;
+    
+    document.getElementById('shiftMonth').textContent = `${currentYear}年${currentMonth}月`;
+    
+    const table = document.getElementById('shiftTable');
+    table.innerHTML = '';
+    
+    if (Object.keys(currentStaff).length === 0) {
+        table.innerHTML = '<tr><td colspan="100%">スタッフを登録してください</td></tr>';
+        return;
+    }
+    
+    // ヘッダー行
+    let headerRow = '<tr><th>スタッフ</th>';
+    const weekdays = ['日', '月', '火', '水', '木', '金', '土'];
+    for (let day = 1; day <= data.days_in_month; day++) {
+        const dayOfWeek = new Date(currentYear, currentMonth - 1, day).getDay();
+        const weekday = weekdays[dayOfWeek];
+        headerRow += `<th>${day}日<br>(${weekday})</th>`;
+    }
+    headerRow += '</tr>';
+    table.innerHTML = headerRow;
+    
+    // データ行
+    Object.entries(currentStaff).sort().forEach(([staffName, staffInfo]) => {
+        const badge = staffInfo.type === '社員' ? '👔' : '👤';
+        let row = `<tr><td class="staff-name">${badge} ${staffName}</td>`;
+        for (let day = 1; day <= data.days_in_month; day++) {
+            const date = `${currentYear}-${String(currentMonth).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
+            const slots = data.shifts[date]?.[staffName] || [];
+            const customSlots = data.custom_shifts?.[date]?.[staffName] || [];
+            const display = [...slots, ...customSlots].join(', ');
+            
+            row += `<td class="clickable" data-cell="${date}__${staffName}" onclick="openShiftModal('${date}', '${staffName}')">${display}</td>`;
+        }
+        row += '</tr>';
+        table.innerHTML += row;
+    });
+}
+
+function openShiftModal(date, staff) {
+    modalData = {date, staff};
+    
+    document.getElementById('modalInfo').textContent = `${date} - ${staff}`;
+    
+    // チェックボックスを生成
+    const container = document.getElementById('timeSlotCheckboxes');
+    container.innerHTML = '';
+    const customGroup = document.getElementById('customTimeSlotGroup');
+    if (customGroup) {
+        customGroup.style.display = 'none';
+    }
+    
+    // 現在の選択を取得
+    fetchWithEtag(`/api/shifts/${currentYear}/${currentMonth}`)
+        .then(res => res.json())
+        .then(applyPendingShiftEdits)
+        .then(data => {
+            const currentSelectedSlots = data.shifts[date]?.[staff] || [];
+            const currentCustomSlots = [
+                ...(data.custom_shifts?.[date]?.[staff] || []),
+                ...currentSelectedSlots.filter(slot => !timeSlots.includes(slot))
+            ].filter((slot, index, array) => array.indexOf(slot) === index);
+            const currentSlots = [...currentSelectedSlots, ...currentCustomSlots];
+            changeMap = data.change_map || {};
+            
+            // スタッフタイプを取得
+            const staffType = currentStaff[staff]?.type || 'アルバイト';
+            
+            if (staffType === '社員') {
+                // 社員の場合も時間帯を選択できるように改善
+                const note = document.createElement('div');
+                note.style.fontSize = '12px';
+                note.style.color = '#666';
+                note.style.marginBottom = '15px';
+                note.style.padding = '10px';
+                note.style.backgroundColor = '#f0f8ff';
+                note.style.borderRadius = '4px';
+                note.textContent = '✓ 社員：複数の時間帯を選択して出勤できます。選択した時間帯で勤務となります。';
+                
+                container.appendChild(note);
+                
+                // 社員にも時間帯チェックボックスを表示
+                timeSlots.forEach(slot => {
+                    addCustomSlotCheckbox(slot, currentSelectedSlots.includes(slot), 'preset');
+                });
+
+                // 既存の自由入力時間帯を表示
+                currentCustomSlots
+                    .forEach(slot => addCustomSlotCheckbox(slot, true, 'custom'));
+
+                if (customGroup) {
+                    customGroup.style.display = 'block';
+                }
+            } else {
+                // アルバイトの場合は時間帯を表示
+                const note = document.createElement('div');
+                note.style.fontSize = '12px';
+                note.style.color = '#666';
+                note.style.marginBottom = '15px';
+                note.style.padding = '10px';
+                note.style.backgroundColor = '#fff8e1';
+                note.style.borderRadius = '4px';
+                note.textContent = '✓ アルバイト：勤務したい時間帯を選択して下さい。複数選択可能です。';
+                
+                container.appendChild(note);
+                
+                timeSlots.forEach(slot => {
+                    addCustomSlotCheckbox(slot, currentSelectedSlots.includes(slot), 'preset');
+                });
+
+                // 既存の自由入力時間帯を表示
+                currentCustomSlots
+                    .forEach(slot => addCustomSlotCheckbox(slot, true, 'custom'));
+
+                if (customGroup) {
+                    customGroup.style.display = 'block';
+                }
+            
+            // 変更オプションを追加（アルバイトのみ）
+            if (staffType !== '社員' && currentSelectedSlots.length > 0) {
+                const changeDiv = document.createElement('div');
+                changeDiv.className = 'change-option';
+                changeDiv.innerHTML = '<h4>⚙️ 時間帯を変更</h4>';
+                
+                currentSelectedSlots.forEach(slot => {
+                    if (changeMap[slot] && changeMap[slot].length > 0) {
+                        const optionDiv = document.createElement('div');
+                        optionDiv.style.marginBottom = '10px';
+                        optionDiv.innerHTML = `<strong>${slot}</strong> → `;
+                        
+                        changeMap[slot].forEach(targetSlot => {
+                            const btn = document.createElement('button');
+                            btn.textContent = targetSlot;
+                            btn.className = 'btn';
+                            btn.style.width = 'auto';
+                            btn.style.padding = '5px 10px';
+                            btn.style.marginLeft = '5px';
+                            btn.style.fontSize = '12px';
+                            btn.onclick = () => changeTimeSlot(slot, targetSlot);
+                            optionDiv.appendChild(btn);
+                        });
+                        
+                        changeDiv.appendChild(optionDiv);
+                    }
+                });
+                
+                container.appendChild(changeDiv);
+            }
+            }
+            
+            document.getElementById('shiftModal').classList.add('active');
+        });
+}
+
+    function addCustomSlotCheckbox(slot, isChecked, source = 'preset') {
+    const container = document.getElementById('timeSlotCheckboxes');
+    if (!container) return;
+
+    const existing = Array.from(
+        container.querySelectorAll('input[type="checkbox"]')
+    ).some(cb => cb.value === slot);
+    if (existing) return;
+
+    const label = document.createElement('label');
+    const checkbox = document.createElement('input');
+    checkbox.type = 'checkbox';
+    checkbox.value = slot;
+    checkbox.checked = !!isChecked;
+    checkbox.dataset.source = source;
+
+    label.appendChild(checkbox);
+    label.appendChild(document.createTextNode(` ${slot}`));
+
+    container.appendChild(label);
+}
+
+function addCustomTimeSlot() {
+    const input = document.getElementById('customTimeSlotInput');
+    if (!input) return;
+
+    const slot = input.value.trim();
+    if (!slot) {
+        alert('時間帯を入力してください');
+        return;
+    }
+
+    addCustomSlotCheckbox(slot, true, 'custom');
+    input.value = '';
+}
+
+function changeTimeSlot(fromSlot, toSlot) {
+    // チェックボックスの状態を変更
+    const checkboxes = document.querySelectorAll('#timeSlotCheckboxes input[type="checkbox"]');
+    checkboxes.forEach(cb => {
+        if (cb.value === fromSlot) {
+            cb.checked = false;
+        } else if (cb.value === toSlot) {
+            cb.checked = true;
+        }
+    });
+    
+    alert(`${fromSlot} を ${toSlot} に変更しました。「保存」ボタンを押して確定してください。`);
+}
+
+async function saveShift() {
+    // 社員・アルバイト共に、チェックされた時間帯を取得
+    const checkboxes = document.querySelectorAll('#timeSlotCheckboxes input[type="checkbox"]:checked');
+    const selectedSlots = [];
+    const customSlots = [];
+
+    Array.from(checkboxes).forEach(cb => {
+        const slot = cb.value;
+        const source = cb.dataset.source || 'preset';
+        if (source === 'custom') {
+            customSlots.push(slot);
+        } else {
+            selectedSlots.push(slot);
+        }
+    });
+    
+    queueShiftEdit({
+        date: modalData.date,
+        staff: modalData.staff,
+        time_slots: selectedSlots,
+        custom_time_slots: customSlots
+    });
+    
+    closeModal();
+    loadShiftTable();
+}
+
+// シフト生成
+let staffOrder = {};  // 月ごとのスタッフ順序を保存
+let customEditableCells = {}; // 生成表で自由入力再編集を維持するセル
+let customShiftHistory = {}; // 生成表セルごとの直前の自由入力値
+let generatedShiftReady = false;
+let generatedShiftLoading = false;
+let isShiftConfirmed = false;
+let isRevisionMode = false;
+
+function getGeneratedCellKey(staffName, dateStr) {
+    return `${dateStr}__${staffName}`;
+}
+
+function setGeneratedActionButtonsEnabled(enabled) {
+    generatedShiftReady = enabled;  // ローディング中でも必ず状態を更新
+    if (generatedShiftLoading) return;  // DOM更新はローディング終了後に任せる
+    if (isShiftConfirmed) return;  // 確定済みUIはここでは制御しない
+    const tempSaveBtn = document.getElementById('tempSaveGeneratedBtn');
+    const confirmBtn = document.getElementById('confirmGeneratedBtn');
+    if (tempSaveBtn) tempSaveBtn.disabled = !enabled;
+    if (confirmBtn) confirmBtn.disabled = !enabled;
+}
+
+function setGeneratedLoading(loading, message = '処理中です...') {
+    generatedShiftLoading = loading;
+    const generateBtn = document.getElementById('generateShiftBtn');
+    const tempSaveBtn = document.getElementById('tempSaveGeneratedBtn');
+    const confirmBtn = document.getElementById('confirmGeneratedBtn');
+    const loadingNote = document.getElementById('generatedLoadingNote');
+
+    if (generateBtn) generateBtn.disabled = loading;
+    if (!isShiftConfirmed) {
+        if (tempSaveBtn) tempSaveBtn.disabled = loading || !generatedShiftReady;
+        if (confirmBtn) confirmBtn.disabled = loading || !generatedShiftReady;
+    } else {
+        // 確定後は再修正ボタンのみ制御
+        if (confirmBtn) confirmBtn.disabled = loading;
+    }
+    if (loadingNote) {
+        loadingNote.textContent = message;
+        loadingNote.style.display = loading ? 'block' : 'none';
+    }
+}
+
+// 確定済みUI ↔ 編集UIを切り替える
+function setConfirmedUI(isConfirmed) {
+    isShiftConfirmed = isConfirmed;
+    const tempSaveBtn = document.getElementById('tempSaveGeneratedBtn');
+    const confirmBtn = document.getElementById('confirmGeneratedBtn');
+
+    if (isConfirmed) {
+        isRevisionMode = false;
+        // 一時保存ボタンを非表示
+        if (tempSaveBtn) tempSaveBtn.style.display = 'none';
+        // 確定ボタン → 再修正ボタン
+        if (confirmBtn) {
+            confirmBtn.textContent = '再修正';
+            confirmBtn.className = 'btn btn-warning';
+            confirmBtn.onclick = reviseGeneratedShift;
+            confirmBtn.disabled = false;
+        }
+    } else {
+        isRevisionMode = true;
+        // 一時保存ボタンを再表示
+        if (tempSaveBtn) {
+            tempSaveBtn.style.display = '';
+            tempSaveBtn.disabled = !generatedShiftReady;
+        }
+        // 再修正ボタン → 確定ボタン
+        if (confirmBtn) {
+            confirmBtn.textContent = '確定';
+            confirmBtn.className = 'btn btn-danger';
+            confirmBtn.onclick = confirmGeneratedShift;
+            confirmBtn.disabled = !generatedShiftReady;
+        }
+    }
+}
+
+// 再修正ボタン押下：確定UIを解除して編集モードに戻す
+function reviseGeneratedShift() {
+    setConfirmedUI(false);
+}
+
+async function getGeneratedShiftStatus() {
+    const url = `/api/generated-shift/status?year=${currentYear}&month=${currentMonth}`;
+    const response = takeBootstrapped(url) || await fetch(url);
+    if (!response.ok) {
+        return null;
+    }
+    return await response.json();
+}
+
+async function restoreGeneratedShiftIfAny() {
+    try {
+        await flushShiftEdits();
+        const status = await getGeneratedShiftStatus();
+        if (!status || !status.success) {
+            return;
+        }
+
+        if (status.has_draft || status.has_confirmed) {
+            await generateShift(false, true);
+            // 確定済みの場合は確定UIを復元
+            if (status.has_confirmed) {
+                setConfirmedUI(true);
+            }
+        } else {
+            const container = document.getElementById('shiftResult');
+            if (container) {
+                container.innerHTML = '<p>保存済みシフトはありません。必要に応じて「シフトを生成」を押してください。</p>';
+            }
+            setGeneratedActionButtonsEnabled(false);
+        }
+    } catch (error) {
+        console.error('restoreGeneratedShiftIfAny failed:', error);
+    }
+}
+
+// /api/generate?format=compact の応答を通常形式（月ごとの dates / staff_list）に戻す
+// 時間帯数が多い店舗では通常形式（配列）がそのまま返る
+function decodeGeneratedShifts(payload) {
+    if (Array.isArray(payload)) {
+        return payload;
+    }
+    const weekdays = ['日', '月', '火', '水', '木', '金', '土'];
+    // ビットマスクは 32 ビットを超えうるため、ビット演算ではなく割り算で展開する
+    const decodeMask = (mask) => {
+        const slots = [];
+        for (let position = 0; mask > 0; position++) {
+            if (mask % 2 === 1) {
+                slots.push(payload.slots[position]);
+            }
+            mask = Math.floor(mask / 2);
+        }
+        return slots;
+    };
+
+    return payload.months.map(month => {
+        const [year, monthNumber] = month.key.split('-').map(Number);
+        const insufficientDays = new Set(month.insufficient);
+        const dates = month.days.map(day => ({
+            date: `${month.key}-${String(day).padStart(2, '0')}`,
+            day,
+            weekday: weekdays[new Date(year, monthNumber - 1, day).getDay()],
+            insufficient: insufficientDays.has(day)
+        }));
+
+        const width = month.days.length;
+        const staffList = month.staff.map(([name, typeId], row) => {
+            const offset = row * width;
+            return {
+                name,
+                type: payload.types[typeId],
+                shifts: month.shifts.slice(offset, offset + width).map(decodeMask),
+                input_shifts: month.input_shifts.slice(offset, offset + width).map(decodeMask),
+                custom_shifts: Array.from({length: width}, () => [])
+            };
+        });
+        month.custom.forEach(([row, column, slots]) => {
+            staffList[row].custom_shifts[column] = slots;
+        });
+        month.extras.forEach(([field, row, column, value]) => {
+            const target = field === 0 ? staffList[row].shifts : staffList[row].input_shifts;
+            target[column] = value;
+        });
+
+        return {month: month.month, dates, staff_list: staffList, shift_table: []};
+    });
+}
+
+async function generateShift(forceRegenerate = false, skipConfirmedPrompt = false) {
+    // 強制再生成の場合は確定UIをリセット
+    if (forceRegenerate) {
+        isShiftConfirmed = false;
+        isRevisionMode = false;
+        setConfirmedUI(false);
+    }
+    setGeneratedLoading(true, 'シフトを生成中です...');
+    setGeneratedActionButtonsEnabled(false);
+
+    try {
+        // 未送信のシフト希望を反映してから生成する
+        await flushShiftEdits();
+        document.getElementById('generatedRemoteNote').style.display = 'none';
+        if (!skipConfirmedPrompt && !forceRegenerate && !isRevisionMode) {
+            const status = await getGeneratedShiftStatus();
+            if (status && status.success && status.has_confirmed) {
+                const regenerate = confirm(
+                    `この月のシフトは確定済みです（${status.confirmed_at || '保存日時不明'}）。\n\n` +
+                    'OK: もう一度生成する\n' +
+                    'キャンセル: 保存済みシフトのまま表示する'
+                );
+
+                if (!regenerate) {
+                    // 保存済み（確定）をそのまま表示
+                    skipConfirmedPrompt = true;
+                } else {
+                    forceRegenerate = true;
+                }
+            }
+        }
+
+        // 生成タブ単独利用でも時間帯選択肢が出るように先に取得
+        try {
+            const shiftsResponse = await fetchWithEtag(`/api/shifts/${currentYear}/${currentMonth}`);
+            if (shiftsResponse.ok) {
+                const shiftsData = await shiftsResponse.json();
+                if (Array.isArray(shiftsData.time_slots)) {
+                    timeSlots = shiftsData.time_slots;
+                }
+            }
+        } catch (e) {
+            console.warn('time_slots load failed:', e);
+        }
+
+        const forceParam = forceRegenerate ? '&force_regenerate=1' : '';
+        const response = await fetch(`/api/generate?year=${currentYear}&month=${currentMonth}${forceParam}&format=compact`);
+        if (!response.ok) {
+            alert('シフト生成に失敗しました');
+            return;
+        }
+        const months = decodeGeneratedShifts(await response.json());
+    
+        const container = document.getElementById('shiftResult');
+        container.innerHTML = '';
+    
+        if (months.length === 0) {
+            container.innerHTML = '<p>シフトデータがありません</p>';
+            setGeneratedActionButtonsEnabled(false);
+            return;
+        }
+    
+    months.forEach(monthData => {
+        const monthGroup = document.createElement('div');
+        monthGroup.className = 'date-group';
+        
+        // 月見出し
+        const monthHeader = document.createElement('h3');
+        monthHeader.textContent = monthData.month;
+        monthGroup.appendChild(monthHeader);
+        
+        // 行順序調整パネル
+        const controlDiv = document.createElement('div');
+        controlDiv.style.marginBottom = '10px';
+        controlDiv.style.padding = '10px';
+        controlDiv.style.backgroundColor = '#f5f5f5';
+        controlDiv.style.borderRadius = '5px';
+        controlDiv.innerHTML = '<small style="color: #666;">💡 表の行をドラッグして並び替えられます。</small>';
+        monthGroup.appendChild(controlDiv);
+        
+                        // シフト色分けの説明パネル
+                        const legendDiv = document.createElement('div');
+                        legendDiv.style.marginBottom = '15px';
+                        legendDiv.style.padding = '10px';
+                        legendDiv.style.backgroundColor = '#fffbe6';
+                        legendDiv.style.borderRadius = '5px';
+                        legendDiv.style.fontSize = '12px';
+                        legendDiv.style.color = '#666';
+                        legendDiv.innerHTML = `
+                            <strong>📋 シフト表示について：</strong><br>
+                            <span style="display: inline-block; margin-top: 5px;">
+                                通常表示＝自動生成シフト（設定に基づいて配置）
+                            </span><br>
+                            <span style="display: inline-block; margin-top: 5px;">
+                                <span style="background-color: #FFB6E1; padding: 2px 6px; border-radius: 3px;">ピンク色</span> =自由入力シフト（手作業で配置・調整してください）
+                            </span>
+                        `;
+                        monthGroup.appendChild(legendDiv);
+        
+        // 表を作成
+        const table = document.createElement('table');
+        table.style.width = '100%';
+        table.style.fontSize = '12px';
+        table.className = 'draggable-table';
+        table.dataset.month = monthData.month;
+        
+        // ヘッダー行（日付と曜日）
+        const headerRow = document.createElement('tr');
+        headerRow.style.backgroundColor = '#f9f9f9';
+        const th1 = document.createElement('th');
+        th1.textContent = '名前';
+        headerRow.appendChild(th1);
+        monthData.dates.forEach(d => {
+            const th = document.createElement('th');
+            th.innerHTML = `${d.day}日<br>(${d.weekday})`;
+            
+            // 人数不足の日は背景色を付与
+            if (d.insufficient) {
+                th.style.backgroundColor = '#ef5350';
+                th.style.color = 'white';
+                th.style.fontWeight = 'bold';
+                th.style.border = '2px solid #c62828';
+            }
+            
+            headerRow.appendChild(th);
+        });
+        table.appendChild(headerRow);
+        
+        // 各スタッフの行をドラッグ可能に
+        monthData.staff_list.forEach((staff, index) => {
+            const row = document.createElement('tr');
+            row.draggable = true;
+            row.dataset.staffIndex = index;
+            row.dataset.staffName = staff.name;
+            row.style.cursor = 'grab';
+            row.style.borderBottom = '1px solid #ddd';
+            
+            // ドラッグ中のスタイル
+            row.addEventListener('dragstart', (e) => {
+                row.style.opacity = '0.5';
+                e.dataTransfer.effectAllowed = 'move';
+                e.dataTransfer.setData('draggedRow', row.dataset.staffIndex);
+            });
+            
+            row.addEventListener('dragend', (e) => {
+                row.style.opacity = '1';
+                document.querySelectorAll('tr[draggable=true]').forEach(r => r.style.backgroundColor = '');
+            });
+            
+            row.addEventListener('dragover', (e) => {
+                e.preventDefault();
+                row.style.backgroundColor = '#e8f4f8';
+            });
+            
+            row.addEventListener('dragleave', (e) => {
+                row.style.backgroundColor = '';
+            });
+            
+            row.addEventListener('drop', (e) => {
+                e.preventDefault();
+                const draggedIndex = e.dataTransfer.getData('draggedRow');
+                const targetIndex = row.dataset.staffIndex;
+                if (draggedIndex !== targetIndex) {
+                    swapTableRows(table, parseInt(draggedIndex), parseInt(targetIndex));
+                    saveStaffOrder(monthData.month, table);
+                }
+                row.style.backgroundColor = '';
+            });
+            
+            const td1 = document.createElement('td');
+            td1.style.textAlign = 'left';
+            td1.innerHTML = `${staff.type === '社員' ? '👔' : '👤'} ${staff.name}`;
+            row.appendChild(td1);
+            
+            staff.shifts.forEach((shifts, dateIdx) => {
+                const td = document.createElement('td');
+                // 選択シフトと自由入力シフトを分けて表示
+                const customShifts = staff.custom_shifts && staff.custom_shifts[dateIdx] ? staff.custom_shifts[dateIdx] : [];
+                const inputShifts = staff.input_shifts && staff.input_shifts[dateIdx] ? staff.input_shifts[dateIdx] : [];
+                const dateStr = monthData.dates[dateIdx].date;
+                const cellKey = getGeneratedCellKey(staff.name, dateStr);
+                if (customShifts.length > 0) {
+                    customEditableCells[cellKey] = true;
+                    customShiftHistory[cellKey] = [...customShifts];
+                }
+                const isCustomEditable = customEditableCells[cellKey] === true;
+                
+                let html = '';
+                // 自由入力シフトがある場合は通常シフトを隠して、自由入力のみ表示
+                if (customShifts.length > 0) {
+                    customShifts.forEach(slot => {
+                        html += `<span style="background-color: #FFB6E1; padding: 2px 4px; border-radius: 3px; display: inline-block;">${slot}</span>`;
+                        if (customShifts.indexOf(slot) < customShifts.length - 1) {
+                            html += '<br>';
+                        }
+                    });
+                } else if (shifts.length > 0) {
+                    html += shifts.join('<br>');
+                } else if (isCustomEditable) {
+                    if (html) html += '<br>';
+                    html += `<span style="background-color: #FFB6E1; padding: 2px 10px; border-radius: 3px; display: inline-block;">&nbsp;</span>`;
+                }
+                
+                td.innerHTML = html || '-';
+                td.style.textAlign = 'center';
+                td.style.cursor = 'pointer';
+                td.style.padding = '5px';
+                td.dataset.staffName = staff.name;
+                td.dataset.dateStr = dateStr;
+                td.dataset.currentShifts = JSON.stringify(shifts);
+                td.dataset.inputShifts = JSON.stringify(inputShifts);
+                td.dataset.customShifts = JSON.stringify(customShifts);
+                td.dataset.customEditable = isCustomEditable ? '1' : '0';
+                
+                // クリックで編集モードに
+                td.addEventListener('click', (e) => {
+                    e.stopPropagation();
+                    showShiftEditMenu(td, monthData.dates[dateIdx], e);
+                });
+                
+                // ホバー時の視覚的フィードバック
+                td.addEventListener('mouseover', () => {
+                    td.style.backgroundColor = '#fff3cd';
+                });
+                td.addEventListener('mouseout', () => {
+                    td.style.backgroundColor = '';
+                });
+                
+                row.appendChild(td);
+            });
+            
+            table.appendChild(row);
+        });
+        
+        monthGroup.appendChild(table);
+        
+        // 月ごとのスタッフ順序を初期化
+        if (!staffOrder[monthData.month]) {
+            saveStaffOrder(monthData.month, table);
+        }
+        
+        // 必要人数チェック（各日付ごと）
+        const checkDiv = document.createElement('div');
+        checkDiv.style.marginTop = '15px';
+        checkDiv.innerHTML = '<h4>必要人数チェック</h4>';
+        
+        monthData.dates.forEach(async d => {
+            const checkResponse = await fetch('/api/check_requirements', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({date: d.date})
+            });
+            const checkData = await checkResponse.json();
+            
+            const dayCheck = document.createElement('div');
+            dayCheck.style.marginBottom = '10px';
+            dayCheck.innerHTML = `<strong>${d.day}日(${d.weekday})</strong>`;
+            
+            checkData.forEach(slot => {
+                const requiredByType = slot.required_by_type || {};
+                const assignedByType = slot.assigned_by_type || {};
+                const okByType = slot.ok_by_type || {};
+                const types = sortStaffTypes(Object.keys(requiredByType));
+                const parts = types.map(type => {
+                    const ok = okByType[type] ? '✓' : '⚠';
+                    const assigned = assignedByType[type] ?? 0;
+                    const required = requiredByType[type] ?? 0;
+                    return `${type}${ok}(${assigned}/${required})`;
+                });
+
+                const item = document.createElement('div');
+                item.style.fontSize = '11px';
+                item.style.marginLeft = '10px';
+                item.innerHTML = `${slot.time_slot}: ${parts.join(' ')}`;
+                dayCheck.appendChild(item);
+            });
+            
+            checkDiv.appendChild(dayCheck);
+        });
+        
+        monthGroup.appendChild(checkDiv);
+        container.appendChild(monthGroup);
+    });
+
+        setGeneratedActionButtonsEnabled(true);
+    } finally {
+        setGeneratedLoading(false);
+    }
+}
+
+async function tempSaveGeneratedShift() {
+    if (!generatedShiftReady) {
+        alert('先にシフトを生成してください');
+        return;
+    }
+
+    setGeneratedLoading(true, '一時保存中です...');
+
+    try {
+        const response = await fetch('/api/generated-shift/temp-save', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                year: currentYear,
+                month: currentMonth
+            })
+        });
+
+        const result = await response.json();
+        if (!response.ok || !result.success) {
+            alert(result.error || '一時保存に失敗しました');
+            return;
+        }
+
+        alert(`一時保存しました（${result.saved_dates}日分）`);
+    } finally {
+        setGeneratedLoading(false);
+    }
+}
+
+async function confirmGeneratedShift() {
+    if (!generatedShiftReady) {
+        alert('先にシフトを生成してください');
+        return;
+    }
+
+    if (!confirm('現在の生成シフトを確定しますか？')) {
+        return;
+    }
+
+    setGeneratedLoading(true, 'シフトを確定中です...');
+
+    try {
+        const response = await fetch('/api/generated-shift/confirm', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                year: currentYear,
+                month: currentMonth
+            })
+        });
+
+        const result = await response.json();
+        if (!response.ok || !result.success) {
+            alert(result.error || 'シフト確定に失敗しました');
+            return;
+        }
+
+        alert(`シフトを確定しました（${result.confirmed_dates}日分）`);
+        // 確定UIに切り替え（一時保存を非表示、再修正ボタンに変更）
+        setConfirmedUI(true);
+    } finally {
+        setGeneratedLoading(false);
+    }
+}
+
+function swapTableRows(table, index1, index2) {
+    const rows = Array.from(table.querySelectorAll('tr[draggable=true]'));
+    if (rows[index1] && rows[index2]) {
+        const temp = rows[index1].cloneNode(true);
+        rows[index1].replaceWith(rows[index2].cloneNode(true));
+        rows[index2].replaceWith(temp);
+        // 新しい行にドラッグイベントを再度設定
+        Array.from(table.querySelectorAll('tr[draggable=true]')).forEach((row, idx) => {
+            row.dataset.staffIndex = idx;
+            row.addEventListener('dragstart', handleDragStart);
+            row.addEventListener('dragend', handleDragEnd);
+            row.addEventListener('dragover', handleDragOver);
+            row.addEventListener('dragleave', handleDragLeave);
+            row.addEventListener('drop', handleDrop);
+        });
+    }
+}
+
+function handleDragStart(e) {
+    e.target.style.opacity = '0.5';
+    e.dataTransfer.effectAllowed = 'move';
+    e.dataTransfer.setData('draggedRow', this.dataset.staffIndex);
+}
+
+function handleDragEnd(e) {
+    e.target.style.opacity = '1';
+    document.querySelectorAll('tr[draggable=true]').forEach(r => r.style.backgroundColor = '');
+}
+
+function handleDragOver(e) {
+    e.preventDefault();
+    this.style.backgroundColor = '#e8f4f8';
+}
+
+function handleDragLeave(e) {
+    this.style.backgroundColor = '';
+}
+
+function handleDrop(e) {
+    e.preventDefault();
+    const draggedIndex = e.dataTransfer.getData('draggedRow');
+    const targetIndex = this.dataset.staffIndex;
+    if (draggedIndex !== targetIndex) {
+        const table = this.closest('table');
+        swapTableRows(table, parseInt(draggedIndex), parseInt(targetIndex));
+        saveStaffOrder(table.dataset.month, table);
+    }
+    this.style.backgroundColor = '';
+}
+
+function saveStaffOrder(month, table) {
+    const order = [];
+    table.querySelectorAll('tr[draggable=true]').forEach(row => {
+        order.push(row.dataset.staffName);
+    });
+    staffOrder[month] = order;
+}
+
+function getStaffOrder(month) {
+    return staffOrder[month] || null;
+}
+
+// シフト編集メニューを表示
+function showShiftEditMenu(td, dateInfo, clickEvent) {
+    if (isShiftConfirmed && !isRevisionMode) {
+        alert('この月のシフトは確定済みです。編集するには「再修正」ボタンを押してください。');
+        return;
+    }
+
+    const staffName = td.dataset.staffName;
+    const dateStr = td.dataset.dateStr;
+    const currentShifts = JSON.parse(td.dataset.currentShifts);
+    const inputShifts = JSON.parse(td.dataset.inputShifts || '[]');
+    const customShifts = JSON.parse(td.dataset.customShifts || '[]');
+    const isCustomEditable = td.dataset.customEditable === '1';
+    const cellKey = getGeneratedCellKey(staffName, dateStr);
+    const previousCustomShifts = customShifts.length > 0
+        ? customShifts
+        : (customShiftHistory[cellKey] || []);
+    
+    // 既存のメニューがあれば削除
+    const existingMenu = document.getElementById('shiftEditMenu');
+    if (existingMenu) {
+        existingMenu.remove();
+    }
+    
+    // メニュー要素を作成
+    const menu = document.createElement('div');
+    menu.id = 'shiftEditMenu';
+    menu.style.position = 'fixed';
+    menu.style.top = clickEvent.clientY + 'px';
+    menu.style.left = clickEvent.clientX + 'px';
+    menu.style.backgroundColor = 'white';
+    menu.style.border = '1px solid #ccc';
+    menu.style.borderRadius = '4px';
+    menu.style.boxShadow = '0 2px 8px rgba(0,0,0,0.15)';
+    menu.style.zIndex = '10000';
+    menu.style.minWidth = '220px';
+    menu.style.maxWidth = '300px';
+    
+    // 入力されたシフト希望を表示（ヘッダー）
+    const inputHeader = document.createElement('div');
+    inputHeader.style.padding = '8px 12px';
+    inputHeader.style.backgroundColor = '#f5f5f5';
+    inputHeader.style.borderBottom = '1px solid #ddd';
+    inputHeader.style.fontSize = '11px';
+    inputHeader.style.color = '#666';
+    const inputShiftText = inputShifts.length > 0 ? inputShifts.join(', ') : 'なし';
+    inputHeader.innerHTML = `<strong>入力されたシフト:</strong><br>${inputShiftText}`;
+    menu.appendChild(inputHeader);
+    
+    // 通常のシフト選択メニュー
+    const options = ['シフトなし'].concat(timeSlots);
+    options.forEach(opt => {
+        const item = document.createElement('div');
+        item.style.padding = '8px 12px';
+        item.style.cursor = 'pointer';
+        item.style.borderBottom = '1px solid #eee';
+        
+        const displayName = opt === 'シフトなし' ? '-' : opt;
+        const isSelected = opt === 'シフトなし' ? currentShifts.length === 0 : currentShifts.includes(opt);
+        
+        item.innerHTML = isSelected ? `✓ ${displayName}` : displayName;
+        item.style.backgroundColor = isSelected ? '#dfe8ee' : 'white';
+        
+        item.addEventListener('mouseover', () => {
+            item.style.backgroundColor = '#f0f0f0';
+        });
+        item.addEventListener('mouseout', () => {
+            item.style.backgroundColor = isSelected ? '#dfe8ee' : 'white';
+        });
+        
+        item.addEventListener('click', async () => {
+            // シフトを更新
+            const newShifts = opt === 'シフトなし' ? [] : [opt];
+            const operations = [];
+            if (customShifts.length > 0 || isCustomEditable) {
+                // 時間選択時は自由入力を解除して、選択シフトを優先表示する
+                operations.push({op: 'custom', staff_name: staffName, date: dateStr, shifts: []});
+            }
+            operations.push({op: 'override', staff_name: staffName, date: dateStr, shifts: newShifts});
+            await updateGeneratedShifts(operations);
+            menu.remove();
+        });
+        
+        menu.appendChild(item);
+    });
+
+    // 自由入力欄と通常シフト選択欄を同時に表示
+    const divider = document.createElement('div');
+    divider.style.borderTop = '1px solid #ddd';
+    divider.style.marginTop = '2px';
+    menu.appendChild(divider);
+
+    const customInputItem = document.createElement('div');
+    customInputItem.style.padding = '8px 12px';
+    customInputItem.style.cursor = 'pointer';
+    customInputItem.style.backgroundColor = '#fff3cd';
+    customInputItem.style.fontWeight = 'bold';
+    customInputItem.textContent = '自由入力で調整...';
+    customInputItem.addEventListener('mouseover', () => {
+        customInputItem.style.backgroundColor = '#ffe8a1';
+    });
+    customInputItem.addEventListener('mouseout', () => {
+        customInputItem.style.backgroundColor = '#fff3cd';
+    });
+    customInputItem.addEventListener('click', () => {
+        menu.remove();
+        showCustomShiftInput(staffName, dateStr, customShifts, previousCustomShifts);
+    });
+    menu.appendChild(customInputItem);
+
+    if (customShifts.length > 0 || isCustomEditable) {
+        const clearCustomItem = document.createElement('div');
+        clearCustomItem.style.padding = '8px 12px';
+        clearCustomItem.style.cursor = 'pointer';
+        clearCustomItem.style.color = '#c62828';
+        clearCustomItem.style.borderTop = '1px solid #eee';
+        clearCustomItem.textContent = '自由入力をクリア';
+        clearCustomItem.addEventListener('mouseover', () => {
+            clearCustomItem.style.backgroundColor = '#ffebee';
+        });
+        clearCustomItem.addEventListener('mouseout', () => {
+            clearCustomItem.style.backgroundColor = 'white';
+        });
+        clearCustomItem.addEventListener('click', async () => {
+            menu.remove();
+            await updateCustomShift(staffName, dateStr, []);
+        });
+        menu.appendChild(clearCustomItem);
+    }
+    
+    document.body.appendChild(menu);
+    
+    // 外側をクリックでメニュー閉じる
+    const closeMenu = (e) => {
+        if (!menu.contains(e.target)) {
+            menu.remove();
+            document.removeEventListener('click', closeMenu);
+        }
+    };
+    setTimeout(() => {
+        document.addEventListener('click', closeMenu);
+    }, 100);
+}
+
+// カスタムシフト入力ダイアログ
+function showCustomShiftInput(staffName, dateStr, currentValue, previousValue = []) {
+    const cellKey = getGeneratedCellKey(staffName, dateStr);
+    customEditableCells[cellKey] = true;
+
+    const previousText = previousValue.length > 0 ? previousValue.join(', ') : 'なし';
+    const currentText = currentValue.length > 0 ? currentValue.join(', ') : '';
+    const input = prompt(
+        `自由入力シフトを入力してください（複数の場合はカンマで区切ります）\n編集前: ${previousText}`,
+        currentText
+    );
+    if (input !== null) {
+        const shifts = input.split(',').map(s => s.trim()).filter(s => s.length > 0);
+        if (shifts.length > 0) {
+            customShiftHistory[cellKey] = [...shifts];
+        }
+        updateCustomShift(staffName, dateStr, shifts);
+    }
+}
+
+// カスタムシフトを更新
+async function updateCustomShift(staffName, dateStr, customShifts, shouldRefresh = true) {
+    try {
+        const response = await fetch('/api/update-custom-shift', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                staff_name: staffName,
+                date: dateStr,
+                custom_shifts: customShifts
+            })
+        });
+        
+        if (response.ok) {
+            const result = await response.json();
+            if (result.success) {
+                if (shouldRefresh) {
+                    // 表を再生成して反映
+                    await generateShift();
+                }
+            } else {
+                alert('エラー: ' + (result.error || '更新に失敗しました'));
+            }
+        } else {
+            alert('サーバーエラー: ' + response.status);
+        }
+    } catch (error) {
+        console.error('Error updating custom shift:', error);
+        alert('エラーが発生しました: ' + error.message);
+    }
+}
+
+// 生成表の複数の編集（override / custom / delete）を1回で送信して更新
+async function updateGeneratedShifts(operations, shouldRefresh = true) {
+    try {
+        const response = await fetch('/api/generated-shift/batch', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({operations})
+        });
+        const result = await response.json();
+        
+        if (response.ok && result.success) {
+            if (shouldRefresh) {
+                // 表を再生成して反映
+                await generateShift();
+            }
+            return result;
+        }
+        alert('エラー: ' + (result.error || response.status));
+    } catch (error) {
+        console.error('Error updating generated shifts:', error);
+        alert('エラーが発生しました: ' + error.message);
+    }
+    return null;
+}
+
+function exportCSV() {
+    // スタッフ順序をサーバーに送信
+    const orderData = JSON.stringify(staffOrder);
+    window.location.href = `/api/export/csv?order=${encodeURIComponent(orderData)}`;
+}
+
+// 月切り替え
+function changeMonth(delta, type) {
+    currentMonth += delta;
+    if (currentMonth > 12) {
+        currentMonth = 1;
+        currentYear++;
+    } else if (currentMonth < 1) {
+        currentMonth = 12;
+        currentYear--;
+    }
+    
+    if (type === 'shifts') {
+        loadShiftTable();
+    }
+    connectStoreEvents();
+}
+
+function closeModal() {
+    document.querySelectorAll('.modal').forEach(modal => {
+        modal.classList.remove('active');
+    });
+}
+
+// 初期化は initializeUI() に統一済み
+
+
+// ========== シフト詳細設定関連 ==========
+
+let currentTimeSlots = [];
+let currentStaffTypes = [];
+let currentSettingMode = 'weekday_weekend';
+let currentSettings = {};
+
+async function loadShiftSettings() {
+    try {
+        const response = takeBootstrapped('/api/shift-settings') || await fetch('/api/shift-settings');
+        const data = await response.json();
+        
+        if (data.success) {
+            currentTimeSlots = data.time_slots || ['10-15', '17-23', '18-23', '19-23'];
+            currentStaffTypes = data.staff_types || ['社員', 'アルバイト'];
+            currentSettingMode = data.mode || 'weekday_weekend';
+            currentSettings = data.settings;
+            
+            // モード選択ラジオボタンを設定
+            const modeRadio = document.querySelector(`input[name="settingMode"][value="${currentSettingMode}"]`);
+            if (modeRadio) {
+                modeRadio.checked = true;
+            }
+            
+            // 表示モードを切り替え
+            showSettingMode(currentSettingMode);
+            
+            // 設定を表示
+            displayTimeSlots(currentTimeSlots);
+            if (currentSettingMode === 'daily') {
+                displayDailyShiftSettings(currentSettings, currentTimeSlots);
+            } else if (currentSettingMode === 'weekday_weekend_with_holidays') {
+                displayHolidayShiftSettings(currentSettings, currentTimeSlots);
+            } else {
+                displayShiftSettings(currentSettings, currentTimeSlots);
+            }
+        }
+    } catch (error) {
+        console.error('設定読み込みエラー:', error);
+        alert('設定の読み込みに失敗しました');
+    }
+}
+
+function sortStaffTypes(types) {
+    const priority = {'社員': 0, 'アルバイト': 1};
+    return [...types].sort((a, b) => {
+        const pa = priority.hasOwnProperty(a) ? priority[a] : 2;
+        const pb = priority.hasOwnProperty(b) ? priority[b] : 2;
+        if (pa !== pb) return pa - pb;
+        return a.localeCompare(b, 'ja');
+    });
+}
+
+function showSettingMode(mode) {
+    const weekday_weekend_mode = document.getElementById('weekday_weekend_mode');
+    const weekday_weekend_with_holidays_mode = document.getElementById('weekday_weekend_with_holidays_mode');
+    const daily_mode = document.getElementById('daily_mode');
+    
+    // すべてを非表示
+    weekday_weekend_mode.style.display = 'none';
+    weekday_weekend_with_holidays_mode.style.display = 'none';
+    daily_mode.style.display = 'none';
+    
+    // 選択されたモードを表示
+    if (mode === 'daily') {
+        daily_mode.style.display = 'block';
+    } else if (mode === 'weekday_weekend_with_holidays') {
+        weekday_weekend_with_holidays_mode.style.display = 'block';
+    } else {
+        weekday_weekend_mode.style.display = 'block';
+    }
+}
+
+function changSettingMode(mode) {
+    currentSettingMode = mode;
+    showSettingMode(mode);
+    // モード切り替え時は再描画するだけ（APIは呼ばない）
+    if (currentSettingMode === 'daily') {
+        displayDailyShiftSettings(currentSettings, currentTimeSlots);
+    } else if (currentSettingMode === 'weekday_weekend_with_holidays') {
+        displayHolidayShiftSettings(currentSettings, currentTimeSlots);
+    } else {
+        displayShiftSettings(currentSettings, currentTimeSlots);
+    }
+}
+
+function renderSettingsHeader(headId, staffTypes) {
+    const headRow = document.getElementById(headId);
+    if (!headRow) return;
+
+    headRow.innerHTML = '';
+    const timeHeader = document.createElement('th');
+    timeHeader.textContent = '時間帯';
+    timeHeader.style.padding = '10px';
+    timeHeader.style.textAlign = 'left';
+    timeHeader.style.border = '1px solid #ddd';
+    headRow.appendChild(timeHeader);
+
+    staffTypes.forEach(type => {
+        const th = document.createElement('th');
+        th.textContent = type;
+        th.style.padding = '10px';
+        th.style.textAlign = 'center';
+        th.style.border = '1px solid #ddd';
+        headRow.appendChild(th);
+    });
+}
+
+function displayTimeSlots(timeSlots) {
+    const container = document.getElementById('timeSlotsList');
+    container.innerHTML = '';
+    
+    timeSlots.forEach(slot => {
+        const tag = document.createElement('div');
+        tag.className = 'time-slot-tag';
+        tag.draggable = true;
+        tag.dataset.slot = slot;
+        tag.innerHTML = `
+            <span style="cursor: grab;">drag</span>
+            <span>${slot}</span>
+            <button class="remove-btn" onclick="removeTimeSlot('${slot}')" title="削除">×</button>
+        `;
+        tag.addEventListener('dragstart', (event) => {
+            event.dataTransfer.setData('text/plain', slot);
+            tag.style.opacity = '0.6';
+        });
+        tag.addEventListener('dragend', () => {
+            tag.style.opacity = '1';
+        });
+        tag.addEventListener('dragover', (event) => {
+            event.preventDefault();
+            tag.style.outline = '2px dashed #2196F3';
+        });
+        tag.addEventListener('dragleave', () => {
+            tag.style.outline = '';
+        });
+        tag.addEventListener('drop', (event) => {
+            event.preventDefault();
+            tag.style.outline = '';
+            const fromSlot = event.dataTransfer.getData('text/plain');
+            if (fromSlot && fromSlot !== slot) {
+                moveTimeSlot(fromSlot, slot);
+            }
+        });
+        container.appendChild(tag);
+    });
+}
+
+function moveTimeSlot(fromSlot, toSlot) {
+    const fromIndex = currentTimeSlots.indexOf(fromSlot);
+    const toIndex = currentTimeSlots.indexOf(toSlot);
+    if (fromIndex === -1 || toIndex === -1) return;
+
+    const updated = [...currentTimeSlots];
+    const [moved] = updated.splice(fromIndex, 1);
+    updated.splice(toIndex, 0, moved);
+    currentTimeSlots = updated;
+    displayTimeSlots(currentTimeSlots);
+    saveTimeSlotOrder();
+}
+
+async function saveTimeSlotOrder() {
+    try {
+        const response = await fetch('/api/time-slots', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({time_slots: currentTimeSlots})
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            loadShiftSettings();
+        } else {
+            alert('❌ 並び替えに失敗しました: ' + (data.error || ''));
+        }
+    } catch (error) {
+        console.error('時間帯並び替えエラー:', error);
+        alert('❌ 並び替え中にエラーが発生しました');
+    }
+}
+
+async function addTimeSlot() {
+    const input = document.getElementById('newTimeSlot');
+    const newSlot = input.value.trim();
+    
+    if (!newSlot) {
+        alert('時間帯を入力してください');
+        return;
+    }
+    
+    // 形式チェック（例：10-15, 17:30-23:00, または掃除などの文字）
+    const timeSlotPattern = /^(\d{1,2})(?::([0-5]\d))?-(\d{1,2})(?::([0-5]\d))?$/;
+    const match = newSlot.match(timeSlotPattern);
+    
+    if (match) {
+        // 時間形式の場合のバリデーション
+        const startHour = parseInt(match[1], 10);
+        const startMin = match[2] ? parseInt(match[2], 10) : 0;
+        const endHour = parseInt(match[3], 10);
+        const endMin = match[4] ? parseInt(match[4], 10) : 0;
+
+        if (startHour > 29 || endHour > 29) {
+            alert('時間は0-29の範囲で入力してください（例：29:00）');
+            return;
+        }
+
+        if (startMin % 30 !== 0 || endMin % 30 !== 0) {
+            alert('分は00または30で入力してください（例：17:30）');
+            return;
+        }
+    } else {
+        // 文字形式の場合のバリデーション（日本語や英字など）
+        if (!/^[\u4e00-\u9fff\u3040-\u309f\u30a0-\u30ffa-zA-Z0-9\-_]+$/.test(newSlot)) {
+            alert('形式が正しくありません。\n\n時間形式: 「開始-終了」（例：10-15, 17:30-23:00）\n文字形式: 日本語、英字、数字 （例：掃除, 営業準備, cleaning）');
+            return;
+        }
+    }
+    
+    if (currentTimeSlots.includes(newSlot)) {
+        alert('この時間帯は既に登録されています');
+        return;
+    }
+    
+    currentTimeSlots.push(newSlot);
+    
+    try {
+        const response = await fetch('/api/time-slots', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({time_slots: currentTimeSlots})
+        });
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            input.value = '';
+            loadShiftSettings(); // 再読み込み
+            alert('✅ 時間帯を追加しました');
+        } else {
+            alert('❌ 追加に失敗しました: ' + (data.error || ''));
+            currentTimeSlots.pop(); // 失敗したら戻す
+        }
+    } catch (error) {
+        console.error('時間帯追加エラー:', error);
+        alert('❌ 追加中にエラーが発生しました');
+        currentTimeSlots.pop();
+    }
+}
+
+async function removeTimeSlot(slot) {
+    if (!confirm(`時間帯「${slot}」を削除しますか？\n※ この時間帯に関連するシフトデータも影響を受ける可能性があります。`)) {
+        return;
+    }
+    
+    currentTimeSlots = currentTimeSlots.filter(s => s !== slot);
+    
+    try {
+        const response = await fetch('/api/time-slots', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({time_slots: currentTimeSlots})
+        });
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            loadShiftSettings(); // 再読み込み
+            alert('✅ 時間帯を削除しました');
+        } else {
+            alert('❌ 削除に失敗しました: ' + (data.error || ''));
+            currentTimeSlots.push(slot); // 失敗したら戻す
+        }
+    } catch (error) {
+        console.error('時間帯削除エラー:', error);
+        alert('❌ 削除中にエラーが発生しました');
+        currentTimeSlots.push(slot);
+    }
+}
+
+function displayShiftSettings(settings, timeSlots) {
+    if (!timeSlots) {
+        timeSlots = ['10-15', '17-23', '18-23', '19-23'];
+    }
+
+    const safeSettings = settings || {};
+    const weekdaySettings = safeSettings.weekday || safeSettings.mon_thu || {};
+    const weekendSettings = safeSettings.weekend || safeSettings.friday || {};
+
+    const staffTypes = sortStaffTypes(currentStaffTypes.length ? currentStaffTypes : ['社員', 'アルバイト']);
+    renderSettingsHeader('weekdaySettingsHead', staffTypes);
+    renderSettingsHeader('weekendSettingsHead', staffTypes);
+    
+    // 平日設定を表示（時間帯リストの順序に従う）
+    const weekdayTbody = document.getElementById('weekdaySettings');
+    weekdayTbody.innerHTML = '';
+    timeSlots.forEach((slot, slotIndex) => {
+        const config = weekdaySettings[slot] || {};
+        const row = document.createElement('tr');
+        const cells = [];
+        
+        // 時間帯
+        cells.push(`<td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">${slot}</td>`);
+
+        // スタッフ種別ごとの入力
+        staffTypes.forEach(type => {
+            const value = Number.isFinite(config[type]) ? config[type] : (config[type] || 0);
+            cells.push(`
+                <td style="padding: 10px; border: 1px solid #ddd; text-align: center;">
+                    <input type="number" min="0" max="10" value="${value}" 
+                           data-day="weekday" data-slot="${slot}" data-type="${type}"
+                           style="width: 60px; padding: 5px; text-align: center; border: 1px solid #ddd; border-radius: 4px;">
+                </td>
+            `);
+        });
+
+        row.innerHTML = cells.join('');
+        weekdayTbody.appendChild(row);
+    });
+    
+    // 週末設定を表示（時間帯リストの順序に従う）
+    const weekendTbody = document.getElementById('weekendSettings');
+    weekendTbody.innerHTML = '';
+    timeSlots.forEach((slot, slotIndex) => {
+        const config = weekendSettings[slot] || {};
+        const row = document.createElement('tr');
+        const cells = [];
+        
+        // 時間帯
+        cells.push(`<td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">${slot}</td>`);
+
+        // スタッフ種別ごとの入力
+        staffTypes.forEach(type => {
+            const value = Number.isFinite(config[type]) ? config[type] : (config[type] || 0);
+            cells.push(`
+                <td style="padding: 10px; border: 1px solid #ddd; text-align: center;">
+                    <input type="number" min="0" max="10" value="${value}" 
+                           data-day="weekend" data-slot="${slot}" data-type="${type}"
+                           style="width: 60px; padding: 5px; text-align: center; border: 1px solid #ddd; border-radius: 4px;">
+                </td>
+            `);
+        });
+
+        row.innerHTML = cells.join('');
+        weekendTbody.appendChild(row);
+    });
+}
+
+function displayDailyShiftSettings(settings, timeSlots) {
+    const container = document.getElementById('dailySettingsContainer');
+    if (!container) return;
+    
+    container.innerHTML = '';
+    
+    const dayNames = ['日', '月', '火', '水', '木', '金', '土'];
+    const staffTypes = sortStaffTypes(currentStaffTypes.length ? currentStaffTypes : ['社員', 'アルバイト']);
+    
+    dayNames.forEach((dayName, dayIndex) => {
+        // 曜日セクション
+        const section = document.createElement('div');
+        section.style.marginBottom = '20px';
+        
+        const title = document.createElement('h3');
+        title.textContent = `${dayName}曜日`;
+        title.style.marginBottom = '10px';
+        title.style.color = '#2196F3';
+        section.appendChild(title);
+        
+        // テーブル
+        const table = document.createElement('table');
+        table.style.width = '100%';
+        table.style.borderCollapse = 'collapse';
+        table.style.marginBottom = '15px';
+        
+        // ヘッダー
+        const thead = document.createElement('thead');
+        const headRow = document.createElement('tr');
+        headRow.style.background = '#f5f5f5';
+        
+        const timeHeader = document.createElement('th');
+        timeHeader.textContent = '時間帯';
+        timeHeader.style.padding = '10px';
+        timeHeader.style.textAlign = 'left';
+        timeHeader.style.border = '1px solid #ddd';
+        headRow.appendChild(timeHeader);
+        
+        staffTypes.forEach(type => {
+            const th = document.createElement('th');
+            th.textContent = type;
+            th.style.padding = '10px';
+            th.style.textAlign = 'center';
+            th.style.border = '1px solid #ddd';
+            headRow.appendChild(th);
+        });
+        
+        thead.appendChild(headRow);
+        table.appendChild(thead);
+        
+        // ボディ
+        const tbody = document.createElement('tbody');
+        timeSlots.forEach(slot => {
+            // JSONから来たキーは文字列なので、文字列キーでアクセス
+            const dayKey = String(dayIndex);
+            const config = settings[dayKey] && settings[dayKey][slot] ? settings[dayKey][slot] : {};
+            const row = document.createElement('tr');
+            
+            const timeCell = document.createElement('td');
+            timeCell.textContent = slot;
+            timeCell.style.padding = '10px';
+            timeCell.style.border = '1px solid #ddd';
+            timeCell.style.fontWeight = 'bold';
+            row.appendChild(timeCell);
+            
+            staffTypes.forEach(type => {
+                const cell = document.createElement('td');
+                const value = Number.isFinite(config[type]) ? config[type] : (config[type] || 0);
+                const input = document.createElement('input');
+                input.type = 'number';
+                input.min = '0';
+                input.max = '10';
+                input.value = value;
+                input.dataset.day = dayIndex;
+                input.dataset.slot = slot;
+                input.dataset.type = type;
+                input.style.width = '60px';
+                input.style.padding = '5px';
+                input.style.textAlign = 'center';
+                input.style.border = '1px solid #ddd';
+                input.style.borderRadius = '4px';
+                
+                cell.style.padding = '10px';
+                cell.style.border = '1px solid #ddd';
+                cell.style.textAlign = 'center';
+                cell.appendChild(input);
+                row.appendChild(cell);
+            });
+            
+            tbody.appendChild(row);
+        });
+        
+        table.appendChild(tbody);
+        section.appendChild(table);
+        container.appendChild(section);
+    });
+}
+
+function displayHolidayShiftSettings(settings, timeSlots) {
+    if (!timeSlots) {
+        timeSlots = ['10-15', '17-23', '18-23', '19-23'];
+    }
+
+    const staffTypes = sortStaffTypes(currentStaffTypes.length ? currentStaffTypes : ['社員', 'アルバイト']);
+    const dayTypes = [
+        { id: 'sunday', label: '☀️ 日（日曜日）' },
+        { id: 'monThu', label: '📅 月-木（通常の平日）' },
+        { id: 'friday', label: '🟠 金（金曜日）' },
+        { id: 'saturday', label: '⭐ 土（土曜日）' },
+        { id: 'holiday', label: '✨ 祝日' },
+        { id: 'dayBeforeHoliday', label: '🌅 祝日前日' }
+    ];
+    
+    dayTypes.forEach(dayType => {
+        renderSettingsHeader(dayType.id + 'SettingsHead', staffTypes);
+        
+        const tbody = document.getElementById(dayType.id + 'Settings');
+        if (!tbody) return;
+        tbody.innerHTML = '';
+        
+        timeSlots.forEach(slot => {
+            // JSONキーを統一（HTMLキーから設定キーへ変換）
+            const dataKey = dayType.id === 'monThu' ? 'mon_thu' : 
+                           dayType.id === 'dayBeforeHoliday' ? 'day_before_holiday' : dayType.id;
+            const config = settings[dataKey] && settings[dataKey][slot] ? settings[dataKey][slot] : {};
+            const row = document.createElement('tr');
+            const cells = [];
+            
+            // 時間帯
+            cells.push(`<td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">${slot}</td>`);
+
+            // スタッフ種別ごとの入力
+            staffTypes.forEach(type => {
+                const value = Number.isFinite(config[type]) ? config[type] : (config[type] || 0);
+                cells.push(`
+                    <td style="padding: 10px; border: 1px solid #ddd; text-align: center;">
+                        <input type="number" min="0" max="10" value="${value}" 
+                               data-day="${dayType.id}" data-slot="${slot}" data-type="${type}"
+                               style="width: 60px; padding: 5px; text-align: center; border: 1px solid #ddd; border-radius: 4px;">
+                    </td>
+                `);
+            });
+
+            row.innerHTML = cells.join('');
+            tbody.appendChild(row);
+        });
+    });
+}
+
+async function saveShiftSettings() {
+    try {
+        let settings;
+        const staffTypes = sortStaffTypes(currentStaffTypes.length ? currentStaffTypes : ['社員', 'アルバイト']);
+        const timeSlots = currentTimeSlots;
+        
+        if (currentSettingMode === 'daily') {
+            // 曜日ごとモード
+            settings = {
+                daily: {}
+            };
+            
+            for (let dayIndex = 0; dayIndex < 7; dayIndex++) {
+                const dayKey = String(dayIndex);
+                settings.daily[dayKey] = {};
+                timeSlots.forEach(slot => {
+                    settings.daily[dayKey][slot] = {};
+                    staffTypes.forEach(type => {
+                        const input = document.querySelector(
+                            `input[data-day="${dayIndex}"][data-slot="${slot}"][data-type="${type}"]`
+                        );
+                        settings.daily[dayKey][slot][type] = parseInt(input?.value, 10) || 0;
+                    });
+                });
+            }
+        } else if (currentSettingMode === 'weekday_weekend_with_holidays') {
+            // 祝日別モード（日曜日を独立）
+            settings = {
+                weekday_weekend_with_holidays: {
+                    sunday: {},
+                    mon_thu: {},
+                    friday: {},
+                    saturday: {},
+                    holiday: {},
+                    day_before_holiday: {}
+                }
+            };
+            
+            const dayTypeMap = {
+                sunday: 'sunday',
+                monThu: 'mon_thu',
+                friday: 'friday',
+                saturday: 'saturday',
+                holiday: 'holiday',
+                dayBeforeHoliday: 'day_before_holiday'
+            };
+            
+            Object.entries(dayTypeMap).forEach(([htmlKey, settingKey]) => {
+                timeSlots.forEach(slot => {
+                    settings.weekday_weekend_with_holidays[settingKey][slot] = {};
+                    staffTypes.forEach(type => {
+                        const input = document.querySelector(
+                            `input[data-day="${htmlKey}"][data-slot="${slot}"][data-type="${type}"]`
+                        );
+                        settings.weekday_weekend_with_holidays[settingKey][slot][type] = parseInt(input?.value, 10) || 0;
+                    });
+                });
+            });
+        } else {
+            // 平日・週末モード
+            settings = {
+                weekday_weekend: {
+                    weekday: {},
+                    weekend: {}
+                }
+            };
+            
+            timeSlots.forEach(slot => {
+                settings.weekday_weekend.weekday[slot] = {};
+                staffTypes.forEach(type => {
+                    const input = document.querySelector(
+                        `input[data-day="weekday"][data-slot="${slot}"][data-type="${type}"]`
+                    );
+                    settings.weekday_weekend.weekday[slot][type] = parseInt(input?.value, 10) || 0;
+                });
+            });
+            
+            timeSlots.forEach(slot => {
+                settings.weekday_weekend.weekend[slot] = {};
+                staffTypes.forEach(type => {
+                    const input = document.querySelector(
+                        `input[data-day="weekend"][data-slot="${slot}"][data-type="${type}"]`
+                    );
+                    settings.weekday_weekend.weekend[slot][type] = parseInt(input?.value, 10) || 0;
+                });
+            });
+        }
+        
+        const response = await fetch('/api/shift-settings', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                settings: settings,
+                mode: currentSettingMode
+            })
+        });
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            alert('✅ 設定を保存しました');
+        } else {
+            alert('❌ 保存に失敗しました: ' + (data.error || ''));
+        }
+    } catch (error) {
+        console.error('設定保存エラー:', error);
+        alert('❌ 保存中にエラーが発生しました');
+    }
+}
+
+async function resetShiftSettings() {
+    if (!confirm('デフォルト設定に戻しますか？')) {
+        return;
+    }
+    
+    const defaultSettings = {
+        weekday_weekend: {
+            weekday: {},
+            weekend: {}
+        },
+        daily: {}
+    };
+    
+    const staffTypes = sortStaffTypes(currentStaffTypes.length ? currentStaffTypes : ['社員', 'アルバイト']);
+    const weekendDays = [5, 6];  // 金土
+    
+    currentTimeSlots.forEach(slot => {
+        // 平日・週末モード用
+        defaultSettings.weekday_weekend.weekday[slot] = {};
+        defaultSettings.weekday_weekend.weekend[slot] = {};
+        
+        // 曜日ごとモード用
+        for (let dayIndex = 0; dayIndex < 7; dayIndex++) {
+            const dayKey = String(dayIndex);
+            if (!defaultSettings.daily[dayKey]) {
+                defaultSettings.daily[dayKey] = {};
+            }
+            defaultSettings.daily[dayKey][slot] = {};
+        }
+        
+        staffTypes.forEach(type => {
+            const value = (type === '社員' || type === 'アルバイト') ? 1 : 0;
+            const weekendValue = (type === '社員' || type === 'アルバイト') ? 1 : 0;
+            
+            // 平日・週末モード
+            defaultSettings.weekday_weekend.weekday[slot][type] = value;
+            defaultSettings.weekday_weekend.weekend[slot][type] = weekendValue;
+            
+            // 曜日ごとモード
+            for (let dayIndex = 0; dayIndex < 7; dayIndex++) {
+                const dayKey = String(dayIndex);
+                const isWeekend = weekendDays.includes(dayIndex);
+                defaultSettings.daily[dayKey][slot][type] = isWeekend ? weekendValue : value;
+            }
+        });
+    });
+    
+    // 現在のモードに応じて表示
+    if (currentSettingMode === 'daily') {
+        displayDailyShiftSettings(defaultSettings.daily, currentTimeSlots);
+    } else {
+        displayShiftSettings(defaultSettings.weekday_weekend, currentTimeSlots);
+    }
+    
+    alert('✅ デフォルト設定を表示しました。保存するには「設定を保存」ボタンを押してください。');
+}
+
+// ========== パスワード変更関連 ==========
+
+async function changePassword() {
+    const currentPassword = document.getElementById('currentPassword').value;
+    const newPassword = document.getElementById('newPassword').value;
+    const confirmPassword = document.getElementById('confirmPassword').value;
+
+    // 入力チェック
+    if (!currentPassword) {
+        alert('現在のパスワードを入力してください');
+        return;
+    }
+
+    if (!newPassword) {
+        alert('新しいパスワードを入力してください');
+        return;
+    }
+
+    if (newPassword.length < 4) {
+        alert('パスワードは4文字以上にしてください');
+        return;
+    }
+
+    if (newPassword !== confirmPassword) {
+        alert('新しいパスワードが一致しません');
+        return;
+    }
+
+    if (currentPassword === newPassword) {
+        alert('新しいパスワードは現在のパスワードと異なるものにしてください');
+        return;
+    }
+
+    if (!confirm('パスワードを変更しますか？\n変更後は新しいパスワードでログインしてください。')) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/change-password', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                current_password: currentPassword,
+                new_password: newPassword
+            })
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            alert('✅ パスワードを変更しました！\n次回ログイン時から新しいパスワードが必要です。');
+            // 入力欄をクリア
+            document.getElementById('currentPassword').value = '';
+            document.getElementById('newPassword').value = '';
+            document.getElementById('confirmPassword').value = '';
+        } else {
+            alert('❌ パスワード変更に失敗しました: ' + (data.error || ''));
+        }
+    } catch (error) {
+        console.error('パスワード変更エラー:', error);
+        alert('❌ パスワード変更中にエラーが発生しました');
+    }
+}
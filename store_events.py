@@ -0,0 +1,229 @@
+"""
+店舗データの変更イベント（Server-Sent Events 用の pub/sub）
+同一プロセス内はキューで配信し、STORE_EVENTS_DB を指定すると SQLite を経由して
+複数ワーカー（gunicorn の別プロセス）の購読者にも配信する
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# 複数ワーカーで共有するイベント DB（未指定ならプロセス内のみ）
+STORE_EVENTS_DB = os.getenv('STORE_EVENTS_DB', '').strip()
+
+# 再接続時に Last-Event-ID から再送するため保持するイベント数（プロセス内のみの場合）
+REPLAY_BUFFER_SIZE = 512
+# 購読者ごとのキューの上限（溢れたら再読み込みを促す）
+SUBSCRIBER_QUEUE_SIZE = 256
+# SQLite のポーリング間隔（秒）とイベントの保持時間（秒）
+POLL_INTERVAL = 0.5
+RETENTION_SECONDS = 600
+
+# キューが溢れた購読者に送るイベント
+RELOAD_EVENT = {'type': 'reload', 'month': None}
+
+
+class Subscription:
+    """1接続分の購読（店舗・月で絞り込み、イベントID順に取り出す）"""
+
+    def __init__(self, broker, store_code, month_key):
+        self.broker = broker
+        self.store_code = store_code
+        self.month_key = month_key
+        self.last_id = 0
+        self._queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._backlog = deque()
+        self._overflowed = False
+
+    def matches(self, event):
+        month = event.get('month')
+        return month is None or month == self.month_key
+
+    def offer(self, event_id, event):
+        """ブローカーから呼ばれる（ブロックしない）"""
+        if not self.matches(event):
+            return
+        try:
+            self._queue.put_nowait((event_id, event))
+        except queue.Full:
+            self._overflowed = True
+
+    def get(self, timeout):
+        """次のイベント (id, event) を返す（timeout 秒以内になければ None）"""
+        if self._overflowed:
+            # 取りこぼしたイベントがあるため、全体の再読み込みを促す
+            self._overflowed = False
+            self._backlog.clear()
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            return None, RELOAD_EVENT
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._backlog:
+                event_id, event = self._backlog.popleft()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    event_id, event = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    return None
+            # 再送分と重複したイベントは飛ばす
+            if event_id <= self.last_id:
+                continue
+            self.last_id = event_id
+            return event_id, event
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """店舗ごとの変更イベントの配信"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or None
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._recent = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self._next_id = 1
+        self._poller = None
+        if self.db_path:
+            self._init_db()
+
+    # --- 購読 ---
+
+    def subscribe(self, store_code, month_key, last_event_id=None):
+        """購読を開始（last_event_id 以降のイベントがあれば先に再送）"""
+        subscription = Subscription(self, store_code, month_key)
+        with self._lock:
+            self._subscribers.setdefault(store_code, set()).add(subscription)
+            if last_event_id is not None and not self.db_path:
+                backlog = [(event_id, event) for event_id, code, event in self._recent
+                           if code == store_code and event_id > last_event_id]
+            else:
+                backlog = []
+
+        if self.db_path:
+            self._ensure_poller()
+            if last_event_id is not None:
+                backlog = self._read_events(last_event_id, store_code)
+
+        subscription._backlog.extend(
+            (event_id, event) for event_id, event in backlog if subscription.matches(event)
+        )
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.store_code)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.store_code]
+
+    def subscriber_count(self, store_code=None):
+        with self._lock:
+            if store_code is not None:
+                return len(self._subscribers.get(store_code, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    # --- 配信 ---
+
+    def publish(self, store_code, event):
+        """イベントを配信（SQLite 使用時は DB 経由で全ワーカーに届く）"""
+        if self.db_path:
+            self._insert_event(store_code, event)
+            return
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            self._dispatch_locked(event_id, store_code, event)
+
+    def _dispatch_locked(self, event_id, store_code, event):
+        # ID 順を保つため、ロックを保持したままキューに入れる（put はブロックしない）
+        self._recent.append((event_id, store_code, event))
+        for subscription in self._subscribers.get(store_code, ()):
+            subscription.offer(event_id, event)
+
+    # --- SQLite による複数ワーカー間の配信 ---
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS store_events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'store_code TEXT NOT NULL, '
+                'payload TEXT NOT NULL, '
+                'created REAL NOT NULL)'
+            )
+
+    def _insert_event(self, store_code, event):
+        payload = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO store_events (store_code, payload, created) VALUES (?, ?, ?)',
+                (store_code, payload, time.time())
+            )
+
+    def _read_events(self, after_id, store_code=None):
+        with self._connect() as conn:
+            if store_code is None:
+                rows = conn.execute(
+                    'SELECT id, store_code, payload FROM store_events WHERE id > ? ORDER BY id',
+                    (after_id,)
+                ).fetchall()
+                return [(event_id, code, json.loads(payload)) for event_id, code, payload in rows]
+            rows = conn.execute(
+                'SELECT id, payload FROM store_events WHERE id > ? AND store_code = ? ORDER BY id',
+                (after_id, store_code)
+            ).fetchall()
+            return [(event_id, json.loads(payload)) for event_id, payload in rows]
+
+    def _ensure_poller(self):
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name='store-events-poller', daemon=True)
+        self._poller.start()
+
+    def _poll_loop(self):
+        with self._connect() as conn:
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM store_events').fetchone()[0]
+        last_cleanup = time.monotonic()
+
+        while True:
+            time.sleep(POLL_INTERVAL)
+            try:
+                events = self._read_events(last_id)
+                if events:
+                    with self._lock:
+                        for event_id, store_code, event in events:
+                            self._dispatch_locked(event_id, store_code, event)
+                    last_id = events[-1][0]
+
+                if time.monotonic() - last_cleanup > RETENTION_SECONDS:
+                    with self._connect() as conn:
+                        conn.execute('DELETE FROM store_events WHERE created < ?', (time.time() - RETENTION_SECONDS,))
+                    last_cleanup = time.monotonic()
+            except sqlite3.Error as e:
+                print(f"[ERROR store_events] イベントの取得に失敗: {str(e)}")
+
+
+def format_sse(event_id, event):
+    """Server-Sent Events の1メッセージに整形"""
+    data = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+    if event_id is None:
+        return f'data: {data}\n\n'
+    return f'id: {event_id}\ndata: {data}\n\n'
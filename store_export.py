@@ -0,0 +1,71 @@
+"""
+店舗データのエクスポート（JSON Lines を1チャンクずつ生成）
+
+形式は store_import.py と同じで、先頭のヘッダー行に続けて1行1チャンクを出力する。
+日付・月ごとのデータは from / to（YYYY-MM）で月を絞り込める。
+全体を1つの文字列にシリアライズせず、一定サイズごとに送り出す（圧縮は compression.py が逐次行う）。
+"""
+
+import os
+from datetime import datetime
+
+from change_log import EXCLUDED_KEYS, SPLIT_SECTIONS, iter_chunks
+from store_import import JSONL_FORMAT, JSONL_SCHEMA, in_range
+from store_json import dumps_compact
+
+# まとめて送り出すバイト数（細かい書き込みを減らす）
+EXPORT_BUFFER_BYTES = int(os.getenv('EXPORT_BUFFER_BYTES', str(64 * 1024)))
+
+
+def in_month_range(sub_key, month_from=None, month_to=None):
+    """日付（YYYY-MM-DD）または月（YYYY-MM）のキーが範囲内か"""
+    return in_range(sub_key[:7], month_from, month_to)
+
+
+def filter_months(data, month_from=None, month_to=None):
+    """日付・月ごとのデータを範囲内の月に絞ったコピー
+
+    範囲の有無にかかわらず、バージョン・索引・パスワード（EXCLUDED_KEYS）は含めない（JSON Lines と同じ）。
+    """
+    filtered = {key: value for key, value in data.items() if key not in EXCLUDED_KEYS}
+    if month_from is None and month_to is None:
+        return filtered
+    for section in SPLIT_SECTIONS:
+        if isinstance(data.get(section), dict):
+            filtered[section] = {
+                key: value for key, value in data[section].items()
+                if in_month_range(key, month_from, month_to)
+            }
+    return filtered
+
+
+def build_export_header(store_code, data, month_from=None, month_to=None):
+    return {
+        'format': JSONL_FORMAT,
+        'schema': JSONL_SCHEMA,
+        'store_code': store_code,
+        'version': data.get('version', 0),
+        'exported_at': datetime.now().isoformat(timespec='seconds'),
+        'from': month_from,
+        'to': month_to,
+    }
+
+
+def iter_export_lines(data, header, month_from=None, month_to=None):
+    """ヘッダー行とチャンク行を EXPORT_BUFFER_BYTES ごとにまとめて返すジェネレーター
+
+    バージョン・索引・パスワードは出力しない（インポート先のものを使うため）。
+    """
+    buffer = bytearray(dumps_compact(header))
+    buffer += b'\n'
+    for key, value in iter_chunks(data):
+        sub_key = key.partition('/')[2]
+        if sub_key and not in_month_range(sub_key, month_from, month_to):
+            continue
+        buffer += dumps_compact({'key': key, 'value': value})
+        buffer += b'\n'
+        if len(buffer) >= EXPORT_BUFFER_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
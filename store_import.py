@@ -0,0 +1,267 @@
+"""
+店舗データのインポート（検証しながら1チャンクずつ組み立てる）
+
+JSON Lines 形式（Content-Type: application/x-ndjson、gzip 可）では1行が1チャンク:
+
+    {"format": "shift-tool-store", "schema": 1, "from": null, "to": null, ...}   # 先頭のヘッダー行（任意）
+    {"key": "staff", "value": {...}}
+    {"key": "shifts/2026-05-01", "value": {"太郎": ["10-15"]}}
+    {"key": "confirmed_generated_shifts/2026-05", "value": {...}}
+
+チャンクキーは変更ログ（change_log.py）と同じ。本文全体を一度に読み込まず、
+1行ずつパース・検証して組み立てるため、不正なデータは保存前にまとめて弾ける。
+ヘッダーの from / to（YYYY-MM）は月を絞ったエクスポートであることを示す（範囲外の月は含まれていない）。
+"""
+
+import os
+import re
+
+from calendar_index import parse_date
+from change_log import EXCLUDED_KEYS, SPLIT_SECTIONS, is_valid_chunk_key, iter_chunks, set_chunk
+from staff_index import DATE_SECTIONS, MONTH_SECTIONS
+from store_json import loads
+
+JSONL_FORMAT = 'shift-tool-store'
+JSONL_SCHEMA = 1
+# 1行（1チャンク）の最大バイト数
+MAX_LINE_BYTES = int(os.getenv('STORE_IMPORT_MAX_LINE_BYTES', str(8 * 1024 * 1024)))
+# インポートに必須のキー
+REQUIRED_KEYS = ('staff', 'shifts', 'requirements')
+# 警告として返す未登録の時間帯の最大件数
+MAX_WARNINGS = 20
+
+MONTH_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+class ImportValidationError(ValueError):
+    def __init__(self, message, line=None):
+        super().__init__(message if line is None else f'{line}行目: {message}')
+        self.line = line
+
+
+def _check(condition, message):
+    if not condition:
+        raise ImportValidationError(message)
+
+
+def _check_date(date_str, month_key=None):
+    try:
+        parsed = parse_date(date_str)
+    except (TypeError, ValueError):
+        raise ImportValidationError(f'日付の形式が正しくありません: {date_str!r}')
+    _check(month_key is None or parsed.month_key == month_key, f'{month_key} 以外の日付があります: {date_str}')
+
+
+def check_month_range(month_from, month_to):
+    """エクスポートの範囲（from / to）を検証して (from, to) を返す（指定なしは None）"""
+    for month in (month_from, month_to):
+        _check(month is None or (isinstance(month, str) and MONTH_PATTERN.match(month) is not None),
+               f'範囲の月の形式が正しくありません: {month!r}')
+    _check(month_from is None or month_to is None or month_from <= month_to, '範囲の開始月が終了月より後です')
+    return month_from, month_to
+
+
+def in_range(month, month_from=None, month_to=None):
+    """月（YYYY-MM）が範囲内か"""
+    return (month_from is None or month >= month_from) and (month_to is None or month <= month_to)
+
+
+def _check_slot_list(slots, where):
+    _check(isinstance(slots, list) and all(isinstance(slot, str) for slot in slots),
+           f'{where}: 時間帯は文字列の配列で指定してください')
+
+
+def _check_day(day, where):
+    """{staff: [時間帯]}"""
+    _check(isinstance(day, dict), f'{where}: スタッフごとの時間帯で指定してください')
+    for staff_name, slots in day.items():
+        _check(staff_name != '', f'{where}: スタッフ名が空です')
+        _check_slot_list(slots, f'{where} {staff_name}')
+
+
+class StoreImporter:
+    """チャンクを1つずつ検証して店舗データを組み立てる"""
+
+    def __init__(self):
+        self.data = {}
+        self.chunks = 0
+        # ヘッダー行のエクスポート範囲（月を絞ったエクスポートなら from / to）
+        self.month_range = (None, None)
+        # 時間帯一覧との照合は、time_slots の位置に関係なく最後にまとめて行う
+        self._slot_refs = set()
+        self._requirement_slots = set()
+
+    def add_line(self, raw_line, line_no):
+        raw_line = raw_line.strip()
+        if not raw_line:
+            return
+        try:
+            record = loads(raw_line)
+        except ValueError as e:
+            raise ImportValidationError(f'JSON として読み込めません: {str(e)}', line_no)
+        if not isinstance(record, dict):
+            raise ImportValidationError('行の形式が不正です', line_no)
+        if 'key' not in record:
+            if record.get('format') == JSONL_FORMAT and self.chunks == 0:
+                if record.get('schema') != JSONL_SCHEMA:
+                    raise ImportValidationError(f'対応していない形式です: schema {record.get("schema")}', line_no)
+                try:
+                    self.month_range = check_month_range(record.get('from'), record.get('to'))
+                except ImportValidationError as e:
+                    raise ImportValidationError(str(e), line_no)
+                return
+            raise ImportValidationError('key がありません', line_no)
+        if 'value' not in record:
+            raise ImportValidationError(f'値がありません: {record["key"]}', line_no)
+        try:
+            self.add_chunk(record['key'], record['value'])
+        except ImportValidationError as e:
+            raise ImportValidationError(str(e), line_no)
+
+    def add_chunk(self, key, value):
+        section = key.partition('/')[0] if isinstance(key, str) else None
+        if section in EXCLUDED_KEYS:
+            # バージョン・索引・パスワードはインポート先のものを使う
+            return
+        _check(is_valid_chunk_key(key), f'不正なキーです: {key!r}')
+        if section in SPLIT_SECTIONS and '/' not in key:
+            # セクション全体を1チャンクで渡された場合は日付・月ごとに検証する
+            _check(isinstance(value, dict), f'{key}: オブジェクトで指定してください')
+            self.data.setdefault(key, {})
+            for sub_key, sub_value in value.items():
+                self.add_chunk(f'{key}/{sub_key}', sub_value)
+            return
+
+        self._validate(key, value)
+        set_chunk(self.data, key, value)
+        self.chunks += 1
+
+    def _validate(self, key, value):
+        section, _, sub_key = key.partition('/')
+        if section in DATE_SECTIONS:
+            _check_date(sub_key)
+            _check_day(value, key)
+            if section != 'custom_shifts':
+                self._slot_refs.update(slot for slots in value.values() for slot in slots)
+        elif section == 'requirements':
+            _check_date(sub_key)
+            _check(isinstance(value, dict), f'{key}: 時間帯ごとの人数で指定してください')
+            for slot, count in value.items():
+                _check(isinstance(count, int) and not isinstance(count, bool) and count >= 0,
+                       f'{key} {slot}: 人数は0以上の整数で指定してください')
+            self._requirement_slots.update(value)
+        elif section in MONTH_SECTIONS:
+            _check(MONTH_PATTERN.match(sub_key) is not None, f'月の形式が正しくありません: {sub_key!r}')
+            _check(isinstance(value, dict) and isinstance(value.get('shifts', {}), dict),
+                   f'{key}: shifts を日付ごとに指定してください')
+            for date_str, day in value.get('shifts', {}).items():
+                _check_date(date_str, sub_key)
+                _check_day(day, f'{key} {date_str}')
+                self._slot_refs.update(slot for slots in day.values() for slot in slots)
+        elif section == 'staff':
+            _check(isinstance(value, (dict, list)), 'staff: スタッフ名をキーとするオブジェクトで指定してください')
+            names = value if isinstance(value, list) else list(value)
+            _check(all(isinstance(name, str) and name for name in names), 'staff: スタッフ名が不正です')
+            if isinstance(value, dict):
+                for name, info in value.items():
+                    _check(isinstance(info, dict) and isinstance(info.get('type', ''), str),
+                           f'staff {name}: 種別の形式が不正です')
+        elif section == 'time_slots':
+            _check(isinstance(value, list) and value and all(isinstance(slot, str) and slot for slot in value),
+                   'time_slots: 時間帯は空でない文字列の配列で指定してください')
+            _check(len(set(value)) == len(value), 'time_slots: 時間帯が重複しています')
+        elif section == 'shift_settings':
+            _check(isinstance(value, dict), 'shift_settings: オブジェクトで指定してください')
+
+    def finish(self, required_keys=REQUIRED_KEYS):
+        """(店舗データ, 警告) を返す（必須キーがなければ ImportValidationError）"""
+        for section in SPLIT_SECTIONS:
+            # 空のセクションはチャンクとして現れないため補う
+            if section in required_keys or section in self.data:
+                self.data.setdefault(section, {})
+        missing_keys = [key for key in required_keys if key not in self.data]
+        if missing_keys:
+            raise ImportValidationError(f'必須キーが不足しています: {", ".join(missing_keys)}')
+
+        warnings = []
+        time_slots = self.data.get('time_slots')
+        if isinstance(time_slots, list):
+            # 時間帯を削除しても過去のシフトは残るため、未登録の時間帯はエラーにせず警告にとどめる
+            unknown = sorted((self._slot_refs | self._requirement_slots) - set(time_slots))
+            warnings.extend(f'時間帯一覧にない時間帯があります: {slot}' for slot in unknown[:MAX_WARNINGS])
+        return self.data, warnings
+
+
+def iter_lines(stream, max_line_bytes=None):
+    """ストリームから (行番号, 行) を順に読む（長すぎる行は ImportValidationError）"""
+    max_line_bytes = max_line_bytes or MAX_LINE_BYTES
+    line_no = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_no += 1
+        if len(line) > max_line_bytes:
+            raise ImportValidationError(f'1行が長すぎます（上限 {max_line_bytes} バイト）', line_no)
+        yield line_no, line
+
+
+def import_jsonl(stream):
+    """JSON Lines を1行ずつ検証し、(店舗データ, 警告, ヘッダーの (from, to)) を返す"""
+    importer = StoreImporter()
+    for line_no, line in iter_lines(stream):
+        importer.add_line(line, line_no)
+    # JSON Lines ではスタッフ一覧以外の空のセクションは省略できる
+    data, warnings = importer.finish(required_keys=('staff',) + tuple(sorted(SPLIT_SECTIONS)))
+    return data, warnings, importer.month_range
+
+
+def import_document(data):
+    """従来形式（{'data': {...}}）の店舗データを同じ規則で検証し、(店舗データ, 警告) を返す"""
+    _check(isinstance(data, dict), 'インポートデータが不正です')
+    missing_keys = [key for key in REQUIRED_KEYS if key not in data]
+    _check(not missing_keys, f'必須キーが不足しています: {", ".join(missing_keys)}')
+    importer = StoreImporter()
+    for key, value in iter_chunks(data):
+        importer.add_chunk(key, value)
+    return importer.finish(required_keys=REQUIRED_KEYS + tuple(key for key in SPLIT_SECTIONS if key in data))
+
+
+def imported_months(data):
+    """インポートデータに含まれる月（YYYY-MM）"""
+    months = set()
+    for section in SPLIT_SECTIONS:
+        keys = data.get(section) or {}
+        months.update(key[:7] for key in keys)
+    return months
+
+
+def merge_by_month(current, imported, month_from=None, month_to=None):
+    """インポートに含まれる月だけを置き換えたデータを返す
+
+    日付・月ごとのデータはインポートに含まれる月を丸ごと置き換え、それ以外の月は現在の内容を残す。
+    範囲（月を絞ったエクスポートの from / to）を指定すると、範囲内の月はインポートに含まれなくても置き換える
+    （エクスポート元で削除された月を反映する）。
+    スタッフは追加・更新のみ（削除しない）、その他の設定はインポートにあれば置き換える。
+    """
+    months = imported_months(imported)
+    has_range = month_from is not None or month_to is not None
+    if has_range:
+        for section in SPLIT_SECTIONS:
+            months.update(key[:7] for key in (current.get(section) or {}) if in_range(key[:7], month_from, month_to))
+    merged = dict(current)
+    for key in SPLIT_SECTIONS:
+        if key not in imported and not has_range:
+            continue
+        kept = {sub_key: sub_value for sub_key, sub_value in (current.get(key) or {}).items()
+                if sub_key[:7] not in months}
+        kept.update(imported.get(key) or {})
+        merged[key] = dict(sorted(kept.items()))
+    for key, value in imported.items():
+        if key in SPLIT_SECTIONS:
+            continue
+        elif key == 'staff' and isinstance(value, dict) and isinstance(current.get('staff'), dict):
+            merged['staff'] = dict(current['staff'], **value)
+        else:
+            merged[key] = value
+    return merged, sorted(months)
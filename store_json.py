@@ -0,0 +1,112 @@
+"""
+店舗データファイルの JSON 読み書き
+orjson がインストールされていれば使用し、なければ標準の json にフォールバックする
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows では fcntl がないため、プロセス内のロックのみ
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # orjson は任意依存
+    orjson = None
+
+# 保存形式: 'compact'（インデントなし・区切り最小）または 'pretty'（従来のインデント付き）
+STORE_JSON_FORMAT = os.getenv('STORE_JSON_FORMAT', 'compact').strip().lower()
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps_compact(data):
+    """インデントなしの UTF-8 バイト列にシリアライズ"""
+    if orjson is not None:
+        # shift_settings['daily'] は int キーを含むため OPT_NON_STR_KEYS が必要
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_pretty(data):
+    """インデント付き（人が読む用）の UTF-8 バイト列にシリアライズ"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def dumps_canonical(data):
+    """キー順を揃えたバイト列（内容の比較・ダイジェスト用）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+    try:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    except TypeError:
+        # int と str のキーが混在している場合は並べ替えできないため、そのままの順で出力
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_store(data):
+    """設定された保存形式でシリアライズ"""
+    if STORE_JSON_FORMAT == 'pretty':
+        return dumps_pretty(data)
+    return dumps_compact(data)
+
+
+def loads(raw):
+    """バイト列または文字列から JSON を読み込む"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode('utf-8')
+    return json.loads(raw)
+
+
+def read_json_file(path):
+    """JSON ファイルを一括で読み込む"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def file_signature(stat_result):
+    """ファイルの同一性を表す (inode, 更新時刻ns, サイズ)"""
+    return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def write_json_file(path, data, pretty=False):
+    """JSON ファイルを一括で書き込む（一時ファイル経由で置き換え、読み込み中の破損を防ぐ）
+
+    返り値: 書き込んだファイルのシグネチャ（file_signature）
+    """
+    payload = dumps_pretty(data) if pretty else dumps_store(data)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            # rename では inode・更新時刻が変わらないため、置き換え前に取得しておく
+            signature = file_signature(os.fstat(f.fileno()))
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return signature
+
+
+@contextmanager
+def file_lock(path):
+    """ロックファイルによるプロセス間の排他ロック（gunicorn の複数ワーカー向け）"""
+    if fcntl is None:
+        yield
+        return
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
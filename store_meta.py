@@ -0,0 +1,177 @@
+"""
+店舗のメタデータ（ヘッダー）ファイル <store>_meta.json
+ログイン・認証確認で使う小さな情報だけを店舗データ本体とは別に保存し、
+本体（数年分のシフト）を読まずに参照できるようにする。
+
+    {
+        'schema': 1,
+        'version': 店舗データのバージョン,
+        'last_modified': 保存日時,
+        'data_signature': 対応する本体ファイルのシグネチャ [inode, 更新時刻ns, サイズ],
+        'password': {'algorithm': 'pbkdf2_sha256', 'iterations': ..., 'salt': ..., 'hash': ...},
+        'mode': シフト設定のモード,
+        'time_slots': [...],
+        'staff': {スタッフ名: 種別}
+    }
+
+本体の保存時（save_data）に書き出し、本体のシグネチャと一致しない場合
+（旧データ・他のツールで本体を書き換えた場合）は本体から作り直す。
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from datetime import datetime
+
+from store_cache import LRUCache
+from store_json import file_signature, read_json_file, write_json_file
+
+META_SCHEMA = 1
+PASSWORD_ALGORITHM = 'pbkdf2_sha256'
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '100000'))
+STORE_META_CACHE_SIZE = int(os.getenv('STORE_META_CACHE_SIZE', '256'))
+CREDENTIAL_CACHE_SIZE = int(os.getenv('CREDENTIAL_CACHE_SIZE', '256'))
+
+# {本体ファイルのパス: メタデータ}（本体のシグネチャが一致する間だけ使う）
+_meta_cache = LRUCache(STORE_META_CACHE_SIZE)
+# 保存のたびにハッシュを計算し直さないよう、直近のパスワードと検証子を覚えておく
+# {メタファイルのパス: (パスワードの sha256, 検証子)}
+_verifier_cache = {}
+_verifier_lock = threading.Lock()
+# 照合に成功した (検証子のハッシュ, ソルト付きパスワードの sha256) の組（PBKDF2 の再計算を省く）
+_credential_cache = LRUCache(CREDENTIAL_CACHE_SIZE)
+# 照合に失敗した組（打ち間違いの再送などで毎回 PBKDF2 を計算しない。失敗が多くても成功の記録を押し出さないよう別に持つ）
+# 検証子のハッシュを含むため、パスワードを変更すれば使われなくなる
+_failed_credential_cache = LRUCache(CREDENTIAL_CACHE_SIZE)
+
+
+def meta_file_path(data_file):
+    """'<store>_data.json' -> '<store>_meta.json'"""
+    base = data_file[:-len('_data.json')] if data_file.endswith('_data.json') else os.path.splitext(data_file)[0]
+    return f'{base}_meta.json'
+
+
+def make_password_verifier(password, salt=None, iterations=None):
+    """パスワードのソルト付きハッシュ（平文は含まない）"""
+    salt = salt or secrets.token_hex(16)
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), iterations)
+    return {
+        'algorithm': PASSWORD_ALGORITHM,
+        'iterations': iterations,
+        'salt': salt,
+        'hash': digest.hex(),
+    }
+
+
+def verify_password(verifier, password):
+    """検証子とパスワードが一致するか"""
+    if not isinstance(verifier, dict) or verifier.get('algorithm') != PASSWORD_ALGORITHM:
+        return False
+    try:
+        expected = make_password_verifier(password, verifier['salt'], int(verifier['iterations']))
+    except (KeyError, TypeError, ValueError):
+        return False
+    return hmac.compare_digest(expected['hash'], str(verifier.get('hash', '')))
+
+
+def check_password(meta, password):
+    """メタデータのパスワード検証子と照合（最近照合した組み合わせは成功・失敗ともキャッシュから判定）"""
+    verifier = meta.get('password')
+    if not isinstance(verifier, dict):
+        return False
+    key = (str(verifier.get('hash')), hashlib.sha256((str(verifier.get('salt')) + password).encode('utf-8')).hexdigest())
+    if _credential_cache.get(key):
+        return True
+    if _failed_credential_cache.get(key):
+        return False
+    if not verify_password(verifier, password):
+        _failed_credential_cache.put(key, True)
+        return False
+    _credential_cache.put(key, True)
+    return True
+
+
+def _password_verifier(meta_path, password):
+    fingerprint = hashlib.sha256(password.encode('utf-8')).hexdigest()
+    with _verifier_lock:
+        cached = _verifier_cache.get(meta_path)
+    if cached is not None and hmac.compare_digest(cached[0], fingerprint):
+        return cached[1]
+
+    # 既存のメタファイルの検証子が同じパスワードなら使い回す（起動後の初回のみ計算）
+    verifier = None
+    try:
+        previous = read_json_file(meta_path).get('password')
+        if verify_password(previous, password):
+            verifier = previous
+    except (OSError, ValueError, AttributeError):
+        pass
+    if verifier is None:
+        verifier = make_password_verifier(password)
+
+    with _verifier_lock:
+        _verifier_cache[meta_path] = (fingerprint, verifier)
+    return verifier
+
+
+def build_store_meta(data, data_signature, password):
+    """店舗データからメタデータを作る"""
+    shift_settings = data.get('shift_settings')
+    staff = data.get('staff', {})
+    if isinstance(staff, list):
+        staff = {name: {'type': 'アルバイト'} for name in staff}
+    return {
+        'schema': META_SCHEMA,
+        'version': data.get('version', 0),
+        'last_modified': datetime.now().isoformat(timespec='seconds'),
+        'data_signature': list(data_signature),
+        'mode': shift_settings.get('mode') if isinstance(shift_settings, dict) else None,
+        'time_slots': data.get('time_slots'),
+        'staff': {
+            name: (info.get('type', 'アルバイト') if isinstance(info, dict) else 'アルバイト')
+            for name, info in staff.items()
+        },
+        'password': password,
+    }
+
+
+def write_store_meta(data_file, data, data_signature, default_password):
+    """本体の保存直後に呼ぶ（メタファイルを書き出してキャッシュする）"""
+    meta_path = meta_file_path(data_file)
+    password = data.get('admin_password') or default_password
+    meta = build_store_meta(data, data_signature, _password_verifier(meta_path, password))
+    write_json_file(meta_path, meta)
+    _meta_cache.put(data_file, meta)
+    return meta
+
+
+def read_store_meta(data_file, default_password):
+    """メタデータを返す（店舗がなければ None）
+
+    本体のシグネチャだけを確認し、一致すればキャッシュかメタファイルを返す。
+    メタファイルがない・古い場合は本体を1回読み込んで作り直す。
+    """
+    try:
+        data_signature = list(file_signature(os.stat(data_file)))
+    except OSError:
+        return None
+
+    cached = _meta_cache.get(data_file)
+    if cached is not None and cached['data_signature'] == data_signature:
+        return cached
+
+    try:
+        meta = read_json_file(meta_file_path(data_file))
+    except (OSError, ValueError):
+        meta = None
+    if (isinstance(meta, dict) and meta.get('schema') == META_SCHEMA
+            and meta.get('data_signature') == data_signature):
+        _meta_cache.put(data_file, meta)
+        return meta
+
+    print(f"[DEBUG store_meta] メタデータを本体から作り直します: {data_file}")
+    data = read_json_file(data_file)
+    return write_store_meta(data_file, data, data_signature, default_password)
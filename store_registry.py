@@ -0,0 +1,161 @@
+"""
+店舗の一覧（レジストリ）shift_data/_registry.json
+
+    {
+        'schema': 1,
+        'stores': {
+            店舗コード: {
+                'file': 本体のファイル名,
+                'size': バイト数,
+                'version': 店舗データのバージョン,
+                'last_modified': 本体の更新日時,
+                'staff_count': スタッフ数,
+                'data_signature': 本体のシグネチャ [inode, 更新時刻ns, サイズ]
+            }
+        }
+    }
+
+保存（save_data）のたびに書き換えるのは未登録の店舗を追加する場合だけ（全店舗で共有するファイルの
+ロックで保存が直列にならないよう、登録済みの店舗の行は保存時には更新しない）。
+一覧の取得時は各本体を stat で確認し、シグネチャが合わない行（保存・他のツールでの書き換え・削除）だけを
+店舗ごとのメタデータ（保存時に書き込み済み）から作り直す。作り直しはロックの外で行い、ロック中は結果の反映だけを行う。
+レジストリがない場合（初回起動時など）はディレクトリを走査して作る。
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import store_meta
+from store_json import file_lock, file_signature, read_json_file, write_json_file
+
+REGISTRY_SCHEMA = 1
+REGISTRY_FILE_NAME = '_registry.json'
+DATA_FILE_SUFFIX = '_data.json'
+
+# {レジストリのパス: (ファイルのシグネチャ, 内容)}
+_registry_cache = {}
+_registry_cache_lock = threading.Lock()
+# レジストリの読み込み〜書き込み（file_lock は Windows では何もしないため、プロセス内でも排他する）
+_registry_write_lock = threading.Lock()
+
+
+def registry_path(data_dir):
+    return os.path.join(data_dir, REGISTRY_FILE_NAME)
+
+
+def build_entry(data_file, signature, version, staff_count):
+    return {
+        'file': os.path.basename(data_file),
+        'size': signature[2],
+        'version': version,
+        'last_modified': datetime.fromtimestamp(signature[1] / 1e9).isoformat(timespec='seconds'),
+        'staff_count': staff_count,
+        'data_signature': list(signature),
+    }
+
+
+def _read(path):
+    try:
+        signature = file_signature(os.stat(path))
+    except OSError:
+        return None
+    with _registry_cache_lock:
+        cached = _registry_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    try:
+        registry = read_json_file(path)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(registry, dict) or registry.get('schema') != REGISTRY_SCHEMA:
+        return None
+    with _registry_cache_lock:
+        _registry_cache[path] = (signature, registry)
+    return registry
+
+
+def _write(path, registry):
+    signature = write_json_file(path, registry)
+    with _registry_cache_lock:
+        _registry_cache[path] = (signature, registry)
+
+
+@contextmanager
+def _locked(path):
+    with _registry_write_lock, file_lock(path):
+        yield
+
+
+def update_store_entry(data_dir, store_code, data_file, signature, data):
+    """本体の保存直後に呼び、未登録の店舗だけ行を追加する（追加した行、登録済み・レジストリがなければ None）"""
+    path = registry_path(data_dir)
+    registry = _read(path)
+    if registry is None or store_code in registry['stores']:
+        # 登録済みの行は一覧の取得時にシグネチャで確認して更新、レジストリがなければ走査で作られる
+        return None
+    entry = build_entry(data_file, signature, data.get('version', 0), len(data.get('staff') or {}))
+    with _locked(path):
+        registry = _read(path)
+        if registry is None or store_code in registry['stores']:
+            return None
+        registry = {'schema': REGISTRY_SCHEMA, 'stores': dict(registry['stores'], **{store_code: entry})}
+        _write(path, registry)
+    return entry
+
+
+def _describe_store(data_file, default_password):
+    """メタデータ（なければ本体から作成）からレジストリの行を作る（店舗がなければ None）"""
+    meta = store_meta.read_store_meta(data_file, default_password)
+    if meta is None:
+        return None
+    return build_entry(data_file, meta['data_signature'], meta.get('version', 0), len(meta.get('staff') or {}))
+
+
+def list_stores(data_dir, default_password, rescan=False):
+    """{店舗コード: 行} を返す（本体・メタデータを読むのは変更された店舗だけ）
+
+    rescan=True またはレジストリがない場合は、ディレクトリを走査して未登録の店舗も追加する。
+    """
+    path = registry_path(data_dir)
+    registry = _read(path)
+    stores = dict(registry['stores']) if registry is not None else {}
+
+    if rescan or registry is None:
+        for entry in os.scandir(data_dir):
+            if entry.is_file() and entry.name.endswith(DATA_FILE_SUFFIX):
+                stores.setdefault(entry.name[:-len(DATA_FILE_SUFFIX)], None)
+
+    # シグネチャが合わない店舗の行をロックの外で作り直す（メタデータの作り直しには本体の読み込みが必要なため）
+    updates = {}
+    for store_code, entry in list(stores.items()):
+        data_file = os.path.join(data_dir, f'{store_code}{DATA_FILE_SUFFIX}')
+        try:
+            signature = list(file_signature(os.stat(data_file)))
+        except OSError:
+            updates[store_code] = None
+            continue
+        if entry is not None and entry.get('data_signature') == signature:
+            continue
+        updates[store_code] = _describe_store(data_file, default_password)
+
+    for store_code, entry in updates.items():
+        if entry is None:
+            del stores[store_code]
+        else:
+            stores[store_code] = entry
+
+    if registry is None or updates:
+        # ロック中は読み直したレジストリに反映するだけ（その間に追加された店舗は残す）
+        with _locked(path):
+            latest = _read(path)
+            merged = dict(latest['stores']) if latest is not None else {}
+            for store_code, entry in stores.items():
+                if store_code in updates or store_code not in merged:
+                    merged[store_code] = entry
+            for store_code, entry in updates.items():
+                if entry is None:
+                    merged.pop(store_code, None)
+            _write(path, {'schema': REGISTRY_SCHEMA, 'stores': merged})
+    return stores
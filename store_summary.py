@@ -0,0 +1,184 @@
+"""
+店舗・月ごとの集計（本部向けの店舗横断ビュー用）
+
+    {
+        'month': 'YYYY-MM',
+        'requested_hours': 希望・自由入力の合計時間,
+        'request_count': 希望を出したスタッフ×日の件数,
+        'days': {date: {'requested_staff': 人数, 'required_peak': 最も多い時間帯の必要人数,
+                        'short_slots': 希望だけでは必要人数に届かない時間帯の数}}
+    }
+
+必要人数は店舗の設定（曜日・祝日・休業日）から求めるため、呼び出し側が required_matrix を渡す。
+
+summarize_assignments は最終生成シフト（最適化結果に確定・一時保存・手作業上書きを反映したもの）の配置状況:
+
+    {
+        'month': 'YYYY-MM',
+        'status': 'confirmed' / 'draft' / None,
+        'dates': 対象日数（生成表と同じく希望・自由入力がある日）,
+        'shortage_days': [必要人数に届かない時間帯がある日],
+        'slots': {時間帯: {'required': 必要人数の合計, 'assigned': 配置人数の合計, 'short': 不足人数の合計}},
+        'staff': {スタッフ名: {'days': 出勤日数, 'slots': 時間帯数}}
+    }
+"""
+
+import calendar
+import re
+
+from shift_model import SlotIndex, count_coverage
+
+# '10-15'、'11:00-20:00'、'8:00-9:30' などの時間帯表記
+SLOT_RANGE_PATTERN = re.compile(r'^\s*(\d{1,2})(?::(\d{2}))?\s*[-~〜]\s*(\d{1,2})(?::(\d{2}))?\s*$')
+
+
+def slot_range(slot):
+    """時間帯を (開始分, 終了分) に変換（時刻として読めない場合は None）"""
+    match = SLOT_RANGE_PATTERN.match(slot) if isinstance(slot, str) else None
+    if match is None:
+        return None
+    start = int(match.group(1)) * 60 + int(match.group(2) or 0)
+    end = int(match.group(3)) * 60 + int(match.group(4) or 0)
+    if end <= start:
+        # 日付をまたぐ時間帯（例: 22-5）
+        end += 24 * 60
+    return start, end
+
+
+def covered_hours(slots):
+    """時間帯リストの合計時間（重なりは1回だけ数える）"""
+    ranges = sorted(filter(None, (slot_range(slot) for slot in slots)))
+    total = 0
+    current_start = current_end = None
+    for start, end in ranges:
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total / 60
+
+
+def month_dates(month_key):
+    year, month = int(month_key[:4]), int(month_key[5:7])
+    return [f'{month_key}-{day:02d}' for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+
+def summarize_requests(data, month_key, staff_types, required_matrix):
+    """希望（shifts・custom_shifts）と必要人数から1か月分の集計を作る
+
+    required_matrix(date_str, time_slots, staff_types) -> [時間帯][種別] の必要人数
+    """
+    slot_index = SlotIndex(data.get('time_slots') or [])
+    type_ids = {staff_type: i for i, staff_type in enumerate(staff_types)}
+    staff_info = data.get('staff') or {}
+    shifts = data.get('shifts') or {}
+    custom_shifts = data.get('custom_shifts') or {}
+
+    days = {}
+    requested_minutes = 0
+    request_count = 0
+    for date_str in month_dates(month_key):
+        requested = shifts.get(date_str) or {}
+        custom = custom_shifts.get(date_str) or {}
+        staff_names = {name for name, slots in requested.items() if slots}
+        staff_names.update(name for name, slots in custom.items() if slots)
+        for name in staff_names:
+            requested_minutes += covered_hours(list(requested.get(name) or ()) + list(custom.get(name) or ())) * 60
+        request_count += len(staff_names)
+
+        required = required_matrix(date_str, slot_index.slots, staff_types)
+        assigned = count_coverage(requested, slot_index, type_ids, staff_info)
+        days[date_str] = {
+            'requested_staff': len(staff_names),
+            'required_peak': max((sum(row) for row in required), default=0),
+            'short_slots': sum(
+                1 for required_row, assigned_row in zip(required, assigned)
+                if any(assigned_count < required_count
+                       for required_count, assigned_count in zip(required_row, assigned_row))
+            ),
+        }
+
+    return {
+        'month': month_key,
+        'requested_hours': round(requested_minutes / 60, 2),
+        'request_count': request_count,
+        'days': days,
+    }
+
+
+def month_status(data, month_key):
+    """生成シフトの保存状態（確定 > 一時保存）"""
+    for section, status in (('confirmed_generated_shifts', 'confirmed'), ('generated_shift_drafts', 'draft')):
+        entry = (data.get(section) or {}).get(month_key)
+        if isinstance(entry, dict) and entry.get('shifts'):
+            return status
+    return None
+
+
+def summarize_assignments(data, month_key, final_shifts, staff_types, required_matrix):
+    """最終生成シフトと必要人数から1か月分の配置状況を作る（生成表の insufficient と同じ判定）"""
+    slot_index = SlotIndex(data.get('time_slots') or [])
+    type_ids = {staff_type: i for i, staff_type in enumerate(staff_types)}
+    staff_info = data.get('staff') or {}
+    dates = sorted(
+        date_str for date_str in set(data.get('shifts') or {}) | set(data.get('custom_shifts') or {})
+        if date_str[:7] == month_key
+    )
+
+    slots = {slot: {'required': 0, 'assigned': 0, 'short': 0} for slot in slot_index.slots}
+    staff = {}
+    shortage_days = []
+    for date_str in dates:
+        day_shifts = final_shifts.get(date_str) or {}
+        required = required_matrix(date_str, slot_index.slots, staff_types)
+        assigned = count_coverage(day_shifts, slot_index, type_ids, staff_info)
+        day_short = 0
+        for slot, required_row, assigned_row in zip(slot_index.slots, required, assigned):
+            short = sum(max(0, required_count - assigned_count)
+                        for required_count, assigned_count in zip(required_row, assigned_row))
+            totals = slots[slot]
+            totals['required'] += sum(required_row)
+            totals['assigned'] += sum(assigned_row)
+            totals['short'] += short
+            day_short += short
+        if day_short:
+            shortage_days.append(date_str)
+        for name, day_slots in day_shifts.items():
+            if day_slots:
+                counts = staff.setdefault(name, {'days': 0, 'slots': 0})
+                counts['days'] += 1
+                counts['slots'] += len(day_slots)
+
+    return {
+        'month': month_key,
+        'status': month_status(data, month_key),
+        'dates': len(dates),
+        'shortage_days': shortage_days,
+        'slots': slots,
+        'staff': dict(sorted(staff.items())),
+    }
+
+
+def aggregate_summaries(store_months):
+    """{店舗コード: {月: 集計}} を日付ごと・全体の合計にまとめる"""
+    totals = {'requested_hours': 0.0, 'request_count': 0, 'days': {}}
+    for months in store_months.values():
+        for summary in months.values():
+            totals['requested_hours'] += summary['requested_hours']
+            totals['request_count'] += summary['request_count']
+            for date_str, day in summary['days'].items():
+                total_day = totals['days'].setdefault(
+                    date_str, {'requested_staff': 0, 'required_peak': 0, 'short_slots': 0, 'short_stores': 0}
+                )
+                total_day['requested_staff'] += day['requested_staff']
+                total_day['required_peak'] += day['required_peak']
+                total_day['short_slots'] += day['short_slots']
+                if day['short_slots']:
+                    total_day['short_stores'] += 1
+    totals['requested_hours'] = round(totals['requested_hours'], 2)
+    totals['days'] = dict(sorted(totals['days'].items()))
+    return totals
@@ -1,91 +1,450 @@
 import argparse
+import gzip
+import http.client
+import io
 import json
-import urllib.request
-import urllib.error
+import os
+import random
+import threading
+import time
 import urllib.parse
-import http.cookiejar
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from http.cookies import SimpleCookie
 
+# 前回同期したバージョンを保存するファイル（{'<リモートURL>|<店舗コード>': {...}}）
+DEFAULT_CURSOR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sync_cursor.json')
+# 全体コピーで使うエクスポート形式（store_import.py と同じ）
+JSONL_MIMETYPE = 'application/x-ndjson'
+EXPORT_FORMAT = 'shift-tool-store'
+# 再試行する応答（混雑・再起動中の Render など）
+RETRY_STATUSES = frozenset((429, 502, 503, 504))
+# 処理されていないことが明らかな応答（冪等でないリクエストでも再試行できる）
+REJECTED_STATUSES = frozenset((429,))
+# 何度送っても結果が変わらないメソッド（応答が返らなくても再試行できる）
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD'))
+# 再試行の待ち時間の上限（秒）
+MAX_BACKOFF = 30.0
 
-def make_session_opener():
-    cookie_jar = http.cookiejar.CookieJar()
-    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookie_jar))
 
+class HttpError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f'HTTP {status}')
+        self.status = status
+        self.body = body
 
-def post_json(opener, url, payload):
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(payload).encode('utf-8'),
-        headers={'Content-Type': 'application/json'},
-        method='POST'
-    )
-    with opener.open(req, timeout=20) as response:
-        return json.loads(response.read().decode('utf-8'))
+    @property
+    def message(self):
+        """API のエラーメッセージ（JSON でなければ本文の先頭）"""
+        try:
+            return json.loads(self.body)['error']
+        except (ValueError, KeyError, TypeError):
+            return self.body[:200]
 
 
-def get_json(opener, url):
-    req = urllib.request.Request(url, method='GET')
-    with opener.open(req, timeout=20) as response:
-        return json.loads(response.read().decode('utf-8'))
+class ConnectionPool:
+    """ホストごとに keep-alive の接続を使い回す（スレッド間で共有）"""
 
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.opened = 0
 
-def login_admin(opener, base_url, store_code, password):
-    return post_json(opener, f"{base_url.rstrip('/')}/api/login", {
-        'role': 'admin',
-        'password': password,
-        'store_code': store_code,
-        'staff_name': ''
-    })
+    def acquire(self, origin, reuse=True):
+        """接続を借りる（reuse=False なら使い回さずに新しく開く）"""
+        with self._lock:
+            idle = self._idle.get(origin)
+            if idle and reuse:
+                return idle.pop()
+            self.opened += 1
+        scheme, host, port = origin
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout)
+
+    def release(self, origin, conn):
+        with self._lock:
+            self._idle.setdefault(origin, []).append(conn)
+
+    def close_all(self):
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+
+class ApiSession:
+    """1店舗・1サーバー分のログインセッション（Cookie を保持し、接続はプールから借りる）"""
+
+    def __init__(self, pool, base_url, retries=3, backoff=0.5):
+        parsed = urllib.parse.urlsplit(base_url.rstrip('/'))
+        default_port = 443 if parsed.scheme == 'https' else 80
+        self.pool = pool
+        self.origin = (parsed.scheme, parsed.hostname, parsed.port or default_port)
+        self.prefix = parsed.path
+        self.retries = retries
+        self.backoff = backoff
+        self.cookies = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.requests = 0
+        self.retried = 0
+
+    def get_json(self, path):
+        return self.request('GET', path)
+
+    def post_json(self, path, payload, idempotent=False):
+        return self.request('POST', path, payload, idempotent)
+
+    def request(self, method, path, payload=None, idempotent=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        response, raw = self._send(method, path, body, headers, idempotent)
+        if response.getheader('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        return json.loads(raw.decode('utf-8'))
+
+    def download(self, path):
+        """(Content-Type, Content-Encoding, 本文) を返す（圧縮されたまま）"""
+        response, raw = self._send('GET', path)
+        return response.getheader('Content-Type', '').split(';')[0].strip(), response.getheader('Content-Encoding'), raw
+
+    def upload(self, path, body, content_type, content_encoding=None):
+        """バイト列をそのまま送信し、JSON の応答を返す"""
+        headers = {'Content-Type': content_type}
+        if content_encoding:
+            headers['Content-Encoding'] = content_encoding
+        response, raw = self._send('POST', path, body, headers)
+        if response.getheader('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        return json.loads(raw.decode('utf-8'))
+
+    def _send(self, method, path, body=None, extra_headers=None, idempotent=None):
+        """再試行しながら送信し、(応答, 受信したままの本文) を返す（4xx/5xx は HttpError）
+
+        冪等でないリクエスト（インポート・差分反映など）は、サーバーに届いていないことが
+        明らかな場合（送信中の接続エラー・429）だけ再試行する（二重に反映させない）
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}
+        headers.update(extra_headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+
+        for attempt in range(self.retries + 1):
+            # 冪等でないリクエストは、閉じられた keep-alive 接続で応答が失われないよう新しい接続で送る
+            conn = self.pool.acquire(self.origin, reuse=idempotent)
+            sent = False
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                sent = True
+                response = conn.getresponse()
+                raw = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # サーバー側で閉じられた keep-alive 接続・一時的なネットワークエラー
+                conn.close()
+                if attempt >= self.retries or (sent and not idempotent):
+                    raise
+                delay = self._backoff_delay(attempt)
+                print(f'  再試行 ({method} {path}): {e} / {delay:.1f}秒後')
+            else:
+                self.requests += 1
+                self.bytes_sent += len(body or b'')
+                self.bytes_received += len(raw)
+                self._store_cookies(response)
+                if response.will_close:
+                    conn.close()
+                else:
+                    self.pool.release(self.origin, conn)
+
+                retryable = RETRY_STATUSES if idempotent else REJECTED_STATUSES
+                if response.status in retryable and attempt < self.retries:
+                    delay = self._backoff_delay(attempt, response.getheader('Retry-After'))
+                    print(f'  再試行 ({method} {path}): HTTP {response.status} / {delay:.1f}秒後')
+                elif response.status >= 400:
+                    if response.getheader('Content-Encoding') == 'gzip':
+                        raw = gzip.decompress(raw)
+                    raise HttpError(response.status, raw.decode('utf-8', errors='replace'))
+                else:
+                    return response, raw
+            self.retried += 1
+            time.sleep(delay)
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(MAX_BACKOFF, float(retry_after))
+            except ValueError:
+                pass
+        # 指数バックオフ（同時に再試行が集中しないよう揺らぎを加える）
+        return min(MAX_BACKOFF, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    def _store_cookies(self, response):
+        for header in response.msg.get_all('Set-Cookie') or ():
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+
+    def login_admin(self, store_code, password):
+        return self.post_json('/api/login', {
+            'role': 'admin',
+            'password': password,
+            'store_code': store_code,
+            'staff_name': ''
+        }, idempotent=True)
+
+
+def load_cursors(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cursors = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cursors if isinstance(cursors, dict) else {}
+
+
+def save_cursors(path, cursors):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cursors, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def cursor_key(remote_url, store_code):
+    return f"{remote_url.rstrip('/')}|{store_code}"
+
+
+def load_store_list(args):
+    """--store-code・--stores・--manifest から同期する店舗の一覧を作る
+
+    マニフェストは JSON の配列で、要素は店舗コードか
+    {'store_code': ..., 'remote_password': ..., 'local_password': ...}。
+    """
+    entries = []
+    if args.store_code:
+        entries.append(args.store_code)
+    if args.stores:
+        entries.extend(code.strip() for code in args.stores.split(',') if code.strip())
+    if args.manifest:
+        with open(args.manifest, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if not isinstance(manifest, list):
+            raise ValueError('マニフェストは店舗の配列で指定してください')
+        entries.extend(manifest)
+
+    stores = {}
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {'store_code': entry}
+        if not isinstance(entry, dict) or not entry.get('store_code'):
+            raise ValueError(f'店舗の指定が不正です: {entry!r}')
+        stores[entry['store_code']] = {
+            'store_code': entry['store_code'],
+            'remote_password': entry.get('remote_password', args.remote_password),
+            'local_password': entry.get('local_password', args.local_password),
+        }
+    return list(stores.values())
+
+
+def delta_sync(remote, local, cursor):
+    """前回の同期以降の差分だけを反映（差分で追えない場合は None）"""
+    try:
+        delta = remote.get_json(f"/api/store-data/changes?since={int(cursor['remote_version'])}")
+    except HttpError as e:
+        if e.status == 410:
+            print('  変更ログで追えないため、全体を同期します')
+            return None
+        raise
+
+    try:
+        patched = local.post_json('/api/store-data/patch', {
+            'changes': delta['changes'],
+            'expected_version': cursor.get('local_version')
+        })
+    except HttpError as e:
+        if e.status == 409:
+            print('  ローカル側が前回の同期後に変更されているため、全体を同期します')
+            return None
+        raise
+
+    if not patched.get('success'):
+        raise RuntimeError('ローカル側への差分反映に失敗しました')
+    return {
+        'mode': 'delta',
+        'remote_version': delta['version'],
+        'local_version': patched['version'],
+        'changes': len(delta['changes'])
+    }
+
+
+def fetch_export(remote):
+    """JSON Lines のエクスポートを取得（gzip のまま保持し、全体の解凍・パースはしない）"""
+    content_type, content_encoding, body = remote.download('/api/store-data/export?format=jsonl')
+    if content_type != JSONL_MIMETYPE:
+        raise RuntimeError(f'Render側が JSON Lines のエクスポートに対応していません（{content_type}）')
+    if content_encoding not in (None, 'gzip'):
+        raise RuntimeError(f'対応していない圧縮形式です: {content_encoding}')
+    if content_encoding is None:
+        body = gzip.compress(body)
+    # 先頭のヘッダー行だけを読んでバージョンを確認する
+    with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+        header = json.loads(f.readline().decode('utf-8'))
+    if header.get('format') != EXPORT_FORMAT:
+        raise RuntimeError('Render側データ形式が不正です')
+    return header, body
+
+
+def full_sync(remote, local, exported=None):
+    """全体をエクスポートしてインポート（圧縮した JSON Lines をそのまま転送）"""
+    header, body = exported or fetch_export(remote)
+    imported = local.upload('/api/store-data/import', body, JSONL_MIMETYPE, 'gzip')
+    if not imported.get('success'):
+        raise RuntimeError('ローカル側インポートに失敗しました')
+    for warning in imported.get('warnings', []):
+        print(f"  警告 ({header.get('store_code')}): {warning}")
+
+    return {
+        'mode': 'full',
+        'remote_version': header.get('version', 0),
+        'local_version': imported.get('version'),
+        'export_bytes': len(body)
+    }
+
+
+def save_backup(backup_dir, store_code, header, body):
+    """エクスポートを <backup_dir>/<店舗コード>_<日時>_v<バージョン>.jsonl.gz に保存"""
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(backup_dir, f"{store_code}_{timestamp}_v{header.get('version', 0)}.jsonl.gz")
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return path
+
+
+def sync_store(store, args, pool, cursors, cursor_lock):
+    """1店舗を同期し、結果（所要時間・転送量・エラー）を返す"""
+    store_code = store['store_code']
+    key = cursor_key(args.remote_url, store_code)
+    remote = ApiSession(pool, args.remote_url, args.retries, args.backoff)
+    local = ApiSession(pool, args.local_url, args.retries, args.backoff)
+    started = time.perf_counter()
+    result = {'store_code': store_code, 'success': False}
+
+    try:
+        if not remote.login_admin(store_code, store['remote_password']).get('success'):
+            raise RuntimeError('Render側ログインに失敗しました')
+
+        exported = None
+        if args.backup_dir:
+            exported = fetch_export(remote)
+            result['backup'] = save_backup(args.backup_dir, store_code, *exported)
+            if args.backup_only:
+                result.update(mode='backup', success=True, export_bytes=len(exported[1]))
+                return result
+
+        if not local.login_admin(store_code, store['local_password']).get('success'):
+            raise RuntimeError('ローカル側ログインに失敗しました')
+
+        with cursor_lock:
+            cursor = cursors.get(key)
+        synced = None
+        if cursor and not args.full:
+            synced = delta_sync(remote, local, cursor)
+        if synced is None:
+            synced = full_sync(remote, local, exported)
+
+        with cursor_lock:
+            cursors[key] = {
+                'remote_version': synced['remote_version'],
+                'local_version': synced['local_version']
+            }
+            save_cursors(args.cursor_file, cursors)
+        result.update(synced, success=True)
+    except HttpError as e:
+        result['error'] = f'HTTP {e.status}: {e.message}'
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        result['bytes_sent'] = remote.bytes_sent + local.bytes_sent
+        result['bytes_received'] = remote.bytes_received + local.bytes_received
+        result['requests'] = remote.requests + local.requests
+        result['retries'] = remote.retried + local.retried
+    return result
+
+
+def print_summary(results, elapsed, pool):
+    print('\n' + '=' * 60)
+    print(f"{'店舗コード':<20} {'結果':<6} {'方式':<6} {'秒':>8} {'送信B':>10} {'受信B':>12}")
+    for result in sorted(results, key=lambda r: r['store_code']):
+        status = 'OK' if result['success'] else 'NG'
+        print(f"{result['store_code']:<20} {status:<6} {result.get('mode', '-'):<6} "
+              f"{result['seconds']:>8.2f} {result['bytes_sent']:>10} {result['bytes_received']:>12}")
+    failures = [r for r in results if not r['success']]
+    for result in failures:
+        print(f"  ❌ {result['store_code']}: {result['error']}")
+    print('=' * 60)
+    print(f"{len(results) - len(failures)}/{len(results)} 店舗成功 / {elapsed:.2f}秒 / "
+          f"送信 {sum(r['bytes_sent'] for r in results)}B / 受信 {sum(r['bytes_received'] for r in results)}B / "
+          f"リクエスト {sum(r['requests'] for r in results)} (再試行 {sum(r['retries'] for r in results)}) / "
+          f"接続 {pool.opened}")
+    return failures
 
 
 def main():
     parser = argparse.ArgumentParser(description='Renderの店舗データをローカルに同期')
     parser.add_argument('--remote-url', required=True, help='Render側URL (例: https://xxx.onrender.com)')
     parser.add_argument('--local-url', default='http://127.0.0.1:5000', help='ローカルURL')
-    parser.add_argument('--store-code', required=True, help='同期する店舗コード')
+    parser.add_argument('--store-code', help='同期する店舗コード')
+    parser.add_argument('--stores', help='同期する店舗コード（カンマ区切り）')
+    parser.add_argument('--manifest', help='同期する店舗の一覧（JSON 配列のファイル）')
     parser.add_argument('--remote-password', default='admin123', help='Render側の管理者パスワード')
     parser.add_argument('--local-password', default='admin123', help='ローカル側の管理者パスワード')
+    parser.add_argument('--cursor-file', default=DEFAULT_CURSOR_FILE, help='前回同期したバージョンの保存先')
+    parser.add_argument('--full', action='store_true', help='差分ではなく常に全体を同期する')
+    parser.add_argument('--backup-dir', help='エクスポート（JSON Lines、gzip）を店舗ごとに保存するディレクトリ')
+    parser.add_argument('--backup-only', action='store_true', help='バックアップのみ行い、ローカルには同期しない')
+    parser.add_argument('--workers', type=int, default=4, help='同時に同期する店舗数')
+    parser.add_argument('--timeout', type=float, default=20, help='1リクエストのタイムアウト（秒）')
+    parser.add_argument('--retries', type=int, default=3, help='通信エラー・混雑時の再試行回数')
+    parser.add_argument('--backoff', type=float, default=0.5, help='最初の再試行までの待ち時間（秒、以降は倍々）')
     args = parser.parse_args()
 
-    remote = make_session_opener()
-    local = make_session_opener()
-
     try:
-        remote_login = login_admin(remote, args.remote_url, args.store_code, args.remote_password)
-        if not remote_login.get('success'):
-            raise RuntimeError('Render側ログインに失敗しました')
+        stores = load_store_list(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not stores:
+        parser.error('--store-code・--stores・--manifest のいずれかで店舗を指定してください')
+    if args.backup_only and not args.backup_dir:
+        parser.error('--backup-only には --backup-dir が必要です')
 
-        exported = get_json(remote, f"{args.remote_url.rstrip('/')}/api/store-data/export")
-        if not exported.get('success'):
-            raise RuntimeError('Render側エクスポートに失敗しました')
+    pool = ConnectionPool(args.timeout)
+    cursors = load_cursors(args.cursor_file)
+    cursor_lock = threading.Lock()
+    results = []
+    started = time.perf_counter()
 
-        data = exported.get('data')
-        if not isinstance(data, dict):
-            raise RuntimeError('Render側データ形式が不正です')
-
-        local_login = login_admin(local, args.local_url, args.store_code, args.local_password)
-        if not local_login.get('success'):
-            raise RuntimeError('ローカル側ログインに失敗しました')
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(stores)))) as executor:
+            futures = [executor.submit(sync_store, store, args, pool, cursors, cursor_lock) for store in stores]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result['success']:
+                    print(f"同期完了: {result['store_code']} ({result['mode']}, {result['seconds']:.2f}秒)")
+                else:
+                    print(f"同期エラー: {result['store_code']}: {result['error']}")
+    finally:
+        pool.close_all()
 
-        imported = post_json(local, f"{args.local_url.rstrip('/')}/api/store-data/import", {'data': data})
-        if not imported.get('success'):
-            raise RuntimeError('ローカル側インポートに失敗しました')
-
-        print('同期完了')
-        print(json.dumps({
-            'store_code': args.store_code,
-            'remote_url': args.remote_url,
-            'local_url': args.local_url,
-            'staff_count': len(data.get('staff', {})),
-            'shift_days': len(data.get('shifts', {}))
-        }, ensure_ascii=False, indent=2))
-
-    except urllib.error.HTTPError as e:
-        body = e.read().decode('utf-8', errors='replace')
-        print(f'HTTPエラー: {e.code}')
-        print(body)
-        raise SystemExit(1)
-    except Exception as e:
-        print(f'同期エラー: {e}')
+    failures = print_summary(results, time.perf_counter() - started, pool)
+    if failures:
         raise SystemExit(1)
 
 
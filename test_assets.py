@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+指紋付き静的ファイル（assets / build_assets）のテスト
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+import assets
+from app import app, get_store_files
+from build_assets import build_assets
+
+TEST_STORE = 'test_assets'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_fingerprinted_assets():
+    """HTML は指紋付き URL を参照し、圧縮済みファイルを長期キャッシュ付きで返す"""
+    print("=" * 50)
+    print("テスト1: 指紋付き URL と圧縮済みファイルの配信")
+    print("=" * 50)
+
+    cleanup()
+    original_dist = assets.DIST_DIR
+    with tempfile.TemporaryDirectory() as dist_dir:
+        assets.DIST_DIR = dist_dir
+        try:
+            results = build_assets(dist_dir)
+            for filename, raw_size, gz_size, _ in results:
+                print(f"  {filename}: {raw_size} -> gzip {gz_size} bytes")
+                assert gz_size < raw_size
+
+            with app.test_client() as client:
+                client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+                html = client.get('/').get_data(as_text=True)
+                urls = re.findall(r'(?:href|src)="(/assets/[^"]+)"', html)
+                print(f"参照: {urls}")
+                assert len(urls) == 2
+                assert '<script>' not in html and '<style>' not in html
+
+                script_url = next(url for url in urls if url.endswith('.js'))
+                response = client.get(script_url, headers={'Accept-Encoding': 'gzip, deflate'})
+                assert response.status_code == 200
+                assert response.headers['Content-Encoding'] == 'gzip'
+                assert 'immutable' in response.headers['Cache-Control']
+                assert 'Accept-Encoding' in response.headers['Vary']
+
+                plain = client.get(script_url, headers={'Accept-Encoding': 'identity'})
+                assert 'Content-Encoding' not in plain.headers
+                assert b'function fetchWithEtag' in plain.get_data()
+                assert client.get(script_url, headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+
+                # 古い指紋はキャッシュさせない、一覧にないファイルは返さない
+                assert client.get('/assets/js/index.000000000000.js').headers['Cache-Control'] == 'no-cache'
+                assert client.get('/assets/app.py').status_code == 404
+        finally:
+            assets.DIST_DIR = original_dist
+            cleanup()
+
+    print("\n✅ テスト1: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_fingerprinted_assets()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
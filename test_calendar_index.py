@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+日付インデックス（calendar_index）のテスト
+"""
+
+import os
+import sys
+
+from calendar_index import DateIndex, month_keys, parse_date, get_day_type
+from app import app, get_store_data_file, get_store_date_index, get_store_files, load_data, save_data
+from store_json import read_json_file, write_json_file
+
+TEST_STORE = 'test_calendar_index'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_month_range():
+    """月単位の範囲取得（二分探索）"""
+    print("=" * 50)
+    print("テスト1: DateIndex.month_dates")
+    print("=" * 50)
+
+    keys = ['2026-05-01', '2026-03-31', '2026-04-30', '2026-04-01', '2026-04-15', '2025-04-10']
+    index = DateIndex(keys)
+    april = index.month_dates(2026, 4)
+    print(f"2026年4月: {april}")
+    assert april == ['2026-04-01', '2026-04-15', '2026-04-30']
+    assert index.month_dates(2026, 6) == []
+    assert index.month_dates(2025, 4) == ['2025-04-10']
+    assert list(index.by_month().keys()) == ['2025-04', '2026-03', '2026-04', '2026-05']
+    assert index.month_index(2026, 4).dates == april
+
+    # 1回しか使わない辞書はソートせずに走査
+    assert month_keys(dict.fromkeys(keys), 2026, 4) == april
+    assert month_keys({}, 2026, 4) == []
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_parse_date():
+    """日付パースのキャッシュと曜日・日の種類"""
+    print("\n" + "=" * 50)
+    print("テスト2: parse_date")
+    print("=" * 50)
+
+    parsed = parse_date('2026-05-09')
+    print(f"2026-05-09: {parsed}")
+    assert parsed.weekday == 5
+    assert parsed.month_key == '2026-05'
+    assert parsed.day_type == 'saturday'
+    assert parse_date('2026-05-09') is parsed  # キャッシュ済み
+
+    # 祝前日（2026-05-03 憲法記念日の前日）は曜日より優先
+    assert get_day_type('2026-05-02') == 'day_before_holiday'
+    assert get_day_type('2026-04-28') == 'day_before_holiday'  # 4/29 昭和の日の前日
+    assert get_day_type('2026-04-29') == 'holiday'  # 水曜の祝日
+    assert get_day_type('2026-04-27') == 'mon_thu'
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_store_date_index_cache():
+    """店舗の日付インデックスはバージョンとファイルのシグネチャが同じ間だけ使い回す"""
+    print("\n" + "=" * 50)
+    print("テスト3: 店舗ごとの日付インデックス")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_request_context():
+            save_data({
+                'staff': {'索引太郎': {'type': 'アルバイト'}},
+                'shifts': {'2026-05-02': {'索引太郎': ['10-15']}, '2026-04-30': {'索引太郎': ['10-15']}},
+                'custom_shifts': {'2026-05-01': {'索引太郎': ['8:00-9:00']}},
+            }, TEST_STORE)
+            first = get_store_date_index(TEST_STORE, load_data(TEST_STORE), 'shifts', 'custom_shifts')
+            assert first.month_dates(2026, 5) == ['2026-05-01', '2026-05-02']
+            assert get_store_date_index(TEST_STORE, load_data(TEST_STORE), 'shifts', 'custom_shifts') is first
+            assert get_store_date_index(TEST_STORE, load_data(TEST_STORE), 'shifts').dates == ['2026-04-30', '2026-05-02']
+
+            # 保存するとバージョンが変わり作り直す
+            data = load_data(TEST_STORE)
+            data['shifts']['2026-05-03'] = {'索引太郎': ['17-23']}
+            save_data(data, TEST_STORE)
+            second = get_store_date_index(TEST_STORE, load_data(TEST_STORE), 'shifts', 'custom_shifts')
+            assert second is not first and second.month_dates(2026, 5)[-1] == '2026-05-03'
+
+            # 他のツールが同じバージョンのまま書き換えた場合も作り直す
+            data_file = get_store_data_file(TEST_STORE)
+            raw = read_json_file(data_file)
+            raw['shifts']['2026-05-04'] = {'索引太郎': ['10-15']}
+            write_json_file(data_file, raw)
+            third = get_store_date_index(TEST_STORE, load_data(TEST_STORE), 'shifts', 'custom_shifts')
+            print(f"5月: {third.month_dates(2026, 5)}")
+            assert third.month_dates(2026, 5)[-1] == '2026-05-04'
+    finally:
+        cleanup()
+
+    print("\n✅ テスト3: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_month_range()
+        test_parse_date()
+        test_store_date_index_cache()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
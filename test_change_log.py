@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+変更ログ（change_log.py）と差分同期（/api/store-data/changes・/api/store-data/patch）のテスト
+"""
+
+import os
+import sys
+
+import change_log
+from app import app, get_store_data_file, get_store_files, load_data, save_data
+from store_json import read_json_file
+
+REMOTE_STORE = 'test_change_log_remote'
+LOCAL_STORE = 'test_change_log_local'
+
+
+def cleanup():
+    for store_code in (REMOTE_STORE, LOCAL_STORE):
+        for path in get_store_files(store_code):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def login(client, store_code):
+    response = client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': store_code})
+    assert response.status_code == 200
+
+
+def synced_content(store_code):
+    """同期対象の内容（店舗ごとのバージョン・索引・パスワードを除く）"""
+    with app.test_request_context():
+        data = load_data(store_code)
+    return {key: value for key, value in data.items() if key not in change_log.EXCLUDED_KEYS}
+
+
+def full_copy(remote, local):
+    exported = remote.get('/api/store-data/export').get_json()
+    imported = local.post('/api/store-data/import', json={'data': exported['data']}).get_json()
+    return {'remote_version': exported['version'], 'local_version': imported['version']}
+
+
+def test_chunk_diff():
+    """変わったチャンクだけが記録され、反映すると元と同じ内容になる"""
+    print("=" * 50)
+    print("テスト1: チャンク単位の差分")
+    print("=" * 50)
+
+    before = {
+        'version': 1,
+        'staff': {'太郎': {'type': 'アルバイト'}},
+        'shifts': {'2026-05-01': {'太郎': ['10-15']}, '2026-05-02': {'太郎': ['17-23']}},
+        'staff_index': {'schema': 1},
+    }
+    after = {
+        'version': 2,
+        'staff': {'太郎': {'type': 'アルバイト'}},
+        'shifts': {'2026-05-01': {'太郎': ['10-15', '17-23']}, '2026-05-03': {'太郎': ['10-15']}},
+        'staff_index': {'schema': 1, 'changed': True},
+    }
+    keys = change_log.diff_digests(change_log.chunk_digests(before), change_log.chunk_digests(after))
+    print(f"変更されたチャンク: {keys}")
+    assert keys == ['shifts/2026-05-01', 'shifts/2026-05-02', 'shifts/2026-05-03']
+
+    changes = []
+    for key in keys:
+        exists, value = change_log.get_chunk(after, key)
+        changes.append({'key': key, 'value': value} if exists else {'key': key, 'deleted': True})
+    target = dict(before, shifts=dict(before['shifts']))
+    assert change_log.apply_changes(target, changes) == 3
+    assert target['shifts'] == after['shifts']
+
+    for invalid in ({'key': 'version', 'value': 5}, {'key': 'staff/太郎', 'value': {}}, {'key': 'shifts/2026-05-01'}):
+        try:
+            change_log.apply_changes(target, [invalid])
+        except ValueError:
+            continue
+        raise AssertionError(f'不正な変更を受け付けました: {invalid}')
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_delta_sync():
+    """前回のバージョン以降の差分だけで同期でき、追えない・競合する場合は 410・409"""
+    print("\n" + "=" * 50)
+    print("テスト2: 差分同期")
+    print("=" * 50)
+
+    cleanup()
+    original_max_entries = change_log.CHANGE_LOG_MAX_ENTRIES
+    remote = app.test_client()
+    local = app.test_client()
+    try:
+        login(remote, REMOTE_STORE)
+        login(local, LOCAL_STORE)
+        remote.post('/api/staff', json={'name': '差分太郎', 'type': 'アルバイト'})
+        remote.patch('/api/shifts/batch', json={'operations': [
+            {'date': '2026-05-01', 'staff': '差分太郎', 'time_slots': ['10-15']},
+            {'date': '2026-05-02', 'staff': '差分太郎', 'time_slots': ['17-23']},
+        ]})
+        cursor = full_copy(remote, local)
+        assert synced_content(LOCAL_STORE) == synced_content(REMOTE_STORE)
+
+        # リモートで追加・変更・削除
+        remote.post('/api/staff', json={'name': '差分花子', 'type': '社員'})
+        remote.patch('/api/shifts/batch', json={'operations': [
+            {'date': '2026-05-01', 'staff': '差分太郎', 'time_slots': ['10-15', '17-23']},
+            {'date': '2026-05-02', 'staff': '差分太郎', 'time_slots': []},
+            {'date': '2026-05-03', 'staff': '差分花子', 'time_slots': ['10-15']},
+        ]})
+        response = remote.get(f"/api/store-data/changes?since={cursor['remote_version']}")
+        delta = response.get_json()
+        keys = [change['key'] for change in delta['changes']]
+        print(f"差分: {response.status_code} {keys}")
+        assert response.status_code == 200
+        assert 'staff' in keys and 'shifts/2026-05-03' in keys and 'shifts/2026-06-01' not in keys
+        assert not any(key in change_log.EXCLUDED_KEYS for key in keys)
+
+        patched = local.post('/api/store-data/patch', json={
+            'changes': delta['changes'], 'expected_version': cursor['local_version']
+        })
+        print(f"反映: {patched.status_code} {patched.get_json()}")
+        assert patched.status_code == 200
+        assert synced_content(LOCAL_STORE) == synced_content(REMOTE_STORE)
+        cursor = {'remote_version': delta['version'], 'local_version': patched.get_json()['version']}
+
+        # 変更がなければ空の差分
+        empty = remote.get(f"/api/store-data/changes?since={cursor['remote_version']}").get_json()
+        assert empty['changes'] == []
+
+        # ローカル側が前回の同期後に変更されていれば 409
+        local.post('/api/staff', json={'name': 'ローカル', 'type': 'アルバイト'})
+        conflict = local.post('/api/store-data/patch', json={'changes': [], 'expected_version': cursor['local_version']})
+        assert conflict.status_code == 409
+
+        # 変更ログから外れた古いカーソル・未来のカーソルは 410
+        change_log.CHANGE_LOG_MAX_ENTRIES = 1
+        remote.post('/api/staff', json={'name': '差分次郎', 'type': 'アルバイト'})
+        remote.post('/api/staff', json={'name': '差分三郎', 'type': 'アルバイト'})
+        gone = remote.get(f"/api/store-data/changes?since={cursor['remote_version']}")
+        print(f"古いカーソル: {gone.status_code} {gone.get_json()}")
+        assert gone.status_code == 410
+        future = remote.get(f"/api/store-data/changes?since={gone.get_json()['version'] + 1}")
+        assert future.status_code == 410
+        assert remote.get('/api/store-data/changes').status_code == 400
+    finally:
+        change_log.CHANGE_LOG_MAX_ENTRIES = original_max_entries
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_reset_and_touched():
+    """ログを作り直した場合は同じバージョンのカーソルでも 410、touched 指定でも全体計算と同じダイジェスト"""
+    print("\n" + "=" * 50)
+    print("テスト3: ログの作り直しと部分的な再計算")
+    print("=" * 50)
+
+    cleanup()
+    remote = app.test_client()
+    try:
+        login(remote, REMOTE_STORE)
+        remote.post('/api/staff', json={'name': '部分太郎', 'type': 'アルバイト'})
+        remote.patch('/api/shifts/batch', json={'operations': [
+            {'date': '2026-05-01', 'staff': '部分太郎', 'time_slots': ['10-15']},
+            {'date': '2026-05-02', 'staff': '部分太郎', 'time_slots': ['17-23']},
+        ]})
+        remote.post('/api/requirements', json={'date': '2026-05-01', 'time_slot': '10-15', 'count': 2})
+        remote.post('/api/update-shift', json={'staff_name': '部分太郎', 'date': '2026-05-02', 'shifts': []})
+        remote.post('/api/delete-generated-shift', json={'staff_name': '部分太郎', 'date': '2026-05-01'})
+
+        data_file = get_store_data_file(REMOTE_STORE)
+        log = read_json_file(change_log.changes_file_path(data_file))
+        with app.test_request_context():
+            data = load_data(REMOTE_STORE)
+        assert log['digests'] == change_log.chunk_digests(data)
+        assert log['entries'][-1]['keys'] == ['shifts/2026-05-01']
+        assert log['entries'][-2]['keys'] == ['manual_generated_shifts/2026-05-02']
+        assert 'shifts/2026-05-01' not in log['digests']
+
+        # 同じバージョンから2回保存された（2回目の直前の状態が分からない）
+        version = data['version']
+        first = dict(data, shifts={'2026-05-02': {'部分太郎': ['10-15']}})
+        second = dict(data, shifts={'2026-05-03': {'部分太郎': ['17-23']}})
+        with app.test_request_context():
+            save_data(first, REMOTE_STORE)
+            change_log._log_cache.clear()
+            with open(change_log.changes_file_path(data_file), 'w') as f:
+                f.write('{}')
+            save_data(second, REMOTE_STORE)
+        assert first['version'] == second['version'] == version + 1
+
+        # 1回目の保存時点のカーソルは差分を受け取れない（空の差分で取りこぼさない）
+        gone = remote.get(f"/api/store-data/changes?since={version + 1}")
+        print(f"作り直す前のカーソル: {gone.status_code} {gone.get_json()}")
+        assert gone.status_code == 410
+        assert remote.get(f"/api/store-data/changes?since={version}").status_code == 410
+
+        # 作り直した後の保存からは差分を返す
+        remote.post('/api/requirements', json={'date': '2026-05-04', 'time_slot': '10-15', 'count': 1})
+        delta = remote.get(f"/api/store-data/changes?since={version + 2}").get_json()
+        assert delta['changes'] == []
+        remote.post('/api/requirements', json={'date': '2026-05-05', 'time_slot': '10-15', 'count': 1})
+        delta = remote.get(f"/api/store-data/changes?since={version + 2}").get_json()
+        assert [change['key'] for change in delta['changes']] == ['requirements/2026-05-05']
+    finally:
+        cleanup()
+
+    print("\n✅ テスト3: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_chunk_diff()
+        test_delta_sync()
+        test_reset_and_touched()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+レスポンス圧縮（compression）のテスト
+"""
+
+import gzip
+import json
+import os
+import sys
+
+from flask import Flask, Response, jsonify
+
+import compression
+from app import app, get_store_files
+
+TEST_STORE = 'test_compression'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def make_test_app():
+    """圧縮だけを登録した小さなアプリ"""
+    test_app = Flask(__name__)
+    compression.init_app(test_app)
+
+    @test_app.route('/large')
+    def large():
+        return jsonify({'rows': [['10-15', '17-23'] for _ in range(500)]})
+
+    @test_app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @test_app.route('/stream')
+    def stream():
+        def generate():
+            for i in range(200):
+                yield json.dumps({'line': i, 'slots': ['10-15', '17-23']}) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    @test_app.route('/events')
+    def events():
+        return Response(iter(['data: {}\n\n' * 200]), mimetype='text/event-stream')
+
+    return test_app
+
+
+def test_negotiation():
+    """Accept-Encoding・サイズ・Content-Type による判定"""
+    print("=" * 50)
+    print("テスト1: 圧縮の条件")
+    print("=" * 50)
+
+    client = make_test_app().test_client()
+
+    plain = client.get('/large')
+    compressed = client.get('/large', headers={'Accept-Encoding': 'gzip, deflate'})
+    print(f"/large: {len(plain.get_data())} -> {len(compressed.get_data())} bytes")
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert int(compressed.headers['Content-Length']) == len(compressed.get_data())
+
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/large', headers={'Accept-Encoding': 'gzip;q=0'}).headers
+    assert 'Content-Encoding' not in client.get('/events', headers={'Accept-Encoding': 'gzip'}).headers
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_streaming():
+    """ストリーミングレスポンスの逐次圧縮"""
+    print("\n" + "=" * 50)
+    print("テスト2: ストリーミングの圧縮")
+    print("=" * 50)
+
+    client = make_test_app().test_client()
+    plain = client.get('/stream').get_data()
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    print(f"/stream: {len(plain)} -> {len(response.get_data())} bytes")
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.get_data()) == plain
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_conditional_get_with_encoding():
+    """圧縮した表現の ETag でも 304 になる"""
+    print("\n" + "=" * 50)
+    print("テスト3: 圧縮時の ETag")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            response = client.get('/api/shifts/2026/5', headers={'Accept-Encoding': 'gzip'})
+            etag = response.headers['ETag']
+            print(f"ETag: {etag} ({response.headers.get('Content-Encoding')})")
+            if response.headers.get('Content-Encoding') == 'gzip':
+                assert etag.endswith('-gzip"')
+            again = client.get('/api/shifts/2026/5', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+            assert again.status_code == 304
+            assert again.headers['ETag'] == etag
+    finally:
+        cleanup()
+
+    print("\n✅ テスト3: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_negotiation()
+        test_streaming()
+        test_conditional_get_with_encoding()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
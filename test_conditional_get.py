@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ETag / 条件付き GET のテスト
+"""
+
+import os
+import sys
+
+import app as app_module
+from app import app, get_store_data_file, get_store_files
+from store_json import read_json_file, write_json_file
+
+TEST_STORE = 'test_conditional_get'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_etag_round_trip():
+    """変更がなければ 304、保存後は新しい ETag"""
+    print("=" * 50)
+    print("テスト1: /api/staff と /api/shifts の ETag")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+
+            response = client.get('/api/staff')
+            etag = response.headers.get('ETag')
+            print(f"初回: {response.status_code} ETag={etag}")
+            assert response.status_code == 200 and etag
+
+            response = client.get('/api/staff', headers={'If-None-Match': etag})
+            print(f"再取得: {response.status_code}")
+            assert response.status_code == 304
+            assert response.get_data() == b''
+
+            month_response = client.get('/api/shifts/2026/5')
+            month_etag = month_response.headers.get('ETag')
+            assert month_etag and month_etag != etag  # 対象（種類・年月）ごとに異なる
+            other_month = client.get('/api/shifts/2026/6', headers={'If-None-Match': month_etag})
+            assert other_month.status_code == 200
+
+            client.post('/api/staff', json={'name': 'ETag太郎', 'type': 'アルバイト'})
+            response = client.get('/api/staff', headers={'If-None-Match': etag})
+            print(f"スタッフ追加後: {response.status_code} ETag={response.headers.get('ETag')}")
+            assert response.status_code == 200
+            assert 'ETag太郎' in response.get_json()
+            assert client.get('/api/shifts/2026/5', headers={'If-None-Match': month_etag}).status_code == 200
+
+            # 他のツールでバージョンを変えずに書き換えた場合も、古い ETag では 304 にならない
+            etag = client.get('/api/staff').headers.get('ETag')
+            data_file = get_store_data_file(TEST_STORE)
+            data = read_json_file(data_file)
+            data['staff']['外部花子'] = {'type': 'アルバイト'}
+            write_json_file(data_file, data)
+            response = client.get('/api/staff', headers={'If-None-Match': etag})
+            print(f"外部で書き換え後: {response.status_code}")
+            assert response.status_code == 200 and '外部花子' in response.get_json()
+            assert client.get('/api/staff', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    finally:
+        cleanup()
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_bootstrap():
+    """初回表示データを1回の読み込みで返し、ETag は個別 API と一致する"""
+    print("\n" + "=" * 50)
+    print("テスト2: /api/bootstrap")
+    print("=" * 50)
+
+    cleanup()
+    original_load_data = app_module.load_data
+    load_calls = []
+
+    def counting_load_data(*args, **kwargs):
+        load_calls.append(args)
+        return original_load_data(*args, **kwargs)
+
+    try:
+        with app.test_client() as client:
+            assert client.get('/api/bootstrap').status_code == 401
+
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            client.post('/api/staff', json={'name': '初回太郎', 'type': 'アルバイト'})
+
+            app_module.load_data = counting_load_data
+            response = client.get('/api/bootstrap?year=2026&month=5')
+            app_module.load_data = original_load_data
+            payload = response.get_json()
+            print(f"管理者: {sorted(payload)} / load_data {len(load_calls)}回")
+            assert response.status_code == 200 and len(load_calls) == 1
+            assert payload['role'] == 'admin' and '初回太郎' in payload['staff']
+            assert payload['shifts']['days_in_month'] == 31
+            assert payload['generated_status']['month'] == '2026-05'
+            assert payload['shift_settings']['success']
+
+            # 返された ETag で個別 API が 304 になる
+            assert client.get('/api/staff', headers={'If-None-Match': payload['etags']['staff']}).status_code == 304
+            assert client.get('/api/shifts/2026/5', headers={'If-None-Match': payload['etags']['shifts']}).status_code == 304
+            assert client.get('/api/bootstrap?year=2026&month=13').status_code == 400
+
+            client.post('/api/logout')
+            client.post('/api/login', json={'role': 'user', 'store_code': TEST_STORE, 'staff_name': '初回太郎'})
+            payload = client.get('/api/bootstrap?year=2026&month=5').get_json()
+            print(f"スタッフ: {sorted(payload)}")
+            assert payload['role'] == 'user' and payload['staff_name'] == '初回太郎'
+            assert 'shift_settings' not in payload and 'generated_status' not in payload
+    finally:
+        app_module.load_data = original_load_data
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_etag_round_trip()
+        test_bootstrap()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
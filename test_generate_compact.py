@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+/api/generate の compact 形式のテスト
+"""
+
+import os
+import sys
+from datetime import date
+
+from app import app, get_store_files, save_data
+from shift_model import SlotIndex
+
+TEST_STORE = 'test_generate_compact'
+WEEKDAYS = ['月', '火', '水', '木', '金', '土', '日']
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def decode(payload):
+    """フロントエンドの decodeGeneratedShifts と同じ手順で通常形式に戻す"""
+    slot_index = SlotIndex(payload['slots'])
+    months = []
+    for month in payload['months']:
+        year, month_number = (int(part) for part in month['key'].split('-'))
+        width = len(month['days'])
+        staff_list = []
+        for row, (name, type_id) in enumerate(month['staff']):
+            cells = slice(row * width, (row + 1) * width)
+            staff_list.append({
+                'name': name,
+                'type': payload['types'][type_id],
+                'shifts': [slot_index.decode(mask) for mask in month['shifts'][cells]],
+                'input_shifts': [slot_index.decode(mask) for mask in month['input_shifts'][cells]],
+                'custom_shifts': [[] for _ in range(width)]
+            })
+        for row, column, slots in month['custom']:
+            staff_list[row]['custom_shifts'][column] = slots
+        for field, row, column, value in month['extras']:
+            staff_list[row]['shifts' if field == 0 else 'input_shifts'][column] = value
+        months.append({
+            'month': month['month'],
+            'dates': [{
+                'date': f"{month['key']}-{day:02d}",
+                'day': day,
+                'weekday': WEEKDAYS[date(year, month_number, day).weekday()],
+                'insufficient': day in month['insufficient']
+            } for day in month['days']],
+            'staff_list': staff_list,
+            'shift_table': []
+        })
+    return months
+
+
+def test_compact_round_trip():
+    """compact 形式を戻すと通常形式と一致する（順序違い・未定義の時間帯も含む）"""
+    print("=" * 50)
+    print("テスト1: compact 形式の往復")
+    print("=" * 50)
+
+    cleanup()
+    data = {
+        'staff': {
+            '社員A': {'type': '社員'},
+            'バイトB': {'type': 'アルバイト'},
+            'バイトC': {'type': 'アルバイト'}
+        },
+        'shifts': {
+            '2026-05-01': {'社員A': ['10-15', '17-23'], 'バイトB': ['17-23', '10-15']},
+            '2026-05-02': {'バイトB': ['謎の時間帯', '18-23'], 'バイトC': ['19-23']},
+            '2026-05-03': {'社員A': ['10-15']}
+        },
+        'custom_shifts': {'2026-05-02': {'バイトC': ['8:00-9:00']}},
+        'requirements': {},
+        'time_slots': ['10-15', '17-23', '18-23', '19-23']
+    }
+    try:
+        with app.test_request_context():
+            save_data(data, TEST_STORE)
+
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            regular = client.get('/api/generate?year=2026&month=5')
+            compact = client.get('/api/generate?year=2026&month=5&format=compact')
+            payload = compact.get_json()
+
+            print(f"通常: {len(regular.get_data())} bytes / compact: {len(compact.get_data())} bytes")
+            print(f"extras: {payload['months'][0]['extras']}")
+            assert payload['format'] == 'compact'
+            assert payload['slots'] == data['time_slots']
+            assert len(compact.get_data()) < len(regular.get_data())
+            assert payload['months'][0]['extras']  # 順序違い・未定義の時間帯はそのまま送る
+            assert decode(payload) == regular.get_json()
+
+            assert client.get('/api/generate?year=2026&month=7&format=compact').get_json() == []
+    finally:
+        cleanup()
+
+    print("\n✅ テスト1: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_compact_round_trip()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+店舗レジストリ（store_registry.py）と本部向けの店舗横断集計（/api/head-office/summary）のテスト
+"""
+
+import os
+import sys
+
+import app as app_module
+import store_registry
+import store_summary
+from app import app, get_store_data_file, get_store_files, SHIFT_DATA_DIR
+from store_json import read_json_file, write_json_file
+
+TEST_STORES = ('test_head_office_a', 'test_head_office_b')
+TOKEN = 'test-head-office-token'
+
+
+def cleanup():
+    for store_code in TEST_STORES:
+        for path in get_store_files(store_code):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def setup_store(store_code, operations):
+    client = app.test_client()
+    client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': store_code})
+    client.post('/api/staff', json={'name': '本部太郎', 'type': '社員'})
+    client.post('/api/staff', json={'name': '本部花子', 'type': 'アルバイト'})
+    client.patch('/api/shifts/batch', json={'operations': operations})
+
+
+def test_slot_hours():
+    """時間帯表記から時間を求める（重なりは1回だけ数える）"""
+    print("=" * 50)
+    print("テスト1: 時間帯の時間数")
+    print("=" * 50)
+
+    assert store_summary.slot_range('10-15') == (600, 900)
+    assert store_summary.slot_range('8:00-9:30') == (480, 570)
+    assert store_summary.slot_range('22-5') == (1320, 1740)
+    assert store_summary.slot_range('掃除') is None
+    assert store_summary.covered_hours(['10-15', '17-23']) == 11
+    assert store_summary.covered_hours(['17-23', '18-23', '掃除']) == 6
+    assert store_summary.covered_hours([]) == 0
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_registry_and_summary():
+    """保存ごとにレジストリが更新され、集計はバージョンが変わるまで本体を読まない"""
+    print("\n" + "=" * 50)
+    print("テスト2: レジストリと店舗横断集計")
+    print("=" * 50)
+
+    cleanup()
+    original = (app_module.HEAD_OFFICE_TOKEN, app_module.load_data)
+    original_describe = store_registry._describe_store
+    loads = []
+
+    def counting_load_data(store_code=None):
+        loads.append(store_code)
+        return original[1](store_code)
+
+    try:
+        registry_file = store_registry.registry_path(SHIFT_DATA_DIR)
+        store_registry.list_stores(SHIFT_DATA_DIR, 'admin123')
+        setup_store(TEST_STORES[0], [
+            {'date': '2026-05-01', 'staff': '本部太郎', 'time_slots': ['10-15']},
+            {'date': '2026-05-01', 'staff': '本部花子', 'time_slots': ['10-15', '17-23']},
+        ])
+        # 新しい店舗は保存時に追加され、登録済みの店舗の保存ではレジストリを書き換えない
+        assert TEST_STORES[0] in read_json_file(registry_file)['stores']
+        registry_mtime = os.stat(registry_file).st_mtime_ns
+        setup_store(TEST_STORES[1], [
+            {'date': '2026-05-01', 'staff': '本部太郎', 'time_slots': ['17-23']},
+            {'date': '2026-05-02', 'staff': '本部花子', 'time_slots': ['10-15'], 'custom_time_slots': ['8:00-9:00']},
+        ])
+        assert TEST_STORES[1] in read_json_file(registry_file)['stores']
+        registry_mtime = os.stat(registry_file).st_mtime_ns
+        version = read_json_file(get_store_data_file(TEST_STORES[1]))['version']
+        setup_store(TEST_STORES[1], [{'date': '2026-05-03', 'staff': '本部太郎', 'time_slots': ['10-15']}])
+        setup_store(TEST_STORES[1], [{'date': '2026-05-03', 'staff': '本部太郎', 'time_slots': []}])
+        assert read_json_file(get_store_data_file(TEST_STORES[1]))['version'] == version + 2
+        assert os.stat(registry_file).st_mtime_ns == registry_mtime
+
+        # 一覧の取得時に保存された店舗の行だけを更新する（行の作り直しはロックの外で行う）
+        described = []
+
+        def checking_describe(data_file, default_password):
+            assert not store_registry._registry_write_lock.locked()
+            described.append(os.path.basename(data_file))
+            return original_describe(data_file, default_password)
+
+        data_file = get_store_data_file(TEST_STORES[0])
+        store_registry._describe_store = checking_describe
+        entry = store_registry.list_stores(SHIFT_DATA_DIR, 'admin123')[TEST_STORES[0]]
+        store_registry._describe_store = original_describe
+        assert f'{TEST_STORES[0]}_data.json' in described
+        print(f"レジストリ: {entry}")
+        assert entry['version'] == read_json_file(data_file)['version'] and entry['staff_count'] == 2
+        assert entry['size'] == os.path.getsize(data_file)
+        assert read_json_file(registry_file)['stores'][TEST_STORES[0]] == entry
+
+        with app.test_client() as client:
+            app_module.HEAD_OFFICE_TOKEN = ''
+            assert client.get('/api/head-office/summary').status_code == 404
+            app_module.HEAD_OFFICE_TOKEN = TOKEN
+            assert client.get('/api/head-office/summary', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+            app_module.load_data = counting_load_data
+            url = f'/api/head-office/summary?from=2026-05&to=2026-05&stores={",".join(TEST_STORES)}'
+            headers = {'Authorization': f'Bearer {TOKEN}'}
+            response = client.get(url, headers=headers)
+            result = response.get_json()
+            assert response.status_code == 200, result
+            store_a, store_b = result['stores']
+            print(f"店舗A: {store_a['months']['2026-05']['requested_hours']}時間 / 合計: {result['totals']['requested_hours']}時間")
+            assert store_a['store_code'] == TEST_STORES[0] and store_a['staff_count'] == 2
+            assert store_a['months']['2026-05']['requested_hours'] == 16
+            assert store_b['months']['2026-05']['requested_hours'] == 12
+            assert store_a['months']['2026-05']['days']['2026-05-01']['requested_staff'] == 2
+            assert len(store_a['months']['2026-05']['days']) == 31
+            assert result['totals']['requested_hours'] == 28 and result['totals']['request_count'] == 4
+            assert result['totals']['days']['2026-05-01']['requested_staff'] == 3
+            assert sorted(loads) == sorted(TEST_STORES)
+
+            # 2回目はキャッシュから（本体を読まない）
+            loads.clear()
+            assert client.get(url, headers=headers).get_json() == result
+            assert loads == []
+
+            # assignments=1 で保存済みの配置状況も返す
+            detailed = client.get(url + '&assignments=1', headers=headers).get_json()
+            assert detailed['stores'][0]['months']['2026-05']['assignments']['dates'] == 1
+            assert detailed['stores'][1]['months']['2026-05']['assignments']['dates'] == 2
+            assert detailed['totals'] == result['totals']
+            loads.clear()
+
+            # 別のツールで本体が書き換えられた店舗だけを読み直す
+            data = read_json_file(data_file)
+            data['version'] += 10
+            data['shifts']['2026-05-03'] = {'本部太郎': ['10-15']}
+            write_json_file(data_file, data)
+            result = client.get(url, headers=headers).get_json()
+            assert loads == [TEST_STORES[0]]
+            assert result['stores'][0]['version'] == data['version']
+            assert result['stores'][0]['months']['2026-05']['requested_hours'] == 21
+
+            assert client.get('/api/head-office/summary?from=2025-01&to=2026-05', headers=headers).status_code == 400
+            assert client.get('/api/head-office/summary?from=2026-13', headers=headers).status_code == 400
+
+        # 削除された店舗は一覧から外れる
+        cleanup()
+        stores = store_registry.list_stores(SHIFT_DATA_DIR, 'admin123')
+        assert not any(code in stores for code in TEST_STORES)
+    finally:
+        app_module.HEAD_OFFICE_TOKEN, app_module.load_data = original
+        store_registry._describe_store = original_describe
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_slot_hours()
+        test_registry_and_summary()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
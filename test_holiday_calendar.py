@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+祝日カレンダー（holiday_calendar）のテスト
+"""
+
+import sys
+from datetime import date
+
+import holiday_calendar
+from app import get_required_staff
+
+
+def test_holidays_by_rule():
+    """規則による祝日計算（振替休日・国民の休日を含む）"""
+    print("=" * 50)
+    print("テスト1: 祝日の計算")
+    print("=" * 50)
+
+    holidays_2026 = holiday_calendar.get_holidays(2026)
+    for day, name in holidays_2026.items():
+        print(f"  {day}: {name}")
+    assert holidays_2026[date(2026, 1, 12)] == '成人の日'
+    assert holidays_2026[date(2026, 3, 20)] == '春分の日'
+    assert holidays_2026[date(2026, 5, 6)] == '振替休日'
+    assert holidays_2026[date(2026, 9, 22)] == '国民の休日'
+    assert holidays_2026[date(2026, 9, 23)] == '秋分の日'
+
+    # 手書きリストが終わっていた 2028 年以降も計算できる
+    holidays_2028 = holiday_calendar.get_holidays(2028)
+    assert holidays_2028[date(2028, 1, 10)] == '成人の日'
+    assert holidays_2028[date(2028, 9, 22)] == '秋分の日'
+    assert holiday_calendar.get_holidays(2020)[date(2020, 7, 24)] == 'スポーツの日'
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_day_table():
+    """日種別テーブル（1日1バイト）"""
+    print("\n" + "=" * 50)
+    print("テスト2: 日種別テーブル")
+    print("=" * 50)
+
+    table = holiday_calendar.day_table(2028)
+    print(f"2028年のテーブル長: {len(table)}")
+    assert len(table) == 366
+    assert holiday_calendar.day_type_name(date(2028, 1, 9)) == 'day_before_holiday'  # 成人の日の前日（日曜）
+    assert holiday_calendar.day_type_name(date(2028, 1, 10)) == 'holiday'
+    assert holiday_calendar.is_holiday(date(2028, 2, 11))  # 金曜の祝日
+    assert holiday_calendar.day_type_name(date(2028, 2, 11)) == 'friday'
+    assert holiday_calendar.day_type_name(date(2027, 12, 31)) == 'day_before_holiday'  # 翌年の元日の前日
+    assert holiday_calendar.day_type_name(date(2028, 3, 1), closed_days={'2028-03-01'}) == 'closed'
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_closed_days():
+    """店舗の休業日は必要人数0"""
+    print("\n" + "=" * 50)
+    print("テスト3: 休業日の必要人数")
+    print("=" * 50)
+
+    settings = {
+        'mode': 'weekday_weekend',
+        'weekday_weekend': {
+            'weekday': {'10-15': {'社員': 1, 'アルバイト': 1}},
+            'weekend': {'10-15': {'社員': 2, 'アルバイト': 2}}
+        },
+        'closed_days': ['2028-03-01']
+    }
+    assert get_required_staff('2028-03-01', '10-15', '社員', settings) == 0
+    assert get_required_staff('2028-03-02', '10-15', '社員', settings) == 1
+
+    print("\n✅ テスト3: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_holidays_by_rule()
+        test_day_table()
+        test_closed_days()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+月ごとの配置状況の集計（month_summary.py・/api/month-summary）のテスト
+"""
+
+import os
+import sys
+
+import app as app_module
+import month_summary
+from app import app, get_store_data_file, get_store_files
+from store_json import read_json_file
+
+TEST_STORE = 'test_month_summary'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_changed_months():
+    """変更ログのチャンクキーから影響する月を求める"""
+    print("=" * 50)
+    print("テスト1: 影響する月")
+    print("=" * 50)
+
+    assert month_summary.changed_months([]) == set()
+    assert month_summary.changed_months([
+        'shifts/2026-05-01', 'custom_shifts/2026-05-31', 'confirmed_generated_shifts/2026-06'
+    ]) == {'2026-05', '2026-06'}
+    assert month_summary.changed_months(['shifts/2026-05-01', 'staff']) is None
+    assert month_summary.changed_months(['shift_settings']) is None
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_materialized_summary():
+    """生成表と同じ判定で集計し、保存で変わった月だけを計算し直す"""
+    print("\n" + "=" * 50)
+    print("テスト2: 月ごとの集計の保存と無効化")
+    print("=" * 50)
+
+    cleanup()
+    original_load_data = app_module.load_data
+    loads = []
+
+    def counting_load_data(store_code=None):
+        loads.append(store_code)
+        return original_load_data(store_code)
+
+    summary_file = month_summary.summary_file_path(get_store_data_file(TEST_STORE))
+    try:
+        client = app.test_client()
+        client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+        client.post('/api/staff', json={'name': '集計社員', 'type': '社員'})
+        client.post('/api/staff', json={'name': '集計バイト', 'type': 'アルバイト'})
+        client.patch('/api/shifts/batch', json={'operations': [
+            {'date': '2026-05-01', 'staff': '集計社員', 'time_slots': ['10-15', '17-23']},
+            {'date': '2026-05-01', 'staff': '集計バイト', 'time_slots': ['17-23']},
+            {'date': '2026-05-02', 'staff': '集計バイト', 'time_slots': ['10-15']},
+            {'date': '2026-06-01', 'staff': '集計社員', 'time_slots': ['10-15']},
+        ]})
+
+        app_module.load_data = counting_load_data
+        response = client.get('/api/month-summary?year=2026&month=5')
+        summary = response.get_json()
+        assert response.status_code == 200, summary
+        print(f"不足日: {summary['shortage_days']} / スタッフ: {summary['staff']}")
+        assert loads == [TEST_STORE]
+
+        # 生成表（/api/generate）の insufficient・選択シフトと一致する
+        generated = client.get('/api/generate?year=2026&month=5&format=compact').get_json()['months'][0]
+        assert summary['dates'] == len(generated['days']) == 2
+        assert [int(date_str[-2:]) for date_str in summary['shortage_days']] == generated['insufficient']
+        regular = client.get('/api/generate?year=2026&month=5').get_json()[0]
+        for row in regular['staff_list']:
+            worked = [slots for slots in row['shifts'] if slots]
+            expected = {'days': len(worked), 'slots': sum(len(slots) for slots in worked)} if worked else None
+            assert summary['staff'].get(row['name']) == expected
+        assert summary['status'] is None
+        assert set(summary['slots']) == {'10-15', '17-23', '18-23', '19-23'}
+        assert all(
+            totals['short'] >= totals['required'] - totals['assigned'] for totals in summary['slots'].values()
+        )
+
+        # 2回目は保存済みの集計を返す（本体を読まない）。ETag が一致すれば 304
+        loads.clear()
+        again = client.get('/api/month-summary?year=2026&month=5')
+        assert again.get_json() == summary and loads == []
+        assert client.get('/api/month-summary?year=2026&month=5',
+                          headers={'If-None-Match': again.headers['ETag']}).status_code == 304
+
+        # 6月の変更では5月の集計は残り、6月は消える
+        client.get('/api/month-summary?year=2026&month=6')
+        client.patch('/api/shifts/batch', json={'operations': [
+            {'date': '2026-06-02', 'staff': '集計バイト', 'time_slots': ['17-23']},
+        ]})
+        stored = read_json_file(summary_file)
+        assert set(stored['months']) == {'2026-05'}
+        loads.clear()
+        assert client.get('/api/month-summary?year=2026&month=5').get_json()['version'] == stored['version']
+        assert loads == []
+        june = client.get('/api/month-summary?year=2026&month=6').get_json()
+        assert june['dates'] == 2 and loads == [TEST_STORE]
+
+        # 一時保存すると状態が変わる。スタッフの変更は全月を消す
+        assert client.post('/api/generated-shift/temp-save', json={'year': 2026, 'month': 5}).status_code == 200
+        assert set(read_json_file(summary_file)['months']) == {'2026-06'}
+        assert client.get('/api/month-summary?year=2026&month=5').get_json()['status'] == 'draft'
+        client.post('/api/staff', json={'name': '集計新人', 'type': 'アルバイト'})
+        assert read_json_file(summary_file)['months'] == {}
+
+        assert client.get('/api/month-summary?year=2026').status_code == 400
+        assert client.get('/api/month-summary?year=2026&month=13').status_code == 400
+    finally:
+        app_module.load_data = original_load_data
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_changed_months()
+        test_materialized_summary()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+PDF エクスポート（pdf_export.py の遅延読み込み）と起動時間ベンチマーク（bench_import.py）のテスト
+"""
+
+import os
+import re
+import sys
+
+import bench_import
+from app import app, get_store_files, save_data
+
+TEST_STORE = 'test_pdf_export'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_app_import_skips_reportlab():
+    """app の import では reportlab を読み込まない"""
+    print("=" * 50)
+    print("テスト1: reportlab の遅延読み込み")
+    print("=" * 50)
+
+    rows = bench_import.run_importtime('app')
+    total_ms = bench_import.module_total_us(rows, 'app') / 1000
+    print(f"import app: {total_ms:.1f} ms / {len(rows)} モジュール")
+    assert any(name == 'app' for name, _, _, _ in rows)
+    assert bench_import.loaded_forbidden(rows, bench_import.DEFAULT_FORBIDDEN) == []
+    assert 'pdf_export' not in bench_import.package_self_times(rows)
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_export_pdf():
+    """エクスポートは従来どおり PDF を返す（シフトがない場合も）"""
+    print("\n" + "=" * 50)
+    print("テスト2: PDF エクスポート")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_request_context():
+            save_data({'staff': {'出力花子': {'type': 'アルバイト'}}, 'shifts': {}}, TEST_STORE)
+        client = app.test_client()
+        client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+        empty = client.get('/api/export/csv')
+        assert empty.status_code == 200 and empty.mimetype == 'application/pdf'
+        assert empty.data.startswith(b'%PDF')
+
+        client.patch('/api/shifts/batch', json={'operations': [
+            {'date': '2026-05-01', 'staff': '出力花子', 'time_slots': ['10-15']},
+            {'date': '2026-06-01', 'staff': '出力花子', 'time_slots': ['17-23']},
+        ]})
+        response = client.get('/api/export/csv')
+        print(f"PDF: {len(empty.data)} bytes（空） / {len(response.data)} bytes（2か月）")
+        assert response.status_code == 200 and response.data.startswith(b'%PDF')
+        # 1か月1ページ
+        assert len(re.findall(rb'/Type /Page[^s]', response.data)) == 2
+    finally:
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_app_import_skips_reportlab()
+        test_export_pdf()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
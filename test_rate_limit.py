@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ログインのレート制限（rate_limit.py）と照合結果キャッシュのテスト
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import app as app_module
+import store_meta
+from app import app, get_store_files
+from rate_limit import TokenBucketLimiter
+
+TEST_STORE = 'test_rate_limit'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def admin_login(client, password, **kwargs):
+    return client.post('/api/login', json={'role': 'admin', 'password': password, 'store_code': TEST_STORE}, **kwargs)
+
+
+def test_token_bucket():
+    """上限まで許可し、回復後は再び許可する（SQLite では別インスタンス間で共有）"""
+    print("=" * 50)
+    print("テスト1: トークンバケット")
+    print("=" * 50)
+
+    limiter = TokenBucketLimiter('test', capacity=3, refill_per_second=20)
+    results = [limiter.consume('1.2.3.4')[0] for _ in range(4)]
+    allowed, retry_after = limiter.consume('1.2.3.4')
+    print(f"連続4回: {results} / 5回目の再試行まで {retry_after:.3f}秒")
+    assert results == [True, True, True, False] and not allowed and retry_after > 0
+    assert limiter.consume('5.6.7.8')[0]  # キーごとに独立
+    assert limiter.peek('1.2.3.4')[0] is False
+    time.sleep(0.06)
+    assert limiter.consume('1.2.3.4')[0]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'rate_limits.db')
+        worker_a = TokenBucketLimiter('login', capacity=2, refill_per_second=0.01, db_path=db_path)
+        worker_b = TokenBucketLimiter('login', capacity=2, refill_per_second=0.01, db_path=db_path)
+        other = TokenBucketLimiter('other', capacity=2, refill_per_second=0.01, db_path=db_path)
+        assert worker_a.consume('store')[0] and worker_b.consume('store')[0]
+        assert not worker_a.consume('store')[0] and not worker_b.peek('store')[0]
+        assert other.consume('store')[0]  # 名前空間が異なるバケットは別
+        worker_b.reset('store')
+        assert worker_a.consume('store')[0]
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_login_throttled_before_io():
+    """上限を超えたログインはファイルを読まずに 429、成功した照合はキャッシュする"""
+    print("\n" + "=" * 50)
+    print("テスト2: ログインの制限")
+    print("=" * 50)
+
+    cleanup()
+    original = (app_module.login_ip_limiter, app_module.login_store_limiter,
+                app_module.TRUSTED_PROXY_COUNT, app_module.load_store_meta, store_meta.verify_password)
+    meta_reads = []
+    verify_calls = []
+
+    def counting_load_store_meta(store_code):
+        meta_reads.append(store_code)
+        return original[3](store_code)
+
+    def counting_verify(verifier, password):
+        verify_calls.append(password)
+        return original[4](verifier, password)
+
+    try:
+        app_module.login_store_limiter = TokenBucketLimiter('login_store', capacity=2, refill_per_second=0.001)
+        app_module.load_store_meta = counting_load_store_meta
+        store_meta.verify_password = counting_verify
+
+        with app.test_client() as client:
+            assert admin_login(client, 'admin123').status_code == 200  # 店舗を作成
+            assert admin_login(client, 'admin123').status_code == 200
+            assert verify_calls == ['admin123']
+            verify_calls.clear()
+            assert admin_login(client, 'admin123').status_code == 200
+            assert verify_calls == []  # 直前に成功した組み合わせは PBKDF2 を再計算しない
+
+            assert admin_login(client, 'wrong1').status_code == 401
+            assert admin_login(client, 'wrong2').status_code == 401
+            meta_reads.clear()
+            response = admin_login(client, 'admin123')
+            print(f"失敗2回の後: {response.status_code} Retry-After={response.headers.get('Retry-After')}")
+            assert response.status_code == 429 and int(response.headers['Retry-After']) >= 1
+            assert meta_reads == []  # ディスクを読む前に拒否
+
+            # スタッフのログインは店舗の失敗回数の影響を受けない
+            staff = client.post('/api/login', json={'role': 'user', 'store_code': TEST_STORE, 'staff_name': '誰か'})
+            assert staff.status_code == 200
+
+        # IP ごとの制限（プロキシ経由なら X-Forwarded-For の右端を使う）
+        app_module.login_ip_limiter = TokenBucketLimiter('login_ip', capacity=2, refill_per_second=0.001)
+        app_module.login_store_limiter = TokenBucketLimiter('login_store', capacity=100, refill_per_second=0.001)
+        app_module.TRUSTED_PROXY_COUNT = 1
+
+        def login_from(client, ip, password=None, spoofed='10.0.0.1'):
+            if password is None:
+                payload = {'role': 'user', 'store_code': TEST_STORE, 'staff_name': '誰か'}
+            else:
+                payload = {'role': 'admin', 'store_code': TEST_STORE, 'password': password, 'staff_name': ''}
+            return client.post('/api/login', json=payload, headers={'X-Forwarded-For': f'{spoofed}, {ip}'}).status_code
+
+        with app.test_client() as client:
+            # 成功したログインは IP の枠を消費しない（同じ回線のスタッフが何人ログインしてもよい）
+            successes = [login_from(client, '203.0.113.7') for _ in range(3)]
+            successes.append(login_from(client, '203.0.113.7', 'admin123'))
+            assert successes == [200, 200, 200, 200]
+
+            statuses = [
+                login_from(client, '203.0.113.7', password, spoofed)
+                for password, spoofed in (('wrong1', '10.0.0.1'), ('wrong2', '10.0.0.2'), ('admin123', '10.0.0.3'))
+            ]
+            other_ip = login_from(client, '198.51.100.9')
+            print(f"成功: {successes} / 同じ IP から失敗2回の後: {statuses} / 別の IP: {other_ip}")
+            assert statuses == [401, 401, 429] and other_ip == 200
+    finally:
+        (app_module.login_ip_limiter, app_module.login_store_limiter,
+         app_module.TRUSTED_PROXY_COUNT, app_module.load_store_meta, store_meta.verify_password) = original
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_token_bucket()
+        test_login_throttled_before_io()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+シフト希望の一括更新（PATCH /api/shifts/batch）のテスト
+"""
+
+import os
+import sys
+import threading
+
+from app import app, get_store_files, load_data, store_lock
+
+TEST_STORE = 'test_shift_batch'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def login(client):
+    client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+
+
+def load_store():
+    with app.test_request_context():
+        return load_data(TEST_STORE)
+
+
+def test_batch_update():
+    """複数セルをまとめて反映し、不正な操作があれば何も反映しない"""
+    print("=" * 50)
+    print("テスト1: 一括更新と検証")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            login(client)
+            client.post('/api/staff', json={'name': '一括太郎', 'type': 'アルバイト'})
+            client.post('/api/staff', json={'name': '一括花子', 'type': '社員'})
+            version = load_store()['version']
+
+            response = client.patch('/api/shifts/batch', json={'operations': [
+                {'date': '2026-05-01', 'staff': '一括太郎', 'time_slots': ['9-12']},
+                {'date': '2026-05-01', 'staff': '一括花子', 'time_slots': ['12-15'], 'custom_time_slots': ['8:00-9:00']},
+                {'date': '2026-05-02', 'staff': '一括太郎', 'time_slots': ['9-12']},
+                {'date': '2026-05-02', 'staff': '一括太郎', 'time_slots': ['15-18']},  # 後の操作が優先
+            ]})
+            result = response.get_json()
+            print(f"一括更新: {response.status_code} {result}")
+            assert response.status_code == 200 and result['applied'] == 4
+            assert result['version'] == version + 1  # 保存は1回だけ
+
+            data = load_store()
+            assert data['shifts']['2026-05-01'] == {'一括太郎': ['9-12'], '一括花子': ['12-15']}
+            assert data['custom_shifts']['2026-05-01'] == {'一括花子': ['8:00-9:00']}
+            assert data['shifts']['2026-05-02'] == {'一括太郎': ['15-18']}
+
+            response = client.patch('/api/shifts/batch', json={'operations': [
+                {'date': '2026-05-01', 'staff': '一括太郎', 'time_slots': []},
+                {'date': '2026-05-03', 'staff': '未登録', 'time_slots': ['9-12']},
+            ]})
+            print(f"不正な操作を含む: {response.status_code} {response.get_json()}")
+            assert response.status_code == 400 and response.get_json()['index'] == 1
+            assert load_store()['shifts']['2026-05-01']['一括太郎'] == ['9-12']  # 反映されていない
+
+            bad_date = client.patch('/api/shifts/batch', json={'operations': [{'date': '2026/05/01', 'staff': '一括太郎'}]})
+            assert bad_date.status_code == 400
+            assert client.patch('/api/shifts/batch', json={'operations': []}).status_code == 400
+
+            # 空の時間帯で削除
+            response = client.patch('/api/shifts/batch', json={'operations': [
+                {'date': '2026-05-01', 'staff': '一括花子', 'time_slots': [], 'custom_time_slots': []},
+            ]})
+            assert response.status_code == 200
+            data = load_store()
+            assert '一括花子' not in data['shifts']['2026-05-01']
+            assert '2026-05-01' not in data['custom_shifts']
+    finally:
+        cleanup()
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_concurrent_batches():
+    """並行した一括更新で更新が失われない"""
+    print("\n" + "=" * 50)
+    print("テスト2: 並行更新")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            login(client)
+            client.post('/api/staff', json={'name': '並行太郎', 'type': 'アルバイト'})
+
+        errors = []
+
+        def worker(day):
+            with app.test_client() as client:
+                login(client)
+                response = client.patch('/api/shifts/batch', json={'operations': [
+                    {'date': f'2026-06-{day:02d}', 'staff': '並行太郎', 'time_slots': ['9-12']}
+                ]})
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+        threads = [threading.Thread(target=worker, args=(day,)) for day in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        data = load_store()
+        saved_days = [date for date in data['shifts'] if date.startswith('2026-06')]
+        print(f"保存された日数: {len(saved_days)} / 20")
+        assert not errors
+        assert len(saved_days) == 20
+    finally:
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_concurrent_writers():
+    """必要人数・休業日・スタッフ追加・一括更新を並行して行っても更新が失われず、バージョンが重複しない"""
+    print("\n" + "=" * 50)
+    print("テスト2b: 種類の異なる更新の並行実行")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            login(client)
+            client.post('/api/staff', json={'name': '並行太郎', 'type': 'アルバイト'})
+        start_version = load_store()['version']
+
+        errors = []
+
+        def worker(day):
+            client = app.test_client()
+            login(client)
+            responses = [
+                client.post('/api/requirements', json={'date': f'2026-07-{day:02d}', 'time_slot': '10-15', 'count': day}),
+                client.post('/api/staff', json={'name': f'並行{day:02d}', 'type': 'アルバイト'}),
+                client.patch('/api/shifts/batch', json={'operations': [
+                    {'date': f'2026-07-{day:02d}', 'staff': '並行太郎', 'time_slots': ['10-15']}
+                ]}),
+            ]
+            errors.extend(response.status_code for response in responses if response.status_code != 200)
+
+        threads = [threading.Thread(target=worker, args=(day,)) for day in range(1, 11)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        data = load_store()
+        print(f"必要人数: {len(data['requirements'])} 日 / スタッフ: {len(data['staff'])} 人 / version: {data['version']}")
+        assert not errors
+        assert len(data['requirements']) == 10
+        assert len(data['staff']) == 11
+        assert len([date for date in data['shifts'] if date.startswith('2026-07')]) == 10
+        # 保存ごとに1つずつ増える（同じバージョンの異なる内容が書かれない）
+        assert data['version'] == start_version + 30
+    finally:
+        cleanup()
+
+    print("\n✅ テスト2b: 成功")
+
+
+def test_nested_store_lock():
+    """同じスレッドで store_lock が入れ子になっても止まらず、外側を抜けると他のスレッドが取得できる"""
+    print("\n" + "=" * 50)
+    print("テスト2c: store_lock の入れ子")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        steps = []
+
+        def nested():
+            with store_lock(TEST_STORE):
+                with store_lock(TEST_STORE):
+                    steps.append('inner')
+                steps.append('outer')
+
+        thread = threading.Thread(target=nested, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        print(f"入れ子: {steps}")
+        assert steps == ['inner', 'outer']
+
+        thread = threading.Thread(target=lambda: nested() or steps.append('other'), daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        assert steps[-1] == 'other'
+    finally:
+        cleanup()
+
+    print("\n✅ テスト2c: 成功")
+
+
+def test_generated_batch():
+    """生成シフト表の上書き・自由入力・削除を一括で反映し、対象日の充足状況を返す"""
+    print("\n" + "=" * 50)
+    print("テスト3: 生成シフト表の一括編集")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            login(client)
+            client.post('/api/staff', json={'name': '生成太郎', 'type': 'アルバイト'})
+            client.post('/api/staff', json={'name': '生成花子', 'type': '社員'})
+            client.patch('/api/shifts/batch', json={'operations': [
+                {'date': '2026-07-01', 'staff': '生成太郎', 'time_slots': ['10-15']},
+            ]})
+
+            response = client.post('/api/generated-shift/batch', json={'operations': [
+                {'op': 'override', 'date': '2026-07-01', 'staff_name': '生成花子', 'shifts': ['10-15']},
+                {'op': 'custom', 'date': '2026-07-02', 'staff_name': '生成花子', 'shifts': ['8:00-9:00']},
+                {'op': 'delete', 'date': '2026-07-01', 'staff_name': '生成太郎'},
+            ]})
+            result = response.get_json()
+            print(f"一括編集: {response.status_code} applied={result.get('applied')} 対象日={sorted(result.get('coverage', {}))}")
+            assert response.status_code == 200 and result['applied'] == 3
+            assert sorted(result['coverage']) == ['2026-07-01', '2026-07-02']
+
+            morning = next(row for row in result['coverage']['2026-07-01'] if row['time_slot'] == '10-15')
+            assert morning['assigned_by_type'] == {'社員': 1, 'アルバイト': 0}
+
+            data = load_store()
+            assert data['manual_generated_shifts']['2026-07-01'] == {'生成花子': ['10-15']}
+            assert data['custom_shifts']['2026-07-02'] == {'生成花子': ['8:00-9:00']}
+            assert '2026-07-01' not in data['shifts']
+
+            response = client.post('/api/generated-shift/batch', json={'operations': [
+                {'op': 'custom', 'date': '2026-07-02', 'staff_name': '生成花子', 'shifts': []},
+                {'op': 'swap', 'date': '2026-07-02', 'staff_name': '生成花子'},
+            ]})
+            assert response.status_code == 400 and response.get_json()['index'] == 1
+            assert load_store()['custom_shifts']['2026-07-02'] == {'生成花子': ['8:00-9:00']}
+
+            client.post('/api/logout')
+            client.post('/api/login', json={'role': 'user', 'store_code': TEST_STORE, 'staff_name': '生成太郎'})
+            response = client.post('/api/generated-shift/batch', json={'operations': [
+                {'op': 'delete', 'date': '2026-07-01', 'staff_name': '生成花子'},
+            ]})
+            assert response.status_code == 403
+    finally:
+        cleanup()
+
+    print("\n✅ テスト3: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_batch_update()
+        test_concurrent_batches()
+        test_concurrent_writers()
+        test_nested_store_lock()
+        test_generated_batch()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+シフト希望の内部表現（shift_model）のテスト
+"""
+
+import sys
+
+from shift_model import SlotIndex, ShiftRequests, count_coverage, iter_bits
+
+
+TIME_SLOTS = ['10-15', '17-23', '18-23', '19-23']
+
+
+def test_slot_index():
+    """時間帯名 ⇔ ビットマスクの変換"""
+    print("=" * 50)
+    print("テスト1: SlotIndex の変換")
+    print("=" * 50)
+
+    slot_index = SlotIndex(TIME_SLOTS)
+    mask, extras = slot_index.encode(['19-23', '10-15', '11:30-14:00'])
+    print(f"mask={mask:04b}, extras={extras}")
+    assert mask == 0b1001
+    assert extras == ['11:30-14:00']
+    assert slot_index.decode(mask) == ['10-15', '19-23']
+    assert list(iter_bits(0b1010)) == [1, 3]
+    assert slot_index.typecode == 'H'
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_round_trip():
+    """JSON 形式との相互変換（入力順・時間帯リスト外の値を保持）"""
+    print("\n" + "=" * 50)
+    print("テスト2: JSON 形式との相互変換")
+    print("=" * 50)
+
+    shifts = {
+        '2026-04-01': {'佐藤': ['10-15', '18-23'], '鈴木': ['19-23']},
+        '2026-04-02': {'鈴木': ['17-23', '22-24'], '佐藤': []},
+    }
+    model = ShiftRequests.from_json(shifts, TIME_SLOTS)
+    print(f"スタッフID: {model.staff.ids}")
+    assert model.staff.ids == {'佐藤': 0, '鈴木': 1}
+    assert list(model.dates['2026-04-02'].staff_ids) == [1, 0]
+
+    restored = model.to_json()
+    print(f"復元結果: {restored}")
+    assert restored == shifts
+    assert list(restored['2026-04-02'].keys()) == ['鈴木', '佐藤']
+
+    # time_slots の並び順でない・重複を含むリストもそのまま戻る
+    unsorted = {
+        '2026-04-03': {
+            '佐藤': ['19-23', '10-15'],
+            '鈴木': ['22-24', '18-23', '17-23', '18-23'],
+            '田中': ['10-15', '19-23'],
+        },
+    }
+    model = ShiftRequests.from_json(unsorted, TIME_SLOTS)
+    day = model.dates['2026-04-03']
+    print(f"入力順: {day.orders}")
+    assert sorted(day.orders) == [0, 1]  # 並び順どおりの行は何も持たない
+    assert list(day.positions(0, day.masks[0])) == [3, 0]
+    assert list(day.positions(1, day.masks[1])) == [2, 1]
+    assert list(day.positions(2, day.masks[2])) == [0, 3]
+    assert model.to_json() == unsorted
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_count_coverage():
+    """時間帯・種別ごとの配置人数"""
+    print("\n" + "=" * 50)
+    print("テスト3: count_coverage")
+    print("=" * 50)
+
+    slot_index = SlotIndex(TIME_SLOTS)
+    type_ids = {'社員': 0, 'アルバイト': 1}
+    staff_info = {'佐藤': {'type': '社員'}, '鈴木': {'type': 'アルバイト'}}
+    staff_map = {'佐藤': ['10-15', '10-15'], '鈴木': ['10-15', '19-23'], '未登録': ['19-23']}
+
+    counts = count_coverage(staff_map, slot_index, type_ids, staff_info)
+    print(f"counts={counts}")
+    assert counts[0] == [1, 1]  # 重複指定は1人として数える
+    assert counts[3] == [0, 2]  # 未登録スタッフはアルバイト扱い
+    assert counts[1] == [0, 0]
+
+    print("\n✅ テスト3: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_slot_index()
+        test_round_trip()
+        test_count_coverage()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+スタッフの逆引きインデックス（staff_index.py）と、削除・名前変更・個人別表示・自分のシフトのテスト
+"""
+
+import os
+import sys
+
+import app as app_module
+import staff_index
+from app import app, get_store_data_file, get_store_files, load_data
+from store_json import read_json_file, write_json_file
+
+TEST_STORE = 'test_staff_index'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def load_store():
+    with app.test_request_context():
+        return load_data(TEST_STORE)
+
+
+def setup_store(client):
+    """希望・自由入力・上書き・一時保存・確定のすべてに登録がある店舗を作る"""
+    client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+    client.post('/api/staff', json={'name': '索引太郎', 'type': 'アルバイト'})
+    client.post('/api/staff', json={'name': '索引花子', 'type': '社員'})
+    client.patch('/api/shifts/batch', json={'operations': [
+        {'date': '2026-05-01', 'staff': '索引太郎', 'time_slots': ['10-15'], 'custom_time_slots': ['8:00-9:00']},
+        {'date': '2026-05-02', 'staff': '索引太郎', 'time_slots': ['17-23']},
+        {'date': '2026-05-02', 'staff': '索引花子', 'time_slots': ['10-15']},
+        {'date': '2026-06-01', 'staff': '索引太郎', 'time_slots': ['10-15']},
+    ]})
+    client.post('/api/generated-shift/temp-save', json={'year': 2026, 'month': 5})
+    client.post('/api/generated-shift/confirm', json={'year': 2026, 'month': 5})
+    client.post('/api/generated-shift/batch', json={'operations': [
+        {'op': 'override', 'date': '2026-05-03', 'staff_name': '索引太郎', 'shifts': ['17-23']},
+    ]})
+
+
+def test_index_maintained():
+    """各更新でインデックスが全件走査の結果と一致し、保存される"""
+    print("=" * 50)
+    print("テスト1: インデックスの保守と個人別表示")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            setup_store(client)
+            data = load_store()
+            entries = data['staff_index']['staff']
+            print(f"索引太郎: {entries['索引太郎']}")
+            assert entries == staff_index.build_staff_index(data)['staff']
+            assert set(entries['索引太郎']) == set(staff_index.INDEXED_SECTIONS)
+            assert entries['索引太郎']['shifts'] == ['2026-05-01', '2026-05-02', '2026-06-01']
+
+            # 保存ファイルにも同じ版で記録されている
+            stored = read_json_file(get_store_data_file(TEST_STORE))
+            assert stored['staff_index']['version'] == stored['version']
+
+            response = client.get('/api/staff/索引太郎/shifts?from=2026-05-01&to=2026-05-31')
+            result = response.get_json()
+            print(f"個人別: {response.status_code} {sorted(result['shifts'])}")
+            assert response.status_code == 200
+            assert sorted(result['shifts']) == ['2026-05-01', '2026-05-02', '2026-05-03']
+            first_day = result['shifts']['2026-05-01']
+            assert first_day['shifts'] == ['10-15'] and first_day['custom_shifts'] == ['8:00-9:00']
+            assert 'confirmed_generated_shifts' in first_day
+            assert result['shifts']['2026-05-03']['manual_generated_shifts'] == ['17-23']
+
+            assert client.get('/api/staff/索引太郎/shifts?from=2026-05-31&to=2026-05-01').status_code == 400
+            assert client.get('/api/staff/未登録/shifts').status_code == 404
+    finally:
+        cleanup()
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_delete_and_rename():
+    """削除・名前変更が全シフト（一時保存・確定を含む）に反映される"""
+    print("\n" + "=" * 50)
+    print("テスト2: 削除と名前変更")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            setup_store(client)
+
+            response = client.post('/api/staff/索引太郎/rename', json={'new_name': '索引次郎'})
+            result = response.get_json()
+            print(f"名前変更: {response.status_code} renamed={result.get('renamed')}")
+            assert response.status_code == 200 and result['renamed'] > 0
+            assert list(result['staff']) == ['索引次郎', '索引花子']  # 並び順を保つ
+
+            data = load_store()
+            for section in staff_index.INDEXED_SECTIONS:
+                for date_str, staff_map in staff_index.iter_section_days(data, section):
+                    assert '索引太郎' not in staff_map, (section, date_str)
+            assert data['custom_shifts']['2026-05-01'] == {'索引次郎': ['8:00-9:00']}
+            assert '索引次郎' in data['confirmed_generated_shifts']['2026-05']['shifts']['2026-05-01']
+            assert data['staff_index']['staff'] == staff_index.build_staff_index(data)['staff']
+
+            assert client.post('/api/staff/索引次郎/rename', json={'new_name': '索引花子'}).status_code == 400
+            assert client.post('/api/staff/索引次郎/rename', json={'new_name': ' '}).status_code == 400
+            assert client.post('/api/staff/未登録/rename', json={'new_name': '誰か'}).status_code == 404
+
+            response = client.delete('/api/staff/索引次郎')
+            assert response.status_code == 200
+            data = load_store()
+            for section in staff_index.INDEXED_SECTIONS:
+                for date_str, staff_map in staff_index.iter_section_days(data, section):
+                    assert '索引次郎' not in staff_map, (section, date_str)
+            assert '2026-06-01' not in data['shifts']  # 空になった日は消える
+            assert data['custom_shifts'] == {}
+            assert '索引花子' in data['shifts']['2026-05-02']
+            assert list(data['staff_index']['staff']) == ['索引花子']
+            print(f"削除後: {data['staff_index']['staff']}")
+    finally:
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_rebuild_on_load():
+    """インデックスのない旧データや版の合わないデータは読み込み時に作り直す"""
+    print("\n" + "=" * 50)
+    print("テスト3: 読み込み時の再構築")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        data_file = get_store_data_file(TEST_STORE)
+        os.makedirs(os.path.dirname(data_file), exist_ok=True)
+        write_json_file(data_file, {
+            'staff': {'旧太郎': {'type': 'アルバイト'}},
+            'shifts': {'2026-05-02': {'旧太郎': ['10-15']}, '2026-05-01': {'旧太郎': ['17-23']}},
+            'requirements': {},
+        })
+        data = load_store()
+        print(f"旧データ: {data['staff_index']}")
+        assert data['staff_index']['staff'] == {'旧太郎': {'shifts': ['2026-05-01', '2026-05-02']}}
+
+        # 他のツールで書き換えられて版が合わない場合
+        stale = read_json_file(data_file)
+        stale['staff_index'] = {'schema': staff_index.STAFF_INDEX_SCHEMA, 'version': 99, 'staff': {}}
+        write_json_file(data_file, stale)
+        assert load_store()['staff_index']['staff'] == {'旧太郎': {'shifts': ['2026-05-01', '2026-05-02']}}
+    finally:
+        cleanup()
+
+    print("\n✅ テスト3: 成功")
+
+
+def test_my_shifts():
+    """スタッフ本人のシフトだけを返し、同じバージョンの間は読み込みなしで応答する"""
+    print("\n" + "=" * 50)
+    print("テスト4: /api/me/shifts")
+    print("=" * 50)
+
+    cleanup()
+    original_load_data = app_module.load_data
+    load_calls = []
+
+    def counting_load_data(*args, **kwargs):
+        load_calls.append(args)
+        return original_load_data(*args, **kwargs)
+
+    try:
+        # 管理者とスタッフの2つのセッションを使う
+        admin = app.test_client()
+        staff = app.test_client()
+        setup_store(admin)
+        assert admin.get('/api/me/shifts').status_code == 403  # 管理者は対象外
+        assert staff.get('/api/me/shifts').status_code == 401
+
+        staff.post('/api/login', json={'role': 'user', 'store_code': TEST_STORE, 'staff_name': '索引太郎'})
+        url = '/api/me/shifts?from=2026-05-01&to=2026-05-31'
+        response = staff.get(url)
+        result = response.get_json()
+        print(f"自分のシフト: {response.status_code} {result['days']}")
+        assert response.status_code == 200 and result['staff_name'] == '索引太郎'
+        assert sorted(result['days']) == ['2026-05-01', '2026-05-02']  # 5/3 は未確定の上書きのみ
+        assert result['days']['2026-05-01']['requested'] == ['10-15']
+        assert result['days']['2026-05-01']['custom'] == ['8:00-9:00']
+        assert 'confirmed' in result['days']['2026-05-01']
+        assert result['confirmed_months'] == ['2026-05']
+        etag = response.headers['ETag']
+
+        app_module.load_data = counting_load_data
+        cached = staff.get(url)
+        not_modified = staff.get(url, headers={'If-None-Match': etag})
+        app_module.load_data = original_load_data
+        print(f"2回目: {cached.status_code} / 条件付き: {not_modified.status_code} / load_data {len(load_calls)}回")
+        assert cached.get_json() == result and not_modified.status_code == 304
+        assert load_calls == []
+
+        # 他のスタッフの変更でもバージョンが変われば作り直す
+        admin.patch('/api/shifts/batch', json={'operations': [
+            {'date': '2026-05-10', 'staff': '索引太郎', 'time_slots': ['17-23']},
+        ]})
+        response = staff.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200 and '2026-05-10' in response.get_json()['days']
+        assert staff.get('/api/me/shifts?from=2026-05-99').status_code == 400
+    finally:
+        app_module.load_data = original_load_data
+        cleanup()
+
+    print("\n✅ テスト4: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_index_maintained()
+        test_delete_and_rename()
+        test_rebuild_on_load()
+        test_my_shifts()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+変更イベント（store_events / SSE）のテスト
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import app as app_module
+from app import app, get_store_files
+from store_events import EventBroker
+
+TEST_STORE = 'test_store_events'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_broker():
+    """月による絞り込みと Last-Event-ID からの再送"""
+    print("=" * 50)
+    print("テスト1: プロセス内の配信")
+    print("=" * 50)
+
+    broker = EventBroker()
+    subscription = broker.subscribe('store', '2026-05')
+    broker.publish('store', {'type': 'cells', 'month': '2026-06'})
+    broker.publish('other', {'type': 'cells', 'month': '2026-05'})
+    broker.publish('store', {'type': 'cells', 'month': '2026-05'})
+    broker.publish('store', {'type': 'reload', 'month': None})
+
+    received = [subscription.get(timeout=0.1) for _ in range(3)]
+    print(f"受信: {received}")
+    assert [event['type'] for _, event in received[:2]] == ['cells', 'reload']
+    assert received[2] is None
+    subscription.close()
+    assert broker.subscriber_count('store') == 0
+
+    # 再接続時は Last-Event-ID より後のイベントを再送
+    first_id = received[0][0]
+    resumed = broker.subscribe('store', '2026-05', last_event_id=first_id - 1)
+    assert resumed.get(timeout=0.1)[0] == first_id
+    assert resumed.get(timeout=0.1)[1]['type'] == 'reload'
+    resumed.close()
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_sqlite_fan_out():
+    """SQLite 経由で別のブローカー（別ワーカー想定）に届く"""
+    print("\n" + "=" * 50)
+    print("テスト2: SQLite によるワーカー間の配信")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'events.db')
+        worker_a = EventBroker(db_path)
+        worker_b = EventBroker(db_path)
+
+        subscription = worker_b.subscribe('store', '2026-05')
+        worker_a.publish('store', {'type': 'confirmed', 'month': '2026-05'})
+        record = subscription.get(timeout=3)
+        print(f"別ワーカーで受信: {record}")
+        assert record is not None and record[1]['type'] == 'confirmed'
+
+        resumed = worker_b.subscribe('store', '2026-05', last_event_id=record[0] - 1)
+        assert resumed.get(timeout=1)[0] == record[0]
+        subscription.close()
+        resumed.close()
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_event_stream():
+    """シフト希望の更新が SSE で届く"""
+    print("\n" + "=" * 50)
+    print("テスト3: /api/events")
+    print("=" * 50)
+
+    cleanup()
+    original = (app_module.SSE_MAX_SECONDS, app_module.SSE_HEARTBEAT_SECONDS)
+    app_module.SSE_MAX_SECONDS = 1
+    app_module.SSE_HEARTBEAT_SECONDS = 0.3
+    try:
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            client.post('/api/staff', json={'name': 'イベント太郎', 'type': 'アルバイト'})
+
+            stream = client.get('/api/events/2026/5', buffered=False)
+            assert stream.mimetype == 'text/event-stream'
+
+            client.patch('/api/shifts/batch', json={'operations': [
+                {'date': '2026-05-01', 'staff': 'イベント太郎', 'time_slots': ['10-15']},
+                {'date': '2026-06-01', 'staff': 'イベント太郎', 'time_slots': ['10-15']},
+            ]})
+
+            body = b''.join(stream.response).decode('utf-8')
+            stream.close()
+            events = [json.loads(line[len('data: '):]) for line in body.splitlines() if line.startswith('data: ')]
+            print(f"受信イベント: {events}")
+            assert body.startswith('retry: ')
+            assert ': ping' in body
+            assert len(events) == 1  # 6月分は届かない
+            assert events[0]['type'] == 'cells'
+            assert events[0]['cells'] == [['2026-05-01', 'イベント太郎', ['10-15'], []]]
+
+        with app.test_client() as client:
+            assert client.get('/api/events/2026/5').status_code == 401
+    finally:
+        app_module.SSE_MAX_SECONDS, app_module.SSE_HEARTBEAT_SECONDS = original
+        cleanup()
+
+    print("\n✅ テスト3: 成功")
+
+
+def test_stream_limit():
+    """同時接続数の上限を超えた接続は 503 で断り、閉じた接続の枠は再利用される"""
+    print("\n" + "=" * 50)
+    print("テスト4: 同時接続数の上限")
+    print("=" * 50)
+
+    cleanup()
+    original = app_module.SSE_MAX_STREAMS
+    app_module.SSE_MAX_STREAMS = 2
+    try:
+        client = app.test_client()
+        client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+
+        streams = [client.get('/api/events/2026/5', buffered=False) for _ in range(2)]
+        assert all(stream.status_code == 200 for stream in streams)
+        busy = client.get('/api/events/2026/5')
+        print(f"上限超過: {busy.status_code} Retry-After={busy.headers.get('Retry-After')}")
+        assert busy.status_code == 503
+        assert busy.headers['Retry-After'] == str(app_module.SSE_BUSY_RETRY_SECONDS)
+        # 接続中も通常のリクエストは処理できる
+        assert client.get('/api/ready').status_code == 200
+
+        # 配信を読み始める前に閉じた接続も枠を返す
+        streams[0].close()
+        reopened = client.get('/api/events/2026/5', buffered=False)
+        assert reopened.status_code == 200
+        reopened.close()
+        streams[1].close()
+        assert app_module.sse_streams == 0
+    finally:
+        app_module.SSE_MAX_STREAMS = original
+        cleanup()
+
+    print("\n✅ テスト4: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_broker()
+        test_sqlite_fan_out()
+        test_event_stream()
+        test_stream_limit()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+店舗データのインポート（store_import.py・/api/store-data/import）のテスト
+"""
+
+import gzip
+import json
+import os
+import sys
+
+import app as app_module
+from app import app, get_store_files, load_data
+
+TEST_STORE = 'test_store_import'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def load_store():
+    with app.test_request_context():
+        return load_data(TEST_STORE)
+
+
+def to_jsonl(records):
+    return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+
+
+def post_jsonl(client, records, query='', compress=False):
+    body = to_jsonl(records)
+    headers = {}
+    if compress:
+        body = gzip.compress(body)
+        headers['Content-Encoding'] = 'gzip'
+    return client.post(f'/api/store-data/import{query}', data=body,
+                       content_type='application/x-ndjson', headers=headers)
+
+
+BASE_RECORDS = [
+    {'format': 'shift-tool-store', 'schema': 1, 'store_code': 'other'},
+    {'key': 'staff', 'value': {'取込太郎': {'type': 'アルバイト'}, '取込花子': {'type': '社員'}}},
+    {'key': 'time_slots', 'value': ['10-15', '17-23']},
+    {'key': 'shifts/2026-05-01', 'value': {'取込太郎': ['10-15']}},
+    {'key': 'shifts/2026-06-01', 'value': {'取込花子': ['17-23']}},
+    {'key': 'requirements/2026-05-01', 'value': {'10-15': 2}},
+    {'key': 'confirmed_generated_shifts/2026-05', 'value': {
+        'confirmed_at': '2026-04-25T10:00:00', 'shifts': {'2026-05-01': {'取込太郎': ['10-15']}}
+    }},
+]
+
+
+def test_jsonl_import():
+    """JSON Lines（gzip）を1行ずつ検証し、1回の保存で取り込む"""
+    print("=" * 50)
+    print("テスト1: JSON Lines のインポート")
+    print("=" * 50)
+
+    cleanup()
+    original_save_data = app_module.save_data
+    saves = []
+
+    def counting_save_data(data, store_code=None):
+        saves.append(data.get('version'))
+        return original_save_data(data, store_code)
+
+    try:
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            version_before = load_store().get('version', 0)
+            app_module.save_data = counting_save_data
+
+            response = post_jsonl(client, BASE_RECORDS, compress=True)
+            result = response.get_json()
+            print(f"インポート: {response.status_code} {result}")
+            assert response.status_code == 200 and result['success']
+            assert len(saves) == 1 and result['version'] == version_before + 1
+            assert result['warnings'] == []
+
+            data = load_store()
+            assert list(data['staff']) == ['取込太郎', '取込花子']
+            assert data['shifts'] == {'2026-05-01': {'取込太郎': ['10-15']}, '2026-06-01': {'取込花子': ['17-23']}}
+            assert data['custom_shifts'] == {} and data['requirements'] == {'2026-05-01': {'10-15': 2}}
+            assert data['admin_password'] == 'admin123'
+            assert data['staff_index']['staff']['取込花子']['shifts'] == ['2026-06-01']
+
+            # 1行でも不正なら行番号付きで 400、データは変わらない
+            saves.clear()
+            invalid_cases = [
+                (BASE_RECORDS + [{'key': 'shifts/2026-02-30', 'value': {}}], 8),
+                (BASE_RECORDS + [{'key': 'requirements/2026-05-02', 'value': {'10-15': -1}}], 8),
+                (BASE_RECORDS[:3] + [{'key': 'confirmed_generated_shifts/2026-05', 'value': {
+                    'shifts': {'2026-06-01': {'取込太郎': ['10-15']}}}}], 4),
+                (BASE_RECORDS[:2] + [{'key': 'shifts/2026-05-01', 'value': {'取込太郎': '10-15'}}], 3),
+                (BASE_RECORDS[:2] + [{'key': 'staff_index/x', 'value': {}}, {'key': 'unknown/x', 'value': 1}], 4),
+            ]
+            for records, line in invalid_cases:
+                response = post_jsonl(client, records)
+                print(f"不正なデータ: {response.status_code} {response.get_json()['error']}")
+                assert response.status_code == 400 and response.get_json()['line'] == line
+            response = client.post('/api/store-data/import', data=b'{"key": "staff", "value": {}}\n{broken',
+                                   content_type='application/x-ndjson')
+            assert response.status_code == 400 and response.get_json()['line'] == 2
+            assert saves == [] and load_store()['version'] == version_before + 1
+
+            # 時間帯一覧にない時間帯は警告のみ
+            response = post_jsonl(client, BASE_RECORDS + [{'key': 'shifts/2026-05-02', 'value': {'取込太郎': ['9-12']}}])
+            assert response.status_code == 200
+            assert response.get_json()['warnings'] == ['時間帯一覧にない時間帯があります: 9-12']
+    finally:
+        app_module.save_data = original_save_data
+        cleanup()
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_merge_by_month():
+    """merge=month では含まれる月だけを置き換え、従来の JSON 形式も同じ検証を通る"""
+    print("\n" + "=" * 50)
+    print("テスト2: 月単位のマージ")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            assert post_jsonl(client, BASE_RECORDS).status_code == 200
+
+            response = post_jsonl(client, [
+                {'key': 'staff', 'value': {'取込次郎': {'type': 'アルバイト'}}},
+                {'key': 'shifts/2026-05-02', 'value': {'取込次郎': ['17-23']}},
+            ], query='?merge=month')
+            result = response.get_json()
+            print(f"マージ: {response.status_code} {result}")
+            assert response.status_code == 200 and result['months'] == ['2026-05']
+
+            data = load_store()
+            assert list(data['staff']) == ['取込太郎', '取込花子', '取込次郎']
+            # 5月は置き換え、6月はそのまま
+            assert data['shifts'] == {'2026-05-02': {'取込次郎': ['17-23']}, '2026-06-01': {'取込花子': ['17-23']}}
+            assert data['requirements'] == {}
+            assert data['confirmed_generated_shifts'] == {}
+            assert data['time_slots'] == ['10-15', '17-23']
+
+            # 従来の JSON 形式
+            exported = client.get('/api/store-data/export').get_json()['data']
+            exported['shifts']['2026-07-01'] = {'取込次郎': ['10-15']}
+            response = client.post('/api/store-data/import', json={'data': exported})
+            assert response.status_code == 200
+            assert load_store()['shifts']['2026-07-01'] == {'取込次郎': ['10-15']}
+
+            exported['shifts']['07/01'] = {}
+            response = client.post('/api/store-data/import', json={'data': exported})
+            assert response.status_code == 400
+            response = client.post('/api/store-data/import', json={'data': {'staff': {}}})
+            assert response.status_code == 400 and '必須キー' in response.get_json()['error']
+            assert post_jsonl(client, BASE_RECORDS, query='?merge=year').status_code == 400
+    finally:
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_jsonl_export_round_trip():
+    """JSON Lines のエクスポートをストリーミング・gzip で返し、そのままインポートできる"""
+    print("\n" + "=" * 50)
+    print("テスト3: エクスポートとの往復")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            assert post_jsonl(client, BASE_RECORDS).status_code == 200
+            before = load_store()
+
+            response = client.get('/api/store-data/export?format=jsonl', headers={'Accept-Encoding': 'gzip'})
+            print(f"エクスポート: {response.status_code} {response.mimetype} {response.headers.get('Content-Encoding')}")
+            assert response.status_code == 200 and response.is_streamed
+            assert response.mimetype == 'application/x-ndjson' and response.headers['Content-Encoding'] == 'gzip'
+            body = response.get_data()
+            lines = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+            assert lines[0]['format'] == 'shift-tool-store' and lines[0]['version'] == before['version']
+            keys = [line['key'] for line in lines[1:]]
+            assert 'shifts/2026-06-01' in keys and 'admin_password' not in keys and 'staff_index' not in keys
+
+            response = client.post('/api/store-data/import', data=body, content_type='application/x-ndjson',
+                                   headers={'Content-Encoding': 'gzip'})
+            assert response.status_code == 200
+            after = load_store()
+            for key in ('staff', 'shifts', 'requirements', 'confirmed_generated_shifts', 'time_slots'):
+                assert after[key] == before[key]
+
+            # 月の絞り込み（JSON Lines・従来の JSON の両方）
+            may = client.get('/api/store-data/export?format=jsonl&from=2026-05&to=2026-05').get_data()
+            keys = [json.loads(line)['key'] for line in may.splitlines()[1:]]
+            print(f"5月のみ: {keys}")
+            assert 'shifts/2026-05-01' in keys and 'shifts/2026-06-01' not in keys and 'staff' in keys
+            june = client.get('/api/store-data/export?from=2026-06').get_json()['data']
+            assert list(june['shifts']) == ['2026-06-01'] and june['confirmed_generated_shifts'] == {}
+            assert client.get('/api/store-data/export?from=2026-13').status_code == 400
+            assert client.get('/api/store-data/export?from=2026-06&to=2026-05').status_code == 400
+    finally:
+        cleanup()
+
+    print("\n✅ テスト3: 成功")
+
+
+def test_partial_export_import():
+    """月を絞ったエクスポートは月単位のマージで取り込み、範囲外の月を消さない"""
+    print("\n" + "=" * 50)
+    print("テスト4: 月を絞ったエクスポートのインポート")
+    print("=" * 50)
+
+    cleanup()
+    try:
+        with app.test_client() as client:
+            client.post('/api/login', json={'role': 'admin', 'password': 'admin123', 'store_code': TEST_STORE})
+            assert post_jsonl(client, BASE_RECORDS).status_code == 200
+
+            # 従来の JSON 形式は範囲の有無で同じキーを返し、パスワード・バージョン・索引を含めない
+            full = client.get('/api/store-data/export').get_json()
+            may = client.get('/api/store-data/export?from=2026-05&to=2026-05').get_json()
+            assert (full['from'], full['to']) == (None, None) and (may['from'], may['to']) == ('2026-05', '2026-05')
+            assert sorted(full['data']) == sorted(may['data'])
+            assert not any(key in full['data'] for key in ('admin_password', 'version', 'staff_index'))
+
+            # 5月だけのエクスポート（エクスポート元では 5月の必要人数を削除済み）を merge なしで取り込む
+            lines = client.get('/api/store-data/export?format=jsonl&from=2026-05&to=2026-05').get_data().splitlines()
+            records = [json.loads(line) for line in lines if not line.startswith(b'{"key":"requirements/')]
+            response = post_jsonl(client, records)
+            result = response.get_json()
+            print(f"5月のみ: {response.status_code} {result.get('months')}")
+            assert response.status_code == 200 and result['months'] == ['2026-05']
+            data = load_store()
+            assert data['shifts'] == {'2026-05-01': {'取込太郎': ['10-15']}, '2026-06-01': {'取込花子': ['17-23']}}
+            assert data['requirements'] == {}
+
+            # 従来の JSON 形式も from / to があれば月単位のマージ
+            may['data']['shifts'] = {'2026-05-02': {'取込花子': ['10-15']}}
+            response = client.post('/api/store-data/import', json=may)
+            assert response.status_code == 200 and response.get_json()['months'] == ['2026-05']
+            assert load_store()['shifts'] == {'2026-05-02': {'取込花子': ['10-15']}, '2026-06-01': {'取込花子': ['17-23']}}
+
+            assert post_jsonl(client, records, query='?merge=year').status_code == 400
+            records[0]['from'] = '2026/05'
+            response = post_jsonl(client, records)
+            assert response.status_code == 400 and response.get_json()['line'] == 1
+            assert client.post('/api/store-data/import', json=dict(may, to='2026-04')).status_code == 400
+    finally:
+        cleanup()
+
+    print("\n✅ テスト4: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_jsonl_import()
+        test_merge_by_month()
+        test_jsonl_export_round_trip()
+        test_partial_export_import()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+店舗メタデータ（<store>_meta.json）のテスト
+"""
+
+import os
+import sys
+
+import app as app_module
+import store_meta
+from app import app, get_store_data_file, get_store_files
+from store_json import read_json_file, write_json_file
+
+TEST_STORE = 'test_store_meta'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def login(client, password='admin123'):
+    return client.post('/api/login', json={'role': 'admin', 'password': password, 'store_code': TEST_STORE})
+
+
+def test_login_reads_header_only():
+    """ログイン・認証確認・スタッフ情報は本体を読まずにメタデータだけで応答する"""
+    print("=" * 50)
+    print("テスト1: ヘッダーのみの読み込み")
+    print("=" * 50)
+
+    cleanup()
+    data_file = get_store_data_file(TEST_STORE)
+    meta_file = store_meta.meta_file_path(data_file)
+    original_read = store_meta.read_json_file
+    original_load_data = app_module.load_data
+    reads = []
+
+    def counting_read(path):
+        reads.append(os.path.basename(path))
+        return original_read(path)
+
+    def failing_load_data(*args, **kwargs):
+        raise AssertionError('load_data が呼ばれました')
+
+    try:
+        with app.test_client() as client:
+            assert login(client).status_code == 200  # 新規店舗
+            client.post('/api/staff', json={'name': 'メタ太郎', 'type': '社員'})
+
+            meta = read_json_file(meta_file)
+            print(f"メタデータ: { {key: meta[key] for key in ('version', 'mode', 'staff')} }")
+            assert meta['staff'] == {'メタ太郎': '社員'}
+            assert meta['time_slots'] and meta['password']['algorithm'] == 'pbkdf2_sha256'
+            assert 'admin123' not in open(meta_file, encoding='utf-8').read()  # 平文は保存しない
+
+            store_meta._meta_cache.clear()
+            store_meta.read_json_file = counting_read
+            app_module.load_data = failing_load_data
+
+            client.post('/api/logout')
+            assert login(client, 'wrong').status_code == 401
+            assert login(client).status_code == 200
+            client.post('/api/logout')
+            client.post('/api/login', json={'role': 'user', 'store_code': TEST_STORE, 'staff_name': 'メタ太郎'})
+            auth = client.get('/api/check-auth').get_json()
+            staff = client.get('/api/current-staff').get_json()
+            print(f"読み込んだファイル: {reads} / check-auth: {auth} / current-staff: {staff}")
+            assert reads == [os.path.basename(meta_file)]  # キャッシュが空のときのメタファイル1回のみ
+            assert auth['staff_registered'] and auth['version'] == meta['version']
+            assert staff['staff_type'] == '社員'
+    finally:
+        store_meta.read_json_file = original_read
+        app_module.load_data = original_load_data
+        cleanup()
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_meta_rebuilt_and_password_change():
+    """メタファイルがない・本体と合わない場合は作り直し、パスワード変更も反映される"""
+    print("\n" + "=" * 50)
+    print("テスト2: 作り直しとパスワード変更")
+    print("=" * 50)
+
+    cleanup()
+    data_file = get_store_data_file(TEST_STORE)
+    meta_file = store_meta.meta_file_path(data_file)
+    try:
+        # メタファイルのない旧データ
+        os.makedirs(os.path.dirname(data_file), exist_ok=True)
+        write_json_file(data_file, {'staff': {'旧花子': {'type': 'アルバイト'}}, 'shifts': {},
+                                    'requirements': {}, 'admin_password': 'oldpass'})
+        with app.test_client() as client:
+            assert login(client, 'admin123').status_code == 401
+            assert login(client, 'oldpass').status_code == 200
+            assert os.path.exists(meta_file)
+            print(f"作り直し: {read_json_file(meta_file)['staff']}")
+
+            # 他のツールで本体だけ書き換えられた場合
+            data = read_json_file(data_file)
+            data['staff']['外部次郎'] = {'type': '社員'}
+            write_json_file(data_file, data)
+            client.post('/api/logout')
+            client.post('/api/login', json={'role': 'user', 'store_code': TEST_STORE, 'staff_name': '外部次郎'})
+            assert client.get('/api/current-staff').get_json()['staff_type'] == '社員'
+
+            client.post('/api/logout')
+            login(client, 'oldpass')
+            response = client.post('/api/change-password', json={'current_password': 'oldpass', 'new_password': 'newpass'})
+            assert response.status_code == 200
+            client.post('/api/logout')
+            assert login(client, 'oldpass').status_code == 401
+            assert login(client, 'newpass').status_code == 200
+    finally:
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+def test_failed_login_cached():
+    """同じ誤ったパスワードでの再試行は PBKDF2 を計算し直さない（パスワード変更後は照合し直す）"""
+    print("\n" + "=" * 50)
+    print("テスト3: 失敗した照合のキャッシュ")
+    print("=" * 50)
+
+    meta = {'password': store_meta.make_password_verifier('secret', iterations=1000)}
+    original = store_meta.verify_password
+    calls = []
+
+    def counting_verify(verifier, password):
+        calls.append(password)
+        return original(verifier, password)
+
+    store_meta.verify_password = counting_verify
+    try:
+        for _ in range(3):
+            assert not store_meta.check_password(meta, 'wrong')
+            assert store_meta.check_password(meta, 'secret')
+        print(f"PBKDF2 の計算: {calls}")
+        assert calls == ['wrong', 'secret']
+
+        # パスワードを 'wrong' に変更すると、以前の失敗は使われない
+        changed = {'password': store_meta.make_password_verifier('wrong', iterations=1000)}
+        assert store_meta.check_password(changed, 'wrong')
+        assert not store_meta.check_password(changed, 'secret')
+        assert calls == ['wrong', 'secret', 'wrong', 'secret']
+    finally:
+        store_meta.verify_password = original
+
+    print("\n✅ テスト3: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_login_reads_header_only()
+        test_meta_rebuilt_and_password_change()
+        test_failed_login_cached()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+同期ツール（sync_render_to_local.py）の HTTP クライアントのテスト
+（keep-alive での接続の使い回し・再試行・Cookie・店舗一覧の読み込み）
+（冪等でない POST は二重に反映されないよう、処理されていないことが明らかな場合だけ再試行）
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from argparse import Namespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sync_render_to_local import ApiSession, ConnectionPool, HttpError, load_store_list
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=()):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.ports.add(self.client_address[1])
+        server.cookies.append(self.headers.get('Cookie'))
+        if self.path == '/busy':
+            server.busy_calls += 1
+            if server.busy_calls == 1:
+                self.send_json(503, {'error': 'busy'}, [('Retry-After', '0')])
+                return
+        if self.path == '/missing':
+            self.send_json(404, {'error': '見つかりません'})
+            return
+        self.send_json(200, {'success': True, 'path': self.path}, [('Set-Cookie', 'session=abc; HttpOnly; Path=/')])
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server.posts[self.path] = server.posts.get(self.path, 0) + 1
+        if server.posts[self.path] == 1:
+            # 1回目: /gateway は処理後にゲートウェイが 502 を返した想定、/limited は処理前の 429
+            if self.path in ('/gateway', '/login'):
+                self.send_json(502, {'error': 'bad gateway'}, [('Retry-After', '0')])
+                return
+            if self.path == '/limited':
+                self.send_json(429, {'error': 'too many'}, [('Retry-After', '0')])
+                return
+        self.send_json(200, {'success': True, 'calls': server.posts[self.path]})
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.ports = set()
+    server.cookies = []
+    server.busy_calls = 0
+    server.posts = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_keep_alive_and_retry():
+    """同じ接続で続けてリクエストし、503 は再試行、4xx はエラーにする"""
+    print("=" * 50)
+    print("テスト1: 接続の使い回しと再試行")
+    print("=" * 50)
+
+    server = start_stub_server()
+    pool = ConnectionPool(timeout=5)
+    try:
+        session = ApiSession(pool, f'http://127.0.0.1:{server.server_address[1]}', retries=2, backoff=0.01)
+        for _ in range(5):
+            assert session.get_json('/ping')['success']
+        assert session.get_json('/busy')['path'] == '/busy'
+        print(f"接続数: {len(server.ports)} / リクエスト {session.requests} / 再試行 {session.retried}")
+        assert len(server.ports) == 1 and pool.opened == 1
+        assert session.requests == 7 and session.retried == 1
+        assert server.cookies[0] is None and server.cookies[-1] == 'session=abc'
+        assert session.bytes_received > 0
+
+        try:
+            session.get_json('/missing')
+        except HttpError as e:
+            assert e.status == 404 and e.message == '見つかりません'
+        else:
+            raise AssertionError('404 が例外になりませんでした')
+    finally:
+        pool.close_all()
+        server.shutdown()
+        server.server_close()
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_post_retry():
+    """冪等でない POST は 502 で再送せず、429 と idempotent=True の場合だけ再試行する"""
+    print("\n" + "=" * 50)
+    print("テスト1b: POST の再試行")
+    print("=" * 50)
+
+    server = start_stub_server()
+    pool = ConnectionPool(timeout=5)
+    try:
+        session = ApiSession(pool, f'http://127.0.0.1:{server.server_address[1]}', retries=2, backoff=0.01)
+        try:
+            session.post_json('/gateway', {'changes': []})
+        except HttpError as e:
+            assert e.status == 502
+        else:
+            raise AssertionError('502 の POST が再送されました')
+
+        assert session.post_json('/limited', {})['calls'] == 2
+        assert session.post_json('/login', {}, idempotent=True)['calls'] == 2
+        print(f"POST 回数: {server.posts} / 再試行 {session.retried}")
+        assert server.posts == {'/gateway': 1, '/limited': 2, '/login': 2}
+        assert session.retried == 2
+    finally:
+        pool.close_all()
+        server.shutdown()
+        server.server_close()
+
+    print("\n✅ テスト1b: 成功")
+
+
+def test_store_list():
+    """--store-code・--stores・マニフェストをまとめ、重複を除いてパスワードを引き継ぐ"""
+    print("\n" + "=" * 50)
+    print("テスト2: 店舗一覧の読み込み")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manifest = os.path.join(tmp_dir, 'stores.json')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            json.dump(['store002', {'store_code': 'store003', 'remote_password': 'secret'}], f)
+        args = Namespace(store_code='store001', stores='store001, store002', manifest=manifest,
+                         remote_password='admin123', local_password='local')
+        stores = load_store_list(args)
+
+    print(f"店舗: {stores}")
+    assert [store['store_code'] for store in stores] == ['store001', 'store002', 'store003']
+    assert stores[2]['remote_password'] == 'secret' and stores[2]['local_password'] == 'local'
+    assert stores[0]['remote_password'] == 'admin123'
+
+    print("\n✅ テスト2: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_keep_alive_and_retry()
+        test_post_retry()
+        test_store_list()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
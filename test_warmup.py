@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+起動時のウォームアップ（warmup.py・/api/ready）のテスト
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime
+
+import app as app_module
+import month_summary
+import warmup
+from app import app, get_store_data_file, get_store_files, save_data
+from store_json import read_json_file
+
+TEST_STORE = 'test_warmup'
+
+
+def cleanup():
+    for path in get_store_files(TEST_STORE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_warmup_state():
+    """手順を順に実行し、実行中は準備未完了・失敗した手順はエラーとして記録する"""
+    print("=" * 50)
+    print("テスト1: ウォームアップの状態")
+    print("=" * 50)
+
+    state = warmup.Warmup()
+    assert state.ready and state.status()['state'] == 'idle'
+
+    release = threading.Event()
+    calls = []
+
+    def slow_step():
+        release.wait(5)
+        calls.append('slow')
+        return 'ok'
+
+    def failing_step():
+        raise RuntimeError('読み込み失敗')
+
+    thread = state.start([('slow', slow_step), ('failing', failing_step)])
+    assert not state.ready and state.status()['state'] == 'running'
+    # 2回目の start は何もしない
+    assert state.start([('slow', slow_step)]) is thread
+    release.set()
+    thread.join(5)
+
+    status = state.status()
+    print(f"状態: {status}")
+    assert status['ready'] and status['state'] == 'done'
+    assert calls == ['slow']
+    assert status['steps']['slow']['detail'] == 'ok'
+    assert status['errors'] == {'failing': '読み込み失敗'}
+
+    print("\n✅ テスト1: 成功")
+
+
+def test_app_warmup():
+    """アプリの手順（PDF・テンプレート・祝日・最近の店舗）と /api/ready"""
+    print("\n" + "=" * 50)
+    print("テスト2: アプリのウォームアップ")
+    print("=" * 50)
+
+    cleanup()
+    original = (app_module.warmup_state, warmup.WARMUP_ENABLED)
+    month_key = datetime.now().strftime('%Y-%m')
+    try:
+        with app.test_request_context():
+            save_data({
+                'staff': {'起動太郎': {'type': '社員'}},
+                'shifts': {f'{month_key}-01': {'起動太郎': ['10-15']}},
+                'time_slots': ['10-15', '17-23']
+            }, TEST_STORE)
+
+        app_module.warmup_state = warmup.Warmup()
+        client = app.test_client()
+        response = client.get('/api/ready')
+        assert response.status_code == 200 and response.get_json()['state'] == 'idle'
+
+        warmup.WARMUP_ENABLED = False
+        assert app_module.start_warmup() is None
+        warmup.WARMUP_ENABLED = True
+        app_module.start_warmup().join(30)
+
+        response = client.get('/api/ready')
+        status = response.get_json()
+        print(f"手順: { {name: step['ms'] for name, step in status['steps'].items()} }")
+        assert response.status_code == 200 and status['state'] == 'done', status
+        assert status['errors'] == {}
+        assert set(status['steps']) == {'pdf', 'templates', 'day_tables', 'stores'}
+        assert TEST_STORE in status['steps']['stores']['detail']
+        import pdf_export
+        assert pdf_export.PDF_FONT_NAME in pdf_export.pdfmetrics.getRegisteredFontNames()
+
+        # 今月の配置状況が保存されている
+        summaries = read_json_file(month_summary.summary_file_path(get_store_data_file(TEST_STORE)))
+        assert summaries['months'][month_key]['staff'] == {'起動太郎': {'days': 1, 'slots': 1}}
+
+        # 実行中は 503
+        app_module.warmup_state = warmup.Warmup()
+        app_module.warmup_state.state = 'running'
+        response = client.get('/api/ready')
+        assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+    finally:
+        app_module.warmup_state, warmup.WARMUP_ENABLED = original
+        cleanup()
+
+    print("\n✅ テスト2: 成功")
+
+
+if __name__ == '__main__':
+    try:
+        test_warmup_state()
+        test_app_warmup()
+
+        print("\n" + "=" * 50)
+        print("🎉 すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,75 @@
+"""
+ワーカー起動時のウォームアップ（最初のリクエストが遅くならないよう、よく使うものを先に読み込む）
+
+gunicorn.conf.py の post_worker_init から app.start_warmup() を呼び、バックグラウンドのスレッドで
+手順（PDF のフォント・テンプレート・祝日テーブル・最近使われた店舗など）を順に実行する。
+進み具合は /api/ready で確認できる（ワーカーごと。実行中は 503）。
+"""
+
+import os
+import threading
+import time
+
+# WARMUP_ENABLED=0 でウォームアップしない
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', '1') == '1'
+# 読み込んでおく店舗数（最近保存された順）
+WARMUP_STORES = int(os.getenv('WARMUP_STORES', '5'))
+
+
+class Warmup:
+    """ウォームアップの実行と状態（idle: 未実行 / running: 実行中 / done: 完了）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = 'idle'
+        self.started_at = None
+        self.finished_at = None
+        self.steps = {}
+        self.errors = {}
+        self.thread = None
+
+    def start(self, steps):
+        """steps = [(名前, 関数)] をバックグラウンドで実行する（プロセスごとに1回だけ）"""
+        with self._lock:
+            if self.state != 'idle':
+                return self.thread
+            self.state = 'running'
+            self.started_at = time.time()
+            self.thread = threading.Thread(target=self._run, args=(steps,), name='warmup', daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def _run(self, steps):
+        for name, step in steps:
+            began = time.perf_counter()
+            try:
+                detail = step()
+            except Exception as e:
+                # 失敗しても起動は続ける（その処理は最初のリクエストで行われる）
+                print(f"[ERROR warmup] {name} に失敗: {str(e)}")
+                self.errors[name] = str(e)
+                detail = None
+            elapsed_ms = round((time.perf_counter() - began) * 1000, 1)
+            self.steps[name] = {'ms': elapsed_ms, 'detail': detail}
+            print(f"[DEBUG warmup] {name}: {elapsed_ms}ms")
+        with self._lock:
+            self.finished_at = time.time()
+            self.state = 'done'
+
+    @property
+    def ready(self):
+        """ウォームアップ中でなければ準備完了（無効・未実行の場合も待つものはない）"""
+        return self.state != 'running'
+
+    def status(self):
+        with self._lock:
+            elapsed = None
+            if self.started_at is not None:
+                elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+            return {
+                'ready': self.ready,
+                'state': self.state,
+                'elapsed': elapsed,
+                'steps': dict(self.steps),
+                'errors': dict(self.errors),
+            }